@@ -461,4 +461,20 @@ class AIPlayer:
 
         return True, event["desired_response"], {
             "new_center_card_id": chosen_center,
-        }
\ No newline at end of file
+        }
+
+def play_ai_actions(engine, ais):
+    # Sends the AIs' actions to the engine until the game is over or none of them acts.
+    # Yields a list of (ai, action_info, handled) for every round of events the AIs acted on.
+    # Every AI has seen the round's events by then, so stopping iteration pauses the game safely.
+    while not engine.is_game_over():
+        events = engine.grab_events()
+        actions = []
+        for ai in ais:
+            ai_performing_action, action_info = ai.ai_process_events(events)
+            if ai_performing_action:
+                handled = engine.handle_game_message(ai.player_id, action_info["action_type"], action_info["action_data"])
+                actions.append((ai, action_info, handled))
+        if not actions:
+            return
+        yield actions
@@ -1,8 +1,9 @@
 from pathlib import Path
 import os
 import json
-from typing import Dict, List, Any
+import hashlib
 from copy import deepcopy
+from typing import Dict, List, Any
 import logging
 logger = logging.getLogger(__name__)
 
@@ -10,6 +11,15 @@ REQUIRED_DECK_COUNT = 50
 REQUIRED_CHEER_COUNT = 20
 MAX_ANY_CARD_COUNT = 4
 
+# Card fields holding effects that trigger at a timing.
+TIMED_EFFECT_FIELDS = [
+    "effects",
+    "gift_effects",
+    "attached_effects",
+]
+
+NO_EFFECTS = ()
+
 ALLOWED_DECK_TYPES = [
     "holomem_debut",
     "holomem_bloom",
@@ -17,9 +27,51 @@ ALLOWED_DECK_TYPES = [
     "support",
 ]
 
+def new_card_instance(template):
+    # A card for use in a game. Top level fields and lists belong to the
+    # instance, anything nested deeper (arts, effects, etc.) is shared with the template.
+    return {key: value.copy() if isinstance(value, list) else value for key, value in template.items()}
+
+def find_containers(value):
+    # Every dict and list in a card definition, including the card itself.
+    if isinstance(value, dict):
+        yield value
+        for field_value in value.values():
+            yield from find_containers(field_value)
+    elif isinstance(value, list):
+        yield value
+        for item in value:
+            yield from find_containers(item)
+
+def find_conditions(value):
+    # Every condition dict anywhere in a card definition.
+    if isinstance(value, dict):
+        if "condition" in value:
+            yield value
+        for field_value in value.values():
+            yield from find_conditions(field_value)
+    elif isinstance(value, list):
+        for item in value:
+            yield from find_conditions(item)
+
 class CardDatabase:
     def __init__(self):
         self.all_cards = []
+        # Card templates are shared by every game and must never be modified.
+        self.card_templates = {}
+        # card_id -> effect field -> timing -> effects
+        self.timed_effects = {}
+        # timing -> card_ids with any effect at that timing
+        self.cards_with_timing = {}
+        # id(condition) -> predicate(engine, effect_player, source_card_id)
+        self.compiled_conditions = {}
+        # Deepcopy memo that leaves the compiled condition dicts shared.
+        self.shared_conditions = {}
+        # Identifies the card definitions that were loaded.
+        self.definitions_hash = ""
+        # Every dict and list in the templates in a fixed order, built when first needed.
+        self.template_objects = None
+        self.template_object_indexes = None
 
         # The card_definitions.json file is in root\decks\card_definitions.json
         # This file is in root\app
@@ -30,14 +82,17 @@ class CardDatabase:
 
     def load_cards(self, path):
         # Load all the cards from the definitions file.
-        with open(path, "r") as f:
-            json_data = json.load(f)
+        with open(path, "rb") as f:
+            definitions = f.read()
+            self.definitions_hash = hashlib.sha1(definitions).hexdigest()
+            json_data = json.loads(definitions)
             card_data = []
             for card in json_data:
                 card_data.append(card)
                 # populate the alternates based on the original card
                 for rarity in card.get("alternates", []):
-                    alt_card = deepcopy(card)
+                    # The card text is shared with the original card.
+                    alt_card = dict(card)
                     alt_id = alt_card["alt_id"]
                     alt_card["alt_id"] = alt_id
                     alt_card["card_id"] = alt_id + "_" + rarity.upper()
@@ -45,17 +100,93 @@ class CardDatabase:
                     del alt_card["alternates"]
                     card_data.append(alt_card)
             self.all_cards = card_data
+            self.card_templates = {}
+            for card in card_data:
+                self.card_templates.setdefault(card["card_id"], card)
+            self.template_objects = None
+            self.template_object_indexes = None
+            self.build_timed_effects()
+            self.compile_conditions()
+
+    def build_timed_effects(self):
+        self.timed_effects = {}
+        self.cards_with_timing = {}
+        for card_id, card in self.card_templates.items():
+            card_timed_effects = {}
+            for field in TIMED_EFFECT_FIELDS:
+                for effect in card.get(field, []):
+                    if "timing" not in effect:
+                        continue
+                    timing = effect["timing"]
+                    card_timed_effects.setdefault(field, {}).setdefault(timing, []).append(effect)
+                    self.cards_with_timing.setdefault(timing, set()).add(card_id)
+            if card_timed_effects:
+                self.timed_effects[card_id] = card_timed_effects
+
+    def compile_conditions(self):
+        # Imported here, the engine imports this module.
+        from app.gameengine import compile_condition
+
+        # Templates are never modified or freed, so the condition dicts
+        # in them can be looked up by id.
+        self.compiled_conditions = {}
+        self.shared_conditions = {}
+        for card_id, card in self.card_templates.items():
+            for condition in find_conditions(card):
+                if id(condition) in self.compiled_conditions:
+                    continue
+                try:
+                    self.compiled_conditions[id(condition)] = compile_condition(condition)
+                except NotImplementedError as e:
+                    raise NotImplementedError(f"{card_id}: {e}") from e
+                self.shared_conditions[id(condition)] = condition
+
+    def copy_effects(self, effects):
+        # Deep copy of card definition effects for a game to modify. Conditions are read only
+        # and stay shared, so the copies still find their compiled predicates.
+        return deepcopy(effects, dict(self.shared_conditions))
+
+    def get_template_objects(self):
+        # Game state refers to these by index when it is saved (see gamesnapshot).
+        # The order only depends on the card definitions.
+        if self.template_objects is None:
+            self.template_objects = []
+            self.template_object_indexes = {}
+            for card in self.card_templates.values():
+                for container in find_containers(card):
+                    if id(container) not in self.template_object_indexes:
+                        self.template_object_indexes[id(container)] = len(self.template_objects)
+                        self.template_objects.append(container)
+        return self.template_objects
+
+    def get_template_object_indexes(self):
+        # id(template object) -> index in get_template_objects()
+        self.get_template_objects()
+        return self.template_object_indexes
+
+    def has_effects_at_timing(self, card_id, timing):
+        return card_id in self.cards_with_timing.get(timing, NO_EFFECTS)
+
+    def get_effects_at_timing(self, card_id, field, timing):
+        # The shared effects from the card definition, copy before modifying.
+        if not self.has_effects_at_timing(card_id, timing):
+            return NO_EFFECTS
+        return self.timed_effects[card_id].get(field, {}).get(timing, NO_EFFECTS)
+
+    def get_card_template(self, card_id):
+        # The shared definition, read only.
+        return self.card_templates.get(card_id)
 
     def get_card_by_id(self, card_id):
-        for card in self.all_cards:
-            if card["card_id"] == card_id:
-                return deepcopy(card)
-        return None
+        template = self.card_templates.get(card_id)
+        if template is None:
+            return None
+        return new_card_instance(template)
 
     def validate_deck(self, oshi_id : str, deck : Dict[str, int], cheer_deck: Dict[str, int]):
 
         # Validate the oshi ID is an existing oshi.
-        oshi_card = self.get_card_by_id(oshi_id)
+        oshi_card = self.get_card_template(oshi_id)
         if not oshi_card or oshi_card["card_type"] != "oshi":
             logger.info("--Deck Invalid: Oshi")
             return False
@@ -64,7 +195,7 @@ class CardDatabase:
         deck_count = 0
         alt_copies = {}
         for card_id, count in deck.items():
-            deck_card = self.get_card_by_id(card_id)
+            deck_card = self.get_card_template(card_id)
             if not deck_card or deck_card["card_type"] not in ALLOWED_DECK_TYPES:
                 if not deck_card:
                     logger.info("--Deck Invalid: Card not found %s" % card_id)
@@ -106,7 +237,7 @@ class CardDatabase:
         cheer_deck_count = 0
         for card_id, count in cheer_deck.items():
             cheer_deck_count += count
-            cheer_deck_card = self.get_card_by_id(card_id)
+            cheer_deck_card = self.get_card_template(card_id)
             if not cheer_deck_card or cheer_deck_card["card_type"] != "cheer":
                 logger.info("--Deck Invalid: Cheer deck wrong")
                 return False
@@ -1,12 +1,21 @@
 from typing import List, Dict, Any
-from app.card_database import CardDatabase
+from app.card_database import CardDatabase, new_card_instance
 import random
-from copy import deepcopy
 import traceback
 import time
+import os
+import copyreg
+from bisect import bisect_left
+from itertools import chain
+from operator import itemgetter
 import logging
 logger = logging.getLogger(__name__)
 
+DEBUG_CARD_INDEX = os.getenv("DEBUG_CARD_INDEX", "false").lower() == "true"
+EFFECT_STATS = os.getenv("EFFECT_STATS", "false").lower() == "true"
+DEBUG_MAINSTEP_CACHE = os.getenv("DEBUG_MAINSTEP_CACHE", "false").lower() == "true"
+SLOW_MESSAGE_MS = float(os.getenv("SLOW_MESSAGE_MS", "250"))
+
 UNKNOWN_CARD_ID = "HIDDEN"
 UNLIMITED_SIZE = 9999
 STARTING_HAND_SIZE = 7
@@ -375,19 +384,560 @@ class GameAction:
     ResignFields = {
     }
 
+# Every action type a player can send.
+GAME_ACTION_TYPES = frozenset(value for name, value in vars(GameAction).items() if isinstance(value, str) and not name.startswith("_"))
+
+class EffectStats:
+    # Count and time spent in do_effect per effect type, across all games.
+    # Times include any effects done from inside the effect (e.g. a choice with one option).
+    def __init__(self, enabled = False):
+        self.enabled = enabled
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counts = {}
+        self.total_times = {}
+        self.max_times = {}
+
+    def record(self, effect_type, elapsed):
+        self.counts[effect_type] = self.counts.get(effect_type, 0) + 1
+        self.total_times[effect_type] = self.total_times.get(effect_type, 0.0) + elapsed
+        if elapsed > self.max_times.get(effect_type, 0.0):
+            self.max_times[effect_type] = elapsed
+
+    def get_report(self):
+        # Most total time first.
+        report = []
+        for effect_type, total_time in sorted(self.total_times.items(), key=lambda item: item[1], reverse=True):
+            count = self.counts[effect_type]
+            report.append({
+                "effect_type": effect_type,
+                "count": count,
+                "total_ms": total_time * 1000,
+                "average_us": total_time * 1e6 / count,
+                "max_us": self.max_times[effect_type] * 1e6,
+            })
+        return report
+
+effect_stats = EffectStats(EFFECT_STATS)
+
+# Upper bounds of the message latency histogram buckets, anything slower goes in one more bucket.
+MESSAGE_LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+# Messages with an action type that isn't a game action are all recorded under this one.
+INVALID_ACTION_TYPE = "invalid"
+
+class MessageLatencyStats:
+    # Histogram of handle_game_message times per action type and the phase the message arrived in,
+    # across all games. Messages slower than slow_message_ms are logged by the engine.
+    def __init__(self, slow_message_ms):
+        self.slow_message_ms = slow_message_ms
+        self.reset()
+
+    def reset(self):
+        # (action_type, phase) -> [bucket counts, total time, max time]
+        self.histograms = {}
+
+    def record(self, action_type, phase, elapsed):
+        # The action type comes from the client, unknown ones share an entry so they can't grow the stats.
+        if not isinstance(action_type, str) or action_type not in GAME_ACTION_TYPES:
+            action_type = INVALID_ACTION_TYPE
+        histogram = self.histograms.get((action_type, phase))
+        if histogram is None:
+            histogram = [[0] * (len(MESSAGE_LATENCY_BUCKETS_MS) + 1), 0.0, 0.0]
+            self.histograms[(action_type, phase)] = histogram
+        elapsed_ms = elapsed * 1000
+        histogram[0][bisect_left(MESSAGE_LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        histogram[1] += elapsed_ms
+        if elapsed_ms > histogram[2]:
+            histogram[2] = elapsed_ms
+        return elapsed_ms > self.slow_message_ms
+
+    def get_report(self):
+        # Most total time first.
+        report = []
+        for (action_type, phase), (bucket_counts, total_ms, max_ms) in sorted(self.histograms.items(), key=lambda item: item[1][1], reverse=True):
+            count = sum(bucket_counts)
+            report.append({
+                "action_type": action_type,
+                "phase": phase,
+                "count": count,
+                "total_ms": total_ms,
+                "average_ms": total_ms / count,
+                "max_ms": max_ms,
+                # Counts of messages up to each bound, the last bound is None for the slower ones.
+                "buckets": [
+                    {"max_ms": bound, "count": bucket_count}
+                    for bound, bucket_count in zip(MESSAGE_LATENCY_BUCKETS_MS + [None], bucket_counts)
+                ],
+            })
+        return report
+
+message_latency_stats = MessageLatencyStats(SLOW_MESSAGE_MS)
+
 class EffectResolutionState:
-    def __init__(self, effects, continuation, cards_to_cleanup = [], simultaneous_choice = False):
-        self.effects_to_resolve = deepcopy(effects)
+    def __init__(self, card_db, effects, continuation, cards_to_cleanup = [], simultaneous_choice = False):
+        self.effects_to_resolve = card_db.copy_effects(effects)
         self.effect_resolution_continuation = continuation
         self.cards_to_cleanup = cards_to_cleanup
         self.simultaneous_choice = simultaneous_choice
 
         self.simultaneous_choice_index = -1
 
+class Continuation:
+    """
+    A step to run later, e.g. once nested effects are resolved or a decision is made.
+    Stored as a step name (see CONTINUATION_STEPS) and its arguments instead of a closure,
+    so games with pending steps can be copied and saved.
+    Called like any other continuation.
+    """
+    __slots__ = ("engine", "step", "args")
+
+    def __init__(self, engine, step, *args):
+        self.engine = engine
+        self.step = step
+        self.args = args
+
+    def __call__(self):
+        return CONTINUATION_STEPS[self.step](self.engine, *self.args)
+
+    def __repr__(self):
+        return f"Continuation({self.step})"
+
+def get_sanitized_fields(event):
+    # The values that replace the hidden fields for anyone who can't see them.
+    sanitized_fields = {}
+    hidden_erase = event.get("hidden_info_erase", [])
+    for field in event.get("hidden_info_fields", []):
+        if field in hidden_erase:
+            sanitized_fields[field] = None
+        else:
+            # If the field is a single id, replace it.
+            # If it is a list, replace them all.
+            if isinstance(event[field], str):
+                sanitized_fields[field] = UNKNOWN_CARD_ID
+            elif isinstance(event[field], list):
+                sanitized_fields[field] = [UNKNOWN_CARD_ID] * len(event[field])
+    return sanitized_fields
+
+class BroadcastEvent:
+    """
+    An event sent to every player and observer, stored once.
+    Each audience's view is built when it is grabbed, and the hidden fields
+    are sanitized once for everyone that can't see them.
+    """
+    __slots__ = ("event", "clocks", "sanitized_fields", "observer_event")
+
+    def __init__(self, event, clocks):
+        self.event = event
+        # Each player's clock_time_used when the event was broadcast.
+        self.clocks = clocks
+        self.sanitized_fields = None
+        self.observer_event = None
+
+    def __reduce__(self):
+        # The views are rebuilt when needed.
+        return (BroadcastEvent, (self.event, self.clocks))
+
+    def get_sanitized_fields(self):
+        if self.sanitized_fields is None:
+            self.sanitized_fields = get_sanitized_fields(self.event)
+        return self.sanitized_fields
+
+    def player_view(self, player_index, player_id):
+        event = self.event
+        view = {
+            "event_player_id": player_id,
+            **event,
+            "your_clock_used": self.clocks[player_index],
+            "opponent_clock_used": self.clocks[1 - player_index],
+        }
+        if "hidden_info_fields" in event and player_id != event.get("hidden_info_player"):
+            view.update(self.get_sanitized_fields())
+        return view
+
+    def observer_view(self):
+        # Observers never see hidden info.
+        # Every observer gets the same view, it is built once and must not be modified.
+        if self.observer_event is None:
+            view = {
+                **self.event,
+                "event_player_id": "observer",
+                "your_clock_used": self.clocks[0],
+                "opponent_clock_used": self.clocks[1],
+            }
+            if "hidden_info_fields" in self.event:
+                view.update(self.get_sanitized_fields())
+            self.observer_event = view
+        return self.observer_event
+
+CARD_STATE_FIELDS = (
+    "played_this_turn",
+    "bloomed_this_turn",
+    "attached_cheer",
+    "attached_support",
+    "stacked_cards",
+    "zone_when_downed",
+    "zone_when_returned_to_hand",
+    "attached_when_downed",
+    "damage",
+    "resting",
+    "rest_extra_turn",
+    "used_art_this_turn",
+)
+CARD_STATE_FIELD_SET = frozenset(CARD_STATE_FIELDS)
+
+class GameCard(dict):
+    """
+    A holomem or support card in a game.
+    The card text and ids are stored in the dict, the per game state lives in slots
+    so the engine can use attribute access. Subscripting works for both, and the
+    mapping methods (iteration, keys, items, len) include the state so dict(card)
+    and json.dumps(card) don't lose it.
+    """
+    __slots__ = ("changes",) + CARD_STATE_FIELDS
+
+    def __init__(self, template, owner_id, game_card_id, changes = None):
+        # The owner's change counts, bumped whenever the card is modified.
+        self.changes = None
+        super().__init__(new_card_instance(template))
+        self["owner_id"] = owner_id
+        self["game_card_id"] = game_card_id
+        self.played_this_turn = False
+        self.bloomed_this_turn = False
+        self.attached_cheer = []
+        self.attached_support = []
+        self.stacked_cards = []
+        self.zone_when_downed = ""
+        self.zone_when_returned_to_hand = ""
+        self.attached_when_downed = []
+        self.damage = 0
+        self.resting = False
+        self.rest_extra_turn = False
+        self.used_art_this_turn = False
+        self.changes = changes
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if self.changes is not None:
+            self.changes["card_state"] += 1
+
+    def __reduce__(self):
+        # Copied and saved as the card text and state, which are
+        # restored without counting as changes.
+        return (copyreg.__newobj__, (GameCard,), (dict.copy(self), [getattr(self, field) for field in self.__slots__]))
+
+    def __setstate__(self, state):
+        card_text, state_values = state
+        dict.update(self, card_text)
+        for field, value in zip(self.__slots__, state_values):
+            object.__setattr__(self, field, value)
+
+    def __missing__(self, key):
+        if key in CARD_STATE_FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in CARD_STATE_FIELD_SET:
+            self.__setattr__(key, value)
+        else:
+            super().__setitem__(key, value)
+            if self.changes is not None:
+                self.changes["card_state"] += 1
+
+    def __contains__(self, key):
+        return key in CARD_STATE_FIELD_SET or super().__contains__(key)
+
+    def get(self, key, default = None):
+        if key in CARD_STATE_FIELD_SET:
+            return getattr(self, key)
+        return super().get(key, default)
+
+    def __iter__(self):
+        return chain(dict.__iter__(self), CARD_STATE_FIELDS)
+
+    def __len__(self):
+        return dict.__len__(self) + len(CARD_STATE_FIELDS)
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def as_dict(self):
+        # Plain dict with the card text and state, for serialization.
+        card_dict = dict.copy(self)
+        for field in CARD_STATE_FIELDS:
+            value = getattr(self, field)
+            if isinstance(value, list):
+                value = [card.as_dict() if isinstance(card, GameCard) else dict(card) for card in value]
+            card_dict[field] = value
+        return card_dict
+
+# Parts of a player's state that are tracked for changes, see PlayerState.changes.
+CHANGE_TAGS = (
+    "hand",
+    "stage",
+    "deck",
+    "holopower",
+    "archive",
+    "cheer_deck",
+    "attachments",
+    "card_state",
+    "player",
+    "effects",
+)
+
+ZONE_CHANGE_TAGS = {
+    "hand": "hand",
+    "center": "stage",
+    "collab": "stage",
+    "backstage": "stage",
+    "deck": "deck",
+    "holopower": "holopower",
+    "archive": "archive",
+    "cheer_deck": "cheer_deck",
+}
+
+# Player fields that don't affect what the player can do.
+UNTRACKED_PLAYER_FIELDS = frozenset([
+    "changes",
+    "clock_time_used",
+])
+
+class CardZone(list):
+    """
+    A list of cards that keeps a game_card_id -> (card, zone) index in sync
+    with every mutation, so finding a card doesn't need to scan every zone.
+    Mutations also bump the owner's change count for the zone.
+    """
+    def __init__(self, name, card_index, cards = (), changes = None):
+        super().__init__(cards)
+        self.name = name
+        self.card_index = card_index
+        self.changes = changes
+        self.change_tag = ZONE_CHANGE_TAGS.get(name)
+        for card in self:
+            self._track(card)
+
+    def _changed(self):
+        if self.changes is not None:
+            self.changes[self.change_tag] += 1
+
+    def __reduce__(self):
+        # The index is saved with the rest of the game, so restoring
+        # the cards doesn't need to track them again.
+        return (copyreg.__newobj__, (type(self),), (list(self), self.__dict__))
+
+    def __setstate__(self, state):
+        cards, attributes = state
+        self.__dict__.update(attributes)
+        super().extend(cards)
+
+    def _track(self, card):
+        self.card_index[card["game_card_id"]] = (card, self)
+
+    def _untrack(self, card):
+        entry = self.card_index.get(card["game_card_id"])
+        if entry and entry[1] is self:
+            del self.card_index[card["game_card_id"]]
+
+    def _contains_instance(self, card):
+        return any(zone_card is card for zone_card in self)
+
+    def detach(self):
+        # Called when the zone is replaced, the list may still be referenced
+        # elsewhere but it no longer represents the zone.
+        for card in self:
+            self._untrack(card)
+        self.card_index = {}
+        self.changes = None
+
+    def reorder(self, cards):
+        # Same cards in a new order, the index doesn't change.
+        super().__setitem__(slice(None), cards)
+        self._changed()
+
+    def append(self, card):
+        super().append(card)
+        self._track(card)
+        self._changed()
+
+    def insert(self, index, card):
+        super().insert(index, card)
+        self._track(card)
+        self._changed()
+
+    def extend(self, cards):
+        cards = list(cards)
+        super().extend(cards)
+        for card in cards:
+            self._track(card)
+        self._changed()
+
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+
+    def remove(self, card):
+        index = self.index(card)
+        removed_card = self[index]
+        super().__delitem__(index)
+        self._untrack(removed_card)
+        self._changed()
+
+    def pop(self, index = -1):
+        card = super().pop(index)
+        self._untrack(card)
+        self._changed()
+        return card
+
+    def clear(self):
+        for card in self:
+            self._untrack(card)
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            old_cards = self[key]
+            super().__setitem__(key, value)
+            for card in old_cards:
+                if not self._contains_instance(card):
+                    self._untrack(card)
+            for card in self:
+                self._track(card)
+        else:
+            old_card = self[key]
+            super().__setitem__(key, value)
+            self._track(value)
+            if old_card is not value and not self._contains_instance(old_card):
+                self._untrack(old_card)
+        self._changed()
+
+    def __delitem__(self, key):
+        old_cards = self[key] if isinstance(key, slice) else [self[key]]
+        super().__delitem__(key)
+        for card in old_cards:
+            self._untrack(card)
+        self._changed()
+
+class AttachmentZone(CardZone):
+    """
+    Cards attached to or stacked under a holomem. The index entries point
+    back to the zone, and the zone knows its holder.
+    """
+    def __init__(self, name, card_index, holder, cards = (), changes = None):
+        self.holder = holder
+        super().__init__(name, card_index, cards, changes)
+        self.change_tag = "attachments"
+
+ATTACHMENT_FIELDS = ["attached_cheer", "attached_support", "stacked_cards"]
+
+class PlayerList(list):
+    """
+    A list field of a player (turn effects, effects used this turn, etc.)
+    that bumps the player's change count when modified in place.
+    """
+    changes = None
+
+    def __init__(self, items, changes):
+        super().__init__(items)
+        self.changes = changes
+
+    def _changed(self):
+        if self.changes is not None:
+            self.changes["player"] += 1
+
+    def append(self, item):
+        super().append(item)
+        self._changed()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._changed()
+
+    def extend(self, items):
+        super().extend(items)
+        self._changed()
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def remove(self, item):
+        super().remove(item)
+        self._changed()
+
+    def pop(self, index = -1):
+        item = super().pop(index)
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+def no_change_counts(changes):
+    return ()
+
+def change_counts_getter(tags):
+    # Reads the counts for the given tags out of PlayerState.changes.
+    return itemgetter(*tags) if tags else no_change_counts
+
+def card_zone_property(zone_name):
+    # Assigning a plain list to a zone (e.g. self.collab = []) wraps it
+    # in a CardZone and reindexes its cards.
+    attribute = "_" + zone_name
+    def get_zone(self):
+        return self.__dict__[attribute]
+    def set_zone(self, cards):
+        old_zone = self.__dict__.get(attribute)
+        if cards is old_zone:
+            return
+        if old_zone is not None:
+            old_zone.detach()
+        self.__dict__[attribute] = CardZone(zone_name, self.card_index, cards, self.changes)
+        self.changes[ZONE_CHANGE_TAGS[zone_name]] += 1
+    return property(get_zone, set_zone)
+
 class PlayerState:
+    hand = card_zone_property("hand")
+    archive = card_zone_property("archive")
+    backstage = card_zone_property("backstage")
+    center = card_zone_property("center")
+    collab = card_zone_property("collab")
+    deck = card_zone_property("deck")
+    cheer_deck = card_zone_property("cheer_deck")
+    holopower = card_zone_property("holopower")
+
     def __init__(self, card_db:CardDatabase, player_info:Dict[str, Any], engine: 'GameEngine'):
+        # tag -> count, bumped whenever that part of the player's state changes.
+        self.changes = dict.fromkeys(CHANGE_TAGS, 0)
         self.engine = engine
         self.player_id = player_info["player_id"]
+        # game_card_id -> (card, zone) for every card in an indexed zone.
+        self.card_index = {}
+        # game_card_id -> (card, attachment zone) for cards attached to this player's holomems.
+        self.attachment_index = {}
         self.username = player_info["username"]
 
         self.first_turn = True
@@ -431,23 +981,10 @@ class PlayerState:
         self.deck = []
         card_number = 1
         for card_id, count in self.deck_list.items():
-            card = card_db.get_card_by_id(card_id)
+            card = card_db.get_card_template(card_id)
             for _ in range(count):
-                generated_card = deepcopy(card)
-                generated_card["owner_id"] = self.player_id
-                generated_card["game_card_id"] = self.player_id + "_" + str(card_number)
-                generated_card["played_this_turn"] = False
-                generated_card["bloomed_this_turn"] = False
-                generated_card["attached_cheer"] = []
-                generated_card["attached_support"] = []
-                generated_card["stacked_cards"] = []
-                generated_card["zone_when_downed"] = ""
-                generated_card["zone_when_returned_to_hand"] = ""
-                generated_card["attached_when_downed"] = []
-                generated_card["damage"] = 0
-                generated_card["resting"] = False
-                generated_card["rest_extra_turn"] = False
-                generated_card["used_art_this_turn"] = False
+                generated_card = GameCard(card, self.player_id, self.player_id + "_" + str(card_number), self.changes)
+                self.reset_attachments(generated_card)
                 card_number += 1
                 self.deck.append(generated_card)
 
@@ -456,9 +993,9 @@ class PlayerState:
         self.cheer_deck = []
         card_number = 1001
         for card_id, count in player_info["cheer_deck"].items():
-            card = card_db.get_card_by_id(card_id)
+            card = card_db.get_card_template(card_id)
             for _ in range(count):
-                generated_card = deepcopy(card)
+                generated_card = new_card_instance(card)
                 generated_card["owner_id"] = self.player_id
                 generated_card["game_card_id"] = self.player_id + "_" + str(card_number)
                 card_number += 1
@@ -467,6 +1004,14 @@ class PlayerState:
         self.game_cards_map = {card["game_card_id"]: card["card_id"] for card in self.deck + self.cheer_deck}
         self.game_cards_map[self.oshi_card["game_card_id"]] = self.oshi_card["card_id"]
 
+    def __setattr__(self, name, value):
+        # Zones count their own changes.
+        if name not in ZONE_CHANGE_TAGS and name not in UNTRACKED_PLAYER_FIELDS:
+            if type(value) is list:
+                value = PlayerList(value, self.changes)
+            self.changes["player"] += 1
+        super().__setattr__(name, value)
+
     def initialize_life(self):
         # Move cards from the cheer deck to the life area equal to the oshi's life.
         self.life = self.cheer_deck[:self.oshi_card["life"]]
@@ -478,7 +1023,7 @@ class PlayerState:
         amount = min(amount, len(self.deck))
         drawn_cards = self.deck[:amount]
         self.hand += drawn_cards
-        self.deck = self.deck[amount:]
+        del self.deck[:amount]
 
         draw_event = {
             "event_type": EventType.EventType_Draw,
@@ -538,7 +1083,7 @@ class PlayerState:
         return False
 
     def is_art_requirement_met(self, card, art):
-        attached_cheer_cards = [attached_card for attached_card in card["attached_cheer"] if is_card_cheer(attached_card)]
+        attached_cheer_cards = [attached_card for attached_card in card.attached_cheer if is_card_cheer(attached_card)]
 
         white_cheer = 0
         green_cheer = 0
@@ -609,7 +1154,7 @@ class PlayerState:
             match art["art_requirement"]:
                 case "has_attached":
                     required_definition_id = art["art_requirement_attached_id"]
-                    for attached in card["attached_support"]:
+                    for attached in card.attached_support:
                         if attached["card_id"] == required_definition_id:
                             passed_requirement = True
                             break
@@ -676,7 +1221,7 @@ class PlayerState:
                 # Check the names of the bloom card, at last one must match a name from the base card.
                 if any(name in bloom_card["card_names"] for name in target_card["card_names"]):
                     # Check the damage, if the bloom version would die, you can't.
-                    if target_card["damage"] < self.get_card_hp(bloom_card):
+                    if target_card.damage < self.get_card_hp(bloom_card):
                         return True
         return False
 
@@ -693,9 +1238,9 @@ class PlayerState:
 
     def get_holomem_zone(self, card):
         if card in self.archive:
-            return card["zone_when_downed"]
+            return card.zone_when_downed
         elif card in self.hand:
-            return card["zone_when_returned_to_hand"]
+            return card.zone_when_returned_to_hand
         elif card in self.center:
             return "center"
         elif card in self.collab:
@@ -735,41 +1280,39 @@ class PlayerState:
         # For now, prioritize Gift effects before oshi effects
         # due to zeta's reduce damage gift that can fail which wants to go first.
         # If needed, on_take_damage will have to become a simultaneous decision resolution.
+        card_db = self.engine.card_db
         for holomem in self.get_holomem_on_stage():
-            if "gift_effects" in holomem:
-                gift_effects = filter_effects_at_timing(holomem["gift_effects"], timing)
-                add_ids_to_effects(gift_effects, self.player_id, holomem["game_card_id"])
-                effects.extend(gift_effects)
-
-        for oshi_effect in self.oshi_card.get("effects", []):
-            if oshi_effect["timing"] == timing:
-                if "timing_source_requirement" in oshi_effect and oshi_effect["timing_source_requirement"] != timing_source_requirement:
-                    continue
-                add_ids_to_effects([oshi_effect], self.player_id, self.oshi_card["game_card_id"])
-                effects.append(oshi_effect)
+            gift_effects = card_db.get_effects_at_timing(holomem["card_id"], "gift_effects", timing)
+            if gift_effects:
+                effects.extend(copy_effects_with_ids(card_db, gift_effects, self.player_id, holomem["game_card_id"]))
 
-        turn_effects = filter_effects_at_timing(self.turn_effects, timing)
-        add_ids_to_effects(turn_effects, self.player_id, "")
-        effects.extend(turn_effects)
+        oshi_effects = card_db.get_effects_at_timing(self.oshi_card["card_id"], "effects", timing)
+        for oshi_effect in oshi_effects:
+            if "timing_source_requirement" in oshi_effect and oshi_effect["timing_source_requirement"] != timing_source_requirement:
+                continue
+            effects.extend(copy_effects_with_ids(card_db, [oshi_effect], self.player_id, self.oshi_card["game_card_id"]))
+
+        if self.turn_effects:
+            turn_effects = filter_effects_at_timing(card_db, self.turn_effects, timing)
+            add_ids_to_effects(turn_effects, self.player_id, "")
+            effects.extend(turn_effects)
 
         if card and card["card_type"] not in ["support", "oshi"]:
-            attachments_to_check = card["attached_support"]
-            if card["attached_when_downed"]:
-                attachments_to_check = card["attached_when_downed"]
+            attachments_to_check = card.attached_support
+            if card.attached_when_downed:
+                attachments_to_check = card.attached_when_downed
             for attached_card in attachments_to_check:
-                attached_effects = attached_card.get("attached_effects", [])
+                attached_effects = card_db.get_effects_at_timing(attached_card["card_id"], "attached_effects", timing)
                 for attached_effect in attached_effects:
-                    if attached_effect["timing"] == timing:
-                        if "timing_source_requirement" in attached_effect and attached_effect["timing_source_requirement"] != timing_source_requirement:
-                            continue
-                        add_ids_to_effects([attached_effect], self.player_id, attached_card["game_card_id"])
-                        effects.append(attached_effect)
+                    if "timing_source_requirement" in attached_effect and attached_effect["timing_source_requirement"] != timing_source_requirement:
+                        continue
+                    effects.extend(copy_effects_with_ids(card_db, [attached_effect], self.player_id, attached_card["game_card_id"]))
         return effects
 
     def get_cheer_color_types_on_holomems(self):
         cheer_color_types = set()
         for card in self.get_holomem_on_stage():
-            for attached_card in card["attached_cheer"]:
+            for attached_card in card.attached_cheer:
                 if is_card_cheer(attached_card):
                     cheer_color_types.update(attached_card["colors"])
         return cheer_color_types
@@ -777,7 +1320,7 @@ class PlayerState:
     def get_cheer_ids_on_holomems(self):
         cheer_ids = []
         for card in self.get_holomem_on_stage():
-            for attached_card in card["attached_cheer"]:
+            for attached_card in card.attached_cheer:
                 if is_card_cheer(attached_card):
                     cheer_ids.append(attached_card["game_card_id"])
         return cheer_ids
@@ -785,7 +1328,7 @@ class PlayerState:
     def get_cheer_on_each_holomem(self, exclude_empty_members = False):
         cheer = {}
         for card in self.get_holomem_on_stage():
-            cheer[card["game_card_id"]] = [attached_card["game_card_id"] for attached_card in card["attached_cheer"]]
+            cheer[card["game_card_id"]] = [attached_card["game_card_id"] for attached_card in card.attached_cheer]
             if exclude_empty_members and len(cheer[card["game_card_id"]]) == 0:
                 del cheer[card["game_card_id"]]
         return cheer
@@ -793,14 +1336,14 @@ class PlayerState:
     def get_holomems_with_cheer(self):
         holomems = []
         for card in self.get_holomem_on_stage():
-            if card["attached_cheer"]:
+            if card.attached_cheer:
                 holomems.append(card["game_card_id"])
         return holomems
 
     def is_cheer_on_holomem(self, cheer_id, target_id):
         holomem_card, _, _ = self.find_card(target_id)
         if holomem_card:
-            for attached_card in holomem_card["attached_cheer"]:
+            for attached_card in holomem_card.attached_cheer:
                 if attached_card["game_card_id"] == cheer_id:
                     return True
         return False
@@ -840,7 +1383,7 @@ class PlayerState:
         source_card, _, _ = self.find_card(card_id)
         holomems = []
         if source_card:
-            for stacked_card in source_card["stacked_cards"]:
+            for stacked_card in source_card.stacked_cards:
                 if is_card_holomem(stacked_card):
                     holomems.append(stacked_card)
         return holomems
@@ -850,12 +1393,12 @@ class PlayerState:
         match location:
             case "backstage":
                 holomems = self.backstage
-        return [holomem for holomem in holomems if holomem["card_type"] == "holomem_debut" and holomem["played_this_turn"]]
+        return [holomem for holomem in holomems if holomem["card_type"] == "holomem_debut" and holomem.played_this_turn]
 
     def get_holomems_with_attachment(self, attachment_id):
-        for card in self.get_holomem_on_stage():
-            if attachment_id in ids_from_cards(card["attached_cheer"] + card["attached_support"]):
-                return [card]
+        _, holder, _ = self.find_attached(attachment_id, ["attached_cheer", "attached_support"])
+        if holder:
+            return [holder]
         return []
 
     def is_center_holomem(self, card_id):
@@ -874,15 +1417,12 @@ class PlayerState:
             case _: return "unknown"
 
     def find_card(self, card_id, include_stacked_cards = False):
-        zones = [self.hand, self.archive, self.backstage, self.center, self.collab, self.deck, self.cheer_deck, self.holopower]
-        for zone in zones:
-            for card in zone:
-                if card["game_card_id"] == card_id:
-                    zone_name = self.get_zone_name(zone)
-                    return card, zone, zone_name
-        for card in self.engine.floating_cards:
-            if card["game_card_id"] == card_id:
-                return card, self.engine.floating_cards, "floating"
+        found = self.card_index.get(card_id) or self.engine.floating_card_index.get(card_id)
+        if self.engine.debug_card_index:
+            self.verify_card_index_entry(card_id, found)
+        if found:
+            card, zone = found
+            return card, zone, zone.name
         if self.oshi_card["game_card_id"] == card_id:
             return self.oshi_card, None, "oshi"
 
@@ -893,13 +1433,73 @@ class PlayerState:
         # Card, Zone, Zone Name
         return None, None, None
 
+    def scan_for_card(self, card_id):
+        # Full scan of the zones in lookup order, used to verify the card index.
+        zones = [self.hand, self.archive, self.backstage, self.center, self.collab, self.deck, self.cheer_deck, self.holopower]
+        for zone in zones + [self.engine.floating_cards]:
+            for card in zone:
+                if card["game_card_id"] == card_id:
+                    return card, zone
+        return None
+
+    def verify_card_index_entry(self, card_id, found):
+        expected = self.scan_for_card(card_id)
+        if expected is None and found is None:
+            return
+        # A card that was put in two zones at once can be found in either one.
+        if expected is None or found is None or expected[0] is not found[0] or not found[1]._contains_instance(found[0]):
+            found_zone = found[1].name if found else None
+            expected_zone = expected[1].name if expected else None
+            raise Exception(f"Card index mismatch for {card_id}: index has {found_zone}, scan found {expected_zone}")
+
+    def verify_card_index(self):
+        zones = [self.hand, self.archive, self.backstage, self.center, self.collab, self.deck, self.cheer_deck, self.holopower]
+        for zone in zones:
+            for card in zone:
+                self.verify_card_index_entry(card["game_card_id"], self.card_index.get(card["game_card_id"]))
+        for card_id, found in self.card_index.items():
+            self.verify_card_index_entry(card_id, found)
+
     def find_attachment(self, attachment_id):
         # Assume this is an attachment, find it on the holomem.
+        attachment, _, _ = self.find_attached(attachment_id, ["attached_support"])
+        return attachment
+
+    def is_holomem_on_stage(self, card):
+        found = self.card_index.get(card["game_card_id"])
+        return found is not None and found[0] is card and found[1].name in ["center", "collab", "backstage"]
+
+    def find_attached(self, attached_id, fields = ATTACHMENT_FIELDS):
+        # Returns the attached card, the holomem on stage holding it and the attachment list.
+        found = self.lookup_attached(attached_id, fields)
+        if self.engine.debug_card_index:
+            expected = self.scan_for_attached(attached_id, fields, include_indexed=True)
+            if expected[0] is not found[0] or expected[1] is not found[1]:
+                raise Exception(f"Attachment index mismatch for {attached_id}")
+        return found
+
+    def lookup_attached(self, attached_id, fields):
+        found = self.attachment_index.get(attached_id)
+        if found:
+            attached_card, zone = found
+            holder = zone.holder
+            if zone.name in fields and getattr(holder, zone.name, None) is zone and self.is_holomem_on_stage(holder):
+                return attached_card, holder, zone
+        # Attachment lists that were replaced with plain lists aren't indexed.
+        return self.scan_for_attached(attached_id, fields, include_indexed=False)
+
+    def scan_for_attached(self, attached_id, fields, include_indexed):
         for holomem in self.get_holomem_on_stage():
-            for attachment in holomem["attached_support"]:
-                if attachment["game_card_id"] == attachment_id:
-                    return attachment
-        return None
+            for field in ATTACHMENT_FIELDS:
+                if field not in fields:
+                    continue
+                attached_cards = getattr(holomem, field)
+                if not include_indexed and isinstance(attached_cards, AttachmentZone) and attached_cards.holder is holomem:
+                    continue
+                for attached_card in attached_cards:
+                    if attached_card["game_card_id"] == attached_id:
+                        return attached_card, holomem, attached_cards
+        return None, None, None
 
     def find_and_remove_card(self, card_id):
         card, zone, zone_name = self.find_card(card_id)
@@ -943,7 +1543,7 @@ class PlayerState:
                 self.holopower.insert(0, card)
 
         if to_zone in ["center", "backstage", "collab", "holomem"] and from_zone_name in ["hand", "deck"]:
-            card["played_this_turn"] = True
+            card.played_this_turn = True
 
         move_card_event = {
             "event_type": EventType.EventType_MoveCard,
@@ -961,17 +1561,23 @@ class PlayerState:
 
     def reset_card_stats(self, card):
         if is_card_holomem(card):
-            card["played_this_turn"] = False
-            card["bloomed_this_turn"] = False
-            card["attached_cheer"] = []
-            card["attached_support"] = []
-            card["stacked_cards"] = []
-            card["damage"] = 0
-            card["resting"] = False
-            card["rest_extra_turn"] = False
-            card["used_art_this_turn"] = False
-            card["zone_when_downed"] = ""
-            card["attached_when_downed"] = []
+            card.played_this_turn = False
+            card.bloomed_this_turn = False
+            self.reset_attachments(card)
+            card.damage = 0
+            card.resting = False
+            card.rest_extra_turn = False
+            card.used_art_this_turn = False
+            card.zone_when_downed = ""
+            card.attached_when_downed = []
+
+    def reset_attachments(self, card):
+        # Give the card fresh attachment zones, dropping the old ones from the index.
+        for field in ATTACHMENT_FIELDS:
+            old_zone = getattr(card, field, None)
+            if isinstance(old_zone, CardZone):
+                old_zone.detach()
+            setattr(card, field, AttachmentZone(field, self.attachment_index, card, changes=self.changes))
 
     def active_resting_cards(self):
         # For each card in the center, backstage, and collab zones, check if they are resting.
@@ -979,10 +1585,10 @@ class PlayerState:
         activated_card_ids = []
         for card in self.get_holomem_on_stage():
             if is_card_resting(card):
-                if card["rest_extra_turn"]:
-                    card["rest_extra_turn"] = False
+                if card.rest_extra_turn:
+                    card.rest_extra_turn = False
                 else:
-                    card["resting"] = False
+                    card.resting = False
                     activated_card_ids.append(card["game_card_id"])
         return activated_card_ids
 
@@ -1003,9 +1609,9 @@ class PlayerState:
         self.card_effects_used_this_turn = []
         self.last_revealed_cards = []
         for card in self.get_holomem_on_stage():
-            card["used_art_this_turn"] = False
-            card["played_this_turn"] = False
-            card["bloomed_this_turn"] = False
+            card.used_art_this_turn = False
+            card.played_this_turn = False
+            card.bloomed_this_turn = False
 
     def reset_collab(self):
         # For all cards in collab, move them back to backstage and rest them.
@@ -1014,7 +1620,7 @@ class PlayerState:
         if self.can_move_front_stage():
             for card in self.collab:
                 # Note: You only rest if you move backstage.
-                card["resting"] = True
+                card.resting = True
                 rested_card_ids.append(card["game_card_id"])
 
                 self.backstage.append(card)
@@ -1041,27 +1647,27 @@ class PlayerState:
             next_bloom_level = bloom_card["bloom_level"]
 
         # Add any stacked cards on the target to this too.
-        bloom_card["stacked_cards"].append(target_card)
-        bloom_card["stacked_cards"] += target_card["stacked_cards"]
-        target_card["stacked_cards"] = []
-
-        bloom_card["attached_cheer"] += target_card["attached_cheer"]
-        target_card["attached_cheer"] = []
-        bloom_card["attached_support"] += target_card["attached_support"]
-        target_card["attached_support"] = []
+        bloom_card.stacked_cards.append(target_card)
+        bloom_card.stacked_cards += target_card.stacked_cards
+        bloom_card.attached_cheer += target_card.attached_cheer
+        bloom_card.attached_support += target_card.attached_support
+        self.reset_attachments(target_card)
 
-        bloom_card["bloomed_this_turn"] = True
-        bloom_card["damage"] = target_card["damage"]
-        bloom_card["resting"] = target_card["resting"]
+        bloom_card.bloomed_this_turn = True
+        bloom_card.damage = target_card.damage
+        bloom_card.resting = target_card.resting
 
         # Put the bloom card where the target card was.
         zone.append(bloom_card)
 
         # For any ongoing turn effects, make sure to point them at the new card.
+        # Conditions can be shared with the card definitions, so replace them instead of modifying.
         for effect in self.turn_effects:
-            for condition in effect.get("conditions", []):
-                if condition.get("required_id", "") == target_card_id:
-                    condition["required_id"] = bloom_card_id
+            if "conditions" in effect:
+                effect["conditions"] = [
+                    dict(condition, required_id=bloom_card_id) if condition.get("required_id", "") == target_card_id else condition
+                    for condition in effect["conditions"]
+                ]
 
         bloom_event = {
             "event_type": EventType.EventType_Bloom,
@@ -1073,7 +1679,7 @@ class PlayerState:
         self.engine.broadcast_event(bloom_event)
 
         # Check if any attached cards must now be archived.
-        attachments = bloom_card["attached_support"].copy()
+        attachments = bloom_card.attached_support.copy()
         for attached_card in attachments:
             if is_card_equipment(attached_card) and not is_card_attach_requirements_meant(attached_card, bloom_card):
                 self.move_card(attached_card["game_card_id"], "archive")
@@ -1091,14 +1697,14 @@ class PlayerState:
         all_bloom_effects.extend(on_bloom_extra_effects)
         all_bloom_effects.extend(on_bloom_level_up_effects)
         if "bloom_effects" in bloom_card:
-            effects = deepcopy(bloom_card["bloom_effects"])
+            effects = self.engine.card_db.copy_effects(bloom_card["bloom_effects"])
             add_ids_to_effects(effects, self.player_id, bloom_card_id)
             all_bloom_effects.extend(effects)
         if len(all_bloom_effects) > 0:
             simultaneous_effects = len(on_bloom_level_up_effects) > 0
             self.engine.begin_resolving_effects(all_bloom_effects, continuation, [], simultaneous_effects)
         else:
-            continuation()
+            self.engine.run_continuation(continuation)
 
     def generate_holopower(self, amount, skip_event=False):
         generated_something = False
@@ -1133,7 +1739,7 @@ class PlayerState:
         on_collab_extra_effects = self.get_effects_at_timing("on_collab", collab_card, "")
 
         # Handle collab effects.
-        collab_effects = deepcopy(collab_card["collab_effects"]) if "collab_effects" in collab_card else []
+        collab_effects = self.engine.card_db.copy_effects(collab_card["collab_effects"]) if "collab_effects" in collab_card else []
         add_ids_to_effects(collab_effects, self.player_id, collab_card_id)
 
         # Handle all collab effects
@@ -1147,63 +1753,40 @@ class PlayerState:
 
     def get_oshi_action_effects(self, skill_id):
         action = next(action for action in self.oshi_card["actions"] if action["skill_id"] == skill_id)
-        return deepcopy(action["effects"])
+        return self.engine.card_db.copy_effects(action["effects"])
 
     def get_special_action_effects(self, card_id: str, effect_id: str):
         card, _, _ = self.find_card(card_id, include_stacked_cards=True)
         action = next(action for action in card["special_actions"] if action["effect_id"] == effect_id)
-        return deepcopy(action["effects"])
+        return self.engine.card_db.copy_effects(action["effects"])
 
     def find_and_remove_attached(self, attached_id):
         previous_holder_id = None
-        found_card = None
-        for card in self.get_holomem_on_stage():
-            if attached_id in ids_from_cards(card["attached_cheer"]):
-                # Remove the cheer.
-                found_card = next(card for card in card["attached_cheer"] if card["game_card_id"] == attached_id)
-                previous_holder_id = card["game_card_id"]
-                card["attached_cheer"].remove(found_card)
-                break
-            if attached_id in ids_from_cards(card["attached_support"]):
-                # Remove the support.
-                found_card = next(card for card in card["attached_support"] if card["game_card_id"] == attached_id)
-                previous_holder_id = card["game_card_id"]
-                card["attached_support"].remove(found_card)
-                break
-            if attached_id in ids_from_cards(card["stacked_cards"]):
-                # Remove the stacked card.
-                found_card = next(card for card in card["stacked_cards"] if card["game_card_id"] == attached_id)
-                previous_holder_id = card["game_card_id"]
-                card["stacked_cards"].remove(found_card)
-                break
-        if not previous_holder_id:
+        found_card, holder, attached_cards = self.find_attached(attached_id)
+        if found_card:
+            previous_holder_id = holder["game_card_id"]
+            attached_cards.remove(found_card)
+        else:
             # Check the life deck.
             if attached_id in ids_from_cards(self.life):
                 found_card = next(card for card in self.life if card["game_card_id"] == attached_id)
                 self.life.remove(found_card)
                 previous_holder_id = "life"
-            # And the archive.
-            elif attached_id in ids_from_cards(self.archive):
-                found_card = next(card for card in self.archive if card["game_card_id"] == attached_id)
-                self.archive.remove(found_card)
-                previous_holder_id = "archive"
-            # And the cheer deck.
-            elif attached_id in ids_from_cards(self.cheer_deck):
-                found_card = next(card for card in self.cheer_deck if card["game_card_id"] == attached_id)
-                self.cheer_deck.remove(found_card)
-                previous_holder_id = "cheer_deck"
+            else:
+                # And the archive and cheer deck.
+                found = self.card_index.get(attached_id)
+                if self.engine.debug_card_index:
+                    self.verify_card_index_entry(attached_id, found)
+                if found and found[1].name in ["archive", "cheer_deck"]:
+                    found_card, zone = found
+                    zone.remove(found_card)
+                    previous_holder_id = zone.name
         return found_card, previous_holder_id
 
     def find_and_remove_support(self, support_id):
-        previous_holder_id = None
-        for card in self.get_holomem_on_stage():
-            if support_id in ids_from_cards(card["attached_support"]):
-                # Remove the support card.
-                support_card = next(card for card in card["attached_support"] if card["game_card_id"] == support_id)
-                previous_holder_id = card["game_card_id"]
-                card["attached_support"].remove(support_card)
-                break
-        return support_card, previous_holder_id
+        support_card, holder, attached_cards = self.find_attached(support_id, ["attached_support"])
+        attached_cards.remove(support_card)
+        return support_card, holder["game_card_id"]
 
     def move_cheer_between_holomems(self, placements):
         for cheer_id, target_id in placements.items():
@@ -1215,7 +1798,7 @@ class PlayerState:
                 if cheer_card:
                     # Attach to the target.
                     target_card, _, _ = self.find_card(target_id)
-                    target_card["attached_cheer"].append(cheer_card)
+                    target_card.attached_cheer.append(cheer_card)
 
                     move_cheer_event = {
                         "event_type": EventType.EventType_MoveAttachedCard,
@@ -1242,14 +1825,12 @@ class PlayerState:
 
     def archive_holomem_from_play(self, card_id):
         card, _, zone_name = self.find_and_remove_card(card_id)
-        attached_cheer = card["attached_cheer"]
-        attached_support = card["attached_support"]
-        stacked_cards = card["stacked_cards"]
-        card["zone_when_downed"] = zone_name
-        card["attached_when_downed"] = attached_support.copy()
-        card["attached_cheer"] = []
-        card["attached_support"] = []
-        card["stacked_cards"] = []
+        attached_cheer = card.attached_cheer
+        attached_support = card.attached_support
+        stacked_cards = card.stacked_cards
+        card.zone_when_downed = zone_name
+        card.attached_when_downed = attached_support.copy()
+        self.reset_attachments(card)
 
         to_archive = attached_cheer + attached_support + stacked_cards
 
@@ -1261,10 +1842,10 @@ class PlayerState:
 
     def return_holomem_to_hand(self, card_id, include_stacked_holomem = False):
         returning_card, _, zone_name = self.find_and_remove_card(card_id)
-        returning_card["zone_when_returned_to_hand"] = zone_name
-        attached_cheer = returning_card["attached_cheer"]
-        attached_support = returning_card["attached_support"]
-        stacked_cards = returning_card["stacked_cards"]
+        returning_card.zone_when_returned_to_hand = zone_name
+        attached_cheer = returning_card.attached_cheer
+        attached_support = returning_card.attached_support
+        stacked_cards = returning_card.stacked_cards
 
         archived_ids = []
         hand_ids = []
@@ -1299,15 +1880,15 @@ class PlayerState:
 
     def set_holomem_hp(self, card_id, target_hp):
         card, _, _ = self.find_card(card_id)
-        if card["damage"] < self.get_card_hp(card) - target_hp:
-            previous_damage = card["damage"]
-            card["damage"] = self.get_card_hp(card) - target_hp
+        if card.damage < self.get_card_hp(card) - target_hp:
+            previous_damage = card.damage
+            card.damage = self.get_card_hp(card) - target_hp
             modify_hp_event = {
                 "event_type": EventType.EventType_ModifyHP,
                 "target_player_id": self.player_id,
                 "card_id": card_id,
-                "damage_done": card["damage"] - previous_damage,
-                "new_damage": card["damage"],
+                "damage_done": card.damage - previous_damage,
+                "new_damage": card.damage,
             }
             self.engine.broadcast_event(modify_hp_event)
 
@@ -1315,26 +1896,26 @@ class PlayerState:
         card, _, _ = self.find_card(card_id)
         healed_amount = 0
         if amount == "all":
-            healed_amount = card["damage"]
+            healed_amount = card.damage
         elif amount == "damage_dealt_floor_round_to_10s":
             if self.engine.after_damage_state:
                 damage_dealt = self.engine.after_damage_state.damage_dealt
                 healed_amount = 10 * (damage_dealt // 10)
-                healed_amount = min(healed_amount, card["damage"])
+                healed_amount = min(healed_amount, card.damage)
         elif amount == "restore_hp_per_cheer_color_types_10s":
             multiplier = len(self.get_cheer_color_types_on_holomems())
             healed_amount = 10 * multiplier
-            healed_amount = min(healed_amount, card["damage"])
+            healed_amount = min(healed_amount, card.damage)
         else:
-            healed_amount = min(amount, card["damage"])
+            healed_amount = min(amount, card.damage)
         if healed_amount > 0:
-            card["damage"] -= healed_amount
+            card.damage -= healed_amount
             modify_hp_event = {
                 "event_type": EventType.EventType_RestoreHP,
                 "target_player_id": self.player_id,
                 "card_id": card_id,
                 "healed_amount": healed_amount,
-                "new_damage": card["damage"],
+                "new_damage": card.damage,
             }
             self.engine.broadcast_event(modify_hp_event)
 
@@ -1343,13 +1924,21 @@ def ids_from_cards(cards):
 
 def replace_field_in_conditions(effect, field_id, replacement_value):
     if "conditions" in effect:
-        conditions = effect["conditions"]
-        for condition in conditions:
-            if field_id in condition:
-                condition[field_id] = replacement_value
+        # Conditions can be shared with the card definitions, so replace them instead of modifying.
+        effect["conditions"] = [
+            dict(condition, **{field_id: replacement_value}) if field_id in condition else condition
+            for condition in effect["conditions"]
+        ]
 
 def is_card_resting(card):
-    return "resting" in card and card["resting"]
+    return getattr(card, "resting", False)
+
+def copy_effects_with_ids(card_db, effects, player_id, card_id):
+    # Card definition effects are shared by every game, so add the ids to copies.
+    # Deep copies since nested effects ("and", choices) get ids added during resolution.
+    copied_effects = card_db.copy_effects(effects)
+    add_ids_to_effects(copied_effects, player_id, card_id)
+    return copied_effects
 
 def add_ids_to_effects(effects, player_id, card_id):
     for effect in effects:
@@ -1363,9 +1952,9 @@ def get_owner_id_from_card_id(card_id):
 def attach_card(attaching_card, target_card):
     card_type = attaching_card["card_type"]
     if card_type == "cheer":
-        target_card["attached_cheer"].append(attaching_card)
+        target_card.attached_cheer.append(attaching_card)
     else:
-        target_card["attached_support"].append(attaching_card)
+        target_card.attached_support.append(attaching_card)
 
 def is_card_limited(card):
     return "limited" in card and card["limited"]
@@ -1388,7 +1977,7 @@ def is_card_sub_type(card, sub_type: str) -> bool:
     return "sub_type" in card and card["sub_type"] == sub_type
 
 def get_cards_of_sub_type_from_holomems(sub_type: str, holomems: list) -> list:
-    return [card for holomem in holomems for card in holomem["attached_support"] if is_card_sub_type(card, sub_type)]
+    return [card for holomem in holomems for card in holomem.attached_support if is_card_sub_type(card, sub_type)]
 
 def is_card_equipment(card):
     return any(is_card_sub_type(card, sub_type) for sub_type in ["mascot", "tool", "fan"])
@@ -1399,20 +1988,33 @@ def is_card_cheer(card):
 def is_card_holomem(card):
     return card["card_type"] in ["holomem_debut", "holomem_bloom", "holomem_spot"]
 
-def filter_effects_at_timing(effects, timing):
-    return deepcopy([effect for effect in effects if effect["timing"] == timing])
+def filter_effects_at_timing(card_db, effects, timing):
+    return card_db.copy_effects([effect for effect in effects if effect["timing"] == timing])
 
 class GameEngine:
     def __init__(self,
         card_db:CardDatabase,
         game_type : str,
         player_infos : List[Dict[str, Any]],
+        headless : bool = False,
+        room_id : str = "",
     ):
         self.phase = GamePhase.Initializing
+        # Headless games (simulations, looking ahead, checking replays) play by the same rules
+        # but keep no events, don't run the clocks and aren't in the message latency stats.
+        self.headless = headless
+        # Off while replaying logged messages, see matchreplay.
+        self.record_latency = not headless
+        # Only for logging.
+        self.room_id = room_id
         self.game_first_turn = True
         self.card_db = card_db
+        # Events sent to one player, and BroadcastEvents for everyone.
         self.latest_events = []
         self.latest_observer_events = []
+        # Every BroadcastEvent in order, for observers catching up.
+        self.observer_log = []
+        self.observer_start_info = None
         self.all_game_messages = []
         self.all_events = []
         self.game_over_event = {}
@@ -1420,7 +2022,12 @@ class GameEngine:
         self.effect_resolution_state = None
         self.test_random_override = None
         self.turn_number = 0
-        self.floating_cards = []
+        self.floating_card_index = {}
+        self.floating_cards = CardZone("floating", self.floating_card_index)
+        self.debug_card_index = DEBUG_CARD_INDEX
+        # player_id -> section -> (change counts getter, change counts, actions)
+        self.mainstep_action_cache = {}
+        self.debug_mainstep_cache = DEBUG_MAINSTEP_CACHE
         self.down_holomem_state : DownHolomemState = None
         self.last_die_value = 0
         self.archive_count_required = 0
@@ -1442,6 +2049,9 @@ class GameEngine:
         self.performance_target_card = None
         self.performance_art = None
         self.performance_continuation = self.blank_continuation
+        # Continuations waiting for the loop in run_continuation.
+        self.queued_continuations = []
+        self.running_continuations = False
 
         self.seed = random.randint(0, 2**32 - 1)
         self.game_type = game_type
@@ -1455,6 +2065,26 @@ class GameEngine:
         for player_state in self.player_states:
             self.all_game_cards_map.update(player_state.game_cards_map)
 
+    def __getstate__(self):
+        # The main step cache is rebuilt as needed.
+        state = self.__dict__.copy()
+        state["mainstep_action_cache"] = {}
+        return state
+
+    def snapshot(self) -> bytes:
+        # The full game state, see gamesnapshot.
+        from app.gamesnapshot import snapshot_game
+        return snapshot_game(self)
+
+    @staticmethod
+    def restore(card_db : CardDatabase, snapshot : bytes) -> 'GameEngine':
+        from app.gamesnapshot import restore_game
+        return restore_game(card_db, snapshot)
+
+    def fork(self) -> 'GameEngine':
+        # An independent copy of the game, e.g. for looking ahead.
+        return GameEngine.restore(self.card_db, self.snapshot())
+
     def get_match_log(self):
         winner = "none"
         game_over_reason = GameOverReason.GameOverReason_Unset
@@ -1484,15 +2114,41 @@ class GameEngine:
         self.test_random_override = random_override
 
     def grab_events(self):
-        events = self.latest_events
+        events = []
+        for event in self.latest_events:
+            if isinstance(event, BroadcastEvent):
+                for player_index, player_id in enumerate(self.player_ids):
+                    events.append(event.player_view(player_index, player_id))
+            else:
+                events.append(event)
         self.latest_events = []
         return events
 
+    def grab_player_events(self, player_ids):
+        # The latest events split by player, for just the players listed.
+        # Broadcast event views are only built for them, anyone else's events are dropped.
+        events_by_player = {player_id: [] for player_id in player_ids}
+        audiences = [(player_index, player_id) for player_index, player_id in enumerate(self.player_ids) if player_id in events_by_player]
+        for event in self.latest_events:
+            if isinstance(event, BroadcastEvent):
+                for player_index, player_id in audiences:
+                    events_by_player[player_id].append(event.player_view(player_index, player_id))
+            else:
+                player_events = events_by_player.get(event["event_player_id"])
+                if player_events is not None:
+                    player_events.append(event)
+        self.latest_events = []
+        return events_by_player
+
     def grab_observer_events(self):
-        events = self.latest_observer_events
+        events = [event.observer_view() for event in self.latest_observer_events]
         self.latest_observer_events = []
         return events
 
+    def skip_observer_events(self):
+        # Nobody is watching, drop the events without building their views.
+        self.latest_observer_events = []
+
     def get_player(self, player_id:str):
         return self.player_states[self.player_ids.index(player_id)]
 
@@ -1500,7 +2156,13 @@ class GameEngine:
         return self.player_states[1 - self.player_ids.index(player_id)]
 
     def shuffle_list(self, lst):
-        self.random_gen.shuffle(lst)
+        if isinstance(lst, CardZone):
+            # Shuffle a plain copy so the index isn't updated for every swap.
+            cards = list(lst)
+            self.random_gen.shuffle(cards)
+            lst.reorder(cards)
+        else:
+            self.random_gen.shuffle(lst)
 
     def random_pick_list(self, lst):
         return self.random_gen.choice(lst)
@@ -1515,20 +2177,8 @@ class GameEngine:
         for player_state in self.player_states:
             card, _, _ = player_state.find_card(game_card_id)
             if not card:
-                for holomem in player_state.get_holomem_on_stage():
-                    for attachment in holomem["attached_support"]:
-                        if attachment["game_card_id"] == game_card_id:
-                            card = attachment
-                            return card
-                    for cheer in holomem["attached_cheer"]:
-                        if cheer["game_card_id"] == game_card_id:
-                            card = cheer
-                            return card
-                    for stacked in holomem["stacked_cards"]:
-                        if stacked["game_card_id"] == game_card_id:
-                            card = stacked
-                            return card
-            else:
+                card, _, _ = player_state.find_attached(game_card_id)
+            if card:
                 return card
         if not card:
             raise Exception(f"Card not found: {game_card_id}")
@@ -1589,42 +2239,36 @@ class GameEngine:
         self.phase = GamePhase.Mulligan
         self.handle_mulligan_phase()
 
-    def get_observer_catchup_events(self):
-        observer_events = [{
-            "event_player_id": "observer",
-            "event_type": EventType.EventType_GameStartInfo,
-            "event_number": -1,
-            "starting_player": self.starting_player_id,
-            "your_id": self.player_ids[0],
-            "opponent_id": self.player_ids[1],
-            "your_username": self.player_states[0].username,
-            "opponent_username": self.player_states[1].username,
-            "game_card_map": self.all_game_cards_map,
-        }]
-        for i in range(len(self.all_events)):
-            event = self.all_events[i]
-            observer_events.append(self.create_observer_event(event))
-        return observer_events
+    def get_observer_catchup_event_count(self):
+        # The game start info followed by every event so far.
+        return 1 + len(self.observer_log)
+
+    def get_observer_catchup_events(self, starting_event_index = 0, max_events = None):
+        # Index 0 is the game start info, index i is event i - 1.
+        # The views are built once and shared by every observer.
+        if self.observer_start_info is None:
+            self.observer_start_info = {
+                "event_player_id": "observer",
+                "event_type": EventType.EventType_GameStartInfo,
+                "event_number": -1,
+                "starting_player": self.starting_player_id,
+                "your_id": self.player_ids[0],
+                "opponent_id": self.player_ids[1],
+                "your_username": self.player_states[0].username,
+                "opponent_username": self.player_states[1].username,
+                "game_card_map": self.all_game_cards_map,
+            }
 
-    def create_observer_event(self, event):
-        event_copy = event.copy()
-        event_copy["event_player_id"] = "observer"
-        event_copy["your_clock_used"] = self.player_states[0].clock_time_used
-        event_copy["opponent_clock_used"] = self.player_states[1].clock_time_used
-        # Always sanitize.
-        hidden_fields = event.get("hidden_info_fields", [])
-        hidden_erase = event.get("hidden_info_erase", [])
-        for field in hidden_fields:
-            if field in hidden_erase:
-                event_copy[field] = None
+        ending_event_index = self.get_observer_catchup_event_count()
+        if max_events is not None:
+            ending_event_index = min(ending_event_index, starting_event_index + max_events)
+        observer_events = []
+        for index in range(max(starting_event_index, 0), ending_event_index):
+            if index == 0:
+                observer_events.append(self.observer_start_info)
             else:
-                # If the field is a single id, replace it.
-                # If it is a list, replace them all.
-                if isinstance(event_copy[field], str):
-                    event_copy[field] = UNKNOWN_CARD_ID
-                elif isinstance(event_copy[field], list):
-                    event_copy[field] = [UNKNOWN_CARD_ID] * len(event_copy[field])
-        return event_copy
+                observer_events.append(self.observer_log[index - 1].observer_view())
+        return observer_events
 
     def handle_mulligan_phase(self):
         # Are both players done mulliganing?
@@ -1649,42 +2293,29 @@ class GameEngine:
                 raise Exception("Unexpected: Player has already mulliganed.")
 
     def send_event(self, event):
+        if self.headless:
+            return
         self.latest_events.append(event)
 
     def broadcast_event(self, event):
+        if self.headless:
+            return
         event["event_number"] = len(self.all_events)
         event["last_game_message_number"] = len(self.all_game_messages) - 1
-        self.latest_observer_events.append(self.create_observer_event(event))
         self.all_events.append(event)
-        hidden_fields = event.get("hidden_info_fields", [])
-        hidden_erase = event.get("hidden_info_erase", [])
-        for player_state in self.player_states:
-            should_sanitize = not (player_state.player_id == event.get("hidden_info_player"))
-            new_event = {
-                "event_player_id": player_state.player_id,
-                **event,
-                "your_clock_used": player_state.clock_time_used,
-                "opponent_clock_used": self.other_player(player_state.player_id).clock_time_used,
-            }
-            if should_sanitize:
-                for field in hidden_fields:
-                    if field in hidden_erase:
-                        new_event[field] = None
-                    else:
-                        # If the field is a single id, replace it.
-                        # If it is a list, replace them all.
-                        if isinstance(new_event[field], str):
-                            new_event[field] = UNKNOWN_CARD_ID
-                        elif isinstance(new_event[field], list):
-                            new_event[field] = [UNKNOWN_CARD_ID] * len(new_event[field])
-            self.latest_events.append(new_event)
+        # Each player's and the observers' views are built when grabbed.
+        broadcast = BroadcastEvent(event, [player_state.clock_time_used for player_state in self.player_states])
+        self.latest_events.append(broadcast)
+        self.latest_observer_events.append(broadcast)
+        self.observer_log.append(broadcast)
 
     def set_decision(self, new_decision):
         if self.current_decision:
             raise Exception("Decision already set.")
         self.current_decision = new_decision
-        self.current_clock_player_id = new_decision["decision_player"]
-        self.clock_accumulation_start_time = time.time()
+        if not self.headless:
+            self.current_clock_player_id = new_decision["decision_player"]
+            self.clock_accumulation_start_time = time.time()
 
     def begin_initial_placement(self):
         self.phase = GamePhase.InitialPlacement
@@ -1804,7 +2435,7 @@ class GameEngine:
                 # No decision to be made.
                 new_center_id = new_center_option_ids[0]
                 active_player.move_card(new_center_id, "center")
-                continuation()
+                self.run_continuation(continuation)
             else:
                 decision_event = {
                     "event_type": EventType.EventType_ResetStepChooseNewCenter,
@@ -1820,7 +2451,7 @@ class GameEngine:
                     "continuation": continuation,
                 })
         else:
-            continuation()
+            self.run_continuation(continuation)
 
     def continue_begin_turn(self):
         # The Reset Step is over.
@@ -1863,11 +2494,49 @@ class GameEngine:
 
     def get_available_mainstep_actions(self):
         active_player = self.get_player(self.active_player_id)
+        changes = active_player.changes
 
-        # Determine available actions.
+        # Each section of actions is reused until something it depends on changes.
+        # The cached actions are shared, they are never modified after being sent.
+        available_actions = []
+        cache = self.mainstep_action_cache.setdefault(active_player.player_id, {})
+        for section, get_section_actions, base_dependencies, get_base_counts in MAINSTEP_ACTION_SECTIONS:
+            cached = cache.get(section)
+            if cached and cached[1] == cached[0](changes):
+                available_actions += cached[2]
+                continue
+
+            # Conditions checked while building add what they depend on.
+            condition_dependencies = []
+            section_actions = get_section_actions(self, active_player, condition_dependencies)
+            get_change_counts = get_base_counts
+            if condition_dependencies:
+                get_change_counts = change_counts_getter(set(base_dependencies).union(condition_dependencies))
+            cache[section] = (get_change_counts, get_change_counts(changes), section_actions)
+            available_actions += section_actions
+
+        if self.debug_mainstep_cache:
+            rebuilt_actions = self.build_mainstep_actions(active_player)
+            if available_actions != rebuilt_actions:
+                raise Exception(f"Main step action cache mismatch: {available_actions} != {rebuilt_actions}")
+
+        return available_actions
+
+    def build_mainstep_actions(self, active_player : PlayerState):
+        # All main step actions from scratch, without the cache.
         available_actions = []
+        for _, get_section_actions, _, _ in MAINSTEP_ACTION_SECTIONS:
+            available_actions.extend(get_section_actions(self, active_player, []))
+        return available_actions
+
+    def are_mainstep_conditions_met(self, dependencies, effect_player : PlayerState, source_card_id, conditions):
+        for condition in conditions:
+            dependencies.extend(MAINSTEP_CONDITION_DEPENDENCIES.get(condition["condition"], CHANGE_TAGS))
+        return self.are_conditions_met(effect_player, source_card_id, conditions)
 
+    def get_mainstep_place_holomem_actions(self, active_player : PlayerState, dependencies):
         # A. Place debut/spot cards.
+        available_actions = []
         on_stage_mems = active_player.get_holomem_on_stage()
         if len(on_stage_mems) < MAX_MEMBERS_ON_STAGE:
             for card in active_player.hand:
@@ -1876,14 +2545,19 @@ class GameEngine:
                         "action_type": GameAction.MainStepPlaceHolomem,
                         "card_id": card["game_card_id"]
                     })
+        return available_actions
 
+    def get_mainstep_bloom_actions(self, active_player : PlayerState, dependencies):
         # B. Bloom
+        available_actions = []
         if not active_player.first_turn:
-            for mem_card in on_stage_mems:
-                if mem_card["played_this_turn"]:
+            # A bloom card's hp doesn't depend on the target, only check it once.
+            bloom_card_hp = {}
+            for mem_card in active_player.get_holomem_on_stage():
+                if mem_card.played_this_turn:
                     # Can't bloom if played this turn.
                     continue
-                if mem_card["bloomed_this_turn"]:
+                if mem_card.bloomed_this_turn:
                     # Can't bloom if already bloomed this turn.
                     continue
 
@@ -1896,18 +2570,23 @@ class GameEngine:
                             # Check the names of the bloom card, at last one must match a name from the base card.
                             if any(name in card["card_names"] for name in mem_card["card_names"]):
                                 # Check the damage, if the bloom version would die, you can't.
-                                if mem_card["damage"] < active_player.get_card_hp(card):
+                                if card["game_card_id"] not in bloom_card_hp:
+                                    bloom_card_hp[card["game_card_id"]] = active_player.get_card_hp(card)
+                                if mem_card.damage < bloom_card_hp[card["game_card_id"]]:
                                     available_actions.append({
                                         "action_type": GameAction.MainStepBloom,
                                         "card_id": card["game_card_id"],
                                         "target_id": mem_card["game_card_id"],
                                     })
+        return available_actions
 
+    def get_mainstep_collab_actions(self, active_player : PlayerState, dependencies):
         # C. Collab
         # Can't have collabed this turn.
         # Must have a card in deck to move to holopower.
         # Collab spot must be empty!
         # Must have a non-resting backstage card.
+        available_actions = []
         if not active_player.collabed_this_turn and len(active_player.deck) > 0 and len(active_player.collab) == 0:
             for card in active_player.backstage:
                 if not is_card_resting(card):
@@ -1915,8 +2594,11 @@ class GameEngine:
                         "action_type": GameAction.MainStepCollab,
                         "card_id": card["game_card_id"],
                     })
+        return available_actions
 
+    def get_mainstep_oshi_skill_actions(self, active_player : PlayerState, dependencies):
         # D. Use Oshi skills.
+        available_actions = []
         for action in active_player.oshi_card["actions"]:
             skill_id = action["skill_id"]
             if action["limit"] == "once_per_turn" and active_player.has_used_once_per_turn_effect(skill_id):
@@ -1930,7 +2612,7 @@ class GameEngine:
                 continue
 
             if "action_conditions" in action:
-                if not self.are_conditions_met(active_player, active_player.oshi_card["game_card_id"], action["action_conditions"]):
+                if not self.are_mainstep_conditions_met(dependencies, active_player, active_player.oshi_card["game_card_id"], action["action_conditions"]):
                     continue
 
             available_actions.append({
@@ -1938,13 +2620,16 @@ class GameEngine:
                 "skill_cost": skill_cost,
                 "skill_id": skill_id,
             })
+        return available_actions
 
+    def get_mainstep_special_actions(self, active_player : PlayerState, dependencies):
         # E. Use effects from attached support cards.
+        available_actions = []
         for holomem in active_player.get_holomem_on_stage():
-            for attached_support in holomem["attached_support"]:
+            for attached_support in holomem.attached_support:
                 for action in attached_support.get("special_actions", []):
                     if "conditions" in action:
-                        if not self.are_conditions_met(active_player, attached_support["game_card_id"], action["conditions"]):
+                        if not self.are_mainstep_conditions_met(dependencies, active_player, attached_support["game_card_id"], action["conditions"]):
                             continue
 
                     available_actions.append({
@@ -1953,8 +2638,12 @@ class GameEngine:
                         "card_id": attached_support["game_card_id"],
                         "owning_card_id": holomem["game_card_id"]
                     })
+        return available_actions
 
+    def get_mainstep_play_support_actions(self, active_player : PlayerState, dependencies):
         # F. Use Support Cards
+        available_actions = []
+        cheer_on_each_mem = None
         for card in active_player.hand:
             if card["card_type"] == "support":
                 if is_card_limited(card):
@@ -1969,7 +2658,7 @@ class GameEngine:
                         continue
 
                 if "play_conditions" in card:
-                    if not self.are_conditions_met(active_player, card["game_card_id"], card["play_conditions"]):
+                    if not self.are_mainstep_conditions_met(dependencies, active_player, card["game_card_id"], card["play_conditions"]):
                         continue
 
                 # Restrictions for mascots and tools with regards to attaching to holomem.
@@ -1980,20 +2669,24 @@ class GameEngine:
                 if "play_requirements" in card:
                     play_requirements = card["play_requirements"]
 
-                cheer_on_each_mem = active_player.get_cheer_on_each_holomem(exclude_empty_members=True)
+                if cheer_on_each_mem is None:
+                    cheer_on_each_mem = active_player.get_cheer_on_each_holomem(exclude_empty_members=True)
                 available_actions.append({
                     "action_type": GameAction.MainStepPlaySupport,
                     "card_id": card["game_card_id"],
                     "play_requirements": play_requirements,
                     "cheer_on_each_mem": cheer_on_each_mem,
                 })
+        return available_actions
 
+    def get_mainstep_baton_pass_actions(self, active_player : PlayerState, dependencies):
         # G. Pass the baton
         # If center holomem is not resting, can swap with a back who is not resting by archiving Cheer.
         # Must be able to archive that much cheer from the center.
+        available_actions = []
         if len(active_player.center) > 0:
             center_mem = active_player.center[0]
-            cheer_on_mem = center_mem["attached_cheer"]
+            cheer_on_mem = center_mem.attached_cheer
             baton_cost = center_mem["baton_cost"]
             if active_player.can_move_front_stage() and not active_player.baton_pass_this_turn and \
                 not is_card_resting(center_mem) and len(cheer_on_mem) >= baton_cost:
@@ -2009,18 +2702,23 @@ class GameEngine:
                         "cost": baton_cost,
                         "available_cheer": ids_from_cards(cheer_on_mem),
                     })
+        return available_actions
 
+    def get_mainstep_begin_performance_actions(self, active_player : PlayerState, dependencies):
         # H. Begin Performance
+        available_actions = []
         if not (self.first_turn_player_id == active_player.player_id and active_player.first_turn):
             available_actions.append({
                 "action_type": GameAction.MainStepBeginPerformance,
             })
+        return available_actions
 
+    def get_mainstep_end_turn_actions(self, active_player : PlayerState, dependencies):
         # I. End Turn
+        available_actions = []
         available_actions.append({
             "action_type": GameAction.MainStepEndTurn,
         })
-
         return available_actions
 
     def send_main_step_actions(self):
@@ -2076,9 +2774,7 @@ class GameEngine:
         }
         self.broadcast_event(end_turn_event)
 
-        self.reset_step_replace_center(lambda :
-            self.begin_player_turn(switch_active_player=True)
-        )
+        self.reset_step_replace_center(Continuation(self, "begin_player_turn", True))
 
     def send_performance_step_actions(self):
         # Determine available actions.
@@ -2124,7 +2820,7 @@ class GameEngine:
         # * That card has the cheer attached that is required for the art.
         performers = active_player.get_holomem_on_stage(only_performers=True)
         for performer in performers:
-            if performer["resting"] or performer["used_art_this_turn"]:
+            if performer.resting or performer.used_art_this_turn:
                 continue
 
             opponent_performers = self.other_player(self.active_player_id).get_holomem_on_stage(only_performers=True, only_collab=target_can_only_be_collab)
@@ -2180,7 +2876,7 @@ class GameEngine:
         self.continue_performance_step()
 
     def continue_performance_step(self):
-        if self.performance_artstatboosts.repeat_art and self.performance_target_card["damage"] < self.performance_target_player.get_card_hp(self.performance_target_card):
+        if self.performance_artstatboosts.repeat_art and self.performance_target_card.damage < self.performance_target_player.get_card_hp(self.performance_target_card):
             self.begin_perform_art(
                 self.performance_performer_card["game_card_id"],
                 self.performance_art["art_id"],
@@ -2199,7 +2895,7 @@ class GameEngine:
         player = self.get_player(self.active_player_id)
         player.performance_attacked_this_turn = True
         performer, _, _ = player.find_card(performer_id)
-        performer["used_art_this_turn"] = True
+        performer.used_art_this_turn = True
         target_owner = self.other_player(self.active_player_id)
         target, _, _ = target_owner.find_card(target_id)
         art = next(art for art in performer["arts"] if art["art_id"] == art_id)
@@ -2224,7 +2920,7 @@ class GameEngine:
         self.performance_continuation = continuation
 
         # Get any before effects and resolve them.
-        art_effects = filter_effects_at_timing(art.get("art_effects", []), "before_art")
+        art_effects = filter_effects_at_timing(self.card_db, art.get("art_effects", []), "before_art")
         add_ids_to_effects(art_effects, player.player_id, performer_id)
         card_effects = player.get_effects_at_timing("before_art", performer)
         all_effects = card_effects + art_effects
@@ -2241,9 +2937,9 @@ class GameEngine:
         active_player = self.get_player(self.active_player_id)
 
         # Deal damage.
-        art_after_deal_damage_effects = filter_effects_at_timing(self.performance_art.get("art_effects", []), "after_deal_damage")
+        art_after_deal_damage_effects = filter_effects_at_timing(self.card_db, self.performance_art.get("art_effects", []), "after_deal_damage")
         add_ids_to_effects(art_after_deal_damage_effects, self.active_player_id, self.performance_performer_card["game_card_id"])
-        art_kill_effects = self.performance_art.get("on_kill_effects", [])
+        art_kill_effects = self.card_db.copy_effects(self.performance_art.get("on_kill_effects", []))
         add_ids_to_effects(art_kill_effects, self.active_player_id, self.performance_performer_card["game_card_id"])
         art_info = {
             "after_deal_damage_effects": art_after_deal_damage_effects,
@@ -2287,7 +2983,7 @@ class GameEngine:
                 "multi_to": True,
             })
         else:
-            continuation()
+            self.run_continuation(continuation)
 
     def deal_life_damage(self, target_player: PlayerState, dealing_card, damage: int, continuation):
         game_over = False
@@ -2316,13 +3012,13 @@ class GameEngine:
 
 
     def deal_damage(self, dealing_player : PlayerState, target_player : PlayerState, dealing_card, target_card, damage, special, prevent_life_loss, art_info, continuation):
-        if target_card["damage"] >= target_player.get_card_hp(target_card):
+        if target_card.damage >= target_player.get_card_hp(target_card):
             # Already dead somehow!
             # Just call the continuation, you don't get to kill them twice.
-            continuation()
+            self.run_continuation(continuation)
             return
 
-        target_card["damage"] += damage
+        target_card.damage += damage
 
         nested_state = None
         if self.take_damage_state:
@@ -2337,31 +3033,31 @@ class GameEngine:
         self.take_damage_state.target_card = target_card
         self.take_damage_state.art_info = art_info
         on_damage_effects = target_player.get_effects_at_timing("on_take_damage", target_card)
-        self.begin_resolving_effects(on_damage_effects, lambda :
-            self.continue_deal_damage(dealing_player, target_player, dealing_card, target_card, damage, special, prevent_life_loss, art_info, continuation)
-        )
+        self.begin_resolving_effects(on_damage_effects, Continuation(self, "continue_deal_damage",
+            dealing_player, target_player, dealing_card, target_card, damage, special, prevent_life_loss, art_info, continuation
+        ))
 
     def restore_holomem_hp(self, target_player : PlayerState, target_card_id, amount, continuation):
         target_card, _, _ = target_player.find_card(target_card_id)
-        before_damage = target_card["damage"]
+        before_damage = target_card.damage
         target_player.restore_holomem_hp(target_card_id, amount)
-        damage_healed = before_damage - target_card["damage"]
+        damage_healed = before_damage - target_card.damage
         if damage_healed > 0:
             on_restore_effects = target_player.get_effects_at_timing("on_restore_hp", target_card)
             self.begin_resolving_effects(on_restore_effects, continuation)
         else:
-            continuation()
+            self.run_continuation(continuation)
 
     def continue_deal_damage(self, dealing_player : PlayerState, target_player : PlayerState, dealing_card, target_card, damage, special, prevent_life_loss, art_info, continuation):
         if self.take_damage_state.added_damage:
-            target_card["damage"] += self.take_damage_state.added_damage
+            target_card.damage += self.take_damage_state.added_damage
             damage += self.take_damage_state.added_damage
 
         if self.take_damage_state.prevented_damage:
             # Recalculate the damage based on prevented damage.
-            target_card["damage"] -= damage
+            target_card.damage -= damage
             damage = max(0, damage - self.take_damage_state.prevented_damage)
-            target_card["damage"] += damage
+            target_card.damage += damage
         self.take_damage_state = self.take_damage_state.nested_state
 
         # Damage is decided here, so play the event.
@@ -2374,18 +3070,18 @@ class GameEngine:
         }
         self.broadcast_event(damage_event)
 
-        died = target_card["damage"] >= target_player.get_card_hp(target_card)
+        died = target_card.damage >= target_player.get_card_hp(target_card)
         if died:
-            self.begin_down_holomem(dealing_player, target_player, dealing_card, target_card, art_info, lambda :
-                self.complete_deal_damage(dealing_player, target_player, dealing_card, target_card, damage, special, prevent_life_loss, died, art_info, continuation))
+            self.begin_down_holomem(dealing_player, target_player, dealing_card, target_card, art_info, Continuation(self, "complete_deal_damage",
+                dealing_player, target_player, dealing_card, target_card, damage, special, prevent_life_loss, died, art_info, continuation))
         else:
             self.complete_deal_damage(dealing_player, target_player, dealing_card, target_card, damage, special, prevent_life_loss, died, art_info, continuation)
 
     def complete_deal_damage(self, dealing_player : PlayerState, target_player : PlayerState, dealing_card, target_card, damage, special, prevent_life_loss, died, art_info, continuation):
         if died:
-            self.process_downed_holomem(target_player, target_card, prevent_life_loss, lambda :
-                self.begin_after_deal_damage(dealing_player, target_player, dealing_card, target_card, damage, special, art_info, continuation)
-            )
+            self.process_downed_holomem(target_player, target_card, prevent_life_loss, Continuation(self, "begin_after_deal_damage",
+                dealing_player, target_player, dealing_card, target_card, damage, special, art_info, continuation
+            ))
         else:
             self.begin_after_deal_damage(dealing_player, target_player, dealing_card, target_card, damage, special, art_info, continuation)
 
@@ -2410,13 +3106,11 @@ class GameEngine:
         self.after_damage_state.target_card_zone = target_player.get_holomem_zone(target_card)
         self.after_damage_state.target_still_on_stage = target_card in target_player.get_holomem_on_stage()
 
-        self.begin_resolving_effects(after_effects, lambda :
-            self.complete_after_deal_damage(continuation)
-        )
+        self.begin_resolving_effects(after_effects, Continuation(self, "complete_after_deal_damage", continuation))
 
     def complete_after_deal_damage(self, continuation):
         self.after_damage_state = self.after_damage_state.nested_state
-        continuation()
+        self.run_continuation(continuation)
 
     def begin_down_holomem(self, dealing_player : PlayerState, target_player : PlayerState, dealing_card, target_card, art_info, continuation):
         player_kill_effects = dealing_player.get_effects_at_timing("on_kill", dealing_card)
@@ -2445,9 +3139,9 @@ class GameEngine:
         self.begin_resolving_effects(all_death_effects, continuation)
 
     def down_holomem(self, dealing_player : PlayerState, target_player : PlayerState, dealing_card, target_card, prevent_life_loss, continuation):
-        self.begin_down_holomem(dealing_player, target_player, dealing_card, target_card, [], lambda :
-            self.process_downed_holomem(target_player, target_card, prevent_life_loss, continuation)
-        )
+        self.begin_down_holomem(dealing_player, target_player, dealing_card, target_card, [], Continuation(self, "process_downed_holomem",
+            target_player, target_card, prevent_life_loss, continuation
+        ))
 
     def process_downed_holomem(self, target_player : PlayerState, target_card, prevent_life_loss, continuation):
         self.down_holomem_state = self.down_holomem_state.nested_state
@@ -2505,19 +3199,45 @@ class GameEngine:
         self.begin_resolving_effects(performer_cleanup_effects, self.continue_performance_step, [], simultaneous_choice=True)
 
     def begin_resolving_effects(self, effects, continuation, cards_to_cleanup = [], simultaneous_choice = False):
+        if not effects and not cards_to_cleanup:
+            # Nothing to resolve (the common case for timings like on_take_damage),
+            # skip setting up a resolution state.
+            if not self.is_game_over():
+                self.run_continuation(continuation)
+            return
+
         effect_continuation = continuation
         if self.effect_resolution_state:
             # There is already an effects resolution going down.
             # The current resolution will continue after this one.
-            outer_resolution_state = self.effect_resolution_state
-            def new_continuation():
-                # Reset the previous effect resolution state before calling the continuation.
-                self.effect_resolution_state = outer_resolution_state
-                continuation()
-            effect_continuation = new_continuation
-        self.effect_resolution_state = EffectResolutionState(effects, effect_continuation, cards_to_cleanup, simultaneous_choice)
+            effect_continuation = Continuation(self, "resume_effect_resolution", self.effect_resolution_state, continuation)
+        self.effect_resolution_state = EffectResolutionState(self.card_db, effects, effect_continuation, cards_to_cleanup, simultaneous_choice)
         self.continue_resolving_effects()
 
+    def run_continuation(self, continuation):
+        # Continuations called from inside another continuation are queued and run by
+        # the outermost call's loop, so long chains of effects don't keep deepening the stack.
+        if self.running_continuations:
+            self.queued_continuations.append(continuation)
+            return
+
+        self.running_continuations = True
+        try:
+            pending = [continuation]
+            while pending:
+                self.queued_continuations = []
+                pending.pop()()
+                # What that step queued runs next, in order, before anything queued earlier.
+                pending.extend(reversed(self.queued_continuations))
+        finally:
+            self.queued_continuations = []
+            self.running_continuations = False
+
+    def resume_effect_resolution(self, outer_resolution_state, continuation):
+        # Reset the previous effect resolution state before calling the continuation.
+        self.effect_resolution_state = outer_resolution_state
+        self.run_continuation(continuation)
+
     def continue_resolving_effects(self):
         if not self.effect_resolution_state.effects_to_resolve:
             for cleanup_card in self.effect_resolution_state.cards_to_cleanup:
@@ -2539,7 +3259,7 @@ class GameEngine:
             continuation = self.effect_resolution_state.effect_resolution_continuation
             self.effect_resolution_state = None
             if not self.is_game_over():
-                continuation()
+                self.run_continuation(continuation)
             return
 
         passed_on_continuation = False
@@ -2583,1943 +3303,2115 @@ class GameEngine:
             self.continue_resolving_effects()
 
     def are_conditions_met(self, effect_player: PlayerState, source_card_id, conditions):
+        compiled_conditions = self.card_db.compiled_conditions
         for condition in conditions:
-           if not self.is_condition_met(effect_player, source_card_id, condition):
-               return False
+            predicate = compiled_conditions.get(id(condition))
+            if predicate is None:
+                # Conditions copied during effect resolution aren't in the compiled table.
+                predicate = compile_condition(condition)
+            if not predicate(self, effect_player, source_card_id):
+                return False
         return True
 
     def is_condition_met(self, effect_player: PlayerState, source_card_id, condition):
-        match condition["condition"]:
-            case Condition.Condition_AnyTagHolomemHasCheer:
-                valid_tags = condition["condition_tags"]
-                for card in effect_player.get_holomem_on_stage():
-                    for tag in card["tags"]:
-                        if tag in valid_tags and len(card["attached_cheer"]) > 0:
-                            return True
-                return False
-            case Condition.Condition_AttachedTo:
-                required_member_name = condition["required_member_name"]
-                required_bloom_levels = condition.get("required_bloom_levels", [])
-                # Determine if source_card_id is attached to a holomem with the required name.
-                source_card = self.find_card(source_card_id)
-                owner_player = self.get_player(source_card["owner_id"])
-                holomems = owner_player.get_holomem_on_stage()
-                for holomem in holomems:
-                    if source_card_id in ids_from_cards(holomem["attached_support"]):
-                        if required_member_name in holomem["card_names"]:
-                            if not required_bloom_levels or holomem.get("bloom_level", -1) in required_bloom_levels:
-                                return True
-                # Check if there is an after damage state and if this the target card had this attached.
-                if self.after_damage_state and source_card_id in ids_from_cards(self.after_damage_state.target_card["attached_when_downed"]):
-                    if required_member_name in self.after_damage_state.target_card["card_names"]:
-                        if not required_bloom_levels or self.after_damage_state.target_card.get("bloom_level", -1) in required_bloom_levels:
-                            return True
-                return False
-            case Condition.Condition_AttachedToHasTags:
-                inverse = condition.get("inverse", False) # XOR the result to get the inverse
-                source_card = self.find_card(source_card_id)
-                owner_player = self.get_player(source_card["owner_id"])
-                holomems = owner_player.get_holomem_on_stage()
-                for holomem in holomems:
-                    if source_card_id in ids_from_cards(holomem["attached_support"]):
-                        return (len(set(holomem["tags"]) & set(condition["required_tags"])) > 0) ^ inverse
-                return False ^ inverse
-            case Condition.Condition_AttachedOwnerIsLocation:
-                required_location = condition["condition_location"]
-                holomems = effect_player.get_holomems_with_attachment(source_card_id)
-                if holomems:
-                    match required_location:
-                        case "backstage":
-                            return holomems[0] in effect_player.backstage
-                        case "center":
-                            return holomems[0] in effect_player.center
-                        case "collab":
-                            return holomems[0] in effect_player.collab
-                        case "center_or_collab":
-                            if holomems[0] in effect_player.center + effect_player.collab:
-                                return True
-                return False
-            case Condition.Condition_AttachedOwnerIsPerforming:
-                holomems = effect_player.get_holomems_with_attachment(source_card_id)
-                return self.performance_performer_card and self.performance_performer_card["game_card_id"] in ids_from_cards(holomems)
-            case Condition.Condition_BloomTargetIsDebut:
-                bloom_card, _, _ = effect_player.find_card(source_card_id)
-                # Bloom target is always in the 0 slot.
-                target_card = bloom_card["stacked_cards"][0]
-                return target_card["card_type"] == "holomem_debut"
-            case Condition.Condition_CanArchiveFromHand:
-                amount_min = condition.get("amount_min", 1)
-                requirement = condition.get("requirement", None)
-                condition_source = condition["condition_source"]
-                return effect_player.can_archive_from_hand(amount_min, condition_source, requirement)
-            case Condition.Condition_CanMoveFrontStage:
-                return effect_player.can_move_front_stage()
-            case Condition.Condition_CardsInHand:
-                amount_min = condition.get("amount_min", -1)
-                amount_max = condition.get("amount_max", -1)
-                if amount_max == -1:
-                    amount_max = UNLIMITED_SIZE
-                return amount_min <= len(effect_player.hand) <= amount_max
-            case Condition.Condition_CardTypeInHand:
-                card_types = condition["condition_card_types"]
-                return any(card["card_type"] in card_types for card in effect_player.hand)
-            case Condition.Condition_CenterIsColor:
-                if len(effect_player.center) == 0:
-                    return False
-                condition_colors = condition["condition_colors"]
-                center_colors = effect_player.center[0]["colors"]
-                if any(color in center_colors for color in condition_colors):
+        return self.are_conditions_met(effect_player, source_card_id, [condition])
+
+    def condition_any_tag_holomem_has_cheer(self, effect_player: PlayerState, source_card_id, condition):
+        valid_tags = condition["condition_tags"]
+        for card in effect_player.get_holomem_on_stage():
+            for tag in card["tags"]:
+                if tag in valid_tags and len(card.attached_cheer) > 0:
                     return True
-            case Condition.Condition_CenterHasAnyTag:
-                valid_tags = condition["condition_tags"]
-                if len(effect_player.center) == 0:
-                    return False
-                center_card = effect_player.center[0]
-                for tag in center_card["tags"]:
-                    if tag in valid_tags:
-                        return True
-                return False
-            case Condition.Condition_CheerInPlay:
-                amount_min = condition["amount_min"]
-                amount_max = condition["amount_max"]
-                if amount_max == -1:
-                    amount_max = UNLIMITED_SIZE
-                return amount_min <= len(effect_player.get_cheer_ids_on_holomems()) <= amount_max
-            case Condition.Condition_ChosenCardHasTag:
-                if len(self.last_chosen_cards) == 0:
-                    return False
-                chosen_card_id = self.last_chosen_cards[0]
-                chosen_card = self.find_card(chosen_card_id)
-                valid_tags = condition["condition_tags"]
-                return any(tag in chosen_card["tags"] for tag in valid_tags)
-            case Condition.Condition_CollabWith:
-                required_member_name = condition["required_member_name"]
-                holomems = effect_player.get_holomem_on_stage(only_performers=True)
-                return any(required_member_name in holomem["card_names"] for holomem in holomems)
-            case Condition.Condition_DamageAbilityIsColor:
-                condition_color = condition["condition_color"]
-                include_oshi_ability = condition.get("include_oshi_ability", False)
-                damage_source = self.after_damage_state.source_card
-                if damage_source["card_type"] == "oshi":
-                    return include_oshi_ability
-                return condition_color in damage_source["colors"]
-            case Condition.Condition_DamagedHolomemIsBackstage:
-                still_on_stage_required = condition.get("still_on_stage", False)
-                if still_on_stage_required and not self.after_damage_state.target_still_on_stage:
-                    return False
-                return self.after_damage_state.target_card_zone == "backstage"
-            case Condition.Condition_DamagedHolomemIsCenterOrCollab:
-                return self.after_damage_state.target_card_zone in ["center", "collab"]
-            case Condition.Condition_DamageSourceIsOpponent:
-                return self.take_damage_state.source_player.player_id != effect_player.player_id
-            case Condition.Condition_DownedCardBelongsToOpponent:
-                source_card = self.find_card(source_card_id)
-                owner_player = self.get_player(source_card["owner_id"])
-                return owner_player.player_id != self.down_holomem_state.holomem_card["owner_id"]
-            case Condition.Condition_DownedCardIsColor:
-                downed_card = self.down_holomem_state.holomem_card
-                condition_color = condition["condition_color"]
-                return condition_color in downed_card["colors"]
-            case Condition.Condition_EffectCardIdNotUsedThisTurn:
-                return not effect_player.has_used_card_effect_this_turn(source_card_id)
-            case Condition.Condition_HasAttachedCard:
-                required_card_name = condition["required_card_name"]
-                source_card = self.find_card(source_card_id)
-                # Check if the source card is attached with the mentioned card name
-                for support in source_card["attached_support"]:
-                    if required_card_name in support["card_names"]:
-                        return True
-                # Can be expanded to include other attachment zones
-                return False
-            case Condition.Condition_HasAttachmentOfType:
-                attachment_type = condition["condition_type"]
-                card, _, _ = effect_player.find_card(source_card_id)
-                for attachment in card["attached_support"]:
-                    if "sub_type" in attachment and attachment["sub_type"] == attachment_type:
-                        return True
-                return False
-            case Condition.Condition_HasAttachmentOfTypesAny:
-                attachment_types: list = condition["condition_types"]
-                card, _, _ = effect_player.find_card(source_card_id)
-                for attachment in card["attached_support"]:
-                    if attachment.get("sub_type") in attachment_types:
-                        return True
-                return False
-            case Condition.Condition_HasStackedHolomem:
-                amount_min = condition.get("amount_min", 1)
-                card, _, _ = effect_player.find_card(source_card_id)
-                stacked_holomems = [card for card in card["stacked_cards"] if is_card_holomem(card)]
-                return amount_min <= len(stacked_holomems)
-            case Condition.Condition_HolomemInArchive:
-                holomems = [holomem for holomem in effect_player.archive if is_card_holomem(holomem)]
-                if "tag_in" in condition:
-                    tags = condition["tag_in"]
-                    holomems = [holomem for holomem in holomems if any(tag in holomem["tags"] for tag in tags)]
-
-                amount_min = condition.get("amount_min", 1)
-                amount_max = condition.get("amount_max", len(holomems))
-                return amount_min <= len(holomems) <= amount_max
-            case Condition.Condition_HolomemOnStage:
-                holomems = []
-                match condition.get("location"):
-                    case "center":
-                        holomems = effect_player.center
-                    case "collab":
-                        holomems = effect_player.collab
-                    case _:
-                        holomems = effect_player.get_holomem_on_stage()
-
-                if "required_member_name_in" in condition:
-                    required_names_in = condition["required_member_name_in"]
-                    return any(member_name in holomem["card_names"] for member_name in required_names_in for holomem in holomems)
-                elif "exclude_member_name_in" in condition:
-                    exclude_names_in = condition["exclude_member_name_in"]
-                    if "tag_in" in condition:
-                        tags = condition["tag_in"]
-                        for holomem in holomems:
-                            if any(exclude_name in holomem["card_names"] for exclude_name in exclude_names_in):
-                                continue
-                            if any(tag in holomem["tags"] for tag in tags):
-                                return True
-                else:
-                    # No specific member needed, but still check tags.
-                    if "tag_in" in condition:
-                        tags = condition["tag_in"]
-                        for holomem in holomems:
-                            if any(tag in holomem["tags"] for tag in tags):
-                                return True
-                return False
-            case Condition.Condition_LastDieRolls:
-                match condition.get("roll_results"):
-                    case "any_odd":
-                        return any([value % 2 == 1 for value in effect_player.last_die_roll_results])
-                return False
-            case Condition.Condition_HolopowerAtLeast:
-                amount = condition["amount"]
-                return len(effect_player.holopower) >= amount
-            case Condition.Condition_NotUsedOncePerGameEffect:
-                condition_effect_id = condition["condition_effect_id"]
-                return not effect_player.has_used_once_per_game_effect(condition_effect_id)
-            case Condition.Condition_NotUsedOncePerTurnEffect:
-                condition_effect_id = condition["condition_effect_id"]
-                return not effect_player.has_used_once_per_turn_effect(condition_effect_id)
-            case Condition.Condition_OpponentTurn:
-                return self.active_player_id != effect_player.player_id
-            case Condition.Condition_OshiIs:
-                required_member_name = condition["required_member_name"]
-                return required_member_name in effect_player.oshi_card["card_names"]
-            case Condition.Condition_OshiIsColor:
-                condition_colors = condition["condition_colors"]
-                for color in condition_colors:
-                    if color in effect_player.oshi_card["colors"]:
-                        return True
-                return False
-            case Condition.Condition_PerformanceTargetHasDamageOverHp:
-                amount = condition["amount"]
-                return self.performance_target_card["damage"] >= self.performance_target_player.get_card_hp(self.performance_target_card) + amount
-            case Condition.Condition_PerformerIsCenter:
-                if len(self.performance_performing_player.center) == 0:
-                    return False
-                return self.performance_performing_player.center[0]["game_card_id"] == self.performance_performer_card["game_card_id"]
-            case Condition.Condition_PerformerIsCollab:
-                if len(self.performance_performing_player.collab) == 0:
-                    return False
-                return self.performance_performing_player.collab[0]["game_card_id"] == self.performance_performer_card["game_card_id"]
-            case Condition.Condition_PerformerIsColor:
-                condition_colors = condition["condition_colors"]
-                for color in self.performance_performer_card["colors"]:
-                    if color in condition_colors:
-                        return True
-                return False
-            case Condition.Condition_PerformerIsSpecificId:
-                required_id = condition["required_id"]
-                return self.performance_performer_card["game_card_id"] == required_id
-            case Condition.Condition_PerformerHasAnyTag:
-                valid_tags = condition["condition_tags"]
-                for tag in self.performance_performer_card["tags"]:
-                    if tag in valid_tags:
-                        return True
-                return False
-            case Condition.Condition_PerformerHasAttachmentOfType:
-                if not self.performance_performer_card:
-                    return False
-                attachment_type = condition["condition_type"]
-                for attachment in self.performance_performer_card["attached_support"]:
-                    if attachment.get("sub_type") == attachment_type:
-                        return True
-                return False
-            case Condition.Condition_PlayedSupportThisTurn:
-                return effect_player.played_support_this_turn
-            case Condition.Condition_RevealedCardsCount:
-                amount_min = condition["amount_min"]
-                return len(effect_player.last_revealed_cards) >= amount_min
-            case Condition.Condition_RevealedCardsHaveSameType:
-                revealed_cards = effect_player.last_revealed_cards
-                if len(revealed_cards) == 0:
-                    return False
-                match condition.get("condition_same_type"):
-                    case "holomem_same_bloom":
-                        # Cards should be holomem and of the same bloom level (Debut is level 0)
-                        base_card = revealed_cards[0] # the card that the rest of the cards will be compared to
-                        if not is_card_holomem(base_card):
-                            return False
-                        card_type = base_card["card_type"]
-                        bloom_level = base_card.get("bloom_level", 0)
-                        return all([card["card_type"] == card_type and card.get("bloom_level", 0) == bloom_level for card in revealed_cards[1:]])
-                return False
-            case Condition.Condition_SelfStageHasCheerColorTypes:
-                amount_min = condition["amount_min"]
-                source_card, _, _ = effect_player.find_card(source_card_id)
-                if source_card:
-                    return amount_min <= len(effect_player.get_cheer_color_types_on_holomems())
-                return False
-            case Condition.Condition_SelfHasCheerColor:
-                condition_colors = condition["condition_colors"]
-                amount_min = condition["amount_min"]
-                source_card, _, _ = effect_player.find_card(source_card_id)
-                if source_card:
-                    cheer_of_matched_colors = 0
-                    for cheer in source_card["attached_cheer"]:
-                        if "any" in condition_colors or any(color in cheer["colors"] for color in condition_colors):
-                            cheer_of_matched_colors += 1
-                    return amount_min <= cheer_of_matched_colors
-                return False
-            case Condition.Condition_StageHasSpace:
-                return len(effect_player.get_holomem_on_stage()) < MAX_MEMBERS_ON_STAGE
-            case Condition.Condition_TargetColor:
-                color_requirement = condition["color_requirement"]
-                return color_requirement in self.performance_target_card["colors"]
-            case Condition.Condition_TargetHasAnyTag:
-                valid_tags = condition["condition_tags"]
-                for tag in self.take_damage_state.target_card["tags"]:
-                    if tag in valid_tags:
-                        return True
-                return False
-            case Condition.Condition_TargetIsBackstage:
-                return self.performance_target_card in self.performance_target_player.backstage
-            case Condition.Condition_TargetIsNotBackstage:
-                return self.performance_target_card not in self.performance_target_player.backstage
-            case Condition.Condition_ThisCardIsCenter:
-                if len(effect_player.center) == 0:
-                    return False
-                return effect_player.center[0]["game_card_id"] == source_card_id
-            case Condition.Condition_ThisCardIsCollab:
-                if len(effect_player.collab) == 0:
-                    return False
-                return effect_player.collab[0]["game_card_id"] == source_card_id
-            case Condition.Condition_ThisCardIsPerforming:
-                return self.performance_performer_card and (self.performance_performer_card["game_card_id"] == source_card_id)
-            case Condition.Condition_TopDeckCardHasAnyCardType:
-                if len(effect_player.deck) == 0:
-                    return False
-                amount = condition.get("amount", 1)
-                valid_card_types = condition["condition_card_types"]
-                top_card_types = [card["card_type"] for card in effect_player.deck[:amount]]
-                return any(valid_card_type in top_card_types for valid_card_type in valid_card_types)
-            case Condition.Condition_TopDeckCardHasAnyTag:
-                valid_tags = condition["condition_tags"]
-                if len(effect_player.deck) == 0:
-                    return False
-                top_card = effect_player.deck[0]
-                if "tags" in top_card:
-                    for tag in top_card["tags"]:
-                        if tag in valid_tags:
-                            return True
-                return False
-            case Condition.Condition_ColorOnStage:
-                holomems = effect_player.get_holomem_on_stage()
-                condition_colors = condition["condition_colors"]
-                return any(True for color in condition_colors for holomem in holomems if color in holomem["colors"])
-            case _:
-                raise NotImplementedError(f"Unimplemented condition: {condition['condition']}")
         return False
 
-    def do_effect(self, effect_player : PlayerState, effect):
-        effect_player_id = effect_player.player_id
-        if "pre_effects" in effect:
-            # Do any do pre_effects right away (Assumption: no decisions/sub effects).
-            do_before_effects = effect["pre_effects"]
-            add_ids_to_effects(do_before_effects, effect_player_id, effect.get("source_card_id", None))
-            for do_before in do_before_effects:
-                self.do_effect(effect_player, do_before)
+    def condition_attached_to(self, effect_player: PlayerState, source_card_id, condition):
+        required_member_name = condition["required_member_name"]
+        required_bloom_levels = condition.get("required_bloom_levels", [])
+        # Determine if source_card_id is attached to a holomem with the required name.
+        source_card = self.find_card(source_card_id)
+        owner_player = self.get_player(source_card["owner_id"])
+        _, holomem, _ = owner_player.find_attached(source_card_id, ["attached_support"])
+        if holomem:
+            if required_member_name in holomem["card_names"]:
+                if not required_bloom_levels or holomem.get("bloom_level", -1) in required_bloom_levels:
+                    return True
+        # Check if there is an after damage state and if this the target card had this attached.
+        if self.after_damage_state and source_card_id in ids_from_cards(self.after_damage_state.target_card.attached_when_downed):
+            if required_member_name in self.after_damage_state.target_card["card_names"]:
+                if not required_bloom_levels or self.after_damage_state.target_card.get("bloom_level", -1) in required_bloom_levels:
+                    return True
+        return False
 
-        passed_on_continuation = False
-        match effect["effect_type"]:
-            case EffectType.EffectType_AddDamageTaken:
-                amount = effect["amount"]
-                self.take_damage_state.added_damage += amount
-                for_art = self.take_damage_state.art_info
-                self.send_boost_event(self.take_damage_state.target_card["game_card_id"], effect["source_card_id"], "damage_added", amount, for_art)
-            case EffectType.EffectType_AddTurnEffect:
-                effect["turn_effect"]["source_card_id"] = effect["source_card_id"]
-                effect_player.add_turn_effect(effect["turn_effect"])
-                event = {
-                    "event_type": EventType.EventType_AddTurnEffect,
-                    "effect_player_id": effect_player_id,
-                    "turn_effect": effect["turn_effect"],
-                }
-                self.broadcast_event(event)
-            case EffectType.EffectType_AddTurnEffectForHolomem:
-                holomem_targets = effect_player.get_holomem_on_stage()
-                limitation = effect.get("limitation", None)
-                if limitation:
-                    match limitation:
-                        case "color_in":
-                            limitation_colors = effect["limitation_colors"]
-                            holomem_targets = [holomem for holomem in holomem_targets if any(color in holomem["colors"] for color in limitation_colors)]
-                        case "last_chosen_holomem":
-                            holomem_targets = [holomem for holomem in holomem_targets if holomem["game_card_id"] == self.last_chosen_holomem_id]
-                        case "name_in":
-                            limitation_names = effect["limitation_names"]
-                            holomem_targets = [holomem for holomem in holomem_targets if any(name in holomem["card_names"] for name in limitation_names)]
-                turn_effect_copy = deepcopy(effect["turn_effect"])
-                turn_effect_copy["source_card_id"] = effect["source_card_id"]
-                holomem_targets = ids_from_cards(holomem_targets)
-                if len(holomem_targets) == 0:
-                    # No effect.
-                    pass
-                if len(holomem_targets) == 1:
-                    replace_field_in_conditions(turn_effect_copy, "required_id", holomem_targets[0])
-                    effect_player.add_turn_effect(turn_effect_copy)
-                    event = {
-                        "event_type": EventType.EventType_AddTurnEffect,
-                        "effect_player_id": effect_player_id,
-                        "turn_effect": turn_effect_copy,
-                    }
-                    self.broadcast_event(event)
-                else:
-                    # Ask the player to choose one.
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "cards_can_choose": holomem_targets,
-                        "effect": effect,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": holomem_targets,
-                        "cards_can_choose": holomem_targets,
-                        "amount_min": 1,
-                        "amount_max": 1,
-                        "turn_effect": turn_effect_copy,
-                        "effect_resolution": self.handle_add_turn_effect_for_holomem,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case EffectType.EffectType_AfterArchiveCheerCheck:
-                previous_archive_count = effect["previous_archive_count"]
-                current_archive_count = len(effect_player.archive)
-                ability_source = effect["ability_source"]
-                if previous_archive_count < current_archive_count:
-                    # The player archived some amount of cheer.
-                    after_archive_effects = effect_player.get_effects_at_timing("after_archive_cheer", None, ability_source)
-                    if self.performance_art:
-                        # Queue to cleanup effects.
-                        effect_player.add_performance_cleanup(after_archive_effects)
-                    else:
-                        # Add it to the rear of the queue.
-                        self.add_effects_to_rear(after_archive_effects)
-            case EffectType.EffectType_ArchiveCheerFromHolomem:
-                source_card, _, _ = effect_player.find_card(effect["source_card_id"])
-                ability_source = effect["ability_source"]
-                self.archive_count_required = effect["amount"]
-                before_archive_effects = effect_player.get_effects_at_timing("before_archive_cheer", source_card, ability_source)
-
-                def archive_cheer_continuation():
-                    amount = self.archive_count_required
-                    from_zone = effect["from"]
-                    required_colors = effect.get("required_colors", [])
-                    target_holomems = []
-                    ability_source = effect["ability_source"]
-                    match from_zone:
-                        case "self":
-                            source_card, _, _ = effect_player.find_card(effect["source_card_id"])
-                            target_holomems.append(source_card)
-                        case "holomem":
-                            target_holomems = effect_player.get_holomem_on_stage()
-                    cheer_options = []
-                    for holomem in target_holomems:
-                        if required_colors:
-                            matched_cheer = []
-                            for cheer in holomem["attached_cheer"]:
-                                if any(color in cheer["colors"] for color in required_colors):
-                                    matched_cheer.append(cheer)
-                            cheer_options += ids_from_cards(matched_cheer)
-                        else:
-                            cheer_options += ids_from_cards(holomem["attached_cheer"])
-                    after_archive_check_effect = {
-                        "player_id": effect_player_id,
-                        "effect_type": EffectType.EffectType_AfterArchiveCheerCheck,
-                        "effect_player_id": effect_player_id,
-                        "previous_archive_count": len(effect_player.archive),
-                        "ability_source": ability_source
-                    }
-                    self.add_effects_to_front([after_archive_check_effect])
-                    if amount == 0:
-                        self.continue_resolving_effects()
-                    elif amount == len(cheer_options):
-                        # Do it immediately.
-                        effect_player.archive_attached_cards(cheer_options)
-                        self.continue_resolving_effects()
-                    else:
-                        choose_event = {
-                            "event_type": EventType.EventType_Decision_ChooseCards,
-                            "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                            "effect_player_id": effect_player_id,
-                            "all_card_seen": cheer_options,
-                            "cards_can_choose": cheer_options,
-                            "from_zone": "holomem",
-                            "to_zone": "archive",
-                            "amount_min": amount,
-                            "amount_max": amount,
-                            "reveal_chosen": True,
-                            "remaining_cards_action": "nothing",
-                        }
-                        self.broadcast_event(choose_event)
-                        self.set_decision({
-                            "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                            "decision_player": effect_player_id,
-                            "all_card_seen": cheer_options,
-                            "cards_can_choose": cheer_options,
-                            "from_zone": "holomem",
-                            "to_zone": "archive",
-                            "amount_min": amount,
-                            "amount_max": amount,
-                            "reveal_chosen": True,
-                            "remaining_cards_action": "nothing",
-                            "source_card_id": effect["source_card_id"],
-                            "effect_resolution": self.handle_choose_cards_result,
-                            "continuation": self.continue_resolving_effects,
-                        })
+    def condition_attached_to_has_tags(self, effect_player: PlayerState, source_card_id, condition):
+        inverse = condition.get("inverse", False) # XOR the result to get the inverse
+        source_card = self.find_card(source_card_id)
+        owner_player = self.get_player(source_card["owner_id"])
+        _, holomem, _ = owner_player.find_attached(source_card_id, ["attached_support"])
+        if holomem:
+            return (len(set(holomem["tags"]) & set(condition["required_tags"])) > 0) ^ inverse
+        return False ^ inverse
+
+    def condition_attached_owner_is_location(self, effect_player: PlayerState, source_card_id, condition):
+        required_location = condition["condition_location"]
+        holomems = effect_player.get_holomems_with_attachment(source_card_id)
+        if holomems:
+            match required_location:
+                case "backstage":
+                    return holomems[0] in effect_player.backstage
+                case "center":
+                    return holomems[0] in effect_player.center
+                case "collab":
+                    return holomems[0] in effect_player.collab
+                case "center_or_collab":
+                    if holomems[0] in effect_player.center + effect_player.collab:
+                        return True
+        return False
 
-                self.begin_resolving_effects(before_archive_effects, archive_cheer_continuation)
-                passed_on_continuation = True
-            case EffectType.EffectType_ArchiveFromHand:
-                amount = effect["amount"]
-                ability_source = effect["ability_source"]
-                self.archive_count_required = amount
-                before_archive_effects = effect_player.get_effects_at_timing("before_archive", None, ability_source)
-                def archive_hand_continuation():
-                    if self.archive_count_required > 0:
-                        # Ask the player to pick cards from their hand to archive.
-                        cards_can_choose = []
-                        match effect.get("requirement"):
-                            case "holomem":
-                                cards_can_choose = ([card["game_card_id"] for card in effect_player.hand if is_card_holomem(card)])
-                            case _:
-                                cards_can_choose = ids_from_cards(effect_player.hand)
-                        all_card_seen = ids_from_cards(effect_player.hand)
-                        choose_event = {
-                            "event_type": EventType.EventType_Decision_ChooseCards,
-                            "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                            "effect_player_id": effect_player_id,
-                            "all_card_seen": all_card_seen,
-                            "cards_can_choose": cards_can_choose,
-                            "from_zone": "hand",
-                            "to_zone": "archive",
-                            "amount_min": self.archive_count_required,
-                            "amount_max": self.archive_count_required,
-                            "reveal_chosen": True,
-                            "remaining_cards_action": "nothing",
-                            "hidden_info_player": effect_player_id,
-                            "hidden_info_fields": ["all_card_seen", "cards_can_choose"],
-                        }
-                        self.broadcast_event(choose_event)
-                        self.set_decision({
-                            "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                            "decision_player": effect_player_id,
-                            "all_card_seen": all_card_seen,
-                            "cards_can_choose": cards_can_choose,
-                            "from_zone": "hand",
-                            "to_zone": "archive",
-                            "amount_min": self.archive_count_required,
-                            "amount_max": self.archive_count_required,
-                            "reveal_chosen": True,
-                            "remaining_cards_action": "nothing",
-                            "source_card_id": effect["source_card_id"],
-                            "effect_resolution": self.handle_choose_cards_result,
-                            "continuation": self.continue_resolving_effects,
-                        })
-                    else:
-                        self.continue_resolving_effects()
-                self.begin_resolving_effects(before_archive_effects, archive_hand_continuation)
-                passed_on_continuation = True
-            case EffectType.EffectType_ArchiveRevealedCards:
-                self.archive_count_required = len(effect_player.last_revealed_cards)
-                before_archive_effects = effect_player.get_effects_at_timing("before_archive", None)
-                def archive_revealed_cards_continuation():
-                    for revealed_card in effect_player.last_revealed_cards:
-                        effect_player.move_card(revealed_card["game_card_id"], "archive")
-                    self.continue_resolving_effects()
-                self.begin_resolving_effects(before_archive_effects, archive_revealed_cards_continuation)
-                passed_on_continuation = True
-            case EffectType.EffectType_ArchiveThisAttachment:
-                attachment_id = effect["source_card_id"]
-                effect_player.archive_attached_cards([attachment_id])
-            case EffectType.EffectType_ArchiveTopStackedHolomem:
-                card, _, _ = effect_player.find_card(effect["source_card_id"])
-                if len(card["stacked_cards"]) > 0:
-                    top_card = card["stacked_cards"][0]
-                    effect_player.archive_attached_cards([top_card["game_card_id"]])
-            case EffectType.EffectType_AttachCardToHolomem:
-                source_card_id = effect["source_card_id"]
-                continuation = self.continue_resolving_effects
-                if "continuation" in effect:
-                    # This effect can be called from elsewhere, so use special continuations
-                    # if they were added on.
-                    continuation = effect["continuation"]
-                holomem_targets = effect_player.get_holomem_on_stage()
-                to_limitation = effect.get("to_limitation", "")
-                to_limitation_colors = effect.get("to_limitation_colors", [])
-                to_limitation_tags = effect.get("to_limitation_tags", [])
-                to_limitation_name = effect.get("to_limitation_name", "")
-                match to_limitation:
-                    case "color_in":
-                        holomem_targets = [holomem for holomem in holomem_targets \
-                            if any(color in holomem["colors"] for color in to_limitation_colors)]
-                    case "specific_member_name":
-                        holomem_targets = [holomem for holomem in holomem_targets \
-                            if to_limitation_name in holomem["card_names"]]
-                    case "tag_in":
-                        holomem_targets = [holomem for holomem in holomem_targets \
-                            if any(tag in holomem["tags"] for tag in to_limitation_tags)]
-                    case "backstage":
-                        holomem_targets = effect_player.backstage
-
-                # restriction for mascots and tools
-                card_to_attach, _, _ = effect_player.find_card(source_card_id, include_stacked_cards=True)
-                # filters out cards that can be attached against support card restrictions
-                holomem_targets = [holomem for holomem in holomem_targets if self.holomem_can_be_attached_with_support_card(holomem, card_to_attach)]
-
-                if len(holomem_targets) > 0:
-                    attach_effect = {
-                        "effect_type": EffectType.EffectType_AttachCardToHolomem_Internal,
-                        "effect_player_id": effect_player.player_id,
-                        "card_id": source_card_id,
-                        "card_ids": [], # Filled in by the decision.
-                        "to_limitation": to_limitation,
-                        "to_limitation_colors": to_limitation_colors,
-                        "to_limitation_tags": to_limitation_tags,
-                        "to_limitation_name": to_limitation_name,
-                        "internal_skip_simultaneous_choice": True,
-                    }
-                    add_ids_to_effects([attach_effect], effect_player.player_id, source_card_id)
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player.player_id,
-                        "cards_can_choose": ids_from_cards(holomem_targets),
-                        "effect": attach_effect,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player.player_id,
-                        "all_card_seen": ids_from_cards(holomem_targets),
-                        "cards_can_choose": ids_from_cards(holomem_targets),
-                        "amount_min": 1,
-                        "amount_max": 1,
-                        "effect_to_run": attach_effect,
-                        "effect_resolution": self.handle_run_single_effect,
-                        "continuation": continuation,
-                    })
-                else:
-                    continuation()
-                    passed_on_continuation = True
-            case EffectType.EffectType_AttachCardToHolomem_Internal:
-                card_to_attach_id = effect["card_id"]
-                target_holomem_id = effect["card_ids"][0]
-                effect_player.move_card(card_to_attach_id, "holomem", target_holomem_id)
-            case EffectType.EffectType_BloomAlreadyBloomedThisTurn:
-                bloomed_cards_this_turn = [holomem for holomem in effect_player.get_holomem_on_stage() if holomem["bloomed_this_turn"]]
-                match effect.get("limitation"):
-                    case "tag_in":
-                        limitation_tags = effect.get("limitation_tags", [])
-                        bloomed_cards_this_turn = [h for h in bloomed_cards_this_turn if any(tag in h["tags"] for tag in limitation_tags)]
-                valid_blooms_dict = {}
-                for bloomed_card in bloomed_cards_this_turn:
-                    for card_in_hand in effect_player.hand:
-                        game_card_id = card_in_hand["game_card_id"]
-                        if effect_player.can_bloom_with_card(bloomed_card, card_in_hand) and game_card_id not in valid_blooms_dict:
-                            valid_blooms_dict[game_card_id] = card_in_hand
-                valid_blooms_in_hand = list(valid_blooms_dict.values())
-                if len(valid_blooms_in_hand) > 0:
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseCards,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "all_card_seen": ids_from_cards(valid_blooms_in_hand),
-                        "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
-                        "from_zone": "hand",
-                        "to_zone": "holomem",
-                        "amount_min": 0,
-                        "amount_max": 1,
-                        "special_reason": "bloom_already_bloomed_this_turn",
-                        "reveal_chosen": True,
-                        "remaining_cards_action": "nothing"
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": ids_from_cards(valid_blooms_in_hand),
-                        "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
-                        "amount_min": 0,
-                        "amount_max": 1,
-                        "target_cards": bloomed_cards_this_turn,
-                        "effect": effect,
-                        "effect_resolution": self.handle_chose_bloom_now_choose_target,
-                        "continuation": self.continue_resolving_effects
-                    })
-            case EffectType.EffectType_BloomDebutPlayedThisTurnTo1st:
-                location = effect["location"]
-                debuts = effect_player.get_debuts_played_this_turn(location)
-                valid_blooms_in_hand = []
-                for card in effect_player.hand:
-                    if card["card_type"] == "holomem_bloom" and card["bloom_level"] == 1:
-                        for debut in debuts:
-                            if effect_player.can_bloom_with_card(debut, card):
-                                valid_blooms_in_hand.append(card)
-                                break
-                if len(valid_blooms_in_hand) > 0:
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseCards,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "all_card_seen": ids_from_cards(valid_blooms_in_hand),
-                        "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
-                        "from_zone": "hand",
-                        "to_zone": "holomem",
-                        "amount_min": 0,
-                        "amount_max": 1,
-                        "special_reason": "bloom_debut_played_this_turn",
-                        "reveal_chosen": True,
-                        "remaining_cards_action": "nothing",
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": ids_from_cards(valid_blooms_in_hand),
-                        "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
-                        "amount_min": 0,
-                        "amount_max": 1,
-                        "target_cards": debuts,
-                        "effect": effect,
-                        "effect_resolution": self.handle_chose_bloom_now_choose_target,
-                        "continuation": self.continue_resolving_effects,
-                    })
+    def condition_attached_owner_is_performing(self, effect_player: PlayerState, source_card_id, condition):
+        holomems = effect_player.get_holomems_with_attachment(source_card_id)
+        return self.performance_performer_card and self.performance_performer_card["game_card_id"] in ids_from_cards(holomems)
+
+    def condition_bloom_target_is_debut(self, effect_player: PlayerState, source_card_id, condition):
+        bloom_card, _, _ = effect_player.find_card(source_card_id)
+        # Bloom target is always in the 0 slot.
+        target_card = bloom_card.stacked_cards[0]
+        return target_card["card_type"] == "holomem_debut"
+
+    def condition_can_archive_from_hand(self, effect_player: PlayerState, source_card_id, condition):
+        amount_min = condition.get("amount_min", 1)
+        requirement = condition.get("requirement", None)
+        condition_source = condition["condition_source"]
+        return effect_player.can_archive_from_hand(amount_min, condition_source, requirement)
+
+    def condition_can_move_front_stage(self, effect_player: PlayerState, source_card_id, condition):
+        return effect_player.can_move_front_stage()
+
+    def condition_cards_in_hand(self, effect_player: PlayerState, source_card_id, condition):
+        amount_min = condition.get("amount_min", -1)
+        amount_max = condition.get("amount_max", -1)
+        if amount_max == -1:
+            amount_max = UNLIMITED_SIZE
+        return amount_min <= len(effect_player.hand) <= amount_max
+
+    def condition_card_type_in_hand(self, effect_player: PlayerState, source_card_id, condition):
+        card_types = condition["condition_card_types"]
+        return any(card["card_type"] in card_types for card in effect_player.hand)
+
+    def condition_center_is_color(self, effect_player: PlayerState, source_card_id, condition):
+        if len(effect_player.center) == 0:
+            return False
+        condition_colors = condition["condition_colors"]
+        center_colors = effect_player.center[0]["colors"]
+        if any(color in center_colors for color in condition_colors):
+            return True
+        return False
 
-            case EffectType.EffectType_BlockOpponentMovement:
-                other_player = self.other_player(effect_player_id)
-                other_player.block_movement_for_turn = True
-            case EffectType.EffectType_Choice:
-                choice = deepcopy(effect["choice"])
-                if self.take_damage_state:
-                    for choice_effect in choice:
-                        choice_effect["incoming_damage_info"] = {
-                            "amount": self.take_damage_state.get_incoming_damage(),
-                            "source_id": self.take_damage_state.source_card["game_card_id"],
-                            "target_id": self.take_damage_state.target_card["game_card_id"],
-                            "special": self.take_damage_state.special,
-                            "prevent_life_loss": self.take_damage_state.prevent_life_loss,
-                        }
-                if "choice_populate_amount_x" in effect:
-                    match effect["choice_populate_amount_x"]:
-                        case "equal_to_last_damage":
-                            for option in choice:
-                                if "amount" in option and option["amount"] == "X":
-                                    option["amount"] = self.after_damage_state.damage_dealt
-                add_ids_to_effects(choice, effect_player_id, effect.get("source_card_id", None))
-                self.send_choice_to_player(effect_player_id, choice)
-            case EffectType.EffectType_ChooseCards:
-                from_zone = effect["from"]
-                destination = effect["destination"]
-                look_at = effect["look_at"]
-                amount_min = effect["amount_min"]
-                amount_max = effect["amount_max"]
-                requirement = effect.get("requirement", None)
-                requirement_block_limited = effect.get("requirement_block_limited", False)
-                requirement_bloom_levels = effect.get("requirement_bloom_levels", [])
-                requirement_buzz_blocked = effect.get("requirement_buzz_blocked", False)
-                requirement_names = effect.get("requirement_names", [])
-                requirement_tags = effect.get("requirement_tags", [])
-                requirement_id = effect.get("requirement_id", "")
-                requirement_match_oshi_color = effect.get("requirement_match_oshi_color", False)
-                requirement_only_holomems_with_any_tag = effect.get("requirement_only_holomems_with_any_tag", False)
-                requirement_colors = effect.get("requirement_colors", [])
-                requirement_sub_types = effect.get("requirement_sub_types", [])
-                requirement_same_name_as_last_choice = effect.get("requirement_same_name_as_last_choice", False)
-                reveal_chosen = effect.get("reveal_chosen", False)
-                remaining_cards_action = effect["remaining_cards_action"]
-                after_choose_effect = effect.get("after_choose_effect", None)
-                requirement_details = {
-                    "requirement": requirement,
-                    "requirement_block_limited": requirement_block_limited,
-                    "requirement_bloom_levels": requirement_bloom_levels,
-                    "requirement_buzz_blocked": requirement_buzz_blocked,
-                    "requirement_names": requirement_names,
-                    "requirement_tags": requirement_tags,
-                    "requirement_id": requirement_id,
-                    "requirement_match_oshi_color": requirement_match_oshi_color,
-                    "requirement_only_holomems_with_any_tag": requirement_only_holomems_with_any_tag,
-                    "requirement_colors": requirement_colors,
-                    "requirement_sub_types": requirement_sub_types,
-                    "requirement_same_name_as_last_choice": requirement_same_name_as_last_choice
-                }
+    def condition_center_has_any_tag(self, effect_player: PlayerState, source_card_id, condition):
+        valid_tags = condition["condition_tags"]
+        if len(effect_player.center) == 0:
+            return False
+        center_card = effect_player.center[0]
+        for tag in center_card["tags"]:
+            if tag in valid_tags:
+                return True
+        return False
 
-                cards_to_choose_from = []
-                match from_zone:
-                    case "archive":
-                        cards_to_choose_from = effect_player.archive
-                    case "attached_support":
-                        for holomem in effect_player.get_holomem_on_stage():
-                            cards_to_choose_from.extend(holomem["attached_support"])
-                    case "cheer_deck":
-                        cards_to_choose_from = effect_player.cheer_deck
-                    case "deck":
-                        cards_to_choose_from = effect_player.deck
-                    case "hand":
-                        cards_to_choose_from = effect_player.hand
-                    case "holopower":
-                        cards_to_choose_from = effect_player.holopower
-                    case "last_revealed_cards":
-                        cards_to_choose_from = effect_player.last_revealed_cards
-                    case "stacked_holomem":
-                        cards_to_choose_from = effect_player.get_holomem_under(effect["source_card_id"])
-
-                # If look_at is -1, look at all cards.
-                if look_at == -1:
-                    look_at = len(cards_to_choose_from)
-
-                # If look_at is greater than the number of cards, look at as many as you can.
-                look_at = min(look_at, len(cards_to_choose_from))
-
-                cards_to_choose_from = cards_to_choose_from[:look_at]
-                cards_can_choose = cards_to_choose_from
-                if requirement:
-                    match requirement:
-                        case "buzz":
-                            cards_can_choose = [card for card in cards_can_choose if "buzz" in card and card["buzz"]]
-                        case "cheer":
-                            # Only include cards that are cheer.
-                            cards_can_choose = [card for card in cards_can_choose if is_card_cheer(card)]
-                        case "color_in":
-                            requirement_colors = effect.get("requirement_colors", [])
-                            cards_can_choose = [card for card in cards_can_choose if any(color in card["colors"] for color in requirement_colors)]
-                        case "color_matches_holomems":
-                            # Only include cards that match the colors of the holomems on stage.
-                            cards_can_choose = [card for card in cards_can_choose if effect_player.matches_stage_holomems_color(card["colors"], tag_requirement=requirement_only_holomems_with_any_tag)]
-                        case "holomem":
-                            cards_can_choose = [card for card in cards_can_choose if is_card_holomem(card)]
-                        case "holomem_bloom":
-                            cards_can_choose = [card for card in cards_can_choose if card["card_type"] == "holomem_bloom"]
-                        case "holomem_debut":
-                            cards_can_choose = [card for card in cards_can_choose if card["card_type"] == "holomem_debut"]
-                        case "holomem_debut_or_bloom":
-                            cards_can_choose = [card for card in cards_can_choose if card["card_type"] in ["holomem_bloom", "holomem_debut"]]
-                        case "holomem_named":
-                            # Only include cards that have a name in the requirement_names list.
-                            cards_can_choose = [card for card in cards_can_choose \
-                                if "card_names" in card and any(name in card["card_names"] for name in requirement_names)]
-                        case "limited":
-                            # only include cards that are limited
-                            cards_can_choose = [card for card in cards_can_choose if is_card_limited(card)]
-                        case "specific_card":
-                            cards_can_choose = [card for card in cards_can_choose if card["card_id"] == requirement_id]
-                        case "support":
-                            # Only include cards that are supports.
-                            cards_can_choose = [card for card in cards_can_choose if card["card_type"] == "support"]
-
-                    # Exclude LIMITED if asked.
-                    if requirement_block_limited:
-                        cards_can_choose = [card for card in cards_can_choose if not is_card_limited(card)]
-
-                    # Exclude any based on bloom level.
-                    if requirement_bloom_levels:
-                        cards_can_choose = [card for card in cards_can_choose if "bloom_level" not in card or card["bloom_level"] in requirement_bloom_levels]
-
-                    # Exclude any buzz if required.
-                    if requirement_buzz_blocked:
-                        cards_can_choose = [card for card in cards_can_choose if "buzz" not in card or not card["buzz"]]
-
-                    # Restrict to only tagged cards.
-                    if requirement_tags:
-                        cards_can_choose = [card for card in cards_can_choose if any(tag in card.get("tags", []) for tag in requirement_tags)]
-
-                    # Restrict to oshi color.
-                    if requirement_match_oshi_color:
-                        cards_can_choose = [card for card in cards_can_choose if effect_player.matches_oshi_color(card["colors"])]
-
-                    # Restrict to specified support sub types
-                    if requirement_sub_types:
-                        cards_can_choose = [card for card in cards_can_choose if card.get("sub_type", "") in requirement_sub_types]
-
-                    # Restrict to same name as last choice from previous choose cards effect
-                    if requirement_same_name_as_last_choice:
-                        same_names = []
-                        for card_id in self.last_chosen_cards:
-                            card = self.find_card(card_id)
-                            same_names += card["card_names"]
-                        cards_can_choose = [card for card in cards_can_choose if any(name in card["card_names"] for name in same_names)]
-
-                if len(cards_can_choose) < amount_min:
-                    amount_min = len(cards_can_choose)
-
-                if len(cards_can_choose) < amount_max:
-                    amount_max = len(cards_can_choose)
-
-                choose_event = {
-                    "event_type": EventType.EventType_Decision_ChooseCards,
-                    "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                    "effect_player_id": effect_player_id,
-                    "all_card_seen": ids_from_cards(cards_to_choose_from),
-                    "cards_can_choose": ids_from_cards(cards_can_choose),
-                    "from_zone": from_zone,
-                    "to_zone": destination,
-                    "amount_min": amount_min,
-                    "amount_max": amount_max,
-                    "reveal_chosen": reveal_chosen,
-                    "remaining_cards_action": remaining_cards_action,
-                    "hidden_info_player": effect_player_id,
-                    "hidden_info_fields": ["all_card_seen", "cards_can_choose"],
-                    "requirement_details": requirement_details,
+    def condition_cheer_in_play(self, effect_player: PlayerState, source_card_id, condition):
+        amount_min = condition["amount_min"]
+        amount_max = condition["amount_max"]
+        if amount_max == -1:
+            amount_max = UNLIMITED_SIZE
+        return amount_min <= len(effect_player.get_cheer_ids_on_holomems()) <= amount_max
+
+    def condition_chosen_card_has_tag(self, effect_player: PlayerState, source_card_id, condition):
+        if len(self.last_chosen_cards) == 0:
+            return False
+        chosen_card_id = self.last_chosen_cards[0]
+        chosen_card = self.find_card(chosen_card_id)
+        valid_tags = condition["condition_tags"]
+        return any(tag in chosen_card["tags"] for tag in valid_tags)
+
+    def condition_collab_with(self, effect_player: PlayerState, source_card_id, condition):
+        required_member_name = condition["required_member_name"]
+        holomems = effect_player.get_holomem_on_stage(only_performers=True)
+        return any(required_member_name in holomem["card_names"] for holomem in holomems)
+
+    def condition_damage_ability_is_color(self, effect_player: PlayerState, source_card_id, condition):
+        condition_color = condition["condition_color"]
+        include_oshi_ability = condition.get("include_oshi_ability", False)
+        damage_source = self.after_damage_state.source_card
+        if damage_source["card_type"] == "oshi":
+            return include_oshi_ability
+        return condition_color in damage_source["colors"]
+
+    def condition_damaged_holomem_is_backstage(self, effect_player: PlayerState, source_card_id, condition):
+        still_on_stage_required = condition.get("still_on_stage", False)
+        if still_on_stage_required and not self.after_damage_state.target_still_on_stage:
+            return False
+        return self.after_damage_state.target_card_zone == "backstage"
+
+    def condition_damaged_holomem_is_center_or_collab(self, effect_player: PlayerState, source_card_id, condition):
+        return self.after_damage_state.target_card_zone in ["center", "collab"]
+
+    def condition_damage_source_is_opponent(self, effect_player: PlayerState, source_card_id, condition):
+        return self.take_damage_state.source_player.player_id != effect_player.player_id
+
+    def condition_downed_card_belongs_to_opponent(self, effect_player: PlayerState, source_card_id, condition):
+        source_card = self.find_card(source_card_id)
+        owner_player = self.get_player(source_card["owner_id"])
+        return owner_player.player_id != self.down_holomem_state.holomem_card["owner_id"]
+
+    def condition_downed_card_is_color(self, effect_player: PlayerState, source_card_id, condition):
+        downed_card = self.down_holomem_state.holomem_card
+        condition_color = condition["condition_color"]
+        return condition_color in downed_card["colors"]
+
+    def condition_effect_card_id_not_used_this_turn(self, effect_player: PlayerState, source_card_id, condition):
+        return not effect_player.has_used_card_effect_this_turn(source_card_id)
+
+    def condition_has_attached_card(self, effect_player: PlayerState, source_card_id, condition):
+        required_card_name = condition["required_card_name"]
+        source_card = self.find_card(source_card_id)
+        # Check if the source card is attached with the mentioned card name
+        for support in source_card.attached_support:
+            if required_card_name in support["card_names"]:
+                return True
+        # Can be expanded to include other attachment zones
+        return False
+
+    def condition_has_attachment_of_type(self, effect_player: PlayerState, source_card_id, condition):
+        attachment_type = condition["condition_type"]
+        card, _, _ = effect_player.find_card(source_card_id)
+        for attachment in card.attached_support:
+            if "sub_type" in attachment and attachment["sub_type"] == attachment_type:
+                return True
+        return False
+
+    def condition_has_attachment_of_types_any(self, effect_player: PlayerState, source_card_id, condition):
+        attachment_types: list = condition["condition_types"]
+        card, _, _ = effect_player.find_card(source_card_id)
+        for attachment in card.attached_support:
+            if attachment.get("sub_type") in attachment_types:
+                return True
+        return False
+
+    def condition_has_stacked_holomem(self, effect_player: PlayerState, source_card_id, condition):
+        amount_min = condition.get("amount_min", 1)
+        card, _, _ = effect_player.find_card(source_card_id)
+        stacked_holomems = [card for card in card.stacked_cards if is_card_holomem(card)]
+        return amount_min <= len(stacked_holomems)
+
+    def condition_holomem_in_archive(self, effect_player: PlayerState, source_card_id, condition):
+        holomems = [holomem for holomem in effect_player.archive if is_card_holomem(holomem)]
+        if "tag_in" in condition:
+            tags = condition["tag_in"]
+            holomems = [holomem for holomem in holomems if any(tag in holomem["tags"] for tag in tags)]
+
+        amount_min = condition.get("amount_min", 1)
+        amount_max = condition.get("amount_max", len(holomems))
+        return amount_min <= len(holomems) <= amount_max
+
+    def condition_holomem_on_stage(self, effect_player: PlayerState, source_card_id, condition):
+        holomems = []
+        match condition.get("location"):
+            case "center":
+                holomems = effect_player.center
+            case "collab":
+                holomems = effect_player.collab
+            case _:
+                holomems = effect_player.get_holomem_on_stage()
+
+        if "required_member_name_in" in condition:
+            required_names_in = condition["required_member_name_in"]
+            return any(member_name in holomem["card_names"] for member_name in required_names_in for holomem in holomems)
+        elif "exclude_member_name_in" in condition:
+            exclude_names_in = condition["exclude_member_name_in"]
+            if "tag_in" in condition:
+                tags = condition["tag_in"]
+                for holomem in holomems:
+                    if any(exclude_name in holomem["card_names"] for exclude_name in exclude_names_in):
+                        continue
+                    if any(tag in holomem["tags"] for tag in tags):
+                        return True
+        else:
+            # No specific member needed, but still check tags.
+            if "tag_in" in condition:
+                tags = condition["tag_in"]
+                for holomem in holomems:
+                    if any(tag in holomem["tags"] for tag in tags):
+                        return True
+        return False
+
+    def condition_last_die_rolls(self, effect_player: PlayerState, source_card_id, condition):
+        match condition.get("roll_results"):
+            case "any_odd":
+                return any([value % 2 == 1 for value in effect_player.last_die_roll_results])
+        return False
+
+    def condition_holopower_at_least(self, effect_player: PlayerState, source_card_id, condition):
+        amount = condition["amount"]
+        return len(effect_player.holopower) >= amount
+
+    def condition_not_used_once_per_game_effect(self, effect_player: PlayerState, source_card_id, condition):
+        condition_effect_id = condition["condition_effect_id"]
+        return not effect_player.has_used_once_per_game_effect(condition_effect_id)
+
+    def condition_not_used_once_per_turn_effect(self, effect_player: PlayerState, source_card_id, condition):
+        condition_effect_id = condition["condition_effect_id"]
+        return not effect_player.has_used_once_per_turn_effect(condition_effect_id)
+
+    def condition_opponent_turn(self, effect_player: PlayerState, source_card_id, condition):
+        return self.active_player_id != effect_player.player_id
+
+    def condition_oshi_is(self, effect_player: PlayerState, source_card_id, condition):
+        required_member_name = condition["required_member_name"]
+        return required_member_name in effect_player.oshi_card["card_names"]
+
+    def condition_oshi_is_color(self, effect_player: PlayerState, source_card_id, condition):
+        condition_colors = condition["condition_colors"]
+        for color in condition_colors:
+            if color in effect_player.oshi_card["colors"]:
+                return True
+        return False
+
+    def condition_performance_target_has_damage_over_hp(self, effect_player: PlayerState, source_card_id, condition):
+        amount = condition["amount"]
+        return self.performance_target_card.damage >= self.performance_target_player.get_card_hp(self.performance_target_card) + amount
+
+    def condition_performer_is_center(self, effect_player: PlayerState, source_card_id, condition):
+        if len(self.performance_performing_player.center) == 0:
+            return False
+        return self.performance_performing_player.center[0]["game_card_id"] == self.performance_performer_card["game_card_id"]
+
+    def condition_performer_is_collab(self, effect_player: PlayerState, source_card_id, condition):
+        if len(self.performance_performing_player.collab) == 0:
+            return False
+        return self.performance_performing_player.collab[0]["game_card_id"] == self.performance_performer_card["game_card_id"]
+
+    def condition_performer_is_color(self, effect_player: PlayerState, source_card_id, condition):
+        condition_colors = condition["condition_colors"]
+        for color in self.performance_performer_card["colors"]:
+            if color in condition_colors:
+                return True
+        return False
+
+    def condition_performer_is_specific_id(self, effect_player: PlayerState, source_card_id, condition):
+        required_id = condition["required_id"]
+        return self.performance_performer_card["game_card_id"] == required_id
+
+    def condition_performer_has_any_tag(self, effect_player: PlayerState, source_card_id, condition):
+        valid_tags = condition["condition_tags"]
+        for tag in self.performance_performer_card["tags"]:
+            if tag in valid_tags:
+                return True
+        return False
+
+    def condition_performer_has_attachment_of_type(self, effect_player: PlayerState, source_card_id, condition):
+        if not self.performance_performer_card:
+            return False
+        attachment_type = condition["condition_type"]
+        for attachment in self.performance_performer_card.attached_support:
+            if attachment.get("sub_type") == attachment_type:
+                return True
+        return False
+
+    def condition_played_support_this_turn(self, effect_player: PlayerState, source_card_id, condition):
+        return effect_player.played_support_this_turn
+
+    def condition_revealed_cards_count(self, effect_player: PlayerState, source_card_id, condition):
+        amount_min = condition["amount_min"]
+        return len(effect_player.last_revealed_cards) >= amount_min
+
+    def condition_revealed_cards_have_same_type(self, effect_player: PlayerState, source_card_id, condition):
+        revealed_cards = effect_player.last_revealed_cards
+        if len(revealed_cards) == 0:
+            return False
+        match condition.get("condition_same_type"):
+            case "holomem_same_bloom":
+                # Cards should be holomem and of the same bloom level (Debut is level 0)
+                base_card = revealed_cards[0] # the card that the rest of the cards will be compared to
+                if not is_card_holomem(base_card):
+                    return False
+                card_type = base_card["card_type"]
+                bloom_level = base_card.get("bloom_level", 0)
+                return all([card["card_type"] == card_type and card.get("bloom_level", 0) == bloom_level for card in revealed_cards[1:]])
+        return False
+
+    def condition_self_stage_has_cheer_color_types(self, effect_player: PlayerState, source_card_id, condition):
+        amount_min = condition["amount_min"]
+        source_card, _, _ = effect_player.find_card(source_card_id)
+        if source_card:
+            return amount_min <= len(effect_player.get_cheer_color_types_on_holomems())
+        return False
+
+    def condition_self_has_cheer_color(self, effect_player: PlayerState, source_card_id, condition):
+        condition_colors = condition["condition_colors"]
+        amount_min = condition["amount_min"]
+        source_card, _, _ = effect_player.find_card(source_card_id)
+        if source_card:
+            cheer_of_matched_colors = 0
+            for cheer in source_card.attached_cheer:
+                if "any" in condition_colors or any(color in cheer["colors"] for color in condition_colors):
+                    cheer_of_matched_colors += 1
+            return amount_min <= cheer_of_matched_colors
+        return False
+
+    def condition_stage_has_space(self, effect_player: PlayerState, source_card_id, condition):
+        return len(effect_player.get_holomem_on_stage()) < MAX_MEMBERS_ON_STAGE
+
+    def condition_target_color(self, effect_player: PlayerState, source_card_id, condition):
+        color_requirement = condition["color_requirement"]
+        return color_requirement in self.performance_target_card["colors"]
+
+    def condition_target_has_any_tag(self, effect_player: PlayerState, source_card_id, condition):
+        valid_tags = condition["condition_tags"]
+        for tag in self.take_damage_state.target_card["tags"]:
+            if tag in valid_tags:
+                return True
+        return False
+
+    def condition_target_is_backstage(self, effect_player: PlayerState, source_card_id, condition):
+        return self.performance_target_card in self.performance_target_player.backstage
+
+    def condition_target_is_not_backstage(self, effect_player: PlayerState, source_card_id, condition):
+        return self.performance_target_card not in self.performance_target_player.backstage
+
+    def condition_this_card_is_center(self, effect_player: PlayerState, source_card_id, condition):
+        if len(effect_player.center) == 0:
+            return False
+        return effect_player.center[0]["game_card_id"] == source_card_id
+
+    def condition_this_card_is_collab(self, effect_player: PlayerState, source_card_id, condition):
+        if len(effect_player.collab) == 0:
+            return False
+        return effect_player.collab[0]["game_card_id"] == source_card_id
+
+    def condition_this_card_is_performing(self, effect_player: PlayerState, source_card_id, condition):
+        return self.performance_performer_card and (self.performance_performer_card["game_card_id"] == source_card_id)
+
+    def condition_top_deck_has_any_card_type(self, effect_player: PlayerState, source_card_id, condition):
+        if len(effect_player.deck) == 0:
+            return False
+        amount = condition.get("amount", 1)
+        valid_card_types = condition["condition_card_types"]
+        top_card_types = [card["card_type"] for card in effect_player.deck[:amount]]
+        return any(valid_card_type in top_card_types for valid_card_type in valid_card_types)
+
+    def condition_top_deck_card_has_any_tag(self, effect_player: PlayerState, source_card_id, condition):
+        valid_tags = condition["condition_tags"]
+        if len(effect_player.deck) == 0:
+            return False
+        top_card = effect_player.deck[0]
+        if "tags" in top_card:
+            for tag in top_card["tags"]:
+                if tag in valid_tags:
+                    return True
+        return False
+
+    def condition_color_on_stage(self, effect_player: PlayerState, source_card_id, condition):
+        holomems = effect_player.get_holomem_on_stage()
+        condition_colors = condition["condition_colors"]
+        return any(True for color in condition_colors for holomem in holomems if color in holomem["colors"])
+
+    def do_effect(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        # Effects can change anything, for either player.
+        for player_state in self.player_states:
+            player_state.changes["effects"] += 1
+        if "pre_effects" in effect:
+            # Do any do pre_effects right away (Assumption: no decisions/sub effects).
+            do_before_effects = effect["pre_effects"]
+            add_ids_to_effects(do_before_effects, effect_player_id, effect.get("source_card_id", None))
+            for do_before in do_before_effects:
+                self.do_effect(effect_player, do_before)
+
+        effect_type = effect["effect_type"]
+        handler = EFFECT_HANDLERS.get(effect_type)
+        if handler is None:
+            raise NotImplementedError(f"Unimplemented effect type: {effect_type}")
+
+        if not effect_stats.enabled:
+            return bool(handler(self, effect_player, effect))
+        start_time = time.perf_counter()
+        try:
+            return bool(handler(self, effect_player, effect))
+        finally:
+            effect_stats.record(effect_type, time.perf_counter() - start_time)
+
+    def effect_add_damage_taken(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        self.take_damage_state.added_damage += amount
+        for_art = self.take_damage_state.art_info
+        self.send_boost_event(self.take_damage_state.target_card["game_card_id"], effect["source_card_id"], "damage_added", amount, for_art)
+
+    def effect_add_turn_effect(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        effect["turn_effect"]["source_card_id"] = effect["source_card_id"]
+        effect_player.add_turn_effect(effect["turn_effect"])
+        event = {
+            "event_type": EventType.EventType_AddTurnEffect,
+            "effect_player_id": effect_player_id,
+            "turn_effect": effect["turn_effect"],
+        }
+        self.broadcast_event(event)
+
+    def effect_add_turn_effect_for_holomem(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        holomem_targets = effect_player.get_holomem_on_stage()
+        limitation = effect.get("limitation", None)
+        if limitation:
+            match limitation:
+                case "color_in":
+                    limitation_colors = effect["limitation_colors"]
+                    holomem_targets = [holomem for holomem in holomem_targets if any(color in holomem["colors"] for color in limitation_colors)]
+                case "last_chosen_holomem":
+                    holomem_targets = [holomem for holomem in holomem_targets if holomem["game_card_id"] == self.last_chosen_holomem_id]
+                case "name_in":
+                    limitation_names = effect["limitation_names"]
+                    holomem_targets = [holomem for holomem in holomem_targets if any(name in holomem["card_names"] for name in limitation_names)]
+        turn_effect_copy = self.card_db.copy_effects(effect["turn_effect"])
+        turn_effect_copy["source_card_id"] = effect["source_card_id"]
+        holomem_targets = ids_from_cards(holomem_targets)
+        if len(holomem_targets) == 0:
+            # No effect.
+            pass
+        if len(holomem_targets) == 1:
+            replace_field_in_conditions(turn_effect_copy, "required_id", holomem_targets[0])
+            effect_player.add_turn_effect(turn_effect_copy)
+            event = {
+                "event_type": EventType.EventType_AddTurnEffect,
+                "effect_player_id": effect_player_id,
+                "turn_effect": turn_effect_copy,
+            }
+            self.broadcast_event(event)
+        else:
+            # Ask the player to choose one.
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "cards_can_choose": holomem_targets,
+                "effect": effect,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": holomem_targets,
+                "cards_can_choose": holomem_targets,
+                "amount_min": 1,
+                "amount_max": 1,
+                "turn_effect": turn_effect_copy,
+                "effect_resolution": self.handle_add_turn_effect_for_holomem,
+                "continuation": self.continue_resolving_effects,
+            })
+
+    def effect_after_archive_check(self, effect_player : PlayerState, effect):
+        previous_archive_count = effect["previous_archive_count"]
+        current_archive_count = len(effect_player.archive)
+        ability_source = effect["ability_source"]
+        if previous_archive_count < current_archive_count:
+            # The player archived some amount of cheer.
+            after_archive_effects = effect_player.get_effects_at_timing("after_archive_cheer", None, ability_source)
+            if self.performance_art:
+                # Queue to cleanup effects.
+                effect_player.add_performance_cleanup(after_archive_effects)
+            else:
+                # Add it to the rear of the queue.
+                self.add_effects_to_rear(after_archive_effects)
+
+    def effect_archive_cheer_from_holomem(self, effect_player : PlayerState, effect):
+        source_card, _, _ = effect_player.find_card(effect["source_card_id"])
+        ability_source = effect["ability_source"]
+        self.archive_count_required = effect["amount"]
+        before_archive_effects = effect_player.get_effects_at_timing("before_archive_cheer", source_card, ability_source)
+        self.begin_resolving_effects(before_archive_effects, Continuation(self, "continue_archive_cheer_from_holomem", effect_player, effect))
+        return True
+
+    def continue_archive_cheer_from_holomem(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        amount = self.archive_count_required
+        from_zone = effect["from"]
+        required_colors = effect.get("required_colors", [])
+        target_holomems = []
+        ability_source = effect["ability_source"]
+        match from_zone:
+            case "self":
+                source_card, _, _ = effect_player.find_card(effect["source_card_id"])
+                target_holomems.append(source_card)
+            case "holomem":
+                target_holomems = effect_player.get_holomem_on_stage()
+        cheer_options = []
+        for holomem in target_holomems:
+            if required_colors:
+                matched_cheer = []
+                for cheer in holomem.attached_cheer:
+                    if any(color in cheer["colors"] for color in required_colors):
+                        matched_cheer.append(cheer)
+                cheer_options += ids_from_cards(matched_cheer)
+            else:
+                cheer_options += ids_from_cards(holomem.attached_cheer)
+        after_archive_check_effect = {
+            "player_id": effect_player_id,
+            "effect_type": EffectType.EffectType_AfterArchiveCheerCheck,
+            "effect_player_id": effect_player_id,
+            "previous_archive_count": len(effect_player.archive),
+            "ability_source": ability_source
+        }
+        self.add_effects_to_front([after_archive_check_effect])
+        if amount == 0:
+            self.continue_resolving_effects()
+        elif amount == len(cheer_options):
+            # Do it immediately.
+            effect_player.archive_attached_cards(cheer_options)
+            self.continue_resolving_effects()
+        else:
+            choose_event = {
+                "event_type": EventType.EventType_Decision_ChooseCards,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "all_card_seen": cheer_options,
+                "cards_can_choose": cheer_options,
+                "from_zone": "holomem",
+                "to_zone": "archive",
+                "amount_min": amount,
+                "amount_max": amount,
+                "reveal_chosen": True,
+                "remaining_cards_action": "nothing",
+            }
+            self.broadcast_event(choose_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": cheer_options,
+                "cards_can_choose": cheer_options,
+                "from_zone": "holomem",
+                "to_zone": "archive",
+                "amount_min": amount,
+                "amount_max": amount,
+                "reveal_chosen": True,
+                "remaining_cards_action": "nothing",
+                "source_card_id": effect["source_card_id"],
+                "effect_resolution": self.handle_choose_cards_result,
+                "continuation": self.continue_resolving_effects,
+            })
+
+    def effect_archive_from_hand(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        ability_source = effect["ability_source"]
+        self.archive_count_required = amount
+        before_archive_effects = effect_player.get_effects_at_timing("before_archive", None, ability_source)
+        self.begin_resolving_effects(before_archive_effects, Continuation(self, "continue_archive_from_hand", effect_player, effect))
+        return True
+
+    def continue_archive_from_hand(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        if self.archive_count_required > 0:
+            # Ask the player to pick cards from their hand to archive.
+            cards_can_choose = []
+            match effect.get("requirement"):
+                case "holomem":
+                    cards_can_choose = ([card["game_card_id"] for card in effect_player.hand if is_card_holomem(card)])
+                case _:
+                    cards_can_choose = ids_from_cards(effect_player.hand)
+            all_card_seen = ids_from_cards(effect_player.hand)
+            choose_event = {
+                "event_type": EventType.EventType_Decision_ChooseCards,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "all_card_seen": all_card_seen,
+                "cards_can_choose": cards_can_choose,
+                "from_zone": "hand",
+                "to_zone": "archive",
+                "amount_min": self.archive_count_required,
+                "amount_max": self.archive_count_required,
+                "reveal_chosen": True,
+                "remaining_cards_action": "nothing",
+                "hidden_info_player": effect_player_id,
+                "hidden_info_fields": ["all_card_seen", "cards_can_choose"],
+            }
+            self.broadcast_event(choose_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": all_card_seen,
+                "cards_can_choose": cards_can_choose,
+                "from_zone": "hand",
+                "to_zone": "archive",
+                "amount_min": self.archive_count_required,
+                "amount_max": self.archive_count_required,
+                "reveal_chosen": True,
+                "remaining_cards_action": "nothing",
+                "source_card_id": effect["source_card_id"],
+                "effect_resolution": self.handle_choose_cards_result,
+                "continuation": self.continue_resolving_effects,
+            })
+        else:
+            self.continue_resolving_effects()
+
+    def effect_archive_revealed_cards(self, effect_player : PlayerState, effect):
+        self.archive_count_required = len(effect_player.last_revealed_cards)
+        before_archive_effects = effect_player.get_effects_at_timing("before_archive", None)
+        self.begin_resolving_effects(before_archive_effects, Continuation(self, "continue_archive_revealed_cards", effect_player))
+        return True
+
+    def continue_archive_revealed_cards(self, effect_player : PlayerState):
+        for revealed_card in effect_player.last_revealed_cards:
+            effect_player.move_card(revealed_card["game_card_id"], "archive")
+        self.continue_resolving_effects()
+
+    def effect_archive_this_attachment(self, effect_player : PlayerState, effect):
+        attachment_id = effect["source_card_id"]
+        effect_player.archive_attached_cards([attachment_id])
+
+    def effect_archive_top_stacked_holomem(self, effect_player : PlayerState, effect):
+        card, _, _ = effect_player.find_card(effect["source_card_id"])
+        if len(card.stacked_cards) > 0:
+            top_card = card.stacked_cards[0]
+            effect_player.archive_attached_cards([top_card["game_card_id"]])
+
+    def effect_attach_card_to_holomem(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        passed_on_continuation = False
+        source_card_id = effect["source_card_id"]
+        continuation = self.continue_resolving_effects
+        if "continuation" in effect:
+            # This effect can be called from elsewhere, so use special continuations
+            # if they were added on.
+            continuation = effect["continuation"]
+        holomem_targets = effect_player.get_holomem_on_stage()
+        to_limitation = effect.get("to_limitation", "")
+        to_limitation_colors = effect.get("to_limitation_colors", [])
+        to_limitation_tags = effect.get("to_limitation_tags", [])
+        to_limitation_name = effect.get("to_limitation_name", "")
+        match to_limitation:
+            case "color_in":
+                holomem_targets = [holomem for holomem in holomem_targets \
+                    if any(color in holomem["colors"] for color in to_limitation_colors)]
+            case "specific_member_name":
+                holomem_targets = [holomem for holomem in holomem_targets \
+                    if to_limitation_name in holomem["card_names"]]
+            case "tag_in":
+                holomem_targets = [holomem for holomem in holomem_targets \
+                    if any(tag in holomem["tags"] for tag in to_limitation_tags)]
+            case "backstage":
+                holomem_targets = effect_player.backstage
+
+        # restriction for mascots and tools
+        card_to_attach, _, _ = effect_player.find_card(source_card_id, include_stacked_cards=True)
+        # filters out cards that can be attached against support card restrictions
+        holomem_targets = [holomem for holomem in holomem_targets if self.holomem_can_be_attached_with_support_card(holomem, card_to_attach)]
+
+        if len(holomem_targets) > 0:
+            attach_effect = {
+                "effect_type": EffectType.EffectType_AttachCardToHolomem_Internal,
+                "effect_player_id": effect_player.player_id,
+                "card_id": source_card_id,
+                "card_ids": [], # Filled in by the decision.
+                "to_limitation": to_limitation,
+                "to_limitation_colors": to_limitation_colors,
+                "to_limitation_tags": to_limitation_tags,
+                "to_limitation_name": to_limitation_name,
+                "internal_skip_simultaneous_choice": True,
+            }
+            add_ids_to_effects([attach_effect], effect_player.player_id, source_card_id)
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player.player_id,
+                "cards_can_choose": ids_from_cards(holomem_targets),
+                "effect": attach_effect,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player.player_id,
+                "all_card_seen": ids_from_cards(holomem_targets),
+                "cards_can_choose": ids_from_cards(holomem_targets),
+                "amount_min": 1,
+                "amount_max": 1,
+                "effect_to_run": attach_effect,
+                "effect_resolution": self.handle_run_single_effect,
+                "continuation": continuation,
+            })
+        else:
+            self.run_continuation(continuation)
+            passed_on_continuation = True
+        return passed_on_continuation
+
+    def effect_attach_card_to_holomem_internal(self, effect_player : PlayerState, effect):
+        card_to_attach_id = effect["card_id"]
+        target_holomem_id = effect["card_ids"][0]
+        effect_player.move_card(card_to_attach_id, "holomem", target_holomem_id)
+
+    def effect_bloom_already_bloomed_this_turn(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        bloomed_cards_this_turn = [holomem for holomem in effect_player.get_holomem_on_stage() if holomem.bloomed_this_turn]
+        match effect.get("limitation"):
+            case "tag_in":
+                limitation_tags = effect.get("limitation_tags", [])
+                bloomed_cards_this_turn = [h for h in bloomed_cards_this_turn if any(tag in h["tags"] for tag in limitation_tags)]
+        valid_blooms_dict = {}
+        for bloomed_card in bloomed_cards_this_turn:
+            for card_in_hand in effect_player.hand:
+                game_card_id = card_in_hand["game_card_id"]
+                if effect_player.can_bloom_with_card(bloomed_card, card_in_hand) and game_card_id not in valid_blooms_dict:
+                    valid_blooms_dict[game_card_id] = card_in_hand
+        valid_blooms_in_hand = list(valid_blooms_dict.values())
+        if len(valid_blooms_in_hand) > 0:
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseCards,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "all_card_seen": ids_from_cards(valid_blooms_in_hand),
+                "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
+                "from_zone": "hand",
+                "to_zone": "holomem",
+                "amount_min": 0,
+                "amount_max": 1,
+                "special_reason": "bloom_already_bloomed_this_turn",
+                "reveal_chosen": True,
+                "remaining_cards_action": "nothing"
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": ids_from_cards(valid_blooms_in_hand),
+                "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
+                "amount_min": 0,
+                "amount_max": 1,
+                "target_cards": bloomed_cards_this_turn,
+                "effect": effect,
+                "effect_resolution": self.handle_chose_bloom_now_choose_target,
+                "continuation": self.continue_resolving_effects
+            })
+
+    def effect_bloom_debut_played_this_turn_to_1st(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        location = effect["location"]
+        debuts = effect_player.get_debuts_played_this_turn(location)
+        valid_blooms_in_hand = []
+        for card in effect_player.hand:
+            if card["card_type"] == "holomem_bloom" and card["bloom_level"] == 1:
+                for debut in debuts:
+                    if effect_player.can_bloom_with_card(debut, card):
+                        valid_blooms_in_hand.append(card)
+                        break
+        if len(valid_blooms_in_hand) > 0:
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseCards,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "all_card_seen": ids_from_cards(valid_blooms_in_hand),
+                "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
+                "from_zone": "hand",
+                "to_zone": "holomem",
+                "amount_min": 0,
+                "amount_max": 1,
+                "special_reason": "bloom_debut_played_this_turn",
+                "reveal_chosen": True,
+                "remaining_cards_action": "nothing",
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": ids_from_cards(valid_blooms_in_hand),
+                "cards_can_choose": ids_from_cards(valid_blooms_in_hand),
+                "amount_min": 0,
+                "amount_max": 1,
+                "target_cards": debuts,
+                "effect": effect,
+                "effect_resolution": self.handle_chose_bloom_now_choose_target,
+                "continuation": self.continue_resolving_effects,
+            })
+
+    def effect_block_opponent_movement(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        other_player = self.other_player(effect_player_id)
+        other_player.block_movement_for_turn = True
+
+    def effect_choice(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        choice = self.card_db.copy_effects(effect["choice"])
+        if self.take_damage_state:
+            for choice_effect in choice:
+                choice_effect["incoming_damage_info"] = {
+                    "amount": self.take_damage_state.get_incoming_damage(),
+                    "source_id": self.take_damage_state.source_card["game_card_id"],
+                    "target_id": self.take_damage_state.target_card["game_card_id"],
+                    "special": self.take_damage_state.special,
+                    "prevent_life_loss": self.take_damage_state.prevent_life_loss,
                 }
-                self.broadcast_event(choose_event)
-                self.set_decision({
-                    "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                    "decision_player": effect_player_id,
-                    "all_card_seen": ids_from_cards(cards_to_choose_from),
-                    "cards_can_choose": ids_from_cards(cards_can_choose),
-                    "from_zone": from_zone,
-                    "to_zone": destination,
-                    "to_limitation": effect.get("to_limitation", ""),
-                    "to_limitation_colors": effect.get("to_limitation_colors", []),
-                    "to_limitation_tags": effect.get("to_limitation_tags", []),
-                    "amount_min": amount_min,
-                    "amount_max": amount_max,
-                    "reveal_chosen": reveal_chosen,
-                    "remaining_cards_action": remaining_cards_action,
-                    "after_choose_effect": after_choose_effect,
-                    "source_card_id": effect["source_card_id"],
-                    "effect_resolution": self.handle_choose_cards_result,
-                    "continuation": self.continue_resolving_effects,
-                })
-            case EffectType.EffectType_DealDamage:
-                special = effect.get("special", False)
-                target = effect["target"]
-                opponent = effect.get("opponent", False)
-                amount = effect["amount"]
-                prevent_life_loss = effect.get("prevent_life_loss", False)
-                multiple_targets = effect.get("multiple_targets", None)
-                source_player = self.get_player(effect_player_id)
-                target_player = effect_player
-                if opponent:
-                    target_player = self.other_player(effect_player_id)
-                source_holomem_card, _, _ = source_player.find_card(effect["source_card_id"])
-                if not source_holomem_card:
-                    # Assume this is an attachment, find it on the holomem.
-                    for holomem in source_player.get_holomem_on_stage():
-                        for attachment in holomem["attached_support"]:
-                            if attachment["game_card_id"] == effect["source_card_id"]:
-                                source_holomem_card = holomem
-                                break
-                match str(amount):
-                    case "total_damage_on_backstage":
-                        amount = sum(card["damage"] for card in target_player.backstage)
-
-                target_cards = []
-                match target:
-                    case "backstage":
-                        target_cards = target_player.backstage
-                    case "center":
-                        target_cards = target_player.center
-                    case "collab":
-                        target_cards = target_player.collab
-                    case "center_or_collab":
-                        target_cards = target_player.center + target_player.collab
-                    case "current_damage_target":
-                        # Only valid if still on stage.
-                        if self.after_damage_state.target_card in target_player.get_holomem_on_stage():
-                            target_cards = [self.after_damage_state.target_card]
-                    case "holomem":
-                        target_cards = target_player.get_holomem_on_stage()
-                    case "self":
-                        target_cards = [source_holomem_card]
-                    case _:
-                        raise NotImplementedError("Only center is supported for now.")
-
-                targets_allowed = 1
-                if multiple_targets:
-                    if str(multiple_targets) == "all":
-                        targets_allowed = len(target_cards)
-                    else:
-                        targets_allowed = multiple_targets
-                if targets_allowed > len(target_cards):
-                    targets_allowed = len(target_cards)
+        if "choice_populate_amount_x" in effect:
+            match effect["choice_populate_amount_x"]:
+                case "equal_to_last_damage":
+                    for option in choice:
+                        if "amount" in option and option["amount"] == "X":
+                            option["amount"] = self.after_damage_state.damage_dealt
+        add_ids_to_effects(choice, effect_player_id, effect.get("source_card_id", None))
+        self.send_choice_to_player(effect_player_id, choice)
+
+    def effect_choose_cards(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        from_zone = effect["from"]
+        destination = effect["destination"]
+        look_at = effect["look_at"]
+        amount_min = effect["amount_min"]
+        amount_max = effect["amount_max"]
+        requirement = effect.get("requirement", None)
+        requirement_block_limited = effect.get("requirement_block_limited", False)
+        requirement_bloom_levels = effect.get("requirement_bloom_levels", [])
+        requirement_buzz_blocked = effect.get("requirement_buzz_blocked", False)
+        requirement_names = effect.get("requirement_names", [])
+        requirement_tags = effect.get("requirement_tags", [])
+        requirement_id = effect.get("requirement_id", "")
+        requirement_match_oshi_color = effect.get("requirement_match_oshi_color", False)
+        requirement_only_holomems_with_any_tag = effect.get("requirement_only_holomems_with_any_tag", False)
+        requirement_colors = effect.get("requirement_colors", [])
+        requirement_sub_types = effect.get("requirement_sub_types", [])
+        requirement_same_name_as_last_choice = effect.get("requirement_same_name_as_last_choice", False)
+        reveal_chosen = effect.get("reveal_chosen", False)
+        remaining_cards_action = effect["remaining_cards_action"]
+        after_choose_effect = effect.get("after_choose_effect", None)
+        requirement_details = {
+            "requirement": requirement,
+            "requirement_block_limited": requirement_block_limited,
+            "requirement_bloom_levels": requirement_bloom_levels,
+            "requirement_buzz_blocked": requirement_buzz_blocked,
+            "requirement_names": requirement_names,
+            "requirement_tags": requirement_tags,
+            "requirement_id": requirement_id,
+            "requirement_match_oshi_color": requirement_match_oshi_color,
+            "requirement_only_holomems_with_any_tag": requirement_only_holomems_with_any_tag,
+            "requirement_colors": requirement_colors,
+            "requirement_sub_types": requirement_sub_types,
+            "requirement_same_name_as_last_choice": requirement_same_name_as_last_choice
+        }
 
-                # Filter out any target cards that already have damage over their hp.
-                target_cards = [card for card in target_cards if card["damage"] < target_player.get_card_hp(card)]
-                if len(target_cards) == 0:
-                    pass
-                elif len(target_cards) == targets_allowed:
-                    target_cards.reverse()
-                    for i in range(targets_allowed):
-                        self.add_deal_damage_internal_effect(
-                            source_player,
-                            target_player,
-                            effect["source_card_id"],
-                            target_cards[i],
-                            amount,
-                            special,
-                            prevent_life_loss
-                        )
-                else:
-                    # Player gets to choose.
-                    # Choose holomem for effect.
-                    target_options = ids_from_cards(target_cards)
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "cards_can_choose": target_options,
-                        "amount_min": targets_allowed,
-                        "amount_max": targets_allowed,
-                        "effect": effect,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": target_options,
-                        "cards_can_choose": target_options,
-                        "amount_min": targets_allowed,
-                        "amount_max": targets_allowed,
-                        "effect_resolution": self.handle_deal_damage_to_holomem,
-                        "effect": effect,
-                        "source_card_id": effect["source_card_id"],
-                        "target_player": target_player,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case EffectType.EffectType_DealDamage_Internal:
-                source_player : PlayerState = effect["source_player"]
-                target_player = effect["target_player"]
-                source_card_id = effect["source_card_id"]
-                dealing_card, _, _ = source_player.find_card(source_card_id)
-                if not dealing_card:
-                    dealing_card = source_player.find_attachment(source_card_id)
-                target_card = effect["target_card"]
-                amount = effect["amount"]
-                special = effect["special"]
-                prevent_life_loss = effect["prevent_life_loss"]
-                self.deal_damage(source_player, target_player, dealing_card, target_card, amount, special, prevent_life_loss, {}, self.continue_resolving_effects)
-                passed_on_continuation = True
-            case EffectType.EffectType_DealDamagePerStacked:
-                holomems = []
-                match effect.get("stack_source"):
-                    case "center":
-                        holomems = effect_player.center
-                    case "all":
-                        holomems = effect_player.get_holomem_on_stage()
-                num_of_stacked_cards = len([card for holomem in holomems for card in holomem["stacked_cards"] if is_card_holomem(card)])
-                effect_copy = deepcopy(effect)
-                effect_copy["amount"] *= num_of_stacked_cards
-                effect_copy["effect_type"] = EffectType.EffectType_DealDamage
-                self.add_effects_to_front([effect_copy])
-            case EffectType.EffectType_DealLifeDamage:
-                amount = effect["amount"]
-                opponent = effect.get("opponent", False)
-                source_player = self.get_player(effect_player_id)
-                target_player = self.other_player(effect_player_id) if opponent else effect_player
-                source_holomem_card, _, _ = source_player.find_card(effect["source_card_id"])
-                if not source_holomem_card:
-                    # Assume this is an attachment, find it on the holomem.
-                    for holomem in source_player.get_holomem_on_stage():
-                        for attachment in holomem["attached_support"]:
-                            if attachment["game_card_id"] == effect["source_card_id"]:
-                                source_holomem_card = holomem
-                                break
-                self.deal_life_damage(target_player, source_holomem_card, amount, self.continue_resolving_effects)
-                passed_on_continuation = True
-            case EffectType.EffectType_DownHolomem:
-                target = effect["target"]
-                required_damage = effect["required_damage"]
-                prevent_life_loss = effect.get("prevent_life_loss", False)
-                source_player = self.get_player(effect_player_id)
-                target_player = self.other_player(effect_player_id)
-                source_card, _, _ = source_player.find_card(effect["source_card_id"])
-                if not source_card:
-                    # Assume this is an attachment, find it on the holomem.
-                    source_card = source_player.find_attachment(effect["source_card_id"])
-
-                target_cards = []
-                match target:
-                    case "backstage":
-                        target_cards = target_player.backstage
-                    case "center":
-                        target_cards = target_player.center
-                    case "collab":
-                        target_cards = target_player.collab
-                    case "center_or_collab":
-                        target_cards = target_player.center + target_player.collab
-                    case "holomem":
-                        target_cards = target_player.get_holomem_on_stage()
-                    case _:
-                        raise NotImplementedError("Missing target type")
-                # Restrict to the required damage
-                target_cards = [card for card in target_cards if card["damage"] >= required_damage]
-                if len(target_cards) == 0:
-                    pass
-                elif len(target_cards) == 1:
-                    self.down_holomem(source_player, target_player, source_card, target_cards[0], prevent_life_loss, self.continue_resolving_effects)
-                    passed_on_continuation = True
-                else:
-                    # Player gets to choose.
-                    # Choose holomem for effect.
-                    target_options = ids_from_cards(target_cards)
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "cards_can_choose": target_options,
-                        "effect": effect,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": target_options,
-                        "cards_can_choose": target_options,
-                        "amount_min": 1,
-                        "amount_max": 1,
-                        "effect_resolution": self.handle_down_holomem,
-                        "effect": effect,
-                        "source_card_id": effect["source_card_id"],
-                        "target_player": target_player,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case EffectType.EffectType_Draw:
-                amount = effect.get("amount", len(effect_player.hand))
-                if str(amount) == "last_card_count":
-                    amount = self.last_card_count
-                    self.last_card_count = 0
-                draw_to_hand_size = effect.get("draw_to_hand_size")
-                if draw_to_hand_size:
-                    amount = max(0, draw_to_hand_size - amount)
-                if amount > 0:
-                    target_player = effect_player
-                    if effect.get("opponent", False):
-                        target_player = self.other_player(effect_player_id)
-                    target_player.draw(amount)
-            case EffectType.EffectType_ForceDieResult:
-                die_result = effect["die_result"]
-                effect_player.set_next_die_roll = die_result
-            case EffectType.EffectType_GenerateChoiceTemplate:
-                template_choice = effect["template_choice"]
-                starts_at = effect["starts_at"]
-                ends_at = effect["ends_at"]
-                usage_count_restriction = effect["usage_count_restriction"]
-                can_pass = effect.get("can_pass", False)
-                max_count = ends_at
-                multi_value = effect.get("multi_value", 1)
-                match ends_at:
-                    case "archive_count_required":
-                        max_count = self.archive_count_required
-                        # Check to see if the starts_at and pass have to change.
-                        holopower_available = len(effect_player.holopower)
-                        cards_in_hand = len(effect_player.hand)
-                        must_pay_with_holo = self.archive_count_required - cards_in_hand
-                        if must_pay_with_holo > 0:
-                            starts_at = max(starts_at, must_pay_with_holo)
-                            can_pass = False
-                match usage_count_restriction:
-                    case "available_archive_from_hand":
-                        ability_source = effect["ability_source"]
-                        max_count = min(max_count, effect_player.get_can_archive_from_hand_count(ability_source))
-                    case "holopower":
-                        max_count = min(len(effect_player.holopower), max_count)
-                choices = []
-                for i in range(starts_at, max_count + 1):
-                    # Populate the "amount": "X"/"multiX" fields.
-                    new_choice = deepcopy(template_choice)
-                    if "amount" in new_choice:
-                        match new_choice["amount"]:
+        cards_to_choose_from = []
+        match from_zone:
+            case "archive":
+                cards_to_choose_from = effect_player.archive
+            case "attached_support":
+                for holomem in effect_player.get_holomem_on_stage():
+                    cards_to_choose_from.extend(holomem.attached_support)
+            case "cheer_deck":
+                cards_to_choose_from = effect_player.cheer_deck
+            case "deck":
+                cards_to_choose_from = effect_player.deck
+            case "hand":
+                cards_to_choose_from = effect_player.hand
+            case "holopower":
+                cards_to_choose_from = effect_player.holopower
+            case "last_revealed_cards":
+                cards_to_choose_from = effect_player.last_revealed_cards
+            case "stacked_holomem":
+                cards_to_choose_from = effect_player.get_holomem_under(effect["source_card_id"])
+
+        # If look_at is -1, look at all cards.
+        if look_at == -1:
+            look_at = len(cards_to_choose_from)
+
+        # If look_at is greater than the number of cards, look at as many as you can.
+        look_at = min(look_at, len(cards_to_choose_from))
+
+        cards_to_choose_from = cards_to_choose_from[:look_at]
+        cards_can_choose = cards_to_choose_from
+        if requirement:
+            match requirement:
+                case "buzz":
+                    cards_can_choose = [card for card in cards_can_choose if "buzz" in card and card["buzz"]]
+                case "cheer":
+                    # Only include cards that are cheer.
+                    cards_can_choose = [card for card in cards_can_choose if is_card_cheer(card)]
+                case "color_in":
+                    requirement_colors = effect.get("requirement_colors", [])
+                    cards_can_choose = [card for card in cards_can_choose if any(color in card["colors"] for color in requirement_colors)]
+                case "color_matches_holomems":
+                    # Only include cards that match the colors of the holomems on stage.
+                    cards_can_choose = [card for card in cards_can_choose if effect_player.matches_stage_holomems_color(card["colors"], tag_requirement=requirement_only_holomems_with_any_tag)]
+                case "holomem":
+                    cards_can_choose = [card for card in cards_can_choose if is_card_holomem(card)]
+                case "holomem_bloom":
+                    cards_can_choose = [card for card in cards_can_choose if card["card_type"] == "holomem_bloom"]
+                case "holomem_debut":
+                    cards_can_choose = [card for card in cards_can_choose if card["card_type"] == "holomem_debut"]
+                case "holomem_debut_or_bloom":
+                    cards_can_choose = [card for card in cards_can_choose if card["card_type"] in ["holomem_bloom", "holomem_debut"]]
+                case "holomem_named":
+                    # Only include cards that have a name in the requirement_names list.
+                    cards_can_choose = [card for card in cards_can_choose \
+                        if "card_names" in card and any(name in card["card_names"] for name in requirement_names)]
+                case "limited":
+                    # only include cards that are limited
+                    cards_can_choose = [card for card in cards_can_choose if is_card_limited(card)]
+                case "specific_card":
+                    cards_can_choose = [card for card in cards_can_choose if card["card_id"] == requirement_id]
+                case "support":
+                    # Only include cards that are supports.
+                    cards_can_choose = [card for card in cards_can_choose if card["card_type"] == "support"]
+
+            # Exclude LIMITED if asked.
+            if requirement_block_limited:
+                cards_can_choose = [card for card in cards_can_choose if not is_card_limited(card)]
+
+            # Exclude any based on bloom level.
+            if requirement_bloom_levels:
+                cards_can_choose = [card for card in cards_can_choose if "bloom_level" not in card or card["bloom_level"] in requirement_bloom_levels]
+
+            # Exclude any buzz if required.
+            if requirement_buzz_blocked:
+                cards_can_choose = [card for card in cards_can_choose if "buzz" not in card or not card["buzz"]]
+
+            # Restrict to only tagged cards.
+            if requirement_tags:
+                cards_can_choose = [card for card in cards_can_choose if any(tag in card.get("tags", []) for tag in requirement_tags)]
+
+            # Restrict to oshi color.
+            if requirement_match_oshi_color:
+                cards_can_choose = [card for card in cards_can_choose if effect_player.matches_oshi_color(card["colors"])]
+
+            # Restrict to specified support sub types
+            if requirement_sub_types:
+                cards_can_choose = [card for card in cards_can_choose if card.get("sub_type", "") in requirement_sub_types]
+
+            # Restrict to same name as last choice from previous choose cards effect
+            if requirement_same_name_as_last_choice:
+                same_names = []
+                for card_id in self.last_chosen_cards:
+                    card = self.find_card(card_id)
+                    same_names += card["card_names"]
+                cards_can_choose = [card for card in cards_can_choose if any(name in card["card_names"] for name in same_names)]
+
+        if len(cards_can_choose) < amount_min:
+            amount_min = len(cards_can_choose)
+
+        if len(cards_can_choose) < amount_max:
+            amount_max = len(cards_can_choose)
+
+        choose_event = {
+            "event_type": EventType.EventType_Decision_ChooseCards,
+            "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+            "effect_player_id": effect_player_id,
+            "all_card_seen": ids_from_cards(cards_to_choose_from),
+            "cards_can_choose": ids_from_cards(cards_can_choose),
+            "from_zone": from_zone,
+            "to_zone": destination,
+            "amount_min": amount_min,
+            "amount_max": amount_max,
+            "reveal_chosen": reveal_chosen,
+            "remaining_cards_action": remaining_cards_action,
+            "hidden_info_player": effect_player_id,
+            "hidden_info_fields": ["all_card_seen", "cards_can_choose"],
+            "requirement_details": requirement_details,
+        }
+        self.broadcast_event(choose_event)
+        self.set_decision({
+            "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+            "decision_player": effect_player_id,
+            "all_card_seen": ids_from_cards(cards_to_choose_from),
+            "cards_can_choose": ids_from_cards(cards_can_choose),
+            "from_zone": from_zone,
+            "to_zone": destination,
+            "to_limitation": effect.get("to_limitation", ""),
+            "to_limitation_colors": effect.get("to_limitation_colors", []),
+            "to_limitation_tags": effect.get("to_limitation_tags", []),
+            "amount_min": amount_min,
+            "amount_max": amount_max,
+            "reveal_chosen": reveal_chosen,
+            "remaining_cards_action": remaining_cards_action,
+            "after_choose_effect": after_choose_effect,
+            "source_card_id": effect["source_card_id"],
+            "effect_resolution": self.handle_choose_cards_result,
+            "continuation": self.continue_resolving_effects,
+        })
+
+    def effect_deal_damage(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        special = effect.get("special", False)
+        target = effect["target"]
+        opponent = effect.get("opponent", False)
+        amount = effect["amount"]
+        prevent_life_loss = effect.get("prevent_life_loss", False)
+        multiple_targets = effect.get("multiple_targets", None)
+        source_player = self.get_player(effect_player_id)
+        target_player = effect_player
+        if opponent:
+            target_player = self.other_player(effect_player_id)
+        source_holomem_card, _, _ = source_player.find_card(effect["source_card_id"])
+        if not source_holomem_card:
+            # Assume this is an attachment, find it on the holomem.
+            for holomem in source_player.get_holomem_on_stage():
+                for attachment in holomem.attached_support:
+                    if attachment["game_card_id"] == effect["source_card_id"]:
+                        source_holomem_card = holomem
+                        break
+        match str(amount):
+            case "total_damage_on_backstage":
+                amount = sum(card.damage for card in target_player.backstage)
+
+        target_cards = []
+        match target:
+            case "backstage":
+                target_cards = target_player.backstage
+            case "center":
+                target_cards = target_player.center
+            case "collab":
+                target_cards = target_player.collab
+            case "center_or_collab":
+                target_cards = target_player.center + target_player.collab
+            case "current_damage_target":
+                # Only valid if still on stage.
+                if self.after_damage_state.target_card in target_player.get_holomem_on_stage():
+                    target_cards = [self.after_damage_state.target_card]
+            case "holomem":
+                target_cards = target_player.get_holomem_on_stage()
+            case "self":
+                target_cards = [source_holomem_card]
+            case _:
+                raise NotImplementedError("Only center is supported for now.")
+
+        targets_allowed = 1
+        if multiple_targets:
+            if str(multiple_targets) == "all":
+                targets_allowed = len(target_cards)
+            else:
+                targets_allowed = multiple_targets
+        if targets_allowed > len(target_cards):
+            targets_allowed = len(target_cards)
+
+        # Filter out any target cards that already have damage over their hp.
+        target_cards = [card for card in target_cards if card.damage < target_player.get_card_hp(card)]
+        if len(target_cards) == 0:
+            pass
+        elif len(target_cards) == targets_allowed:
+            target_cards.reverse()
+            for i in range(targets_allowed):
+                self.add_deal_damage_internal_effect(
+                    source_player,
+                    target_player,
+                    effect["source_card_id"],
+                    target_cards[i],
+                    amount,
+                    special,
+                    prevent_life_loss
+                )
+        else:
+            # Player gets to choose.
+            # Choose holomem for effect.
+            target_options = ids_from_cards(target_cards)
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "cards_can_choose": target_options,
+                "amount_min": targets_allowed,
+                "amount_max": targets_allowed,
+                "effect": effect,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": target_options,
+                "cards_can_choose": target_options,
+                "amount_min": targets_allowed,
+                "amount_max": targets_allowed,
+                "effect_resolution": self.handle_deal_damage_to_holomem,
+                "effect": effect,
+                "source_card_id": effect["source_card_id"],
+                "target_player": target_player,
+                "continuation": self.continue_resolving_effects,
+            })
+
+    def effect_deal_damage_internal(self, effect_player : PlayerState, effect):
+        source_player : PlayerState = effect["source_player"]
+        target_player = effect["target_player"]
+        source_card_id = effect["source_card_id"]
+        dealing_card, _, _ = source_player.find_card(source_card_id)
+        if not dealing_card:
+            dealing_card = source_player.find_attachment(source_card_id)
+        target_card = effect["target_card"]
+        amount = effect["amount"]
+        special = effect["special"]
+        prevent_life_loss = effect["prevent_life_loss"]
+        self.deal_damage(source_player, target_player, dealing_card, target_card, amount, special, prevent_life_loss, {}, self.continue_resolving_effects)
+        return True
+
+    def effect_deal_damage_per_stacked(self, effect_player : PlayerState, effect):
+        holomems = []
+        match effect.get("stack_source"):
+            case "center":
+                holomems = effect_player.center
+            case "all":
+                holomems = effect_player.get_holomem_on_stage()
+        num_of_stacked_cards = len([card for holomem in holomems for card in holomem.stacked_cards if is_card_holomem(card)])
+        effect_copy = self.card_db.copy_effects(effect)
+        effect_copy["amount"] *= num_of_stacked_cards
+        effect_copy["effect_type"] = EffectType.EffectType_DealDamage
+        self.add_effects_to_front([effect_copy])
+
+    def effect_deal_life_damage(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        amount = effect["amount"]
+        opponent = effect.get("opponent", False)
+        source_player = self.get_player(effect_player_id)
+        target_player = self.other_player(effect_player_id) if opponent else effect_player
+        source_holomem_card, _, _ = source_player.find_card(effect["source_card_id"])
+        if not source_holomem_card:
+            # Assume this is an attachment, find it on the holomem.
+            for holomem in source_player.get_holomem_on_stage():
+                for attachment in holomem.attached_support:
+                    if attachment["game_card_id"] == effect["source_card_id"]:
+                        source_holomem_card = holomem
+                        break
+        self.deal_life_damage(target_player, source_holomem_card, amount, self.continue_resolving_effects)
+        return True
+
+    def effect_down_holomem(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        passed_on_continuation = False
+        target = effect["target"]
+        required_damage = effect["required_damage"]
+        prevent_life_loss = effect.get("prevent_life_loss", False)
+        source_player = self.get_player(effect_player_id)
+        target_player = self.other_player(effect_player_id)
+        source_card, _, _ = source_player.find_card(effect["source_card_id"])
+        if not source_card:
+            # Assume this is an attachment, find it on the holomem.
+            source_card = source_player.find_attachment(effect["source_card_id"])
+
+        target_cards = []
+        match target:
+            case "backstage":
+                target_cards = target_player.backstage
+            case "center":
+                target_cards = target_player.center
+            case "collab":
+                target_cards = target_player.collab
+            case "center_or_collab":
+                target_cards = target_player.center + target_player.collab
+            case "holomem":
+                target_cards = target_player.get_holomem_on_stage()
+            case _:
+                raise NotImplementedError("Missing target type")
+        # Restrict to the required damage
+        target_cards = [card for card in target_cards if card.damage >= required_damage]
+        if len(target_cards) == 0:
+            pass
+        elif len(target_cards) == 1:
+            self.down_holomem(source_player, target_player, source_card, target_cards[0], prevent_life_loss, self.continue_resolving_effects)
+            passed_on_continuation = True
+        else:
+            # Player gets to choose.
+            # Choose holomem for effect.
+            target_options = ids_from_cards(target_cards)
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "cards_can_choose": target_options,
+                "effect": effect,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": target_options,
+                "cards_can_choose": target_options,
+                "amount_min": 1,
+                "amount_max": 1,
+                "effect_resolution": self.handle_down_holomem,
+                "effect": effect,
+                "source_card_id": effect["source_card_id"],
+                "target_player": target_player,
+                "continuation": self.continue_resolving_effects,
+            })
+        return passed_on_continuation
+
+    def effect_draw(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        amount = effect.get("amount", len(effect_player.hand))
+        if str(amount) == "last_card_count":
+            amount = self.last_card_count
+            self.last_card_count = 0
+        draw_to_hand_size = effect.get("draw_to_hand_size")
+        if draw_to_hand_size:
+            amount = max(0, draw_to_hand_size - amount)
+        if amount > 0:
+            target_player = effect_player
+            if effect.get("opponent", False):
+                target_player = self.other_player(effect_player_id)
+            target_player.draw(amount)
+
+    def effect_force_die_result(self, effect_player : PlayerState, effect):
+        die_result = effect["die_result"]
+        effect_player.set_next_die_roll = die_result
+
+    def effect_generate_choice_template(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        template_choice = effect["template_choice"]
+        starts_at = effect["starts_at"]
+        ends_at = effect["ends_at"]
+        usage_count_restriction = effect["usage_count_restriction"]
+        can_pass = effect.get("can_pass", False)
+        max_count = ends_at
+        multi_value = effect.get("multi_value", 1)
+        match ends_at:
+            case "archive_count_required":
+                max_count = self.archive_count_required
+                # Check to see if the starts_at and pass have to change.
+                holopower_available = len(effect_player.holopower)
+                cards_in_hand = len(effect_player.hand)
+                must_pay_with_holo = self.archive_count_required - cards_in_hand
+                if must_pay_with_holo > 0:
+                    starts_at = max(starts_at, must_pay_with_holo)
+                    can_pass = False
+        match usage_count_restriction:
+            case "available_archive_from_hand":
+                ability_source = effect["ability_source"]
+                max_count = min(max_count, effect_player.get_can_archive_from_hand_count(ability_source))
+            case "holopower":
+                max_count = min(len(effect_player.holopower), max_count)
+        choices = []
+        for i in range(starts_at, max_count + 1):
+            # Populate the "amount": "X"/"multiX" fields.
+            new_choice = self.card_db.copy_effects(template_choice)
+            if "amount" in new_choice:
+                match new_choice["amount"]:
+                    case "multiX":
+                        new_choice["amount"] = i * multi_value
+                    case "X":
+                        new_choice["amount"] = i
+            if "cost" in new_choice:
+                match new_choice["cost"]:
+                    case "X":
+                        new_choice["cost"] = i
+            if "pre_effects" in new_choice:
+                for pre_effect in new_choice["pre_effects"]:
+                    if "amount" in pre_effect:
+                        match pre_effect["amount"]:
                             case "multiX":
-                                new_choice["amount"] = i * multi_value
+                                pre_effect["amount"] = i * multi_value
                             case "X":
-                                new_choice["amount"] = i
-                    if "cost" in new_choice:
-                        match new_choice["cost"]:
+                                pre_effect["amount"] = i
+            if "and" in new_choice:
+                for and_effect in new_choice["and"]:
+                    if "amount" in and_effect:
+                        match and_effect["amount"]:
+                            case "multiX":
+                                and_effect["amount"] = i * multi_value
                             case "X":
-                                new_choice["cost"] = i
-                    if "pre_effects" in new_choice:
-                        for pre_effect in new_choice["pre_effects"]:
-                            if "amount" in pre_effect:
-                                match pre_effect["amount"]:
-                                    case "multiX":
-                                        pre_effect["amount"] = i * multi_value
-                                    case "X":
-                                        pre_effect["amount"] = i
-                    if "and" in new_choice:
-                        for and_effect in new_choice["and"]:
-                            if "amount" in and_effect:
-                                match and_effect["amount"]:
-                                    case "multiX":
-                                        and_effect["amount"] = i * multi_value
-                                    case "X":
-                                        and_effect["amount"] = i
-                    choices.append(new_choice)
-                if can_pass:
-                    choices.append({ "effect_type": EffectType.EffectType_Pass })
-                # Now do this as a choice effect.
-                add_ids_to_effects(choices, effect_player_id, effect.get("source_card_id", None))
-                if len(choices) == 1:
-                    # There is no choice, the player has to do the effect.
-                    self.do_effect(effect_player, choices[0])
-                else:
-                    self.send_choice_to_player(effect_player_id, choices)
-            case EffectType.EffectType_GenerateHolopower:
-                amount = effect["amount"]
-                effect_player.generate_holopower(amount)
-            case EffectType.EffectType_GoFirst:
-                first = effect["first"]
-                if first:
-                    self.first_turn_player_id = effect_player_id
-                else:
-                    self.first_turn_player_id = self.other_player(effect_player_id).player_id
-            case EffectType.EffectType_OshiActivation:
-                skill_id = effect["skill_id"]
-                oshi_skill_event = {
-                    "event_type": EventType.EventType_OshiSkillActivation,
-                    "oshi_player_id": effect_player.player_id,
-                    "skill_id": skill_id,
-                    "limit": effect["limit"]
-                }
-                self.broadcast_event(oshi_skill_event)
-            case EffectType.EffectType_ModifyNextLifeLoss:
-                self.next_life_loss_modifier += effect["amount"]
-            case EffectType.EffectType_MoveCheerBetweenHolomems:
-                amount = effect["amount"]
-                to_limitation = effect.get("to_limitation", "")
-                to_limitation_tags = effect.get("to_limitation_tags", [])
-                available_cheer = effect_player.get_cheer_ids_on_holomems()
-                available_targets = effect_player.get_holomem_on_stage()
-                match to_limitation:
-                    case "tag_in":
-                        available_targets = [holomem for holomem in available_targets if any(tag in holomem["tags"] for tag in to_limitation_tags)]
-                available_targets = ids_from_cards(available_targets)
-                cheer_on_each_mem = effect_player.get_cheer_on_each_holomem()
+                                and_effect["amount"] = i
+            choices.append(new_choice)
+        if can_pass:
+            choices.append({ "effect_type": EffectType.EffectType_Pass })
+        # Now do this as a choice effect.
+        add_ids_to_effects(choices, effect_player_id, effect.get("source_card_id", None))
+        if len(choices) == 1:
+            # There is no choice, the player has to do the effect.
+            self.do_effect(effect_player, choices[0])
+        else:
+            self.send_choice_to_player(effect_player_id, choices)
 
-                # there should be valid targets and sources for cheers to be moved
-                if len(available_targets) > 1 and len(available_cheer) > 0:
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_SendCheer,
-                        "desired_response": GameAction.EffectResolution_MoveCheerBetweenHolomems,
-                        "effect_player_id": effect_player_id,
-                        "amount_min": amount,
-                        "amount_max": amount,
-                        "from_zone": "holomem",
-                        "to_zone": "holomem",
-                        "from_options": available_cheer,
-                        "to_options": available_targets,
-                        "cheer_on_each_mem": cheer_on_each_mem,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_MoveCheerBetweenHolomems,
-                        "decision_player": effect_player_id,
-                        "amount_min": amount,
-                        "amount_max": amount,
-                        "available_cheer": available_cheer,
-                        "available_targets": available_targets,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case EffectType.EffectType_MultipleDieRoll:
-                effect_player.last_die_roll_results = [] # reset the results
-
-                amount = effect["amount"]
-                match amount:
-                    case "per_two_mascots":
-                        mascots = get_cards_of_sub_type_from_holomems("mascot", effect_player.get_holomem_on_stage())
-                        amount = len(mascots) // 2
-
-                die_effects = effect["die_effects"]
-                roll_effects = []
-                for _ in range(amount):
-                    roll_effects.extend(deepcopy(die_effects))
-
-                add_ids_to_effects(roll_effects, effect_player_id, effect["source_card_id"])
-                self.add_effects_to_front(roll_effects)
-            case EffectType.EffectType_OrderCards:
-                for_opponent = effect.get("opponent", False)
-                from_zone = effect["from"]
-                to_zone = effect["destination"]
-                bottom = effect.get("bottom", False)
-                amount = effect.get("amount", -1)
-                order_player = effect_player
-                if for_opponent:
-                    order_player = self.other_player(effect_player_id)
-                cards_to_order = []
-                match from_zone:
-                    case "hand":
-                        cards_to_order = ids_from_cards(order_player.hand)
-                    case "deck":
-                        cards_to_order = ids_from_cards(order_player.deck)
-
-                amount = len(cards_to_order) if amount == -1 else min(amount, len(cards_to_order))
-                cards_to_order = cards_to_order[:amount]
-                self.last_card_count = len(cards_to_order)
-                order = "order_on_bottom" if bottom else "order_on_top"
-                self.choose_cards_cleanup_remaining(order_player.player_id, cards_to_order, order, from_zone, to_zone,
-                    self.continue_resolving_effects
-                )
-                passed_on_continuation = True
-            case EffectType.EffectType_Pass:
-                pass
-            case EffectType.EffectType_PerformanceLifeLostIncrease:
-                amount = effect["amount"]
-                self.next_life_loss_modifier += amount
-            case EffectType.EffectType_PlaceHolomem:
-                card_id = effect["card_id"]
-                to_zone = effect["location"]
-                effect_player.move_card(card_id, to_zone)
-            case EffectType.EffectType_PowerBoost:
-                amount = effect["amount"]
-                multiplier = 1
-                if "multiplier" in effect:
-                    match effect["multiplier"]:
-                        case "last_die_value":
-                            multiplier = self.last_die_value
-                amount *= multiplier
-                self.handle_power_boost(amount, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerAllFans:
-                per_amount = effect["amount"]
-                fans = get_cards_of_sub_type_from_holomems("fan", effect_player.get_holomem_on_stage())
-                total = per_amount * len(fans)
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerAllMascots:
-                per_amount = effect["amount"]
+    def effect_generate_holopower(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        effect_player.generate_holopower(amount)
+
+    def effect_go_first(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        first = effect["first"]
+        if first:
+            self.first_turn_player_id = effect_player_id
+        else:
+            self.first_turn_player_id = self.other_player(effect_player_id).player_id
+
+    def effect_oshi_activation(self, effect_player : PlayerState, effect):
+        skill_id = effect["skill_id"]
+        oshi_skill_event = {
+            "event_type": EventType.EventType_OshiSkillActivation,
+            "oshi_player_id": effect_player.player_id,
+            "skill_id": skill_id,
+            "limit": effect["limit"]
+        }
+        self.broadcast_event(oshi_skill_event)
+
+    def effect_modify_next_life_loss(self, effect_player : PlayerState, effect):
+        self.next_life_loss_modifier += effect["amount"]
+
+    def effect_move_cheer_between_holomems(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        amount = effect["amount"]
+        to_limitation = effect.get("to_limitation", "")
+        to_limitation_tags = effect.get("to_limitation_tags", [])
+        available_cheer = effect_player.get_cheer_ids_on_holomems()
+        available_targets = effect_player.get_holomem_on_stage()
+        match to_limitation:
+            case "tag_in":
+                available_targets = [holomem for holomem in available_targets if any(tag in holomem["tags"] for tag in to_limitation_tags)]
+        available_targets = ids_from_cards(available_targets)
+        cheer_on_each_mem = effect_player.get_cheer_on_each_holomem()
+
+        # there should be valid targets and sources for cheers to be moved
+        if len(available_targets) > 1 and len(available_cheer) > 0:
+            decision_event = {
+                "event_type": EventType.EventType_Decision_SendCheer,
+                "desired_response": GameAction.EffectResolution_MoveCheerBetweenHolomems,
+                "effect_player_id": effect_player_id,
+                "amount_min": amount,
+                "amount_max": amount,
+                "from_zone": "holomem",
+                "to_zone": "holomem",
+                "from_options": available_cheer,
+                "to_options": available_targets,
+                "cheer_on_each_mem": cheer_on_each_mem,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_MoveCheerBetweenHolomems,
+                "decision_player": effect_player_id,
+                "amount_min": amount,
+                "amount_max": amount,
+                "available_cheer": available_cheer,
+                "available_targets": available_targets,
+                "continuation": self.continue_resolving_effects,
+            })
+
+    def effect_multiple_die_roll(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        effect_player.last_die_roll_results = [] # reset the results
+
+        amount = effect["amount"]
+        match amount:
+            case "per_two_mascots":
                 mascots = get_cards_of_sub_type_from_holomems("mascot", effect_player.get_holomem_on_stage())
-                total = per_amount * len(mascots)
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerArchivedHolomem:
-                per_amount = effect["amount"]
-                holomems_in_archive = [card for card in effect_player.archive if is_card_holomem(card)]
-                total = per_amount * len(holomems_in_archive)
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerAllCheerColorTypes:
-                per_amount = effect["amount"]
-                multiplier = len(effect_player.get_cheer_color_types_on_holomems())
-                total = per_amount * multiplier
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerCheerColorTypes:
-                per_amount = effect["amount"]
-                match effect.get("oshi_effect_target", ""):
-                    case "center":
-                        source_card = effect_player.center
-                    case "collab":
-                        source_card = effect_player.collab
-                    case _:
-                        source_card, _, _ = effect_player.find_card(effect["source_card_id"])
-                cheer_color_types = set()
-                for card in source_card:
-                    for attached_card in card["attached_cheer"]:
-                        if is_card_cheer(attached_card):
-                            cheer_color_types.update(attached_card["colors"])
-                multiplier = len(cheer_color_types)
-                total = per_amount * multiplier
-                self.handle_power_boost(total, effect["source_card_id"]) 
-            case EffectType.EffectType_PowerBoostPerAttachedCheer:
-                per_amount = effect["amount"]
-                limit = effect["limit"]
+                amount = len(mascots) // 2
+
+        die_effects = effect["die_effects"]
+        roll_effects = []
+        for _ in range(amount):
+            roll_effects.extend(self.card_db.copy_effects(die_effects))
+
+        add_ids_to_effects(roll_effects, effect_player_id, effect["source_card_id"])
+        self.add_effects_to_front(roll_effects)
+
+    def effect_order_cards(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        for_opponent = effect.get("opponent", False)
+        from_zone = effect["from"]
+        to_zone = effect["destination"]
+        bottom = effect.get("bottom", False)
+        amount = effect.get("amount", -1)
+        order_player = effect_player
+        if for_opponent:
+            order_player = self.other_player(effect_player_id)
+        cards_to_order = []
+        match from_zone:
+            case "hand":
+                cards_to_order = ids_from_cards(order_player.hand)
+            case "deck":
+                cards_to_order = ids_from_cards(order_player.deck)
+
+        amount = len(cards_to_order) if amount == -1 else min(amount, len(cards_to_order))
+        cards_to_order = cards_to_order[:amount]
+        self.last_card_count = len(cards_to_order)
+        order = "order_on_bottom" if bottom else "order_on_top"
+        self.choose_cards_cleanup_remaining(order_player.player_id, cards_to_order, order, from_zone, to_zone,
+            self.continue_resolving_effects
+        )
+        return True
+
+    def effect_pass(self, effect_player : PlayerState, effect):
+        pass
+
+    def effect_performance_life_lost_increase(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        self.next_life_loss_modifier += amount
+
+    def effect_place_holomem(self, effect_player : PlayerState, effect):
+        card_id = effect["card_id"]
+        to_zone = effect["location"]
+        effect_player.move_card(card_id, to_zone)
+
+    def effect_power_boost(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        multiplier = 1
+        if "multiplier" in effect:
+            match effect["multiplier"]:
+                case "last_die_value":
+                    multiplier = self.last_die_value
+        amount *= multiplier
+        self.handle_power_boost(amount, effect["source_card_id"])
+
+    def effect_power_boost_per_all_fans(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        fans = get_cards_of_sub_type_from_holomems("fan", effect_player.get_holomem_on_stage())
+        total = per_amount * len(fans)
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_all_mascots(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        mascots = get_cards_of_sub_type_from_holomems("mascot", effect_player.get_holomem_on_stage())
+        total = per_amount * len(mascots)
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_archived_holomem(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        holomems_in_archive = [card for card in effect_player.archive if is_card_holomem(card)]
+        total = per_amount * len(holomems_in_archive)
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_all_cheer_color_types(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        multiplier = len(effect_player.get_cheer_color_types_on_holomems())
+        total = per_amount * multiplier
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_cheer_color_types(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        match effect.get("oshi_effect_target", ""):
+            case "center":
+                source_card = effect_player.center
+            case "collab":
+                source_card = effect_player.collab
+            case _:
                 source_card, _, _ = effect_player.find_card(effect["source_card_id"])
-                cheer_count = len(source_card["attached_cheer"])
-                multiplier = min(cheer_count, limit)
-                total = per_amount * multiplier
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerBackstage:
-                per_amount = effect["amount"]
-                backstage_mems = len(effect_player.backstage)
-                total = per_amount * backstage_mems
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerHolomem:
-                per_amount = effect["amount"]
+        cheer_color_types = set()
+        for card in source_card:
+            for attached_card in card.attached_cheer:
+                if is_card_cheer(attached_card):
+                    cheer_color_types.update(attached_card["colors"])
+        multiplier = len(cheer_color_types)
+        total = per_amount * multiplier
+        self.handle_power_boost(total, effect["source_card_id"]) 
+
+    def effect_power_boost_per_attached_cheer(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        limit = effect["limit"]
+        source_card, _, _ = effect_player.find_card(effect["source_card_id"])
+        cheer_count = len(source_card.attached_cheer)
+        multiplier = min(cheer_count, limit)
+        total = per_amount * multiplier
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_backstage(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        backstage_mems = len(effect_player.backstage)
+        total = per_amount * backstage_mems
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_holomem(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        holomems = effect_player.get_holomem_on_stage()
+        match effect.get("exclude"):
+            case "self":
+                holomems = [h for h in holomems if h["game_card_id"] != effect["source_card_id"]]
+        if "has_tag" in effect:
+            holomems = [holomem for holomem in holomems if effect["has_tag"] in holomem["tags"]]
+        total = per_amount * min(len(holomems), effect.get("limit", 99))
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_revealed_card(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        revealed_cards = effect_player.last_revealed_cards
+        match effect.get("limitation"):
+            case "holomem":
+                revealed_cards = [card for card in revealed_cards if is_card_holomem(card)]
+            case "support":
+                revealed_cards = [card for card in revealed_cards if card["card_type"] == "support"]
+        total = per_amount * len(revealed_cards)
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_stacked(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        stacked_cards = self.performance_performer_card.get("stacked_cards", [])
+        stacked_holomems = [card for card in stacked_cards if is_card_holomem(card)]
+        total = per_amount * len(stacked_holomems)
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_power_boost_per_played_support(self, effect_player : PlayerState, effect):
+        per_amount = effect["amount"]
+        sub_type = effect["support_sub_type"]
+        num_played = effect_player.played_support_types_this_turn.get(sub_type, 0)
+        total = per_amount * num_played
+        self.handle_power_boost(total, effect["source_card_id"])
+
+    def effect_record_effect_card_id_used_this_turn(self, effect_player : PlayerState, effect):
+        effect_player.record_card_effect_used_this_turn(effect["source_card_id"])
+
+    def effect_record_last_die_result(self, effect_player : PlayerState, effect):
+        effect_player.last_die_roll_results.append(self.last_die_value)
+
+    def effect_record_used_once_per_game_effect(self, effect_player : PlayerState, effect):
+        effect_player.record_effect_used_this_game(effect["effect_id"])
+
+    def effect_record_used_once_per_turn_effect(self, effect_player : PlayerState, effect):
+        effect_player.record_effect_used_this_turn(effect["effect_id"])
+
+    def effect_recover_downed_holomem_cards(self, effect_player : PlayerState, effect):
+        self.remove_downed_holomems_to_hand = True
+
+    def effect_reduce_damage(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        if str(amount) == "all":
+            amount_num = 9999
+        else:
+            amount_num = amount
+        self.take_damage_state.prevented_damage += amount_num
+        from_art = self.take_damage_state.art_info
+        self.send_boost_event(self.take_damage_state.target_card["game_card_id"], effect["source_card_id"], "damage_prevented", amount, from_art)
+
+    def effect_reduce_required_archive_count(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        self.archive_count_required -= amount
+
+    def effect_repeat_art(self, effect_player : PlayerState, effect):
+        self.performance_artstatboosts.repeat_art = True
+
+    def effect_restore_hp(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        target = effect["target"]
+        amount = effect["amount"]
+        limitation = effect.get("limitation", "")
+        limitation_colors = effect.get("limitation_colors", [])
+        hit_all_targets = effect.get("hit_all_targets", False)
+        target_options = []
+        match target:
+            case "attached_owner":
+                holomems = effect_player.get_holomems_with_attachment(effect["source_card_id"])
+                if holomems:
+                    target_options = ids_from_cards(holomems)
+            case "backstage":
+                target_options = ids_from_cards(effect_player.backstage)
+            case "center":
+                target_options = ids_from_cards(effect_player.center)
+            case "holomem":
                 holomems = effect_player.get_holomem_on_stage()
-                match effect.get("exclude"):
-                    case "self":
-                        holomems = [h for h in holomems if h["game_card_id"] != effect["source_card_id"]]
-                if "has_tag" in effect:
-                    holomems = [holomem for holomem in holomems if effect["has_tag"] in holomem["tags"]]
-                total = per_amount * min(len(holomems), effect.get("limit", 99))
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerRevealedCard:
-                per_amount = effect["amount"]
-                revealed_cards = effect_player.last_revealed_cards
-                match effect.get("limitation"):
-                    case "holomem":
-                        revealed_cards = [card for card in revealed_cards if is_card_holomem(card)]
-                    case "support":
-                        revealed_cards = [card for card in revealed_cards if card["card_type"] == "support"]
-                total = per_amount * len(revealed_cards)
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerStacked:
-                per_amount = effect["amount"]
-                stacked_cards = self.performance_performer_card.get("stacked_cards", [])
-                stacked_holomems = [card for card in stacked_cards if is_card_holomem(card)]
-                total = per_amount * len(stacked_holomems)
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_PowerBoostPerPlayedSupport:
-                per_amount = effect["amount"]
-                sub_type = effect["support_sub_type"]
-                num_played = effect_player.played_support_types_this_turn.get(sub_type, 0)
-                total = per_amount * num_played
-                self.handle_power_boost(total, effect["source_card_id"])
-            case EffectType.EffectType_RecordEffectCardIdUsedThisTurn:
-                effect_player.record_card_effect_used_this_turn(effect["source_card_id"])
-            case EffectType.EffectType_RecordLastDieResult:
-                effect_player.last_die_roll_results.append(self.last_die_value)
-            case EffectType.EffectType_RecordUsedOncePerGameEffect:
-                effect_player.record_effect_used_this_game(effect["effect_id"])
-            case EffectType.EffectType_RecordUsedOncePerTurnEffect:
-                effect_player.record_effect_used_this_turn(effect["effect_id"])
-            case EffectType.EffectType_RecoverDownedHolomemCards:
-                self.remove_downed_holomems_to_hand = True
-            case EffectType.EffectType_ReduceDamage:
-                amount = effect["amount"]
-                if str(amount) == "all":
-                    amount_num = 9999
-                else:
-                    amount_num = amount
-                self.take_damage_state.prevented_damage += amount_num
-                from_art = self.take_damage_state.art_info
-                self.send_boost_event(self.take_damage_state.target_card["game_card_id"], effect["source_card_id"], "damage_prevented", amount, from_art)
-            case EffectType.EffectType_ReduceRequiredArchiveCount:
-                amount = effect["amount"]
-                self.archive_count_required -= amount
-            case EffectType.EffectType_RepeatArt:
-                self.performance_artstatboosts.repeat_art = True
-            case EffectType.EffectType_RestoreHp:
-                target = effect["target"]
-                amount = effect["amount"]
-                limitation = effect.get("limitation", "")
-                limitation_colors = effect.get("limitation_colors", [])
-                hit_all_targets = effect.get("hit_all_targets", False)
-                target_options = []
-                match target:
-                    case "attached_owner":
-                        holomems = effect_player.get_holomems_with_attachment(effect["source_card_id"])
-                        if holomems:
-                            target_options = ids_from_cards(holomems)
-                    case "backstage":
-                        target_options = ids_from_cards(effect_player.backstage)
-                    case "center":
-                        target_options = ids_from_cards(effect_player.center)
-                    case "holomem":
-                        holomems = effect_player.get_holomem_on_stage()
-                        match limitation:
-                            case "color_in":
-                                holomems = [holomem for holomem in holomems if any(color in holomem["colors"] for color in limitation_colors)]
-                            case "tag_in":
-                                limitation_tags = effect.get("limitation_tags", [])
-                                holomems = [holomem for holomem in holomems if any(color in holomem["tags"] for color in limitation_tags)]
-                        target_options = ids_from_cards(holomems)
-                    case "self":
-                        target_options = [effect["source_card_id"]]
-                targets_allowed = 1
-                if hit_all_targets:
-                    targets_allowed = len(target_options)
-                if len(target_options) == 0:
-                    pass
-                elif len(target_options) == targets_allowed:
-                    target_options.reverse()
-                    for i in range(targets_allowed):
-                        self.add_restore_holomem_hp_internal_effect(
-                            effect_player,
-                            target_options[i],
-                            effect["source_card_id"],
-                            amount
-                        )
+                match limitation:
+                    case "color_in":
+                        holomems = [holomem for holomem in holomems if any(color in holomem["colors"] for color in limitation_colors)]
+                    case "tag_in":
+                        limitation_tags = effect.get("limitation_tags", [])
+                        holomems = [holomem for holomem in holomems if any(color in holomem["tags"] for color in limitation_tags)]
+                target_options = ids_from_cards(holomems)
+            case "self":
+                target_options = [effect["source_card_id"]]
+        targets_allowed = 1
+        if hit_all_targets:
+            targets_allowed = len(target_options)
+        if len(target_options) == 0:
+            pass
+        elif len(target_options) == targets_allowed:
+            target_options.reverse()
+            for i in range(targets_allowed):
+                self.add_restore_holomem_hp_internal_effect(
+                    effect_player,
+                    target_options[i],
+                    effect["source_card_id"],
+                    amount
+                )
+        else:
+            # Choose holomem for effect.
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "cards_can_choose": target_options,
+                "effect": effect,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": target_options,
+                "cards_can_choose": target_options,
+                "amount_min": 1,
+                "amount_max": 1,
+                "source_card_id": effect["source_card_id"],
+                "effect_resolution": self.handle_restore_hp_for_holomem,
+                "effect_amount": amount,
+                "continuation": self.continue_resolving_effects,
+            })
+
+    def effect_restore_hp_internal(self, effect_player : PlayerState, effect):
+        target_player = effect["target_player"]
+        target_card = effect["target_card"]
+        amount = effect["amount"]
+        self.last_chosen_holomem_id = target_card
+        self.restore_holomem_hp(target_player, target_card, amount, self.continue_resolving_effects)
+        return True
+
+    def effect_return_holomem_to_debut(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        target_player = effect_player
+        if effect.get("opponent", False):
+            target_player = self.other_player(effect_player_id)
+        target = effect["target"]
+        target_cards = []
+        match target:
+            case "backstage":
+                target_cards = target_player.backstage
+            case "center":
+                target_cards = target_player.center
+            case "collab":
+                target_cards = target_player.collab
+            case "center_or_collab":
+                target_cards = target_player.center + target_player.collab
+            case "holomem":
+                target_cards = target_player.get_holomem_on_stage()
+            case _:
+                raise NotImplementedError("Only center is supported for now.")
+
+        if len(target_cards) == 0:
+            pass
+        elif len(target_cards) == 1:
+            self.return_holomem_to_debut(target_player, target_cards[0]["game_card_id"])
+        else:
+            target_options = ids_from_cards(target_cards)
+            decision_event = {
+                "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "cards_can_choose": target_options,
+                "effect": effect,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": target_options,
+                "cards_can_choose": target_options,
+                "amount_min": 1,
+                "amount_max": 1,
+                "effect_resolution": self.handle_return_holomem_to_debut,
+                "target_player": target_player,
+                "continuation": self.continue_resolving_effects,
+            })
+
+    def effect_reveal_top_deck(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        if len(effect_player.deck) > 0:
+            amount = effect.get("amount", 1)
+            top_cards = effect_player.deck[:amount]
+            effect_player.last_revealed_cards = top_cards
+            reveal_event = {
+                "event_type": EventType.EventType_RevealCards,
+                "effect_player_id": effect_player_id,
+                "card_ids": ids_from_cards(top_cards),
+                "source": "topdeck"
+            }
+            self.broadcast_event(reveal_event)
+            after_reveal_effects = effect_player.get_effects_at_timing("after_reveal", None)
+            self.add_effects_to_front(after_reveal_effects)
+
+    def effect_reroll_die(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        rigged = False
+        if effect_player.set_next_die_roll:
+            die_result = effect_player.set_next_die_roll
+            effect_player.set_next_die_roll = 0
+            rigged = True
+        else:
+            die_result = self.random_gen.randint(1, 6)
+        self.last_die_value = die_result
+
+        die_event = {
+            "event_type": EventType.EventType_RollDie,
+            "effect_player_id": effect_player_id,
+            "die_result": die_result,
+            "rigged": rigged,
+        }
+        self.broadcast_event(die_event)
+
+    def effect_roll_die(self, effect_player : PlayerState, effect):
+        # Put the actual roll in front on the queue, but
+        # check afterwards to see if we should add any more effects up front.
+        rolldie_internal_effect = self.card_db.copy_effects(effect)
+        rolldie_internal_effect["effect_type"] = EffectType.EffectType_RollDie_Internal
+        rolldie_internal_effect["internal_skip_simultaneous_choice"] =  True
+        # Remove the and effects because they were already processed.
+        rolldie_internal_effect["and"] = []
+        self.add_effects_to_front([rolldie_internal_effect])
+
+        # When we roll a die, check if there are any choices to be made like oshi abilities.
+        ability_effects = effect_player.get_effects_at_timing("before_die_roll", "", effect["source"])
+        if ability_effects:
+            self.add_effects_to_front(ability_effects)
+
+    def effect_choose_die_result(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        choice_info = {
+            "specific_options": ["1", "2", "3", "4", "5", "6"],
+        }
+        min_choice = 0
+        max_choice = 5
+        decision_event = {
+            "event_type": EventType.EventType_ForceDieResult,
+            "desired_response": GameAction.EffectResolution_MakeChoice,
+            "choice_event": True,
+            "effect_player_id": effect_player_id,
+            "choice_info": choice_info,
+            "min_choice": min_choice,
+            "max_choice": max_choice,
+        }
+        self.broadcast_event(decision_event)
+        self.set_decision({
+            "decision_type": DecisionType.DecisionChoice,
+            "decision_player": effect_player_id,
+            "choice_info": choice_info,
+            "min_choice": min_choice,
+            "max_choice": max_choice,
+            "resolution_func": self.handle_force_die_result,
+            "continuation": self.continue_resolving_effects,
+        })
+
+    def effect_roll_die_internal(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        rigged = False
+        if effect_player.set_next_die_roll:
+            die_result = effect_player.set_next_die_roll
+            effect_player.set_next_die_roll = 0
+            rigged = True
+        else:
+            die_result = self.random_gen.randint(1, 6)
+        self.last_die_value = die_result
+
+        die_event = {
+            "event_type": EventType.EventType_RollDie,
+            "effect_player_id": effect_player_id,
+            "die_result": die_result,
+            "rigged": rigged,
+        }
+        self.broadcast_event(die_event)
+
+        # Add the resolution to the front of the queue.
+        # This will check last_die_value to see what happens.
+        # However process any after die roll effects first.
+        rolldie_resolution_effect = self.card_db.copy_effects(effect)
+        rolldie_resolution_effect["effect_type"] = EffectType.EffectType_RollDie_Internal_Resolution
+        rolldie_resolution_effect["internal_skip_simultaneous_choice"] =  True
+        self.add_effects_to_front([rolldie_resolution_effect])
+
+        # Check for after die roll effects.
+        source_card, _, _ = effect_player.find_card(effect["source_card_id"])
+        after_die_roll_effects = effect_player.get_effects_at_timing("after_die_roll", source_card, effect["source"])
+        self.begin_resolving_effects(after_die_roll_effects, self.continue_resolving_effects)
+        return True
+
+    def effect_roll_die_internal_resolution(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        die_effects = effect["die_effects"]
+        effects_to_resolve = []
+        for die_effects_option in die_effects:
+            activate_on_values = die_effects_option["activate_on_values"]
+            if self.last_die_value in activate_on_values:
+                effects_to_resolve = die_effects_option["effects"]
+                break
+        if effects_to_resolve:
+            # Push these effects onto the front of the effect list.
+            add_ids_to_effects(effects_to_resolve, effect_player_id, effect["source_card_id"])
+            self.add_effects_to_front(effects_to_resolve)
+
+    def effect_send_cheer(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        # Required params
+        amount_min = effect["amount_min"]
+        amount_max = effect["amount_max"]
+        from_zone = effect["from"]
+        to_zone = effect["to"]
+        # Optional
+        from_limitation = effect.get("from_limitation", "")
+        from_limitation_colors = effect.get("from_limitation_colors", [])
+        from_limitation_tags = effect.get("from_limitation_tags", [])
+        to_limitation = effect.get("to_limitation", "")
+        to_limitation_colors = effect.get("to_limitation_colors", [])
+        to_limitation_tags = effect.get("to_limitation_tags", [])
+        to_limitation_exclude_name = effect.get("to_limitation_exclude_name", "")
+        multi_to = effect.get("multi_to", False)
+        limit_one_per_member = effect.get("limit_one_per_member", False)
+
+        # Determine options
+        from_options = []
+        to_options = []
+        remove_from_to_options = []
+
+        match from_zone:
+            case "archive":
+                # Get archive cheer cards.
+                relevant_archive_cards = [card for card in effect_player.archive if is_card_cheer(card)]
+                if from_limitation:
+                    match from_limitation:
+                        case "color_in":
+                            from_options = [card for card in relevant_archive_cards if any(color in card["colors"] for color in from_limitation_colors)]
+                        case _:
+                            raise NotImplementedError(f"Unimplemented from limitation: {from_limitation}")
                 else:
-                    # Choose holomem for effect.
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "cards_can_choose": target_options,
-                        "effect": effect,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": target_options,
-                        "cards_can_choose": target_options,
-                        "amount_min": 1,
-                        "amount_max": 1,
-                        "source_card_id": effect["source_card_id"],
-                        "effect_resolution": self.handle_restore_hp_for_holomem,
-                        "effect_amount": amount,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case EffectType.EffectType_RestoreHp_Internal:
-                target_player = effect["target_player"]
-                target_card = effect["target_card"]
-                amount = effect["amount"]
-                self.last_chosen_holomem_id = target_card
-                self.restore_holomem_hp(target_player, target_card, amount, self.continue_resolving_effects)
-                passed_on_continuation = True
-            case EffectType.EffectType_ReturnHolomemToDebut:
-                target_player = effect_player
-                if effect.get("opponent", False):
-                    target_player = self.other_player(effect_player_id)
-                target = effect["target"]
-                target_cards = []
-                match target:
-                    case "backstage":
-                        target_cards = target_player.backstage
-                    case "center":
-                        target_cards = target_player.center
-                    case "collab":
-                        target_cards = target_player.collab
-                    case "center_or_collab":
-                        target_cards = target_player.center + target_player.collab
-                    case "holomem":
-                        target_cards = target_player.get_holomem_on_stage()
-                    case _:
-                        raise NotImplementedError("Only center is supported for now.")
-
-                if len(target_cards) == 0:
-                    pass
-                elif len(target_cards) == 1:
-                    self.return_holomem_to_debut(target_player, target_cards[0]["game_card_id"])
+                    from_options = relevant_archive_cards
+                from_options = ids_from_cards(from_options)
+            case "cheer_deck":
+                # Cheer deck is from top.
+                if len(effect_player.cheer_deck) > 0:
+                    from_options = [effect_player.cheer_deck[0]]
+                from_options = ids_from_cards(from_options)
+            case "downed_holomem":
+                holomem = self.down_holomem_state.holomem_card
+                if from_limitation:
+                    match from_limitation:
+                        case "color_in":
+                            from_options = [card for card in holomem.attached_cheer \
+                                if any(color in card["colors"] for color in from_limitation_colors)]
                 else:
-                    target_options = ids_from_cards(target_cards)
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_ChooseHolomemForEffect,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "cards_can_choose": target_options,
-                        "effect": effect,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": target_options,
-                        "cards_can_choose": target_options,
-                        "amount_min": 1,
-                        "amount_max": 1,
-                        "effect_resolution": self.handle_return_holomem_to_debut,
-                        "target_player": target_player,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case EffectType.EffectType_RevealTopDeck:
-                if len(effect_player.deck) > 0:
-                    amount = effect.get("amount", 1)
-                    top_cards = effect_player.deck[:amount]
-                    effect_player.last_revealed_cards = top_cards
-                    reveal_event = {
-                        "event_type": EventType.EventType_RevealCards,
+                    from_options = holomem.attached_cheer
+                from_options = ids_from_cards(from_options)
+            case "holomem":
+                holomem_options = effect_player.get_holomem_on_stage()
+                if from_limitation:
+                    match from_limitation:
+                        case "tag_in":
+                            holomem_options = [card for card in holomem_options if any(tag in card["tags"] for tag in from_limitation_tags)]
+                for holomem in holomem_options:
+                    for cheer in holomem.attached_cheer:
+                        from_options.append(cheer)
+                from_options = ids_from_cards(from_options)
+            case "opponent_holomem":
+                opponent = self.other_player(effect_player_id)
+                holomem_options = opponent.get_holomem_on_stage()
+                if from_limitation:
+                    match from_limitation:
+                        case "center":
+                            holomem_options = opponent.center
+                        case _:
+                            raise NotImplementedError(f"Unimplemented from limitation: {from_limitation}")
+                for holomem in holomem_options:
+                    from_options.extend(holomem.attached_cheer)
+                from_options = ids_from_cards(from_options)
+            case "self":
+                from_zone = "holomem"
+                source_card, _, _ = effect_player.find_card(effect["source_card_id"])
+                from_options = ids_from_cards(source_card.attached_cheer)
+                remove_from_to_options = [effect["source_card_id"]]
+            case _:
+                raise NotImplementedError(f"Unimplemented from zone: {from_zone}")
+
+        match to_zone:
+            case "archive":
+                to_options = ["archive"]
+                # Add the after archive effect unless we're moving opponent cheer.
+                if from_zone != "opponent_holomem":
+                    after_archive_check_effect = {
+                        "player_id": effect_player_id,
+                        "effect_type": EffectType.EffectType_AfterArchiveCheerCheck,
                         "effect_player_id": effect_player_id,
-                        "card_ids": ids_from_cards(top_cards),
-                        "source": "topdeck"
+                        "previous_archive_count": len(effect_player.archive),
+                        "ability_source": effect.get("ability_source", ""),
                     }
-                    self.broadcast_event(reveal_event)
-                    after_reveal_effects = effect_player.get_effects_at_timing("after_reveal", None)
-                    self.add_effects_to_front(after_reveal_effects)
-            case EffectType.EffectType_RerollDie:
-                rigged = False
-                if effect_player.set_next_die_roll:
-                    die_result = effect_player.set_next_die_roll
-                    effect_player.set_next_die_roll = 0
-                    rigged = True
-                else:
-                    die_result = self.random_gen.randint(1, 6)
-                self.last_die_value = die_result
-
-                die_event = {
-                    "event_type": EventType.EventType_RollDie,
-                    "effect_player_id": effect_player_id,
-                    "die_result": die_result,
-                    "rigged": rigged,
-                }
-                self.broadcast_event(die_event)
-            case EffectType.EffectType_RollDie:
-                # Put the actual roll in front on the queue, but
-                # check afterwards to see if we should add any more effects up front.
-                rolldie_internal_effect = deepcopy(effect)
-                rolldie_internal_effect["effect_type"] = EffectType.EffectType_RollDie_Internal
-                rolldie_internal_effect["internal_skip_simultaneous_choice"] =  True
-                # Remove the and effects because they were already processed.
-                rolldie_internal_effect["and"] = []
-                self.add_effects_to_front([rolldie_internal_effect])
-
-                # When we roll a die, check if there are any choices to be made like oshi abilities.
-                ability_effects = effect_player.get_effects_at_timing("before_die_roll", "", effect["source"])
-                if ability_effects:
-                    self.add_effects_to_front(ability_effects)
-            case EffectType.EffectType_RollDie_ChooseResult:
-                choice_info = {
-                    "specific_options": ["1", "2", "3", "4", "5", "6"],
-                }
-                min_choice = 0
-                max_choice = 5
-                decision_event = {
-                    "event_type": EventType.EventType_ForceDieResult,
-                    "desired_response": GameAction.EffectResolution_MakeChoice,
-                    "choice_event": True,
-                    "effect_player_id": effect_player_id,
-                    "choice_info": choice_info,
-                    "min_choice": min_choice,
-                    "max_choice": max_choice,
-                }
-                self.broadcast_event(decision_event)
-                self.set_decision({
-                    "decision_type": DecisionType.DecisionChoice,
-                    "decision_player": effect_player_id,
-                    "choice_info": choice_info,
-                    "min_choice": min_choice,
-                    "max_choice": max_choice,
-                    "resolution_func": self.handle_force_die_result,
-                    "continuation": self.continue_resolving_effects,
-                })
-            case EffectType.EffectType_RollDie_Internal:
-                rigged = False
-                if effect_player.set_next_die_roll:
-                    die_result = effect_player.set_next_die_roll
-                    effect_player.set_next_die_roll = 0
-                    rigged = True
+                    self.add_effects_to_front([after_archive_check_effect])
+            case "holomem":
+                if to_limitation:
+                    match to_limitation:
+                        case "attached_owner":
+                            source_card = self.find_card(effect["source_card_id"])
+                            owner_player = self.get_player(source_card["owner_id"])
+                            to_options = owner_player.get_holomems_with_attachment(effect["source_card_id"])
+                        case "color_in":
+                            to_options = [card for card in effect_player.get_holomem_on_stage() if any(color in card["colors"] for color in to_limitation_colors)]
+                        case "backstage":
+                            to_options = effect_player.backstage
+                        case "center":
+                            to_options = effect_player.center
+                        case "center_or_collab":
+                            to_options = effect_player.center + effect_player.collab
+                        case "specific_member_name":
+                            to_limitation_name = effect.get("to_limitation_name", "")
+                            holomems = effect_player.get_holomem_on_stage()
+                            to_options = [card for card in holomems if to_limitation_name in card["card_names"]]
+                        case "tag_in":
+                            to_options = [card for card in effect_player.get_holomem_on_stage() if any(tag in card["tags"] for tag in to_limitation_tags)]
+                        case "card_type":
+                            to_limitation_card_type = effect.get("to_limitation_card_type", "")
+                            holomems = effect_player.get_holomem_on_stage()
+                            to_options = [card for card in holomems if to_limitation_card_type == card["card_type"]]
+                        case _:
+                            raise NotImplementedError(f"Unimplemented to limitation: {to_limitation}")
                 else:
-                    die_result = self.random_gen.randint(1, 6)
-                self.last_die_value = die_result
-
-                die_event = {
-                    "event_type": EventType.EventType_RollDie,
-                    "effect_player_id": effect_player_id,
-                    "die_result": die_result,
-                    "rigged": rigged,
-                }
-                self.broadcast_event(die_event)
+                    to_options = effect_player.get_holomem_on_stage()
+                if to_limitation_exclude_name:
+                    to_options = [card for card in to_options if to_limitation_exclude_name not in card["card_names"]]
+
+                # Remove any to_options where the holomem is downed.
+                if self.down_holomem_state:
+                    to_options = [card for card in to_options if card["game_card_id"] != self.down_holomem_state.holomem_card["game_card_id"]]
+                to_options = ids_from_cards(to_options)
+            case "this_holomem":
+                to_options = [effect["source_card_id"]]
+                to_zone = "holomem"
+        if str(amount_min) == "all":
+            amount_min = len(from_options)
+        if str(amount_max) == "all":
+            amount_max = len(from_options)
+
+        if remove_from_to_options:
+            for card_id in remove_from_to_options:
+                to_options.remove(card_id)
+        if len(to_options) == 0 or len(from_options) == 0:
+            # No effect.
+            pass
+        elif len(to_options) == 1 and len(from_options) == 1 and amount_min == len(from_options) and amount_max == amount_min:
+            # Do it automatically.
+            placements = {}
+            for from_id in from_options:
+                placements[from_id] = to_options[0]
+            # Do both players as the cheer could be opponent targeted.
+            effect_player.move_cheer_between_holomems(placements)
+            opponent = self.other_player(effect_player.player_id)
+            opponent.move_cheer_between_holomems(placements)
+        else:
+            if len(from_options) < amount_min:
+                # If there's less cheer than the min, do as many as you can.
+                amount_min = len(from_options)
 
-                # Add the resolution to the front of the queue.
-                # This will check last_die_value to see what happens.
-                # However process any after die roll effects first.
-                rolldie_resolution_effect = deepcopy(effect)
-                rolldie_resolution_effect["effect_type"] = EffectType.EffectType_RollDie_Internal_Resolution
-                rolldie_resolution_effect["internal_skip_simultaneous_choice"] =  True
-                self.add_effects_to_front([rolldie_resolution_effect])
+            if from_zone == "opponent_holomem":
+                opponent = self.other_player(effect_player_id)
+                cheer_on_each_mem = opponent.get_cheer_on_each_holomem()
+            else:
+                cheer_on_each_mem = effect_player.get_cheer_on_each_holomem()
+            decision_event = {
+                "event_type": EventType.EventType_Decision_SendCheer,
+                "desired_response": GameAction.EffectResolution_MoveCheerBetweenHolomems,
+                "effect_player_id": effect_player_id,
+                "amount_min": amount_min,
+                "amount_max": amount_max,
+                "from_zone": from_zone,
+                "from_limitation": from_limitation,
+                "from_limitation_colors": from_limitation_colors,
+                "to_zone": to_zone,
+                "to_limitation": to_limitation,
+                "to_limitation_colors": to_limitation_colors,
+                "from_options": from_options,
+                "to_options": to_options,
+                "cheer_on_each_mem": cheer_on_each_mem,
+                "multi_to": multi_to,
+                "limit_one_per_member": limit_one_per_member,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_MoveCheerBetweenHolomems,
+                "decision_player": effect_player_id,
+                "amount_min": amount_min,
+                "amount_max": amount_max,
+                "available_cheer": from_options,
+                "available_targets": to_options,
+                "multi_to": multi_to,
+                "limit_one_per_member": limit_one_per_member,
+                "continuation": self.continue_resolving_effects,
+            })
 
-                # Check for after die roll effects.
-                source_card, _, _ = effect_player.find_card(effect["source_card_id"])
-                after_die_roll_effects = effect_player.get_effects_at_timing("after_die_roll", source_card, effect["source"])
-                self.begin_resolving_effects(after_die_roll_effects, self.continue_resolving_effects)
-                passed_on_continuation = True
-            case EffectType.EffectType_RollDie_Internal_Resolution:
-                die_effects = effect["die_effects"]
-                effects_to_resolve = []
-                for die_effects_option in die_effects:
-                    activate_on_values = die_effects_option["activate_on_values"]
-                    if self.last_die_value in activate_on_values:
-                        effects_to_resolve = die_effects_option["effects"]
-                        break
-                if effects_to_resolve:
-                    # Push these effects onto the front of the effect list.
-                    add_ids_to_effects(effects_to_resolve, effect_player_id, effect["source_card_id"])
-                    self.add_effects_to_front(effects_to_resolve)
-            case EffectType.EffectType_SendCheer:
-                # Required params
-                amount_min = effect["amount_min"]
-                amount_max = effect["amount_max"]
-                from_zone = effect["from"]
-                to_zone = effect["to"]
-                # Optional
-                from_limitation = effect.get("from_limitation", "")
-                from_limitation_colors = effect.get("from_limitation_colors", [])
-                from_limitation_tags = effect.get("from_limitation_tags", [])
-                to_limitation = effect.get("to_limitation", "")
-                to_limitation_colors = effect.get("to_limitation_colors", [])
-                to_limitation_tags = effect.get("to_limitation_tags", [])
-                to_limitation_exclude_name = effect.get("to_limitation_exclude_name", "")
-                multi_to = effect.get("multi_to", False)
-                limit_one_per_member = effect.get("limit_one_per_member", False)
-
-                # Determine options
-                from_options = []
-                to_options = []
-                remove_from_to_options = []
-
-                match from_zone:
-                    case "archive":
-                        # Get archive cheer cards.
-                        relevant_archive_cards = [card for card in effect_player.archive if is_card_cheer(card)]
-                        if from_limitation:
-                            match from_limitation:
-                                case "color_in":
-                                    from_options = [card for card in relevant_archive_cards if any(color in card["colors"] for color in from_limitation_colors)]
-                                case _:
-                                    raise NotImplementedError(f"Unimplemented from limitation: {from_limitation}")
-                        else:
-                            from_options = relevant_archive_cards
-                        from_options = ids_from_cards(from_options)
-                    case "cheer_deck":
-                        # Cheer deck is from top.
-                        if len(effect_player.cheer_deck) > 0:
-                            from_options = [effect_player.cheer_deck[0]]
-                        from_options = ids_from_cards(from_options)
-                    case "downed_holomem":
-                        holomem = self.down_holomem_state.holomem_card
-                        if from_limitation:
-                            match from_limitation:
-                                case "color_in":
-                                    from_options = [card for card in holomem["attached_cheer"] \
-                                        if any(color in card["colors"] for color in from_limitation_colors)]
-                        else:
-                            from_options = holomem["attached_cheer"]
-                        from_options = ids_from_cards(from_options)
-                    case "holomem":
-                        holomem_options = effect_player.get_holomem_on_stage()
-                        if from_limitation:
-                            match from_limitation:
-                                case "tag_in":
-                                    holomem_options = [card for card in holomem_options if any(tag in card["tags"] for tag in from_limitation_tags)]
-                        for holomem in holomem_options:
-                            for cheer in holomem["attached_cheer"]:
-                                from_options.append(cheer)
-                        from_options = ids_from_cards(from_options)
-                    case "opponent_holomem":
-                        opponent = self.other_player(effect_player_id)
-                        holomem_options = opponent.get_holomem_on_stage()
-                        if from_limitation:
-                            match from_limitation:
-                                case "center":
-                                    holomem_options = opponent.center
-                                case _:
-                                    raise NotImplementedError(f"Unimplemented from limitation: {from_limitation}")
-                        for holomem in holomem_options:
-                            from_options.extend(holomem["attached_cheer"])
-                        from_options = ids_from_cards(from_options)
-                    case "self":
-                        from_zone = "holomem"
-                        source_card, _, _ = effect_player.find_card(effect["source_card_id"])
-                        from_options = ids_from_cards(source_card["attached_cheer"])
-                        remove_from_to_options = [effect["source_card_id"]]
-                    case _:
-                        raise NotImplementedError(f"Unimplemented from zone: {from_zone}")
-
-                match to_zone:
-                    case "archive":
-                        to_options = ["archive"]
-                        # Add the after archive effect unless we're moving opponent cheer.
-                        if from_zone != "opponent_holomem":
-                            after_archive_check_effect = {
-                                "player_id": effect_player_id,
-                                "effect_type": EffectType.EffectType_AfterArchiveCheerCheck,
-                                "effect_player_id": effect_player_id,
-                                "previous_archive_count": len(effect_player.archive),
-                                "ability_source": effect.get("ability_source", ""),
-                            }
-                            self.add_effects_to_front([after_archive_check_effect])
-                    case "holomem":
-                        if to_limitation:
-                            match to_limitation:
-                                case "attached_owner":
-                                    source_card = self.find_card(effect["source_card_id"])
-                                    owner_player = self.get_player(source_card["owner_id"])
-                                    to_options = owner_player.get_holomems_with_attachment(effect["source_card_id"])
-                                case "color_in":
-                                    to_options = [card for card in effect_player.get_holomem_on_stage() if any(color in card["colors"] for color in to_limitation_colors)]
-                                case "backstage":
-                                    to_options = effect_player.backstage
-                                case "center":
-                                    to_options = effect_player.center
-                                case "center_or_collab":
-                                    to_options = effect_player.center + effect_player.collab
-                                case "specific_member_name":
-                                    to_limitation_name = effect.get("to_limitation_name", "")
-                                    holomems = effect_player.get_holomem_on_stage()
-                                    to_options = [card for card in holomems if to_limitation_name in card["card_names"]]
-                                case "tag_in":
-                                    to_options = [card for card in effect_player.get_holomem_on_stage() if any(tag in card["tags"] for tag in to_limitation_tags)]
-                                case "card_type":
-                                    to_limitation_card_type = effect.get("to_limitation_card_type", "")
-                                    holomems = effect_player.get_holomem_on_stage()
-                                    to_options = [card for card in holomems if to_limitation_card_type == card["card_type"]]
-                                case _:
-                                    raise NotImplementedError(f"Unimplemented to limitation: {to_limitation}")
-                        else:
-                            to_options = effect_player.get_holomem_on_stage()
-                        if to_limitation_exclude_name:
-                            to_options = [card for card in to_options if to_limitation_exclude_name not in card["card_names"]]
-
-                        # Remove any to_options where the holomem is downed.
-                        if self.down_holomem_state:
-                            to_options = [card for card in to_options if card["game_card_id"] != self.down_holomem_state.holomem_card["game_card_id"]]
-                        to_options = ids_from_cards(to_options)
-                    case "this_holomem":
-                        to_options = [effect["source_card_id"]]
-                        to_zone = "holomem"
-                if str(amount_min) == "all":
-                    amount_min = len(from_options)
-                if str(amount_max) == "all":
-                    amount_max = len(from_options)
-
-                if remove_from_to_options:
-                    for card_id in remove_from_to_options:
-                        to_options.remove(card_id)
-                if len(to_options) == 0 or len(from_options) == 0:
-                    # No effect.
-                    pass
-                elif len(to_options) == 1 and len(from_options) == 1 and amount_min == len(from_options) and amount_max == amount_min:
-                    # Do it automatically.
-                    placements = {}
-                    for from_id in from_options:
-                        placements[from_id] = to_options[0]
-                    # Do both players as the cheer could be opponent targeted.
-                    effect_player.move_cheer_between_holomems(placements)
-                    opponent = self.other_player(effect_player.player_id)
-                    opponent.move_cheer_between_holomems(placements)
-                else:
-                    if len(from_options) < amount_min:
-                        # If there's less cheer than the min, do as many as you can.
-                        amount_min = len(from_options)
+    def effect_send_collab_back(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        optional = effect.get("optional", False)
+        if optional:
+            # Ask the user if they want to send this collab back to the backstage.
+            choice_info = {
+                "specific_options": ["pass", "ok"]
+            }
+            min_choice = 0
+            max_choice = 1
+            decision_event = {
+                "event_type": EventType.EventType_Choice_SendCollabBack,
+                "desired_response": GameAction.EffectResolution_MakeChoice,
+                "choice_event": True,
+                "effect_player_id": effect_player_id,
+                "choice_info": choice_info,
+                "min_choice": min_choice,
+                "max_choice": max_choice,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionChoice,
+                "decision_player": effect_player_id,
+                "choice_info": choice_info,
+                "min_choice": min_choice,
+                "max_choice": max_choice,
+                "resolution_func": self.handle_choice_return_collab,
+                "continuation": self.continue_resolving_effects,
+            })
+        else:
+            effect_player.return_collab()
 
-                    if from_zone == "opponent_holomem":
-                        opponent = self.other_player(effect_player_id)
-                        cheer_on_each_mem = opponent.get_cheer_on_each_holomem()
-                    else:
-                        cheer_on_each_mem = effect_player.get_cheer_on_each_holomem()
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_SendCheer,
-                        "desired_response": GameAction.EffectResolution_MoveCheerBetweenHolomems,
-                        "effect_player_id": effect_player_id,
-                        "amount_min": amount_min,
-                        "amount_max": amount_max,
-                        "from_zone": from_zone,
-                        "from_limitation": from_limitation,
-                        "from_limitation_colors": from_limitation_colors,
-                        "to_zone": to_zone,
-                        "to_limitation": to_limitation,
-                        "to_limitation_colors": to_limitation_colors,
-                        "from_options": from_options,
-                        "to_options": to_options,
-                        "cheer_on_each_mem": cheer_on_each_mem,
-                        "multi_to": multi_to,
-                        "limit_one_per_member": limit_one_per_member,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_MoveCheerBetweenHolomems,
-                        "decision_player": effect_player_id,
-                        "amount_min": amount_min,
-                        "amount_max": amount_max,
-                        "available_cheer": from_options,
-                        "available_targets": to_options,
-                        "multi_to": multi_to,
-                        "limit_one_per_member": limit_one_per_member,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case EffectType.EffectType_SendCollabBack:
-                optional = effect.get("optional", False)
-                if optional:
-                    # Ask the user if they want to send this collab back to the backstage.
-                    choice_info = {
-                        "specific_options": ["pass", "ok"]
-                    }
-                    min_choice = 0
-                    max_choice = 1
-                    decision_event = {
-                        "event_type": EventType.EventType_Choice_SendCollabBack,
-                        "desired_response": GameAction.EffectResolution_MakeChoice,
-                        "choice_event": True,
-                        "effect_player_id": effect_player_id,
-                        "choice_info": choice_info,
-                        "min_choice": min_choice,
-                        "max_choice": max_choice,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionChoice,
-                        "decision_player": effect_player_id,
-                        "choice_info": choice_info,
-                        "min_choice": min_choice,
-                        "max_choice": max_choice,
-                        "resolution_func": self.handle_choice_return_collab,
-                        "continuation": self.continue_resolving_effects,
-                    })
-                else:
-                    effect_player.return_collab()
-            case EffectType.EffectType_SetCenterHP:
-                amount = effect["amount"]
-                is_opponent = "opponent" in effect and effect["opponent"]
-                affected_player = effect_player
-                if is_opponent:
-                    affected_player = self.other_player(effect_player_id)
-                if len(affected_player.center) > 0:
-                    affected_player.set_holomem_hp(affected_player.center[0]["game_card_id"], amount)
-            case EffectType.EffectType_ShuffleArchiveToDeck:
-                archived_cards = effect_player.archive
-                match effect.get("limitation"):
-                    case "holomem":
-                        archived_cards = [card for card in archived_cards if is_card_holomem(card)]
-                for card in archived_cards:
-                    effect_player.move_card(card["game_card_id"], "deck", hidden_info=False)
-                effect_player.shuffle_deck()
-            case EffectType.EffectType_ShuffleHandToDeck:
-                self.last_card_count = len(effect_player.hand)
-                effect_player.shuffle_hand_to_deck()
-            case EffectType.EffectType_SpendHolopower:
-                amount = effect["amount"]
-                effect_player.spend_holopower(amount)
-                if "oshi_skill_id" in effect:
-                    oshi_skill_event = {
-                        "event_type": EventType.EventType_OshiSkillActivation,
-                        "oshi_player_id": effect_player.player_id,
-                        "skill_id": effect["oshi_skill_id"],
-                    }
-                    self.broadcast_event(oshi_skill_event)
-            case EffectType.EffectType_SwitchCenterWithBack:
-                target_player = effect_player
-                swap_opponent_cards = "opponent" in effect and effect["opponent"]
-                skip_resting = effect.get("skip_resting", False)
-                if swap_opponent_cards:
-                    target_player = self.other_player(effect_player_id)
-                available_backstage_ids = []
-                for card in target_player.backstage:
-                    if skip_resting and card["resting"]:
-                        continue
-                    available_backstage_ids.append(card["game_card_id"])
-                if len(available_backstage_ids) == 0 or (not swap_opponent_cards and not target_player.can_move_front_stage()):
-                    # No effect.
-                    pass
-                elif len(available_backstage_ids) == 1:
-                    # Do it right away.
-                    target_player.swap_center_with_back(available_backstage_ids[0])
-                else:
-                    # Ask for a decision.
-                    decision_event = {
-                        "event_type": EventType.EventType_Decision_SwapHolomemToCenter,
-                        "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
-                        "effect_player_id": effect_player_id,
-                        "cards_can_choose": available_backstage_ids,
-                        "swap_opponent_cards": swap_opponent_cards,
-                    }
-                    self.broadcast_event(decision_event)
-                    self.set_decision({
-                        "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
-                        "decision_player": effect_player_id,
-                        "all_card_seen": available_backstage_ids,
-                        "cards_can_choose": available_backstage_ids,
-                        "amount_min": 1,
-                        "amount_max": 1,
-                        "effect_resolution": self.handle_holomem_swap,
-                        "continuation": self.continue_resolving_effects,
-                    })
-            case _:
-                raise NotImplementedError(f"Unimplemented effect type: {effect['effect_type']}")
+    def effect_set_center_hp(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        amount = effect["amount"]
+        is_opponent = "opponent" in effect and effect["opponent"]
+        affected_player = effect_player
+        if is_opponent:
+            affected_player = self.other_player(effect_player_id)
+        if len(affected_player.center) > 0:
+            affected_player.set_holomem_hp(affected_player.center[0]["game_card_id"], amount)
+
+    def effect_shuffle_archive_to_deck(self, effect_player : PlayerState, effect):
+        archived_cards = effect_player.archive
+        match effect.get("limitation"):
+            case "holomem":
+                archived_cards = [card for card in archived_cards if is_card_holomem(card)]
+        for card in archived_cards:
+            effect_player.move_card(card["game_card_id"], "deck", hidden_info=False)
+        effect_player.shuffle_deck()
+
+    def effect_shuffle_hand_to_deck(self, effect_player : PlayerState, effect):
+        self.last_card_count = len(effect_player.hand)
+        effect_player.shuffle_hand_to_deck()
+
+    def effect_spend_holopower(self, effect_player : PlayerState, effect):
+        amount = effect["amount"]
+        effect_player.spend_holopower(amount)
+        if "oshi_skill_id" in effect:
+            oshi_skill_event = {
+                "event_type": EventType.EventType_OshiSkillActivation,
+                "oshi_player_id": effect_player.player_id,
+                "skill_id": effect["oshi_skill_id"],
+            }
+            self.broadcast_event(oshi_skill_event)
 
-        return passed_on_continuation
+    def effect_switch_center_with_back(self, effect_player : PlayerState, effect):
+        effect_player_id = effect_player.player_id
+        target_player = effect_player
+        swap_opponent_cards = "opponent" in effect and effect["opponent"]
+        skip_resting = effect.get("skip_resting", False)
+        if swap_opponent_cards:
+            target_player = self.other_player(effect_player_id)
+        available_backstage_ids = []
+        for card in target_player.backstage:
+            if skip_resting and card.resting:
+                continue
+            available_backstage_ids.append(card["game_card_id"])
+        if len(available_backstage_ids) == 0 or (not swap_opponent_cards and not target_player.can_move_front_stage()):
+            # No effect.
+            pass
+        elif len(available_backstage_ids) == 1:
+            # Do it right away.
+            target_player.swap_center_with_back(available_backstage_ids[0])
+        else:
+            # Ask for a decision.
+            decision_event = {
+                "event_type": EventType.EventType_Decision_SwapHolomemToCenter,
+                "desired_response": GameAction.EffectResolution_ChooseCardsForEffect,
+                "effect_player_id": effect_player_id,
+                "cards_can_choose": available_backstage_ids,
+                "swap_opponent_cards": swap_opponent_cards,
+            }
+            self.broadcast_event(decision_event)
+            self.set_decision({
+                "decision_type": DecisionType.DecisionEffect_ChooseCardsForEffect,
+                "decision_player": effect_player_id,
+                "all_card_seen": available_backstage_ids,
+                "cards_can_choose": available_backstage_ids,
+                "amount_min": 1,
+                "amount_max": 1,
+                "effect_resolution": self.handle_holomem_swap,
+                "continuation": self.continue_resolving_effects,
+            })
 
     def add_effects_to_front(self, new_effects):
         self.effect_resolution_state.effects_to_resolve = new_effects + self.effect_resolution_state.effects_to_resolve
@@ -4652,6 +5544,8 @@ class GameEngine:
         return True
 
     def handle_game_message(self, player_id:str, action_type:str, action_data: dict):
+        start_time = time.perf_counter()
+        phase = self.phase
         self.all_game_messages.append({
             "game_message_number": len(self.all_game_messages),
             "last_event_number": len(self.all_events) - 1,
@@ -4720,6 +5614,16 @@ class GameEngine:
                 player_info_str += f"{player.username}({player.player_id}),"
             logger.error(f"Player info: {player_info_str}")
 
+        if self.record_latency:
+            self.record_message_latency(player_id, action_type, phase, time.perf_counter() - start_time)
+        return handled
+
+    def record_message_latency(self, player_id:str, action_type:str, phase:str, elapsed:float):
+        if message_latency_stats.record(action_type, phase, elapsed):
+            # Enough to find the message in the match log and replay up to it.
+            logger.warning(f"Slow game message: Room {self.room_id} Player {player_id} Action {action_type} Phase {phase} took {elapsed * 1000:.1f} ms."
+                f" Message {len(self.all_game_messages) - 1} Events {len(self.all_events)} Seed {self.seed}")
+
     def validate_mulligan(self, player_id:str, action_data: dict):
         if self.phase != GamePhase.Mulligan:
             self.send_event(self.make_error_event(player_id, "invalid_phase", "Invalid phase for mulligan."))
@@ -4862,7 +5766,7 @@ class GameEngine:
         new_center_card_id = action_data["new_center_card_id"]
         player.move_card(new_center_card_id, "center")
 
-        continuation()
+        self.run_continuation(continuation)
 
         return True
 
@@ -4892,7 +5796,7 @@ class GameEngine:
         for cheer_id, target_id in placements.items():
             player.move_card(cheer_id, "holomem", target_id)
 
-        continuation()
+        self.run_continuation(continuation)
         return True
 
     def validate_main_step_place_holomem(self, player_id:str, action_data:dict):
@@ -4968,7 +5872,7 @@ class GameEngine:
         card_id = action_data["card_id"]
         player.move_card(card_id, "backstage")
 
-        continuation()
+        self.run_continuation(continuation)
         return True
 
 
@@ -5167,7 +6071,7 @@ class GameEngine:
         if is_event_card_whit_magic_tag_limited(card):
             player.event_card_whit_magic_tag = True
 
-        card_effects = card["effects"]
+        card_effects = self.card_db.copy_effects(card["effects"])
         add_ids_to_effects(card_effects, player.player_id, card_id)
         self.floating_cards.append(card)
         self.begin_resolving_effects(card_effects, continuation, [card])
@@ -5219,7 +6123,7 @@ class GameEngine:
         player.baton_pass_this_turn = True
 
         continuation = self.clear_decision()
-        continuation()
+        self.run_continuation(continuation)
 
         return True
 
@@ -5367,7 +6271,7 @@ class GameEngine:
         opponent.move_cheer_between_holomems(placements)
 
         continuation = self.clear_decision()
-        continuation()
+        self.run_continuation(continuation)
 
         return True
 
@@ -5458,7 +6362,7 @@ class GameEngine:
             player.move_card(card_id, to_zone, zone_card_id="", hidden_info=True, add_to_bottom=bottom)
 
         continuation = self.clear_decision()
-        continuation()
+        self.run_continuation(continuation)
 
         return True
 
@@ -5469,7 +6373,7 @@ class GameEngine:
         owner = self.get_player(owner_id)
         owner.swap_center_with_back(card_id)
 
-        continuation()
+        self.run_continuation(continuation)
 
     def handle_add_turn_effect_for_holomem(self, decision_info_copy, performing_player_id:str, card_ids:List[str], continuation):
         effect_player = self.get_player(performing_player_id)
@@ -5484,7 +6388,7 @@ class GameEngine:
         }
         self.broadcast_event(event)
 
-        continuation()
+        self.run_continuation(continuation)
 
     def handle_deal_damage_to_holomem(self, decision_info_copy, performing_player_id:str, card_ids:List[str], continuation):
         effect = decision_info_copy["effect"]
@@ -5503,7 +6407,7 @@ class GameEngine:
                 effect.get("special", False),
                 effect.get("prevent_life_loss", False)
             )
-        continuation()
+        self.run_continuation(continuation)
 
     def handle_down_holomem(self, decision_info_copy, performing_player_id:str, card_ids:List[str], continuation):
         effect = decision_info_copy["effect"]
@@ -5524,7 +6428,7 @@ class GameEngine:
         hp_to_restore = decision_info_copy["effect_amount"]
         source_card_id = decision_info_copy["source_card_id"]
         self.add_restore_holomem_hp_internal_effect(effect_player, holomem_target, source_card_id, hp_to_restore)
-        continuation()
+        self.run_continuation(continuation)
 
     def handle_run_single_effect(self, decision_info_copy, performing_player_id:str, card_ids:List[str], continuation):
         effect_player = self.get_player(performing_player_id)
@@ -5532,12 +6436,12 @@ class GameEngine:
         effect["card_ids"] = card_ids
         # Assumption here is no conditions and no decisions after.
         self.do_effect(effect_player, effect)
-        continuation()
+        self.run_continuation(continuation)
 
     def handle_chose_bloom_now_choose_target(self, decision_info_copy, performing_player_id:str, card_ids:List[str], continuation):
         if len(card_ids) == 0:
             # The user decided to not do this.
-            continuation()
+            self.run_continuation(continuation)
             return
 
         effect_player = self.get_player(performing_player_id)
@@ -5575,7 +6479,7 @@ class GameEngine:
     def handle_bloom_into_target(self, decision_info_copy, performing_player_id:str, card_ids:List[str], continuation):
         if len(card_ids) == 0:
             # The user decided to not do this.
-            continuation()
+            self.run_continuation(continuation)
             return
         effect_player = self.get_player(performing_player_id)
         bloom_card_id = decision_info_copy["bloom_card_id"]
@@ -5585,12 +6489,12 @@ class GameEngine:
         chosen_card = self.find_card(card_ids[0])
         owner_player = self.get_player(chosen_card["owner_id"])
         self.return_holomem_to_debut(owner_player, card_ids[0])
-        continuation()
+        self.run_continuation(continuation)
 
     def return_holomem_to_debut(self, effect_player : PlayerState, card_id):
         card, _, _ = effect_player.find_card(card_id)
-        stacked_cards = card["stacked_cards"].copy()
-        attached_support = card["attached_support"].copy()
+        stacked_cards = card.stacked_cards.copy()
+        attached_support = card.attached_support.copy()
         debut = None
         for stacked_card in stacked_cards:
             if stacked_card["card_type"] == "holomem_debut":
@@ -5601,7 +6505,7 @@ class GameEngine:
             return
 
         # Restore the damage.
-        current_damage = card["damage"]
+        current_damage = card.damage
         effect_player.restore_holomem_hp(card_id, current_damage)
         # Return all stacked and attached to hand.
         for attached_card in attached_support:
@@ -5611,11 +6515,12 @@ class GameEngine:
         # Use player.bloom() in order to "bloom" the debut over this card.
         # This will keep all the cheer in place conveniently.
         if debut["game_card_id"] != card_id:
-            effect_player.bloom(debut["game_card_id"], card_id, lambda :
-                # Finally, move the debut card back to original target card back to hand
-                # since it got stacked as part of the bloom.
-                effect_player.move_card(card_id, "hand")
-            )
+            effect_player.bloom(debut["game_card_id"], card_id, Continuation(self, "complete_return_holomem_to_debut", effect_player, card_id))
+
+    def complete_return_holomem_to_debut(self, effect_player : PlayerState, card_id):
+        # Finally, move the debut card back to original target card back to hand
+        # since it got stacked as part of the bloom.
+        effect_player.move_card(card_id, "hand")
 
     def handle_choose_cards_result(self, decision_info_copy, performing_player_id:str, card_ids:List[str], continuation):
         from_zone = decision_info_copy["from_zone"]
@@ -5648,9 +6553,9 @@ class GameEngine:
                 "to_limitation": to_limitation,
                 "to_limitation_colors": to_limitation_colors,
                 "to_limitation_tags": to_limitation_tags,
-                "continuation": lambda :
-                    # Finish the cleanup of the remaining cards.
-                    self.choose_cards_cleanup_remaining(performing_player_id, remaining_card_ids, remaining_cards_action, from_zone, from_zone, continuation),
+                # Finish the cleanup of the remaining cards.
+                "continuation": Continuation(self, "choose_cards_cleanup_remaining",
+                    performing_player_id, remaining_card_ids, remaining_cards_action, from_zone, from_zone, continuation),
             }
             self.do_effect(player, attach_effect)
         elif to_zone in ["backstage", "stage"]:
@@ -5708,8 +6613,8 @@ class GameEngine:
                         "min_choice": 0,
                         "max_choice": len(choice) - 1,
                         "resolution_func": self.handle_choice_effects,
-                        "continuation": lambda :
-                            self.choose_cards_cleanup_remaining(performing_player_id, remaining_card_ids, remaining_cards_action, from_zone, from_zone, continuation)
+                        "continuation": Continuation(self, "choose_cards_cleanup_remaining",
+                            performing_player_id, remaining_card_ids, remaining_cards_action, from_zone, from_zone, continuation)
                     })
         elif to_zone == "bottom_of_deck":
             for card_id in card_ids:
@@ -5775,7 +6680,7 @@ class GameEngine:
                     raise NotImplementedError(f"Unimplemented remaining cards action: {remaining_cards_action}")
 
         if not self.current_decision:
-            continuation()
+            self.run_continuation(continuation)
 
     def handle_choice_return_collab(self, decision_info_copy, player_id, choice_index, continuation):
         # 0 is pass, 1 is okay
@@ -5783,18 +6688,18 @@ class GameEngine:
             player = self.get_player(player_id)
             player.return_collab()
 
-        continuation()
+        self.run_continuation(continuation)
 
     def handle_force_die_result(self, decision_info_copy, player_id, choice_index, continuation):
         # 0-5 is die result 1-6
         player = self.get_player(player_id)
         player.set_next_die_roll = choice_index + 1
-        continuation()
+        self.run_continuation(continuation)
 
     def handle_choice_effects(self, decision_info_copy, player_id, choice_index, continuation):
         if decision_info_copy.get("simultaneous_resolution", False):
             self.effect_resolution_state.simultaneous_choice_index = choice_index
-            continuation()
+            self.run_continuation(continuation)
         else:
             chosen_effect = decision_info_copy["choice"][choice_index]
             self.begin_resolving_effects([chosen_effect], continuation)
@@ -5822,7 +6727,7 @@ class GameEngine:
                             return False
                 return len(attached_mascots) < mascot_count_limit
             case "tool":
-                return all([card.get("sub_type") != sub_type for card in holomem["attached_support"]])
+                return all([card.get("sub_type") != sub_type for card in holomem.attached_support])
 
         return True # not a support card or support card sub-type has no restrictions
 
@@ -5834,4 +6739,197 @@ class GameEngine:
         for holomem in player.get_holomem_on_stage():
             if self.holomem_can_be_attached_with_support_card(holomem, card):
                 return True
-        return False
\ No newline at end of file
+        return False
+
+
+def mainstep_action_section(section, get_section_actions, dependencies):
+    # With a getter for the counts of the section's own dependencies.
+    return (section, get_section_actions, dependencies, change_counts_getter(dependencies))
+
+# Main step actions in the order they are offered, with what each depends on
+# (see PlayerState.changes). Conditions add their own dependencies.
+MAINSTEP_ACTION_SECTIONS = [
+    mainstep_action_section("place_holomem", GameEngine.get_mainstep_place_holomem_actions, ("hand", "stage")),
+    mainstep_action_section("bloom", GameEngine.get_mainstep_bloom_actions, ("hand", "stage", "attachments", "card_state", "player")),
+    mainstep_action_section("collab", GameEngine.get_mainstep_collab_actions, ("deck", "stage", "card_state", "player")),
+    mainstep_action_section("oshi_skill", GameEngine.get_mainstep_oshi_skill_actions, ("holopower", "player")),
+    mainstep_action_section("special", GameEngine.get_mainstep_special_actions, ("stage", "attachments")),
+    mainstep_action_section("play_support", GameEngine.get_mainstep_play_support_actions, ("hand", "stage", "attachments", "player")),
+    mainstep_action_section("baton_pass", GameEngine.get_mainstep_baton_pass_actions, ("stage", "attachments", "card_state", "player")),
+    mainstep_action_section("begin_performance", GameEngine.get_mainstep_begin_performance_actions, ("player",)),
+    mainstep_action_section("end_turn", GameEngine.get_mainstep_end_turn_actions, ()),
+]
+
+# What the conditions that can come up in the main step depend on.
+# Any other condition is assumed to depend on everything.
+MAINSTEP_CONDITION_DEPENDENCIES = {
+    Condition.Condition_AttachedTo: ("stage", "attachments", "effects"),
+    Condition.Condition_CanMoveFrontStage: ("player",),
+    Condition.Condition_CardsInHand: ("hand",),
+    Condition.Condition_CardTypeInHand: ("hand",),
+    Condition.Condition_CheerInPlay: ("stage", "attachments"),
+    Condition.Condition_EffectCardIdNotUsedThisTurn: ("player",),
+    Condition.Condition_HolomemOnStage: ("stage",),
+    Condition.Condition_HolopowerAtLeast: ("holopower",),
+    Condition.Condition_StageHasSpace: ("stage",),
+}
+
+# Continuation step name -> GameEngine method that runs it.
+CONTINUATION_STEPS = {
+    "begin_after_deal_damage": GameEngine.begin_after_deal_damage,
+    "begin_player_turn": GameEngine.begin_player_turn,
+    "choose_cards_cleanup_remaining": GameEngine.choose_cards_cleanup_remaining,
+    "complete_after_deal_damage": GameEngine.complete_after_deal_damage,
+    "complete_deal_damage": GameEngine.complete_deal_damage,
+    "complete_return_holomem_to_debut": GameEngine.complete_return_holomem_to_debut,
+    "continue_archive_cheer_from_holomem": GameEngine.continue_archive_cheer_from_holomem,
+    "continue_archive_from_hand": GameEngine.continue_archive_from_hand,
+    "continue_archive_revealed_cards": GameEngine.continue_archive_revealed_cards,
+    "continue_deal_damage": GameEngine.continue_deal_damage,
+    "process_downed_holomem": GameEngine.process_downed_holomem,
+    "resume_effect_resolution": GameEngine.resume_effect_resolution,
+}
+
+# Effect type -> GameEngine method that does it.
+# A method returns True if it passed on the continuation (a decision is pending).
+EFFECT_HANDLERS = {
+    EffectType.EffectType_AddDamageTaken: GameEngine.effect_add_damage_taken,
+    EffectType.EffectType_AddTurnEffect: GameEngine.effect_add_turn_effect,
+    EffectType.EffectType_AddTurnEffectForHolomem: GameEngine.effect_add_turn_effect_for_holomem,
+    EffectType.EffectType_AfterArchiveCheerCheck: GameEngine.effect_after_archive_check,
+    EffectType.EffectType_ArchiveCheerFromHolomem: GameEngine.effect_archive_cheer_from_holomem,
+    EffectType.EffectType_ArchiveFromHand: GameEngine.effect_archive_from_hand,
+    EffectType.EffectType_ArchiveRevealedCards: GameEngine.effect_archive_revealed_cards,
+    EffectType.EffectType_ArchiveThisAttachment: GameEngine.effect_archive_this_attachment,
+    EffectType.EffectType_ArchiveTopStackedHolomem: GameEngine.effect_archive_top_stacked_holomem,
+    EffectType.EffectType_AttachCardToHolomem: GameEngine.effect_attach_card_to_holomem,
+    EffectType.EffectType_AttachCardToHolomem_Internal: GameEngine.effect_attach_card_to_holomem_internal,
+    EffectType.EffectType_BloomAlreadyBloomedThisTurn: GameEngine.effect_bloom_already_bloomed_this_turn,
+    EffectType.EffectType_BloomDebutPlayedThisTurnTo1st: GameEngine.effect_bloom_debut_played_this_turn_to_1st,
+    EffectType.EffectType_BlockOpponentMovement: GameEngine.effect_block_opponent_movement,
+    EffectType.EffectType_Choice: GameEngine.effect_choice,
+    EffectType.EffectType_ChooseCards: GameEngine.effect_choose_cards,
+    EffectType.EffectType_DealDamage: GameEngine.effect_deal_damage,
+    EffectType.EffectType_DealDamage_Internal: GameEngine.effect_deal_damage_internal,
+    EffectType.EffectType_DealDamagePerStacked: GameEngine.effect_deal_damage_per_stacked,
+    EffectType.EffectType_DealLifeDamage: GameEngine.effect_deal_life_damage,
+    EffectType.EffectType_DownHolomem: GameEngine.effect_down_holomem,
+    EffectType.EffectType_Draw: GameEngine.effect_draw,
+    EffectType.EffectType_ForceDieResult: GameEngine.effect_force_die_result,
+    EffectType.EffectType_GenerateChoiceTemplate: GameEngine.effect_generate_choice_template,
+    EffectType.EffectType_GenerateHolopower: GameEngine.effect_generate_holopower,
+    EffectType.EffectType_GoFirst: GameEngine.effect_go_first,
+    EffectType.EffectType_OshiActivation: GameEngine.effect_oshi_activation,
+    EffectType.EffectType_ModifyNextLifeLoss: GameEngine.effect_modify_next_life_loss,
+    EffectType.EffectType_MoveCheerBetweenHolomems: GameEngine.effect_move_cheer_between_holomems,
+    EffectType.EffectType_MultipleDieRoll: GameEngine.effect_multiple_die_roll,
+    EffectType.EffectType_OrderCards: GameEngine.effect_order_cards,
+    EffectType.EffectType_Pass: GameEngine.effect_pass,
+    EffectType.EffectType_PerformanceLifeLostIncrease: GameEngine.effect_performance_life_lost_increase,
+    EffectType.EffectType_PlaceHolomem: GameEngine.effect_place_holomem,
+    EffectType.EffectType_PowerBoost: GameEngine.effect_power_boost,
+    EffectType.EffectType_PowerBoostPerAllFans: GameEngine.effect_power_boost_per_all_fans,
+    EffectType.EffectType_PowerBoostPerAllMascots: GameEngine.effect_power_boost_per_all_mascots,
+    EffectType.EffectType_PowerBoostPerArchivedHolomem: GameEngine.effect_power_boost_per_archived_holomem,
+    EffectType.EffectType_PowerBoostPerAllCheerColorTypes: GameEngine.effect_power_boost_per_all_cheer_color_types,
+    EffectType.EffectType_PowerBoostPerCheerColorTypes: GameEngine.effect_power_boost_per_cheer_color_types,
+    EffectType.EffectType_PowerBoostPerAttachedCheer: GameEngine.effect_power_boost_per_attached_cheer,
+    EffectType.EffectType_PowerBoostPerBackstage: GameEngine.effect_power_boost_per_backstage,
+    EffectType.EffectType_PowerBoostPerHolomem: GameEngine.effect_power_boost_per_holomem,
+    EffectType.EffectType_PowerBoostPerRevealedCard: GameEngine.effect_power_boost_per_revealed_card,
+    EffectType.EffectType_PowerBoostPerStacked: GameEngine.effect_power_boost_per_stacked,
+    EffectType.EffectType_PowerBoostPerPlayedSupport: GameEngine.effect_power_boost_per_played_support,
+    EffectType.EffectType_RecordEffectCardIdUsedThisTurn: GameEngine.effect_record_effect_card_id_used_this_turn,
+    EffectType.EffectType_RecordLastDieResult: GameEngine.effect_record_last_die_result,
+    EffectType.EffectType_RecordUsedOncePerGameEffect: GameEngine.effect_record_used_once_per_game_effect,
+    EffectType.EffectType_RecordUsedOncePerTurnEffect: GameEngine.effect_record_used_once_per_turn_effect,
+    EffectType.EffectType_RecoverDownedHolomemCards: GameEngine.effect_recover_downed_holomem_cards,
+    EffectType.EffectType_ReduceDamage: GameEngine.effect_reduce_damage,
+    EffectType.EffectType_ReduceRequiredArchiveCount: GameEngine.effect_reduce_required_archive_count,
+    EffectType.EffectType_RepeatArt: GameEngine.effect_repeat_art,
+    EffectType.EffectType_RestoreHp: GameEngine.effect_restore_hp,
+    EffectType.EffectType_RestoreHp_Internal: GameEngine.effect_restore_hp_internal,
+    EffectType.EffectType_ReturnHolomemToDebut: GameEngine.effect_return_holomem_to_debut,
+    EffectType.EffectType_RevealTopDeck: GameEngine.effect_reveal_top_deck,
+    EffectType.EffectType_RerollDie: GameEngine.effect_reroll_die,
+    EffectType.EffectType_RollDie: GameEngine.effect_roll_die,
+    EffectType.EffectType_RollDie_ChooseResult: GameEngine.effect_choose_die_result,
+    EffectType.EffectType_RollDie_Internal: GameEngine.effect_roll_die_internal,
+    EffectType.EffectType_RollDie_Internal_Resolution: GameEngine.effect_roll_die_internal_resolution,
+    EffectType.EffectType_SendCheer: GameEngine.effect_send_cheer,
+    EffectType.EffectType_SendCollabBack: GameEngine.effect_send_collab_back,
+    EffectType.EffectType_SetCenterHP: GameEngine.effect_set_center_hp,
+    EffectType.EffectType_ShuffleArchiveToDeck: GameEngine.effect_shuffle_archive_to_deck,
+    EffectType.EffectType_ShuffleHandToDeck: GameEngine.effect_shuffle_hand_to_deck,
+    EffectType.EffectType_SpendHolopower: GameEngine.effect_spend_holopower,
+    EffectType.EffectType_SwitchCenterWithBack: GameEngine.effect_switch_center_with_back,
+}
+
+# Condition name -> GameEngine method that evaluates it.
+CONDITION_HANDLERS = {
+    Condition.Condition_AnyTagHolomemHasCheer: GameEngine.condition_any_tag_holomem_has_cheer,
+    Condition.Condition_AttachedTo: GameEngine.condition_attached_to,
+    Condition.Condition_AttachedToHasTags: GameEngine.condition_attached_to_has_tags,
+    Condition.Condition_AttachedOwnerIsLocation: GameEngine.condition_attached_owner_is_location,
+    Condition.Condition_AttachedOwnerIsPerforming: GameEngine.condition_attached_owner_is_performing,
+    Condition.Condition_BloomTargetIsDebut: GameEngine.condition_bloom_target_is_debut,
+    Condition.Condition_CanArchiveFromHand: GameEngine.condition_can_archive_from_hand,
+    Condition.Condition_CanMoveFrontStage: GameEngine.condition_can_move_front_stage,
+    Condition.Condition_CardsInHand: GameEngine.condition_cards_in_hand,
+    Condition.Condition_CardTypeInHand: GameEngine.condition_card_type_in_hand,
+    Condition.Condition_CenterIsColor: GameEngine.condition_center_is_color,
+    Condition.Condition_CenterHasAnyTag: GameEngine.condition_center_has_any_tag,
+    Condition.Condition_CheerInPlay: GameEngine.condition_cheer_in_play,
+    Condition.Condition_ChosenCardHasTag: GameEngine.condition_chosen_card_has_tag,
+    Condition.Condition_CollabWith: GameEngine.condition_collab_with,
+    Condition.Condition_DamageAbilityIsColor: GameEngine.condition_damage_ability_is_color,
+    Condition.Condition_DamagedHolomemIsBackstage: GameEngine.condition_damaged_holomem_is_backstage,
+    Condition.Condition_DamagedHolomemIsCenterOrCollab: GameEngine.condition_damaged_holomem_is_center_or_collab,
+    Condition.Condition_DamageSourceIsOpponent: GameEngine.condition_damage_source_is_opponent,
+    Condition.Condition_DownedCardBelongsToOpponent: GameEngine.condition_downed_card_belongs_to_opponent,
+    Condition.Condition_DownedCardIsColor: GameEngine.condition_downed_card_is_color,
+    Condition.Condition_EffectCardIdNotUsedThisTurn: GameEngine.condition_effect_card_id_not_used_this_turn,
+    Condition.Condition_HasAttachedCard: GameEngine.condition_has_attached_card,
+    Condition.Condition_HasAttachmentOfType: GameEngine.condition_has_attachment_of_type,
+    Condition.Condition_HasAttachmentOfTypesAny: GameEngine.condition_has_attachment_of_types_any,
+    Condition.Condition_HasStackedHolomem: GameEngine.condition_has_stacked_holomem,
+    Condition.Condition_HolomemInArchive: GameEngine.condition_holomem_in_archive,
+    Condition.Condition_HolomemOnStage: GameEngine.condition_holomem_on_stage,
+    Condition.Condition_LastDieRolls: GameEngine.condition_last_die_rolls,
+    Condition.Condition_HolopowerAtLeast: GameEngine.condition_holopower_at_least,
+    Condition.Condition_NotUsedOncePerGameEffect: GameEngine.condition_not_used_once_per_game_effect,
+    Condition.Condition_NotUsedOncePerTurnEffect: GameEngine.condition_not_used_once_per_turn_effect,
+    Condition.Condition_OpponentTurn: GameEngine.condition_opponent_turn,
+    Condition.Condition_OshiIs: GameEngine.condition_oshi_is,
+    Condition.Condition_OshiIsColor: GameEngine.condition_oshi_is_color,
+    Condition.Condition_PerformanceTargetHasDamageOverHp: GameEngine.condition_performance_target_has_damage_over_hp,
+    Condition.Condition_PerformerIsCenter: GameEngine.condition_performer_is_center,
+    Condition.Condition_PerformerIsCollab: GameEngine.condition_performer_is_collab,
+    Condition.Condition_PerformerIsColor: GameEngine.condition_performer_is_color,
+    Condition.Condition_PerformerIsSpecificId: GameEngine.condition_performer_is_specific_id,
+    Condition.Condition_PerformerHasAnyTag: GameEngine.condition_performer_has_any_tag,
+    Condition.Condition_PerformerHasAttachmentOfType: GameEngine.condition_performer_has_attachment_of_type,
+    Condition.Condition_PlayedSupportThisTurn: GameEngine.condition_played_support_this_turn,
+    Condition.Condition_RevealedCardsCount: GameEngine.condition_revealed_cards_count,
+    Condition.Condition_RevealedCardsHaveSameType: GameEngine.condition_revealed_cards_have_same_type,
+    Condition.Condition_SelfStageHasCheerColorTypes: GameEngine.condition_self_stage_has_cheer_color_types,
+    Condition.Condition_SelfHasCheerColor: GameEngine.condition_self_has_cheer_color,
+    Condition.Condition_StageHasSpace: GameEngine.condition_stage_has_space,
+    Condition.Condition_TargetColor: GameEngine.condition_target_color,
+    Condition.Condition_TargetHasAnyTag: GameEngine.condition_target_has_any_tag,
+    Condition.Condition_TargetIsBackstage: GameEngine.condition_target_is_backstage,
+    Condition.Condition_TargetIsNotBackstage: GameEngine.condition_target_is_not_backstage,
+    Condition.Condition_ThisCardIsCenter: GameEngine.condition_this_card_is_center,
+    Condition.Condition_ThisCardIsCollab: GameEngine.condition_this_card_is_collab,
+    Condition.Condition_ThisCardIsPerforming: GameEngine.condition_this_card_is_performing,
+    Condition.Condition_TopDeckCardHasAnyCardType: GameEngine.condition_top_deck_has_any_card_type,
+    Condition.Condition_TopDeckCardHasAnyTag: GameEngine.condition_top_deck_card_has_any_tag,
+    Condition.Condition_ColorOnStage: GameEngine.condition_color_on_stage,
+}
+
+def compile_condition(condition):
+    # Bind a condition to its handler once so checking it is a single call.
+    handler = CONDITION_HANDLERS.get(condition["condition"])
+    if handler is None:
+        raise NotImplementedError(f"Unimplemented condition: {condition['condition']}")
+    return lambda engine, effect_player, source_card_id: handler(engine, effect_player, source_card_id, condition)
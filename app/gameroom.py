@@ -1,9 +1,10 @@
+import asyncio
 import traceback
 import json
 import os
 import time
 from typing import List
-from app.playermanager import Player
+from app.playermanager import Player, send_game_events_to_all
 from app.gameengine import GameEngine, GameAction, EventType
 from app.card_database import CardDatabase
 from app.aiplayer import AIPlayer, DefaultAIDeck
@@ -11,6 +12,8 @@ from app.dbaccess import upload_match_to_blob_storage
 import logging
 logger = logging.getLogger(__name__)
 
+OBSERVER_CATCHUP_PAGE_SIZE = 50
+
 class GameRoom:
     def __init__(self, room_id : str, room_name : str, players : List[Player], game_type : str, queue_name : str):
         self.room_id = room_id
@@ -21,9 +24,63 @@ class GameRoom:
         self.game_type = game_type
         self.queue_name = queue_name
         self.cleanup_room = False
+        self.engine = None
         for player in self.players:
             player.current_game_room = self
 
+        # Everything that touches the game runs in the room's own task, one item at a time
+        # in the order it was posted, so two players, the idle check and the AI never interleave.
+        # Each room has its own task, rooms don't wait on each other.
+        self.inbox : asyncio.Queue = asyncio.Queue()
+        self.room_task = None
+        self.closed = False
+        # Called with the room after each inbox item is processed.
+        self.on_processed = None
+
+    def post(self, handler, *args) -> asyncio.Future:
+        # The future is done once the handler has run, it is never failed.
+        future = asyncio.get_running_loop().create_future()
+        if self.closed:
+            future.set_result(None)
+            return future
+        self.inbox.put_nowait((handler, args, future))
+        if self.room_task is None or self.room_task.done():
+            self.room_task = asyncio.create_task(self.run_room())
+        return future
+
+    async def run_room(self):
+        while not self.closed:
+            item = await self.inbox.get()
+            if item is None:
+                break
+            handler, args, future = item
+            result = None
+            try:
+                result = await handler(*args)
+            except Exception as e:
+                error_details = traceback.format_exc()
+                logger.error(f"Error processing {handler.__name__} in Room {self.room_id}: {e} Callstack: {error_details}")
+            if not future.done():
+                # Not if whoever posted it was cancelled.
+                future.set_result(result)
+            if self.on_processed:
+                try:
+                    self.on_processed(self)
+                except Exception as e:
+                    error_details = traceback.format_exc()
+                    logger.error(f"Error after processing {handler.__name__} in Room {self.room_id}: {e} Callstack: {error_details}")
+
+        # Anything posted after the room closed is dropped.
+        while not self.inbox.empty():
+            item = self.inbox.get_nowait()
+            if item is not None and not item[2].done():
+                item[2].set_result(None)
+
+    def close(self):
+        self.closed = True
+        # Wake the room task if it is waiting for the next item.
+        self.inbox.put_nowait(None)
+
     def is_ai_game(self):
         return self.game_type == "ai"
 
@@ -39,7 +96,25 @@ class GameRoom:
             "players": [player.get_public_player_info() for player in self.players],
         }
 
-    async def start(self, card_db: CardDatabase):
+    def start(self, card_db: CardDatabase):
+        return self.post(self.begin_game, card_db)
+
+    def handle_game_message(self, player_id: str, action_type:str, action_data: dict):
+        return self.post(self.process_game_message, player_id, action_type, action_data)
+
+    def join_as_observer(self, player: Player):
+        return self.post(self.add_observer, player)
+
+    def observer_request_next_events(self, player: Player, starting_event_index):
+        return self.post(self.send_observer_catchup_events, player, starting_event_index)
+
+    def handle_player_quit(self, player: Player):
+        return self.post(self.process_player_quit, player)
+
+    def handle_player_disconnect(self, player: Player):
+        return self.post(self.process_player_disconnect, player)
+
+    async def begin_game(self, card_db: CardDatabase):
         logger.info(f"GAME: Starting game ({self.room_id}) Players ({[player.get_username() for player in self.players]}) Ids ({[player.player_id for player in self.players]})")
         player_info = [player.get_player_game_info() for player in self.players]
         if self.is_ai_game():
@@ -50,14 +125,12 @@ class GameRoom:
         self.engine = GameEngine(
             card_db=card_db,
             player_infos=player_info,
-            game_type=self.game_type
+            game_type=self.game_type,
+            room_id=self.room_id,
         )
 
         self.engine.begin_game()
-        events = self.engine.grab_events()
-        await self.send_events(events)
-        observer_events = self.engine.grab_observer_events()
-        await self.send_observer_events(observer_events)
+        events = self.send_events()
 
         if self.is_ai_game():
             # In case the AI has to mulligan first!
@@ -68,21 +141,31 @@ class GameRoom:
                 action_type = ai_action["action_type"]
                 action_data = ai_action["action_data"]
 
-                await self.handle_game_message(player_id, action_type, action_data)
+                await self.process_game_message(player_id, action_type, action_data)
 
-    async def send_events(self, events):
-        for event in events:
-            for player in self.players:
-                if player.connected and player.player_id == event["event_player_id"]:
-                    await player.send_game_event(event)
+    def send_events(self):
+        # Queued on each player's connection, sending never waits on the network.
+        # Event views are only built for connected players and the AI, the AI's events are returned.
+        recipient_ids = [player.player_id for player in self.players if player.connected]
+        if self.ai_player:
+            recipient_ids.append(self.ai_player.player_id)
+        events_by_player = self.engine.grab_player_events(recipient_ids)
+        for player in self.players:
+            if player.connected:
+                player.send_game_events(events_by_player[player.player_id])
+        self.send_observer_events()
+        return events_by_player.get(self.ai_player.player_id) if self.ai_player else []
+
+    def send_observer_events(self):
+        if not self.observers:
+            # Don't build the observer views if nobody is watching.
+            self.engine.skip_observer_events()
+            return
 
-    async def send_observer_events(self, events):
-        for event in events:
-            for player in self.observers:
-                if player.connected:
-                    await player.send_game_event(event)
+        events = self.engine.grab_observer_events()
+        send_game_events_to_all(self.observers, events)
 
-    async def handle_game_message(self, player_id: str, action_type:str, action_data: dict):
+    async def process_game_message(self, player_id: str, action_type:str, action_data: dict):
         for observer in self.observers:
             if player_id == observer.player_id:
                 # Assume any message from an observer is them leaving.
@@ -101,10 +184,7 @@ class GameRoom:
         done_processing = False
         while not done_processing and not self.engine.is_game_over():
             self.engine.handle_game_message(player_id, action_type, action_data)
-            events = self.engine.grab_events()
-            await self.send_events(events)
-            observer_events = self.engine.grab_observer_events()
-            await self.send_observer_events(observer_events)
+            events = self.send_events()
             if self.is_ai_game():
                 ai_performing_action, ai_action = self.ai_player.ai_process_events(events)
                 #logger.info("AI Action: %s %s" % (ai_performing_action, ai_action))
@@ -129,37 +209,35 @@ class GameRoom:
     def is_ready_for_cleanup(self):
         return self.cleanup_room
 
-    async def join_as_observer(self, player: Player):
+    async def add_observer(self, player: Player):
         self.observers.append(player)
         player.current_game_room = self
 
-        await self.observer_request_next_events(player, 0)
-
-    async def observer_request_next_events(self, player: Player, starting_event_index):
-        events = self.engine.get_observer_catchup_events()
+        await self.send_observer_catchup_events(player, 0)
 
+    async def send_observer_catchup_events(self, player: Player, starting_event_index):
         # Only send the next 50 events.
-        ending_event_index = starting_event_index + 50
-        for event in events[starting_event_index:ending_event_index]:
-            await player.send_game_event(event)
+        events = self.engine.get_observer_catchup_events(starting_event_index, OBSERVER_CATCHUP_PAGE_SIZE)
+        ending_event_index = starting_event_index + OBSERVER_CATCHUP_PAGE_SIZE
 
-        # If this is the end, send the catch up event.
-        if ending_event_index >= len(events):
-            await player.send_game_event({"event_type": EventType.EventType_ObserverCaughtUp})
+        # If this is the end, send the catch up event with them.
+        if ending_event_index >= self.engine.get_observer_catchup_event_count():
+            events.append({"event_type": EventType.EventType_ObserverCaughtUp})
+        player.send_game_events(events)
 
 
-    async def handle_player_quit(self, player: Player):
+    async def process_player_quit(self, player: Player):
         try:
             logger.info(f"Player quit message: {player.get_username()} - {player.player_id} from Room {self.room_id}")
-            await self.handle_game_message(player.player_id, GameAction.Resign, {})
+            await self.process_game_message(player.player_id, GameAction.Resign, {})
         except Exception as e:
             error_details = traceback.format_exc()
             logger.error(f"Error processing handle_player_quitplayer {player.get_username()} - {player.player_id} from Room {self.room_id}: {e} Callstack: {error_details}")
 
-    async def handle_player_disconnect(self, player : Player):
+    async def process_player_disconnect(self, player : Player):
         try:
             logger.info(f"Player disconnect message: {player.get_username()} - {player.player_id} from Room {self.room_id}")
-            await self.handle_game_message(player.player_id, GameAction.Resign, {})
+            await self.process_game_message(player.player_id, GameAction.Resign, {})
         except Exception as e:
             error_details = traceback.format_exc()
             logger.error(f"Error processing handle_player_quitplayer {player.get_username()} - {player.player_id} from Room {self.room_id}: {e} Callstack: {error_details}")
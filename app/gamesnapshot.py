@@ -0,0 +1,75 @@
+import gc
+import io
+import pickle
+from app.gameengine import GameEngine
+from app.card_database import CardDatabase
+import logging
+logger = logging.getLogger(__name__)
+
+# Saves the whole state of a GameEngine (players, decisions, effects being resolved,
+# the random generator, etc.) so it can be restored later or forked.
+#
+# A snapshot is a pickle of a header followed by the engine.
+# The card definitions are not saved, the game refers to the card database's
+# template objects by index, so a snapshot can only be restored with the same
+# card definitions. Pending continuations are Continuation records (step name and
+# arguments) or bound methods, both saved by name.
+
+SNAPSHOT_VERSION = 3
+PICKLE_PROTOCOL = 5
+
+class SnapshotError(Exception):
+    pass
+
+class SnapshotPickler(pickle.Pickler):
+    def __init__(self, file, card_db : CardDatabase):
+        super().__init__(file, protocol=PICKLE_PROTOCOL)
+        get_template_index = card_db.get_template_object_indexes().get
+
+        # Called for every object saved, so kept to a plain function.
+        def persistent_id(obj):
+            obj_type = type(obj)
+            if obj_type is dict or obj_type is list:
+                return get_template_index(id(obj))
+            if obj is card_db:
+                return "card_db"
+            return None
+        self.persistent_id = persistent_id
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, card_db : CardDatabase):
+        super().__init__(file)
+        self.card_db = card_db
+        self.template_objects = card_db.get_template_objects()
+
+    def persistent_load(self, pid):
+        if pid == "card_db":
+            return self.card_db
+        return self.template_objects[pid]
+
+def snapshot_game(engine : GameEngine) -> bytes:
+    output = io.BytesIO()
+    pickler = SnapshotPickler(output, engine.card_db)
+    pickler.dump({
+        "version": SNAPSHOT_VERSION,
+        "card_definitions": engine.card_db.definitions_hash,
+    })
+    pickler.dump(engine)
+    return output.getvalue()
+
+def restore_game(card_db : CardDatabase, snapshot : bytes) -> GameEngine:
+    unpickler = SnapshotUnpickler(io.BytesIO(snapshot), card_db)
+    header = unpickler.load()
+    if header["version"] != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot version {header['version']} is not {SNAPSHOT_VERSION}")
+    if header["card_definitions"] != card_db.definitions_hash:
+        raise SnapshotError("Snapshot was saved with different card definitions")
+
+    # Loading creates a lot of objects at once, don't let it set off a full collection.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return unpickler.load()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
@@ -0,0 +1,102 @@
+from bisect import bisect_left, bisect_right
+from app.gameengine import GameEngine
+from app.card_database import CardDatabase
+import logging
+logger = logging.getLogger(__name__)
+
+# Rebuilds a logged match (GameEngine.get_match_log) so any point in it can be reached
+# without replaying it from the start.
+# The match is replayed once, saving a snapshot every CHECKPOINT_INTERVAL
+# messages and at the start of every turn. Seeking restores the nearest snapshot
+# before the target and replays the few messages after it.
+# Replays are headless unless asked otherwise. A headless seek gives a game with no
+# events or observer log. Otherwise the snapshots keep the events so far, and a seek
+# gives a game that sends events and can catch up observers from the start of the match.
+
+CHECKPOINT_INTERVAL = 20
+
+class ReplayError(Exception):
+    pass
+
+class MatchReplay:
+    def __init__(self, card_db : CardDatabase, match_data, checkpoint_interval = CHECKPOINT_INTERVAL, headless = True):
+        self.card_db = card_db
+        self.headless = headless
+        self.match_data = match_data
+        self.game_messages = match_data["all_game_messages"]
+        # For each message, the number of the last event before it was handled.
+        self.last_event_numbers = [message["last_event_number"] for message in self.game_messages]
+        # Snapshots in order, with the number of messages handled when each was saved.
+        self.checkpoint_message_counts = []
+        self.checkpoints = []
+        # turn number -> messages handled when it started
+        self.turn_starts = {}
+        self.build_checkpoints(checkpoint_interval)
+
+    def new_engine(self):
+        engine = GameEngine(self.card_db, self.match_data["game_type"], self.match_data["player_info"], headless=self.headless)
+        engine.seed = int(self.match_data["seed"])
+        # Replayed messages aren't in the message latency stats.
+        engine.record_latency = False
+        return engine
+
+    def handle_message(self, engine : GameEngine, message_index):
+        message = self.game_messages[message_index]
+        if not engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"]):
+            raise ReplayError(f"Message {message_index} ({message['action_type']}) was not handled.")
+
+    def add_checkpoint(self, engine : GameEngine, message_count):
+        self.checkpoint_message_counts.append(message_count)
+        self.checkpoints.append(engine.snapshot())
+
+    def build_checkpoints(self, checkpoint_interval):
+        engine = self.new_engine()
+        engine.begin_game()
+        self.turn_starts[engine.turn_number] = 0
+        self.add_checkpoint(engine, 0)
+        last_checkpoint = 0
+        for message_index in range(len(self.game_messages)):
+            if engine.is_game_over():
+                # Anything sent after the game ended was never handled.
+                self.game_messages = self.game_messages[:message_index]
+                self.last_event_numbers = self.last_event_numbers[:message_index]
+                break
+            self.handle_message(engine, message_index)
+            message_count = message_index + 1
+            new_turn = engine.turn_number not in self.turn_starts
+            if new_turn:
+                self.turn_starts[engine.turn_number] = message_count
+            if new_turn or message_count - last_checkpoint >= checkpoint_interval:
+                self.add_checkpoint(engine, message_count)
+                last_checkpoint = message_count
+
+        if engine.is_game_over():
+            winner = engine.get_player(engine.game_over_event["winner_id"]).username
+            if (engine.game_over_event["reason_id"], winner) != (self.match_data["game_over_reason"], self.match_data["winner"]):
+                raise ReplayError("Replay ended differently from the match log.")
+
+    def get_turn_count(self):
+        return max(self.turn_starts)
+
+    def seek_message(self, message_count) -> GameEngine:
+        # The game after the first message_count messages were handled.
+        if not 0 <= message_count <= len(self.game_messages):
+            raise ValueError(f"Message count {message_count} is out of range.")
+        checkpoint_index = bisect_right(self.checkpoint_message_counts, message_count) - 1
+        engine = GameEngine.restore(self.card_db, self.checkpoints[checkpoint_index])
+        for message_index in range(self.checkpoint_message_counts[checkpoint_index], message_count):
+            self.handle_message(engine, message_index)
+        # Messages from here on are new.
+        engine.record_latency = not engine.headless
+        return engine
+
+    def seek_turn(self, turn_number) -> GameEngine:
+        # The game as the turn started, before any of its player's actions.
+        if turn_number not in self.turn_starts:
+            raise ValueError(f"Turn {turn_number} is not in the match.")
+        return self.seek_message(self.turn_starts[turn_number])
+
+    def seek_event(self, event_number) -> GameEngine:
+        # The game right after the message that sent this event.
+        # Messages are logged with the number of the last event before them.
+        return self.seek_message(bisect_left(self.last_event_numbers, event_number))
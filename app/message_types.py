@@ -1,7 +1,22 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from typing import Any, Dict, List
 import json
 
+# Optional features a client can ask for when joining the server.
+# game_events: every event from one engine step comes in one game_events message
+# instead of a game_event message each.
+FEATURE_GAME_EVENTS = "game_events"
+# server_info_diffs: after a full server_info, lobby changes come as server_info_diff
+# messages. A diff applies to the server_info or diff with version base_version,
+# older versions are ignored. On a gap the client sends server_info_resync
+# and gets a full server_info again. A client too far behind on diffs also gets
+# a full server_info in place of the ones it hadn't been sent yet.
+FEATURE_SERVER_INFO_DIFFS = "server_info_diffs"
+
+# Clients that send lobby_subscribe get lobby_view messages with only what they
+# subscribed to instead of server_info, and only when it changed.
+MAX_LOBBY_PAGE_SIZE = 200
+
 @dataclass
 class Message:
     message_type: str
@@ -17,6 +32,33 @@ class ServerInfoMessage(Message):
     players_info: List[Dict]
     your_id : str
     your_username : str
+    version : int = 0
+
+@dataclass
+class ServerInfoDiffMessage(Message):
+    version : int
+    base_version : int
+    players_added : List[Dict]
+    players_changed : List[Dict]
+    players_removed : List[str]
+    rooms_added : List[Dict]
+    rooms_changed : List[Dict]
+    rooms_removed : List[str]
+    # Only when it changed.
+    queue_info : Any = None
+
+@dataclass
+class LobbyViewMessage(Message):
+    your_id : str
+    your_username : str
+    # Each view is only included when it changed, and left out of the message otherwise.
+    room_info : Any = None
+    queue_info : Any = None
+    # players_info, cursor, next_cursor (None on the last page) and players_count.
+    players_page : Any = None
+
+    def as_dict(self):
+        return {key: value for key, value in asdict(self).items() if value is not None}
 
 @dataclass
 class ErrorMessage(Message):
@@ -26,8 +68,22 @@ class ErrorMessage(Message):
 # Server Inbound Messages
 @dataclass
 class JoinServerMessage(Message):
+    features: List[str] = field(default_factory=list)
+
+@dataclass
+class ServerInfoResyncMessage(Message):
     pass
 
+@dataclass
+class LobbySubscribeMessage(Message):
+    rooms : bool = False
+    queues : bool = False
+    players : bool = False
+    # A page starts after the player with this cursor, 0 for the first page.
+    # Cursors are given out as next_cursor in the pages.
+    players_cursor : int = 0
+    players_page_size : int = 50
+
 @dataclass
 class ObserveRoomMessage(Message):
     room_id: str
@@ -65,6 +121,10 @@ def parse_message(json_data: str) -> Message:
     match message_type:
         case "join_server":
             return JoinServerMessage(**data)
+        case "server_info_resync":
+            return ServerInfoResyncMessage(**data)
+        case "lobby_subscribe":
+            return LobbySubscribeMessage(**data)
         case "join_matchmaking_queue":
             return JoinMatchmakingQueueMessage(**data)
         case "leave_matchmaking_queue":
@@ -1,9 +1,52 @@
 import os
+import json
+import asyncio
+from collections import deque
 from fastapi import WebSocket
 from typing import Dict
-from app.message_types import ServerInfoMessage
+from app.message_types import ServerInfoMessage, ServerInfoDiffMessage, LobbyViewMessage, LobbySubscribeMessage
+from app.message_types import FEATURE_GAME_EVENTS, FEATURE_SERVER_INFO_DIFFS, MAX_LOBBY_PAGE_SIZE
 import random
 import time
+from bisect import bisect_right
+import logging
+logger = logging.getLogger(__name__)
+
+# Messages a client can fall behind by before it is disconnected.
+# Lobby updates are queued apart and don't count toward it.
+OUTBOUND_QUEUE_SIZE = int(os.getenv("OUTBOUND_QUEUE_SIZE", "1000"))
+# Lobby updates a client can fall behind by before they are dropped
+# and the whole lobby is sent once in their place.
+LOBBY_QUEUE_SIZE = int(os.getenv("LOBBY_QUEUE_SIZE", "50"))
+
+def encode_message(message : dict):
+    # The same JSON as WebSocket.send_json.
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+def send_game_events_to_all(players, events):
+    # Each form of the message is encoded once, however many players get it.
+    if not events:
+        return
+    batch_message = None
+    event_messages = None
+    for player in players:
+        if not player.connected:
+            continue
+        if FEATURE_GAME_EVENTS in player.features:
+            if batch_message is None:
+                batch_message = encode_message({
+                    "message_type": "game_events",
+                    "events": events
+                })
+            player.send_encoded(batch_message)
+        else:
+            if event_messages is None:
+                event_messages = [encode_message({
+                    "message_type": "game_event",
+                    "event_data": event
+                }) for event in events]
+            for event_message in event_messages:
+                player.send_encoded(event_message)
 
 def generate_username(num_results=1):
     directory_path = os.path.dirname(__file__)
@@ -37,6 +80,97 @@ class Player:
         self.oshi_id = None
         self.deck = []
         self.cheer_deck = []
+        self.features = set()
+
+        # Encoded messages are sent by the player's own writer task, in order,
+        # so nothing sending to them ever waits on their connection.
+        self.outbound = deque()
+        self.outbound_ready = asyncio.Event()
+        self.writer_task = None
+        # Closes the connection of a player who fell too far behind.
+        self.close_task = None
+        # The latest server_info that hasn't been sent yet, sent before anything else.
+        self.queued_server_info = None
+        # Lobby updates, sent after the server_info and before outbound.
+        self.lobby_outbound = deque()
+        # The lobby version the player has been sent, None for a full server_info next.
+        self.server_info_version = None
+        # Lobby views the player subscribed to, instead of server_info.
+        self.lobby_subscription : LobbySubscribeMessage = None
+        # view -> the version of it (or for the players page, the page) last sent.
+        self.lobby_views_sent = {}
+
+    def send(self, message : dict):
+        self.send_encoded(encode_message(message))
+
+    def send_encoded(self, message : str):
+        if not self.connected:
+            return
+        if len(self.outbound) >= OUTBOUND_QUEUE_SIZE:
+            logger.warning(f"Player {self.get_username()} - {self.player_id} fell {len(self.outbound)} messages behind, disconnecting.")
+            self.disconnect()
+            self.close_task = asyncio.create_task(self.close_websocket())
+            return
+        self.outbound.append(message)
+        self.start_writer()
+
+    def send_server_info(self, message : str):
+        if not self.connected:
+            return
+        # Only the latest lobby state matters.
+        self.queued_server_info = message
+        self.start_writer()
+
+    def send_lobby_update(self, message : str):
+        # False if the player is too far behind on lobby updates, the message isn't queued then.
+        if not self.connected:
+            return True
+        if len(self.lobby_outbound) >= LOBBY_QUEUE_SIZE:
+            return False
+        self.lobby_outbound.append(message)
+        self.start_writer()
+        return True
+
+    def drop_lobby_updates(self):
+        self.lobby_outbound.clear()
+
+    def start_writer(self):
+        self.outbound_ready.set()
+        if self.writer_task is None:
+            self.writer_task = asyncio.create_task(self.run_writer())
+
+    async def run_writer(self):
+        while self.connected:
+            if self.queued_server_info is not None:
+                message = self.queued_server_info
+                self.queued_server_info = None
+            elif self.lobby_outbound:
+                message = self.lobby_outbound.popleft()
+            elif self.outbound:
+                message = self.outbound.popleft()
+            else:
+                self.outbound_ready.clear()
+                await self.outbound_ready.wait()
+                continue
+            try:
+                await self.websocket.send_text(message)
+            except Exception as e:
+                logger.info(f"Send failed to player {self.get_username()} - {self.player_id}: {e}")
+                self.disconnect()
+
+    def disconnect(self):
+        # Stops sending, anything not sent yet is dropped.
+        self.connected = False
+        self.outbound.clear()
+        self.lobby_outbound.clear()
+        self.queued_server_info = None
+        self.outbound_ready.set()
+
+    async def close_websocket(self):
+        try:
+            await self.websocket.close()
+        except Exception as e:
+            logger.info(f"Close failed for player {self.get_username()} - {self.player_id}: {e}")
 
     def save_deck_info(self, oshi_id: str, deck: Dict[str, int], cheer_deck: Dict[str, int]):
         self.oshi_id = oshi_id
@@ -73,23 +207,67 @@ class Player:
             "oshi_id": self.oshi_id,
         }
 
-    async def send_game_event(self, event):
-        await self.websocket.send_json({
+    def set_features(self, features):
+        if not isinstance(features, list):
+            features = []
+        self.features = {feature for feature in features if isinstance(feature, str)}
+
+    def set_lobby_subscription(self, subscription : LobbySubscribeMessage):
+        if not isinstance(subscription.players_cursor, int) or not isinstance(subscription.players_page_size, int):
+            return False
+        subscription.players_page_size = max(1, min(subscription.players_page_size, MAX_LOBBY_PAGE_SIZE))
+        self.lobby_subscription = subscription
+        # Everything subscribed to is sent again.
+        self.lobby_views_sent = {}
+        return True
+
+    def send_game_event(self, event):
+        self.send({
             "message_type": "game_event",
             "event_data": event
         })
 
+    def send_game_events(self, events):
+        # One message for all of them if the client supports it.
+        send_game_events_to_all([self], events)
+
+def diff_by_id(old_items, new_items):
+    # Added and changed items, and ids removed.
+    added = [item for item_id, item in new_items.items() if item_id not in old_items]
+    changed = [item for item_id, item in new_items.items() if item_id in old_items and old_items[item_id] != item]
+    removed = [item_id for item_id in old_items if item_id not in new_items]
+    return added, changed, removed
+
 class PlayerManager:
     def __init__(self):
         self.active_players : Dict[str, Player] = {}
+        # The lobby as last broadcast, to send only what changed since.
+        self.lobby_version = 0
+        self.lobby_players = {}
+        self.lobby_rooms = {}
+        self.lobby_queue_info = None
+        # Versions of each lobby view, for subscribers to tell what changed.
+        self.lobby_view_versions = {"rooms": 0, "queues": 0, "players": 0}
+        # Players in the lobby snapshot in the order they joined, by their sequence numbers,
+        # so a page is found without going through everyone before it.
+        self.next_player_sequence = 1
+        self.player_sequences = {}
+        self.lobby_order_sequences = []
+        self.lobby_order_ids = []
 
     def add_player(self, player_id: str, websocket: WebSocket):
         self.active_players[player_id] = Player(player_id, websocket)
+        self.player_sequences[player_id] = self.next_player_sequence
+        self.next_player_sequence += 1
         return self.active_players[player_id]
 
     def remove_player(self, player_id: str):
         if player_id in self.active_players:
+            self.active_players[player_id].disconnect()
             del self.active_players[player_id]
+            if player_id not in self.lobby_players:
+                # Never in a broadcast, so not in the lobby order either.
+                del self.player_sequences[player_id]
 
     def get_player(self, player_id: str) -> Player:
         return self.active_players.get(player_id)
@@ -97,35 +275,141 @@ class PlayerManager:
     def get_players_info(self):
         return [player.get_public_player_info() for player in self.active_players.values()]
 
-    async def broadcast_server_info(self, queue_info, game_rooms):
-        players_info = self.get_players_info()
-        failed_players = []
-        room_info = []
-        for room in game_rooms:
-            if not room.is_ai_game():
-                room_info.append(room.get_room_info())
-        player_ids = list(self.active_players.keys())
-        for player_id in player_ids:
-            if player_id not in self.active_players:
-                continue
-            player = self.active_players[player_id]
-            if not player.connected:
-                continue
+    def update_lobby(self, players, rooms, queue_info):
+        # Returns the diff from the last version, None if nothing changed.
+        players_added, players_changed, players_removed = diff_by_id(self.lobby_players, players)
+        rooms_added, rooms_changed, rooms_removed = diff_by_id(self.lobby_rooms, rooms)
+        queue_changed = queue_info != self.lobby_queue_info
+        if not (players_added or players_changed or players_removed or rooms_added or rooms_changed or rooms_removed or queue_changed):
+            return None
 
-            message = ServerInfoMessage(
-                message_type="server_info",
-                queue_info=queue_info,
-                room_info=room_info,
-                players_info=players_info,
-                your_id=player.player_id,
-                your_username=player.get_username()
-            )
+        self.lobby_version += 1
+        self.lobby_players = players
+        self.lobby_rooms = rooms
+        self.lobby_queue_info = queue_info
+        if rooms_added or rooms_changed or rooms_removed:
+            self.lobby_view_versions["rooms"] += 1
+        if queue_changed:
+            self.lobby_view_versions["queues"] += 1
+        if players_added or players_changed or players_removed:
+            self.lobby_view_versions["players"] += 1
+            self.update_lobby_order(players_added, players_removed)
+        return ServerInfoDiffMessage(
+            message_type="server_info_diff",
+            version=self.lobby_version,
+            base_version=self.lobby_version - 1,
+            players_added=players_added,
+            players_changed=players_changed,
+            players_removed=players_removed,
+            rooms_added=rooms_added,
+            rooms_changed=rooms_changed,
+            rooms_removed=rooms_removed,
+            queue_info=queue_info if queue_changed else None,
+        )
 
-            try:
-                await player.websocket.send_json(message.as_dict())
-            except:
-                failed_players.append(player.player_id)
+    def update_lobby_order(self, players_added, players_removed):
+        for player_id in players_removed:
+            sequence = self.player_sequences.pop(player_id)
+            index = bisect_right(self.lobby_order_sequences, sequence) - 1
+            del self.lobby_order_sequences[index]
+            del self.lobby_order_ids[index]
+        # Added players are in the order they joined, after everyone already listed.
+        for player_info in players_added:
+            self.lobby_order_sequences.append(self.player_sequences[player_info["player_id"]])
+            self.lobby_order_ids.append(player_info["player_id"])
+
+    def get_players_page(self, cursor, page_size):
+        start = bisect_right(self.lobby_order_sequences, cursor)
+        end = start + page_size
+        return {
+            "players_info": [self.lobby_players[player_id] for player_id in self.lobby_order_ids[start:end]],
+            "cursor": cursor,
+            "next_cursor": self.lobby_order_sequences[end - 1] if end < len(self.lobby_order_sequences) else None,
+            "players_count": len(self.lobby_order_ids),
+        }
 
-        # Remove any players we can't contact anymore.
-        for player_id in failed_players:
-            self.remove_player(player_id)
\ No newline at end of file
+    def send_lobby_view(self, player : Player):
+        view_message = self.get_lobby_view(player)
+        if view_message is None:
+            return
+        if not player.send_lobby_update(encode_message(view_message.as_dict())):
+            # Too far behind, every view is sent again in one message in place of the queued ones.
+            player.drop_lobby_updates()
+            player.lobby_views_sent = {}
+            view_message = self.get_lobby_view(player)
+            player.send_lobby_update(encode_message(view_message.as_dict()))
+
+    def get_lobby_view(self, player : Player):
+        # Only the views the player watches, and only the ones that changed since they were sent.
+        # None if nothing did, the views returned count as sent.
+        subscription = player.lobby_subscription
+        views_sent = player.lobby_views_sent
+        view_message = LobbyViewMessage(
+            message_type="lobby_view",
+            your_id=player.player_id,
+            your_username=player.get_username(),
+        )
+        changed = False
+        if subscription.rooms and views_sent.get("rooms") != self.lobby_view_versions["rooms"]:
+            views_sent["rooms"] = self.lobby_view_versions["rooms"]
+            view_message.room_info = list(self.lobby_rooms.values())
+            changed = True
+        if subscription.queues and views_sent.get("queues") != self.lobby_view_versions["queues"]:
+            views_sent["queues"] = self.lobby_view_versions["queues"]
+            view_message.queue_info = self.lobby_queue_info
+            changed = True
+        if subscription.players and views_sent.get("players_version") != self.lobby_view_versions["players"]:
+            views_sent["players_version"] = self.lobby_view_versions["players"]
+            page = self.get_players_page(subscription.players_cursor, subscription.players_page_size)
+            if page != views_sent.get("players"):
+                views_sent["players"] = page
+                view_message.players_page = page
+                changed = True
+        return view_message if changed else None
+
+    def get_server_info_prefix(self):
+        # Everything but the player's own id and name is encoded once,
+        # those are added at the end of the same JSON object for each player.
+        shared_message = ServerInfoMessage(
+            message_type="server_info",
+            queue_info=self.lobby_queue_info,
+            room_info=list(self.lobby_rooms.values()),
+            players_info=list(self.lobby_players.values()),
+            your_id="",
+            your_username="",
+            version=self.lobby_version,
+        ).as_dict()
+        del shared_message["your_id"]
+        del shared_message["your_username"]
+        return encode_message(shared_message)[:-1]
+
+    def broadcast_server_info(self, queue_info, game_rooms):
+        players = {player.player_id: player.get_public_player_info() for player in self.active_players.values()}
+        rooms = {room.room_id: room.get_room_info() for room in game_rooms if not room.is_ai_game()}
+        diff = self.update_lobby(players, rooms, queue_info)
+
+        # Players up to date with the last version get the diff, anyone else the whole lobby.
+        encoded_diff = None
+        server_info_prefix = None
+        for player in list(self.active_players.values()):
+            if not player.connected:
+                continue
+            if player.lobby_subscription is not None:
+                self.send_lobby_view(player)
+                continue
+            if player.server_info_version == self.lobby_version:
+                continue
+            takes_diff = diff and FEATURE_SERVER_INFO_DIFFS in player.features and player.server_info_version == diff.base_version
+            player.server_info_version = self.lobby_version
+            if takes_diff:
+                if encoded_diff is None:
+                    encoded_diff = encode_message(diff.as_dict())
+                # In order with the diffs before it, never replaced.
+                if player.send_lobby_update(encoded_diff):
+                    continue
+            # The whole lobby replaces any diffs not sent yet.
+            player.drop_lobby_updates()
+            if server_info_prefix is None:
+                server_info_prefix = self.get_server_info_prefix()
+            player_fields = encode_message({"your_id": player.player_id, "your_username": player.get_username()})[1:]
+            player.send_server_info(f"{server_info_prefix},{player_fields}")
\ No newline at end of file
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+from app.gameengine import GameEngine, CONDITION_HANDLERS
+from app.card_database import CardDatabase
+from app.aiplayer import AIPlayer, play_ai_actions
+import logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Compares the cost of checking card conditions by matching the condition name
+# (how is_condition_met used to work) with calling the predicates compiled at load.
+# Replays the match logs in tests\test_match_logs, or the directory given on the command line.
+# With no match logs, AI vs AI games are played and replayed instead.
+
+REPEATS = 20
+GENERATED_GAMES = 20
+
+current_directory = os.getcwd()
+match_logs_dir = os.path.join(current_directory, "tests", "test_match_logs")
+if len(sys.argv) > 1:
+    match_logs_dir = sys.argv[1]
+
+card_db = CardDatabase()
+
+def build_legacy_dispatch():
+    # Rebuild the old match statement, one case per condition in the original order.
+    lines = ["def legacy_is_condition_met(engine, effect_player, source_card_id, condition):"]
+    lines.append("    match condition['condition']:")
+    for index, name in enumerate(CONDITION_HANDLERS):
+        lines.append(f"        case {name!r}:")
+        lines.append(f"            return handlers[{index}](engine, effect_player, source_card_id, condition)")
+    lines.append("        case _:")
+    lines.append("            raise NotImplementedError(f\"Unimplemented condition: {condition['condition']}\")")
+    namespace = {"handlers": list(CONDITION_HANDLERS.values())}
+    exec("\n".join(lines), namespace)
+    return namespace["legacy_is_condition_met"]
+
+legacy_is_condition_met = build_legacy_dispatch()
+
+class ConditionTimings:
+    def __init__(self):
+        self.checks = 0
+        self.compiled_checks = 0
+        self.legacy_time = 0.0
+        self.compiled_time = 0.0
+
+timings = ConditionTimings()
+
+def legacy_are_conditions_met(engine, effect_player, source_card_id, conditions):
+    for condition in conditions:
+        if not legacy_is_condition_met(engine, effect_player, source_card_id, condition):
+            return False
+    return True
+
+class BenchmarkEngine(GameEngine):
+    def are_conditions_met(self, effect_player, source_card_id, conditions):
+        # Time both ways of checking at the point of use so they see the same game state.
+        # Conditions don't change the game so repeating them is safe.
+        timings.checks += len(conditions)
+        timings.compiled_checks += sum(1 for condition in conditions if id(condition) in self.card_db.compiled_conditions)
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            legacy_result = legacy_are_conditions_met(self, effect_player, source_card_id, conditions)
+        timings.legacy_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            result = GameEngine.are_conditions_met(self, effect_player, source_card_id, conditions)
+        timings.compiled_time += time.perf_counter() - start
+
+        if result != legacy_result:
+            raise Exception(f"Condition result mismatch: {conditions}")
+        return result
+
+def replay_match(match_data):
+    all_game_messages = match_data["all_game_messages"]
+    engine = BenchmarkEngine(card_db, match_data["game_type"], match_data["player_info"])
+    engine.seed = int(match_data["seed"])
+    engine.begin_game()
+    for message in all_game_messages:
+        if engine.is_game_over():
+            break
+        engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"])
+
+def load_starter_deck(file_name):
+    with open(os.path.join(current_directory, "decks", file_name), "r") as f:
+        return json.load(f)
+
+def generate_match_logs(game_count):
+    decks = [load_starter_deck("starter_azki.json"), load_starter_deck("starter_sora.json")]
+    match_logs = []
+    for game_index in range(game_count):
+        players = []
+        for player_index, deck in enumerate(decks):
+            players.append({
+                "player_id": f"player{player_index + 1}",
+                "username": f"AI Player {player_index + 1}",
+                "oshi_id": deck["oshi_id"],
+                "deck": deck["deck"],
+                "cheer_deck": deck["cheer_deck"],
+            })
+        engine = GameEngine(card_db, "versus", players)
+        engine.seed = game_index
+        ais = [AIPlayer(player["player_id"]) for player in players]
+        engine.begin_game()
+        for actions in play_ai_actions(engine, ais):
+            for _, action_info, handled in actions:
+                if not handled:
+                    raise Exception(f"Game error in generated game {game_index}: {action_info['action_type']}")
+        if not engine.is_game_over():
+            raise Exception(f"Generated game {game_index} stopped before the end")
+        match_logs.append(engine.get_match_log())
+    return match_logs
+
+def load_match_logs():
+    match_logs = []
+    if os.path.isdir(match_logs_dir):
+        for file_name in os.listdir(match_logs_dir):
+            if file_name.endswith(".json"):
+                with open(os.path.join(match_logs_dir, file_name), "r") as f:
+                    match_logs.append(json.load(f))
+    return match_logs
+
+match_logs = load_match_logs()
+if match_logs:
+    print(f"Replaying {len(match_logs)} match logs from {match_logs_dir}")
+else:
+    print(f"No match logs in {match_logs_dir}, generating {GENERATED_GAMES} AI games")
+    match_logs = generate_match_logs(GENERATED_GAMES)
+
+for match_data in match_logs:
+    replay_match(match_data)
+
+if timings.checks == 0:
+    print("No conditions were checked.")
+    sys.exit(0)
+
+calls = timings.checks * REPEATS
+print(f"Conditions: {timings.checks} ({timings.compiled_checks} precompiled, {timings.checks - timings.compiled_checks} copied during resolution)")
+print(f"Match dispatch:    {timings.legacy_time * 1e9 / calls:8.1f} ns per condition")
+print(f"Compiled dispatch: {timings.compiled_time * 1e9 / calls:8.1f} ns per condition")
+print(f"Speedup: {timings.legacy_time / timings.compiled_time:.2f}x")
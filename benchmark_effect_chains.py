@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+from app.gameengine import GameEngine, DecisionType
+from app.card_database import CardDatabase
+from app.aiplayer import AIPlayer, play_ai_actions
+import logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Compares resolving long chains of effects with continuations run by the loop in
+# run_continuation against calling each continuation directly (how they used to run).
+# Each chain is a list of 0 damage effects, every one goes through the whole
+# deal damage continuation chain before the next effect starts.
+# Reports the deepest stack seen and the time per chain.
+
+CHAIN_LENGTHS = [10, 50, 100, 200, 400]
+REPEATS = 20
+
+current_directory = os.getcwd()
+card_db = CardDatabase()
+
+def load_starter_deck(file_name):
+    with open(os.path.join(current_directory, "decks", file_name), "r") as f:
+        return json.load(f)
+
+def start_game():
+    # Play AI moves until the first main step, both players have a center by then.
+    decks = [load_starter_deck("starter_azki.json"), load_starter_deck("starter_sora.json")]
+    players = []
+    for player_index, deck in enumerate(decks):
+        players.append({
+            "player_id": f"player{player_index + 1}",
+            "username": f"AI Player {player_index + 1}",
+            "oshi_id": deck["oshi_id"],
+            "deck": deck["deck"],
+            "cheer_deck": deck["cheer_deck"],
+        })
+    engine = GameEngine(card_db, "versus", players)
+    engine.seed = 0
+    ais = [AIPlayer(player["player_id"]) for player in players]
+    engine.begin_game()
+    for _ in play_ai_actions(engine, ais):
+        if engine.current_decision and engine.current_decision["decision_type"] == DecisionType.DecisionMainStep:
+            return engine
+    raise Exception("The game ended before the first main step")
+
+def build_chain(engine : GameEngine, length):
+    player = engine.get_player(engine.active_player_id)
+    source_card_id = player.center[0]["game_card_id"]
+    return [{
+        "player_id": player.player_id,
+        "effect_type": "deal_damage",
+        "target": "center",
+        "opponent": True,
+        "amount": 0,
+        "source_card_id": source_card_id,
+    } for _ in range(length)]
+
+def chain_resolved():
+    pass
+
+def resolve_chain(engine : GameEngine, chain):
+    engine.clear_decision()
+    engine.begin_resolving_effects(chain, chain_resolved)
+    if engine.effect_resolution_state:
+        raise Exception("Chain did not finish resolving")
+
+def stack_depth():
+    depth = 0
+    frame = sys._getframe(1)
+    while frame:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+def measure_depth(start_snapshot, length):
+    engine = GameEngine.restore(card_db, start_snapshot)
+    max_depth = [0]
+    broadcast_event = engine.broadcast_event
+    def measured_broadcast_event(event):
+        max_depth[0] = max(max_depth[0], stack_depth())
+        broadcast_event(event)
+    engine.broadcast_event = measured_broadcast_event
+    resolve_chain(engine, build_chain(engine, length))
+    return max_depth[0]
+
+def measure_time(start_snapshot, length):
+    total_time = 0.0
+    for _ in range(REPEATS):
+        engine = GameEngine.restore(card_db, start_snapshot)
+        chain = build_chain(engine, length)
+        engine.grab_events()
+        start = time.perf_counter()
+        resolve_chain(engine, chain)
+        total_time += time.perf_counter() - start
+    return total_time / REPEATS
+
+def call_directly(self, continuation):
+    continuation()
+
+def run_mode(start_snapshot, length):
+    try:
+        return measure_depth(start_snapshot, length), measure_time(start_snapshot, length)
+    except RecursionError:
+        return None, None
+
+start_snapshot = start_game().snapshot()
+print(f"Recursion limit: {sys.getrecursionlimit()}")
+print(f"{'chain':>6} {'loop depth':>11} {'loop ms':>9} {'direct depth':>13} {'direct ms':>10}")
+run_continuation = GameEngine.run_continuation
+for length in CHAIN_LENGTHS:
+    GameEngine.run_continuation = run_continuation
+    loop_depth, loop_time = run_mode(start_snapshot, length)
+    GameEngine.run_continuation = call_directly
+    direct_depth, direct_time = run_mode(start_snapshot, length)
+    GameEngine.run_continuation = run_continuation
+
+    def format_result(depth, elapsed, width):
+        if depth is None:
+            return f"{'RecursionError':>{width * 2 + 1}}"
+        return f"{depth:>{width}} {elapsed * 1000:>{width}.2f}"
+    print(f"{length:>6} {format_result(loop_depth, loop_time, 10)} {format_result(direct_depth, direct_time, 11)}")
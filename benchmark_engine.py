@@ -0,0 +1,389 @@
+import gc
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from app.gameengine import GameEngine, DecisionType, CONDITION_HANDLERS, TakeDamageState, AfterDamageState, DownHolomemState
+from app.card_database import CardDatabase, find_conditions
+from app.aiplayer import AIPlayer, play_ai_actions
+import logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Times the main engine operations and compares them with a saved baseline.
+# Every benchmark runs several rounds and keeps the fastest time per operation,
+# the least disturbed by anything else running on the machine.
+# Run with --save to write the baseline, later runs fail when any benchmark is
+# slower than the baseline by more than the threshold.
+# Match logs come from tests\test_match_logs. Without them, AI vs AI games are
+# played and their logs used instead, the baseline records which was used.
+# Timings depend on the machine, so the baseline isn't committed: create one on the
+# machine you benchmark on with --save before making changes (see the README).
+
+ROUNDS = 5
+THRESHOLD = 0.25
+AI_GAME_SEEDS = range(10)
+GENERATED_GAMES = 20
+# Repeats of each condition check.
+CONDITION_REPEATS = 20
+# Every nth main step board is prepared for checking every condition in the card definitions.
+CONDITION_BOARD_INTERVAL = 10
+# Every nth main step decision in the match logs is used as a board.
+MAINSTEP_BOARD_INTERVAL = 10
+
+current_directory = os.getcwd()
+default_baseline_path = os.path.join(current_directory, "benchmark_baseline.json")
+match_logs_dir = os.path.join(current_directory, "tests", "test_match_logs")
+
+card_db = CardDatabase()
+
+def load_starter_deck(file_name):
+    with open(os.path.join(current_directory, "decks", file_name), "r") as f:
+        return json.load(f)
+
+decks = [load_starter_deck("starter_azki.json"), load_starter_deck("starter_sora.json")]
+players = []
+for player_index, deck in enumerate(decks):
+    players.append({
+        "player_id": f"player{player_index + 1}",
+        "username": f"AI Player {player_index + 1}",
+        "oshi_id": deck["oshi_id"],
+        "deck": deck["deck"],
+        "cheer_deck": deck["cheer_deck"],
+    })
+
+def play_ai_game(seed):
+    random.seed(seed)
+    engine = GameEngine(card_db, "versus", players)
+    engine.seed = seed
+    ais = [AIPlayer(player["player_id"]) for player in players]
+    engine.begin_game()
+    for _ in play_ai_actions(engine, ais):
+        pass
+    return engine
+
+def replay_match(match_data, on_message = None):
+    engine = GameEngine(card_db, match_data["game_type"], match_data["player_info"])
+    engine.seed = int(match_data["seed"])
+    # Replayed messages aren't in the message latency stats.
+    engine.record_latency = False
+    engine.begin_game()
+    for message in match_data["all_game_messages"]:
+        if engine.is_game_over():
+            break
+        if on_message:
+            on_message(engine)
+        engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"])
+    return engine
+
+def load_match_logs():
+    match_logs = []
+    if os.path.isdir(match_logs_dir):
+        for file_name in sorted(os.listdir(match_logs_dir)):
+            if file_name.endswith(".json"):
+                with open(os.path.join(match_logs_dir, file_name), "r") as f:
+                    match_logs.append(json.load(f))
+    if match_logs:
+        return f"{len(match_logs)} match logs from tests/test_match_logs", match_logs
+    match_logs = [play_ai_game(seed).get_match_log() for seed in range(GENERATED_GAMES)]
+    return f"{GENERATED_GAMES} generated AI games", match_logs
+
+class BenchmarkData:
+    # Built on first use, only the benchmarks being run pay for it.
+    def __init__(self):
+        self._match_logs = None
+        self.corpus = None
+        self._mainstep_engines = None
+        self._condition_checks = None
+
+    @property
+    def match_logs(self):
+        if self._match_logs is None:
+            self.corpus, self._match_logs = load_match_logs()
+        return self._match_logs
+
+    @property
+    def mainstep_engines(self):
+        # Games waiting on main step decisions from the match logs.
+        if self._mainstep_engines is None:
+            self._mainstep_engines = []
+            mainstep_count = [0]
+            def save_mainstep_board(engine : GameEngine):
+                if engine.current_decision and engine.current_decision["decision_type"] == DecisionType.DecisionMainStep:
+                    if mainstep_count[0] % MAINSTEP_BOARD_INTERVAL == 0:
+                        self._mainstep_engines.append(engine.fork())
+                    mainstep_count[0] += 1
+            for match_data in self.match_logs:
+                replay_match(match_data, on_message=save_mainstep_board)
+        return self._mainstep_engines
+
+    @property
+    def condition_checks(self):
+        # (board, effect player, source card id, condition) for every condition in the card
+        # definitions on every prepared board, leaving out checks that need game state
+        # the board doesn't have.
+        if self._condition_checks is None:
+            self._condition_checks = []
+            conditions = {}
+            for card in card_db.card_templates.values():
+                for condition in find_conditions(card):
+                    conditions.setdefault(id(condition), (card, condition))
+            for engine in self.mainstep_engines[::CONDITION_BOARD_INTERVAL]:
+                board = prepare_condition_board(engine)
+                if board is None:
+                    continue
+                effect_player = board.get_player(board.active_player_id)
+                for card, condition in conditions.values():
+                    source_card_id = condition_source_card_id(effect_player, card)
+                    try:
+                        board.is_condition_met(effect_player, source_card_id, condition)
+                    except Exception:
+                        continue
+                    self._condition_checks.append((board, effect_player, source_card_id, condition))
+        return self._condition_checks
+
+data = BenchmarkData()
+
+# Each benchmark runs one round and returns the time taken and the number of operations timed.
+
+def benchmark_card_database_load():
+    start = time.perf_counter()
+    CardDatabase()
+    return time.perf_counter() - start, 1
+
+def benchmark_engine_init():
+    count = 200
+    start = time.perf_counter()
+    for _ in range(count):
+        GameEngine(card_db, "versus", players)
+    return time.perf_counter() - start, count
+
+def benchmark_begin_game():
+    engines = []
+    for seed in range(50):
+        engine = GameEngine(card_db, "versus", players)
+        engine.seed = seed
+        engines.append(engine)
+    start = time.perf_counter()
+    for engine in engines:
+        engine.begin_game()
+    return time.perf_counter() - start, len(engines)
+
+def benchmark_mainstep_actions():
+    # Every section built from scratch.
+    engines = data.mainstep_engines
+    start = time.perf_counter()
+    for engine in engines:
+        engine.build_mainstep_actions(engine.get_player(engine.active_player_id))
+    return time.perf_counter() - start, len(engines)
+
+def benchmark_mainstep_actions_cached():
+    # Nothing changed since the actions were last sent.
+    engines = data.mainstep_engines
+    for engine in engines:
+        engine.get_available_mainstep_actions()
+    start = time.perf_counter()
+    for engine in engines:
+        engine.get_available_mainstep_actions()
+    return time.perf_counter() - start, len(engines)
+
+def benchmark_broadcast_event():
+    # All of one match's events broadcast and grabbed by both players and the observers.
+    match_data = data.match_logs[0]
+    engine = data.mainstep_engines[0].fork()
+    engine.grab_events()
+    engine.grab_observer_events()
+    events = [dict(event) for event in match_data["all_events"]]
+    start = time.perf_counter()
+    for event in events:
+        engine.broadcast_event(event)
+    engine.grab_events()
+    engine.grab_observer_events()
+    return time.perf_counter() - start, len(events)
+
+def prepare_condition_board(engine : GameEngine):
+    # A copy of a main step board with a performance, damage and a downed holomem
+    # in progress, so conditions only checked at those times can be checked too.
+    player = engine.get_player(engine.active_player_id)
+    opponent = engine.other_player(engine.active_player_id)
+    if not player.center or not opponent.center:
+        return None
+    board = engine.fork()
+    player = board.get_player(board.active_player_id)
+    opponent = board.other_player(board.active_player_id)
+    performer = player.center[0]
+    target = opponent.center[0]
+    board.performance_performing_player = player
+    board.performance_performer_card = performer
+    board.performance_target_player = opponent
+    board.performance_target_card = target
+    board.take_damage_state = TakeDamageState()
+    board.take_damage_state.source_player = opponent
+    board.take_damage_state.source_card = target
+    board.take_damage_state.target_card = performer
+    board.after_damage_state = AfterDamageState()
+    board.after_damage_state.source_player = player
+    board.after_damage_state.source_card = performer
+    board.after_damage_state.target_player = opponent
+    board.after_damage_state.target_card = target
+    board.after_damage_state.target_card_zone = "center"
+    board.after_damage_state.target_still_on_stage = True
+    board.down_holomem_state = DownHolomemState()
+    board.down_holomem_state.holomem_card = target
+    board.last_chosen_cards = [performer["game_card_id"]]
+    player.last_revealed_cards = list(player.deck[:3])
+    return board
+
+def condition_source_card_id(player, card):
+    # A card on the board like the one the condition is from.
+    if card["card_type"] == "oshi":
+        return player.oshi_card["game_card_id"]
+    holomems = player.get_holomem_on_stage()
+    if card["card_type"] == "support":
+        for holomem in holomems:
+            if holomem.attached_support:
+                return holomem.attached_support[0]["game_card_id"]
+    for holomem in holomems:
+        if holomem.stacked_cards:
+            return holomem["game_card_id"]
+    return holomems[0]["game_card_id"]
+
+def benchmark_is_condition_met():
+    # Every condition in the card definitions, on boards from the match logs.
+    checks = data.condition_checks
+    start = time.perf_counter()
+    for board, effect_player, source_card_id, condition in checks:
+        for _ in range(CONDITION_REPEATS):
+            board.is_condition_met(effect_player, source_card_id, condition)
+    return time.perf_counter() - start, len(checks) * CONDITION_REPEATS
+
+def benchmark_ai_game():
+    start = time.perf_counter()
+    for seed in AI_GAME_SEEDS:
+        play_ai_game(seed)
+    return time.perf_counter() - start, len(AI_GAME_SEEDS)
+
+def benchmark_match_log_replay():
+    match_logs = data.match_logs
+    start = time.perf_counter()
+    for match_data in match_logs:
+        replay_match(match_data)
+    return time.perf_counter() - start, len(match_logs)
+
+# name -> (benchmark, what one operation is)
+BENCHMARKS = {
+    "card_database_load": (benchmark_card_database_load, "load"),
+    "engine_init": (benchmark_engine_init, "engine"),
+    "begin_game": (benchmark_begin_game, "game"),
+    "mainstep_actions": (benchmark_mainstep_actions, "board"),
+    "mainstep_actions_cached": (benchmark_mainstep_actions_cached, "board"),
+    "broadcast_event": (benchmark_broadcast_event, "event"),
+    "is_condition_met": (benchmark_is_condition_met, "condition"),
+    "ai_game": (benchmark_ai_game, "game"),
+    "match_log_replay": (benchmark_match_log_replay, "match"),
+}
+# Only comparable with a baseline from the same match logs.
+MATCH_LOG_BENCHMARKS = ["mainstep_actions", "mainstep_actions_cached", "broadcast_event", "is_condition_met", "match_log_replay"]
+
+def run_benchmark(benchmark, rounds):
+    best = None
+    for _ in range(rounds):
+        # Start every round with the same garbage to collect.
+        gc.collect()
+        elapsed, operations = benchmark()
+        per_operation = elapsed / operations
+        if best is None or per_operation < best:
+            best = per_operation
+    return best
+
+def format_time(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.2f} us"
+    return f"{seconds * 1e9:.0f} ns"
+
+def load_baseline(baseline_path):
+    if not os.path.exists(baseline_path):
+        return None
+    with open(baseline_path, "r") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time engine operations and compare them with a baseline.")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run, all of them by default: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--baseline", default=default_baseline_path)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Fail when slower than the baseline by more than this fraction.")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline.")
+    args = parser.parse_args()
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown_names = [name for name in names if name not in BENCHMARKS]
+    if unknown_names:
+        print(f"Unknown benchmarks: {', '.join(unknown_names)}")
+        sys.exit(2)
+
+    baseline = load_baseline(args.baseline)
+    if baseline and not args.save:
+        print(f"Comparing with {args.baseline} (more than {args.threshold:.0%} slower fails)")
+    elif not args.save:
+        print(f"No baseline at {args.baseline}, run with --save to create one.")
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<25} {'time':>10} {'per':<10} {'baseline':>10} {'change':>8}")
+    for name in names:
+        benchmark, unit = BENCHMARKS[name]
+        seconds = run_benchmark(benchmark, args.rounds)
+        results[name] = {"seconds": seconds, "unit": unit}
+        line = f"{name:<25} {format_time(seconds):>10} {unit:<10}"
+        if baseline and not args.save and name in baseline["results"]:
+            if name in MATCH_LOG_BENCHMARKS and baseline["corpus"] != data.corpus:
+                print(f"{line}  (baseline used {baseline['corpus']})", flush=True)
+                continue
+            baseline_seconds = baseline["results"][name]["seconds"]
+            change = seconds / baseline_seconds - 1
+            line += f" {format_time(baseline_seconds):>10} {change:>+8.1%}"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  SLOWER"
+        print(line, flush=True)
+
+    if "is_condition_met" in results:
+        condition_names = {condition["condition"] for _, _, _, condition in data.condition_checks}
+        print(f"Conditions checked: {len(condition_names)} of {len(CONDITION_HANDLERS)} kinds")
+        never_checked = [name for name in CONDITION_HANDLERS if name not in condition_names]
+        if never_checked:
+            print(f"WARNING: never checked, not in the timing: {', '.join(never_checked)}")
+    if data.corpus:
+        print(f"Match logs: {data.corpus}")
+
+    if args.save:
+        if baseline:
+            # Keep the baselines of benchmarks that weren't run, unless the match logs changed.
+            corpus = data.corpus or baseline["corpus"]
+            kept_results = {name: result for name, result in baseline["results"].items()
+                if name not in MATCH_LOG_BENCHMARKS or baseline["corpus"] == corpus}
+            results = {**kept_results, **results}
+            data.corpus = corpus
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "corpus": data.corpus,
+                "results": results,
+            }, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(f"Slower than the baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
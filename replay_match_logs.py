@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+from multiprocessing import Pool
+from app.gameengine import GameEngine
+from app.card_database import CardDatabase
+import logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Replays match logs (from download_match_logs.py) against the current engine across
+# a process pool and reports any match that plays out differently from its log:
+# the first event that differs, a message the engine no longer accepts, or a different
+# game over reason or winner.
+# Match logs are read one at a time by the workers, so any number of them can be checked.
+
+current_directory = os.getcwd()
+default_match_logs_dir = os.path.join(current_directory, "tests", "match_logs")
+
+# Each worker loads the card definitions once.
+card_db = None
+
+def init_worker():
+    global card_db
+    # Engine errors for messages that aren't handled are reported as divergences instead.
+    logging.getLogger("app.gameengine").setLevel(logging.CRITICAL)
+    card_db = CardDatabase()
+
+def find_match_logs(match_logs_dir):
+    for entry in os.scandir(match_logs_dir):
+        if entry.is_file() and entry.name.endswith(".json"):
+            yield entry.path
+
+def describe_event_difference(event_number, logged_event, replayed_event):
+    if logged_event is None:
+        return f"event {event_number} {replayed_event['event_type']} is not in the log"
+    if replayed_event is None:
+        return f"event {event_number} {logged_event['event_type']} was not sent"
+    fields = sorted(field for field in set(logged_event) | set(replayed_event) if logged_event.get(field) != replayed_event.get(field))
+    differences = ", ".join(f"{field}: {logged_event.get(field)!r} -> {replayed_event.get(field)!r}" for field in fields)
+    return f"event {event_number} {logged_event['event_type']} differs ({differences})"
+
+def find_event_divergence(logged_events, engine : GameEngine, replay_finished):
+    # Compare as JSON, the way the events were logged.
+    replayed_events = json.loads(json.dumps(engine.all_events))
+    event_count = max(len(logged_events), len(replayed_events))
+    if not replay_finished:
+        # Only what was replayed before stopping can be compared.
+        event_count = len(replayed_events)
+    for event_number in range(event_count):
+        logged_event = logged_events[event_number] if event_number < len(logged_events) else None
+        replayed_event = replayed_events[event_number] if event_number < len(replayed_events) else None
+        if logged_event != replayed_event:
+            return describe_event_difference(event_number, logged_event, replayed_event)
+    return None
+
+def find_result_divergence(match_data, engine : GameEngine):
+    replayed_match_data = engine.get_match_log()
+    for field in ["game_over_reason", "winner"]:
+        if match_data[field] != replayed_match_data[field]:
+            return f"{field} {match_data[field]} -> {replayed_match_data[field]}"
+    return None
+
+def replay_match(match_log_path):
+    result = {
+        "match": os.path.basename(match_log_path),
+        "messages": 0,
+        "events": 0,
+        "replay_ms": 0.0,
+        "divergence": None,
+        "error": None,
+    }
+    try:
+        with open(match_log_path, "r") as f:
+            match_data = json.load(f)
+        all_game_messages = match_data["all_game_messages"]
+
+        start = time.perf_counter()
+        engine = GameEngine(card_db, match_data["game_type"], match_data["player_info"])
+        engine.seed = int(match_data["seed"])
+        engine.begin_game()
+        unhandled_message = None
+        for message_index, message in enumerate(all_game_messages):
+            if engine.is_game_over():
+                break
+            if not engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"]):
+                unhandled_message = f"message {message_index} {message['action_type']} was not handled"
+                break
+            result["messages"] += 1
+        result["replay_ms"] = (time.perf_counter() - start) * 1000
+        result["events"] = len(engine.all_events)
+
+        # An event that differs explains why a later message wasn't handled.
+        result["divergence"] = find_event_divergence(match_data["all_events"], engine, unhandled_message is None)
+        if not result["divergence"]:
+            result["divergence"] = unhandled_message or find_result_divergence(match_data, engine)
+    except Exception:
+        result["error"] = traceback.format_exc()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay match logs and report any that play out differently.")
+    parser.add_argument("match_logs_dir", nargs="?", default=default_match_logs_dir)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--quiet", action="store_true", help="Only print matches that diverged or failed.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.match_logs_dir):
+        print(f"No match logs directory at {args.match_logs_dir}")
+        sys.exit(1)
+
+    matches = 0
+    diverged = 0
+    failed = 0
+    total_replay_ms = 0.0
+    start = time.perf_counter()
+    with Pool(args.processes, initializer=init_worker) as pool:
+        for result in pool.imap_unordered(replay_match, find_match_logs(args.match_logs_dir)):
+            matches += 1
+            total_replay_ms += result["replay_ms"]
+            summary = f"{result['match']}: {result['messages']} messages, {result['events']} events, {result['replay_ms']:.1f} ms"
+            if result["error"]:
+                failed += 1
+                error = result["error"].strip().replace("\n", "\n  ")
+                print(f"FAILED {summary}\n  {error}")
+            elif result["divergence"]:
+                diverged += 1
+                print(f"DIVERGED {summary}\n  {result['divergence']}")
+            elif not args.quiet:
+                print(f"ok {summary}")
+    elapsed = time.perf_counter() - start
+
+    if matches == 0:
+        print(f"No match logs in {args.match_logs_dir}")
+        sys.exit(0)
+    print(f"Replayed {matches} matches in {elapsed:.1f} s with {args.processes} processes ({matches / elapsed:.1f} matches/s, {total_replay_ms / matches:.1f} ms average replay)")
+    print(f"{matches - diverged - failed} matched, {diverged} diverged, {failed} failed")
+    if diverged or failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import asyncio
 import traceback
 import os
 import uuid
@@ -11,7 +12,7 @@ from fastapi.staticfiles import StaticFiles
 from app.matchmaking import Matchmaking
 import app.message_types as message_types
 from app.playermanager import PlayerManager, Player
-from app.gameengine import GamePhase
+from app.gameengine import GamePhase, message_latency_stats, effect_stats
 from app.gameroom import GameRoom
 from app.card_database import CardDatabase
 from app.dbaccess import download_and_extract_game_package
@@ -21,6 +22,8 @@ from dotenv import load_dotenv
 # Set the player timeout to 15 minutes.
 PLAYER_TIMEOUT_THRESHOLD = 15 * 60
 IDLE_TASK_TIMER = 60
+# Lobby changes within this many seconds go out in one server_info broadcast.
+SERVER_INFO_DEBOUNCE = 0.25
 
 # Load the .env file
 load_dotenv()
@@ -61,6 +64,33 @@ app = FastAPI(lifespan=lifespan)
 async def root():
     return RedirectResponse(url="/game/index.html")
 
+# Game message handling times since the server started, by action type and phase.
+@app.get("/stats/message_latency")
+async def message_latency():
+    return {
+        "slow_message_ms": message_latency_stats.slow_message_ms,
+        "messages": message_latency_stats.get_report(),
+    }
+
+# Time spent per effect type since timing was turned on (EFFECT_STATS=true or the switch below).
+@app.get("/stats/effects")
+async def effect_timings():
+    return {
+        "enabled": effect_stats.enabled,
+        "effects": effect_stats.get_report(),
+    }
+
+# Turns effect timing on or off for every game, reset clears the counts so far.
+@app.post("/stats/effects")
+async def set_effect_timing(enabled: bool, reset: bool = False):
+    if reset:
+        effect_stats.reset()
+    if enabled:
+        effect_stats.enable()
+    else:
+        effect_stats.disable()
+    return await effect_timings()
+
 # Store connected clients
 class ConnectionManager:
     def __init__(self):
@@ -94,17 +124,27 @@ game_rooms : List[GameRoom] = []
 matchmaking : Matchmaking = Matchmaking()
 card_db : CardDatabase = CardDatabase()
 last_idle_check = time.time()
+server_info_task = None
+
+def broadcast_server_info():
+    global server_info_task
+    if server_info_task is None:
+        server_info_task = asyncio.create_task(broadcast_server_info_after_debounce())
 
-async def broadcast_server_info():
-    await player_manager.broadcast_server_info(matchmaking.get_queue_info(), game_rooms)
+async def broadcast_server_info_after_debounce():
+    global server_info_task
+    await asyncio.sleep(SERVER_INFO_DEBOUNCE)
+    # Changes from here on get their own broadcast.
+    server_info_task = None
+    player_manager.broadcast_server_info(matchmaking.get_queue_info(), game_rooms)
 
-async def send_error_message(websocket: WebSocket, error_id, error_str : str):
+def send_error_message(player: Player, error_id, error_str : str):
     message = message_types.ErrorMessage(
         message_type="error",
         error_id = error_id,
         error_message=error_str,
     )
-    await websocket.send_json(message.as_dict())
+    player.send(message.as_dict())
 
 
 @app.websocket("/ws")
@@ -124,13 +164,24 @@ async def websocket_endpoint(websocket: WebSocket):
                 message = message_types.parse_message(data)
             except Exception as e:
                 logger.error("Error in message parsing: {e}\nMessage: {data}")
-                await send_error_message(websocket, "invalid_message", f"ERROR: Invalid JSON: {data}")
+                send_error_message(player, "invalid_message", f"ERROR: Invalid JSON: {data}")
                 continue
 
             player.last_seen = time.time()
 
             if isinstance(message, message_types.JoinServerMessage):
-                await broadcast_server_info()
+                player.set_features(message.features)
+                broadcast_server_info()
+
+            elif isinstance(message, message_types.ServerInfoResyncMessage):
+                player.server_info_version = None
+                broadcast_server_info()
+
+            elif isinstance(message, message_types.LobbySubscribeMessage):
+                if player.set_lobby_subscription(message):
+                    broadcast_server_info()
+                else:
+                    send_error_message(player, "invalid_lobby_subscription", "Invalid lobby subscription.")
 
             elif isinstance(message, message_types.ObserveRoomMessage):
                 room_id = message.room_id
@@ -138,25 +189,25 @@ async def websocket_endpoint(websocket: WebSocket):
                     if room.room_id == room_id:
                         player.current_game_room = room
                         await room.join_as_observer(player)
-                        await broadcast_server_info()
+                        broadcast_server_info()
                         break
                 else:
-                    await send_error_message(websocket, "invalid_room", f"ERROR: Match not found.")
+                    send_error_message(player, "invalid_room", f"ERROR: Match not found.")
             elif isinstance(message, message_types.ObserverGetEventsMessage):
                 if not player.current_game_room:
-                    await send_error_message(websocket, "not_in_room", f"ERROR: Not in a game room.")
+                    send_error_message(player, "not_in_room", f"ERROR: Not in a game room.")
                     break
-                await player.current_game_room.observer_request_next_events(player, message.next_event_index)
+                player.current_game_room.observer_request_next_events(player, message.next_event_index)
             elif isinstance(message, message_types.JoinMatchmakingQueueMessage):
                 # Ensure player is in a joinable state.
                 if not can_player_join_queue(player):
-                    await send_error_message(websocket, "joinmatch_invalid_alreadyinmatch", "Already in a match.")
+                    send_error_message(player, "joinmatch_invalid_alreadyinmatch", "Already in a match.")
                 elif not matchmaking.is_game_type_valid(message.game_type):
-                    await send_error_message(websocket, "joinmatch_invalid_gametype", "Invalid game type.")
+                    send_error_message(player, "joinmatch_invalid_gametype", "Invalid game type.")
                 else:
                     queue_name = message.queue_name.strip()
                     if not matchmaking.is_valid_queue_name(queue_name):
-                        await send_error_message(websocket, "joinmatch_invalid_queuename", "Invalid queue name.")
+                        send_error_message(player, "joinmatch_invalid_queuename", "Invalid queue name.")
                     else:
                         is_valid = card_db.validate_deck(
                             oshi_id=message.oshi_id,
@@ -178,35 +229,35 @@ async def websocket_endpoint(websocket: WebSocket):
                             )
                             if match:
                                 game_rooms.append(match)
+                                match.on_processed = check_cleanup_room
                                 await match.start(card_db)
 
-                            await broadcast_server_info()
+                            broadcast_server_info()
                         else:
-                            await send_error_message(websocket, "joinmatch_invaliddeck", "Invalid deck list.")
+                            send_error_message(player, "joinmatch_invaliddeck", "Invalid deck list.")
 
             elif isinstance(message, message_types.LeaveMatchmakingQueueMessage):
                 matchmaking.remove_player_from_queue(player)
-                await broadcast_server_info()
+                broadcast_server_info()
 
             elif isinstance(message, message_types.LeaveGameMessage):
                 player_room : GameRoom = player.current_game_room
                 if player_room is not None:
                     await player_room.handle_player_quit(player)
-                    check_cleanup_room(player_room)
-                    await broadcast_server_info()
+                    broadcast_server_info()
                 else:
-                    await send_error_message(websocket, "not_in_room", f"ERROR: Not in a game room to leave.")
+                    send_error_message(player, "not_in_room", f"ERROR: Not in a game room to leave.")
 
             elif isinstance(message, message_types.GameActionMessage):
                 #logger.info(f"GAMEACTION: {message.action_type}")
                 player_room : GameRoom = player.current_game_room
                 if player_room and not player_room.is_ready_for_cleanup():
-                    await player_room.handle_game_message(player.player_id, message.action_type, message.action_data)
-                    check_cleanup_room(player_room)
+                    # Handled in order by the room's task, this connection can read its next message meanwhile.
+                    player_room.handle_game_message(player.player_id, message.action_type, message.action_data)
                 else:
-                    await send_error_message(websocket, "not_in_room", f"ERROR: Not in a game room to send a game message.")
+                    send_error_message(player, "not_in_room", f"ERROR: Not in a game room to send a game message.")
             else:
-                await send_error_message(websocket, "invalid_game_message", f"ERROR: Invalid message: {data}")
+                send_error_message(player, "invalid_game_message", f"ERROR: Invalid message: {data}")
 
             await check_idle_users_task()
 
@@ -217,19 +268,20 @@ async def websocket_endpoint(websocket: WebSocket):
         for room in game_rooms:
             if player in room.players or player in room.observers:
                 await room.handle_player_disconnect(player)
-                check_cleanup_room(room)
                 break
 
         player_manager.remove_player(player_id)
         await manager.disconnect(websocket)
-        await broadcast_server_info()
+        broadcast_server_info()
     except Exception as e:
         error_details = traceback.format_exc()
         logger.error(f"Error websocket loop from player {player.get_username()} - {player.player_id}: {e} Callstack: {error_details}")
 
 def cleanup_room(room: GameRoom):
+    # Called from the room's task after it processed something, see GameRoom.on_processed.
     logger.info("Cleanup game room ID: %s" % room.room_id)
     game_rooms.remove(room)
+    room.close()
     for player in room.players:
         player.current_game_room = None
     for observer in room.observers:
@@ -272,7 +324,6 @@ async def check_idle_users_task():
                 for room in game_rooms:
                     if player in room.players or player in room.observers:
                         await room.handle_player_quit(player)
-                        check_cleanup_room(room)
                         break
                 player.connected = False
                 player_manager.remove_player(player_id)
@@ -284,5 +335,5 @@ async def check_idle_users_task():
             player_manager.remove_player(player_id)
             removed_players = True
     if removed_players:
-        await broadcast_server_info()
+        broadcast_server_info()
 
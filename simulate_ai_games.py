@@ -0,0 +1,201 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from multiprocessing import Pool
+from app.gameengine import GameEngine, EventType
+from app.card_database import CardDatabase
+from app.aiplayer import AIPlayer, play_ai_actions
+import logging
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Plays AI vs AI games between two deck lists across a process pool.
+# Game i uses seed first_seed + i for both the engine and the AI, so any game
+# can be played again on its own with --first-seed and --games 1.
+# Reports games and actions per second, win rates, and a signature for every game
+# that crashed: an exception in the engine, an action the engine rejected, a game
+# where neither AI could act, or one that never ended.
+
+current_directory = os.getcwd()
+default_deck_paths = [
+    os.path.join(current_directory, "decks", "starter_azki.json"),
+    os.path.join(current_directory, "decks", "starter_sora.json"),
+]
+MAX_ACTIONS = 5000
+
+# Each worker loads the card definitions and decks once.
+card_db = None
+players = None
+
+class ExceptionCapture(logging.Handler):
+    # The engine logs exceptions from game messages instead of raising them,
+    # keep the last one logged to build the crash signature from.
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.last_error = None
+
+    def emit(self, record):
+        message = record.getMessage()
+        if message.startswith("Error processing game message"):
+            self.last_error = message
+
+exception_capture = ExceptionCapture()
+
+def init_worker(decks):
+    global card_db, players
+    engine_logger = logging.getLogger("app.gameengine")
+    engine_logger.setLevel(logging.ERROR)
+    engine_logger.propagate = False
+    engine_logger.addHandler(exception_capture)
+    logging.getLogger("app.aiplayer").setLevel(logging.CRITICAL)
+    card_db = CardDatabase()
+    players = []
+    for player_index, deck in enumerate(decks):
+        players.append({
+            "player_id": f"player{player_index + 1}",
+            "username": deck.get("deck_id", f"Deck {player_index + 1}"),
+            "oshi_id": deck["oshi_id"],
+            "deck": deck["deck"],
+            "cheer_deck": deck["cheer_deck"],
+        })
+
+def load_deck(deck_path):
+    with open(deck_path, "r") as f:
+        return json.load(f)
+
+def exception_signature(error_message):
+    # The exception and the innermost frame it came from.
+    callstack = error_message.split("Callstack:", 1)[-1].strip()
+    frames = re.findall(r'File "([^"]+)", line (\d+), in (\S+)', callstack)
+    exception_line = callstack.splitlines()[-1] if callstack else error_message
+    if not frames:
+        return exception_line
+    file_path, line_number, function_name = frames[-1]
+    return f"{exception_line} at {os.path.basename(file_path)}:{line_number} in {function_name}"
+
+def rejected_action_signature(engine : GameEngine, action_info):
+    # An exception logged while handling the action, or the error sent back for it.
+    if exception_capture.last_error:
+        return exception_signature(exception_capture.last_error)
+    error_events = [event for event in engine.grab_events() if event["event_type"] == EventType.EventType_GameError]
+    error_id = error_events[-1]["error_id"] if error_events else "unknown"
+    return f"{action_info['action_type']} rejected: {error_id}"
+
+def play_game(seed):
+    result = {
+        "seed": seed,
+        "winner": None,
+        "first_player": None,
+        "reason": None,
+        "actions": 0,
+        "turns": 0,
+        "game_ms": 0.0,
+        "crash": None,
+    }
+    random.seed(seed)
+    exception_capture.last_error = None
+    start = time.perf_counter()
+    try:
+        engine = GameEngine(card_db, "versus", players)
+        engine.seed = seed
+        ais = [AIPlayer(player["player_id"]) for player in players]
+        engine.begin_game()
+        for actions in play_ai_actions(engine, ais):
+            for _, action_info, handled in actions:
+                if not handled:
+                    result["crash"] = rejected_action_signature(engine, action_info)
+                    break
+            if result["crash"]:
+                break
+            if len(engine.all_game_messages) >= MAX_ACTIONS:
+                result["crash"] = f"not over after {MAX_ACTIONS} actions"
+                break
+        if not engine.is_game_over() and not result["crash"]:
+            decision_type = engine.current_decision["decision_type"] if engine.current_decision else None
+            result["crash"] = f"no AI action for {decision_type}"
+        # Chosen by the player who won the pick, after the game began.
+        result["first_player"] = engine.first_turn_player_id
+        result["actions"] = len(engine.all_game_messages)
+        result["turns"] = engine.turn_number
+        if engine.is_game_over():
+            result["winner"] = engine.game_over_event["winner_id"]
+            result["reason"] = engine.game_over_event["reason_id"]
+    except Exception as e:
+        # Raised outside of handle_game_message, such as from begin_game.
+        _, _, traceback = sys.exc_info()
+        while traceback.tb_next:
+            traceback = traceback.tb_next
+        frame = traceback.tb_frame
+        result["crash"] = f"{type(e).__name__}: {e} at {os.path.basename(frame.f_code.co_filename)}:{traceback.tb_lineno} in {frame.f_code.co_name}"
+    result["game_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+def percent(count, total):
+    return f"{count / total * 100:.1f}%" if total else "-"
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI vs AI games between two decks and report throughput, win rates and crashes.")
+    parser.add_argument("decks", nargs="*", default=default_deck_paths, help="Two deck list files, the same deck twice for a mirror match.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if len(args.decks) != 2:
+        print("Expected two deck list files.")
+        sys.exit(2)
+    decks = [load_deck(deck_path) for deck_path in args.decks]
+    deck_names = [f"player1 ({os.path.basename(args.decks[0])})", f"player2 ({os.path.basename(args.decks[1])})"]
+
+    wins = Counter()
+    first_player_wins = 0
+    reasons = Counter()
+    crashes = {}
+    total_actions = 0
+    total_turns = 0
+    total_game_ms = 0.0
+    finished = 0
+    seeds = range(args.first_seed, args.first_seed + args.games)
+    start = time.perf_counter()
+    with Pool(args.processes, initializer=init_worker, initargs=(decks,)) as pool:
+        for result in pool.imap_unordered(play_game, seeds, chunksize=4):
+            total_actions += result["actions"]
+            total_game_ms += result["game_ms"]
+            if result["crash"]:
+                crashes.setdefault(result["crash"], []).append(result["seed"])
+                continue
+            finished += 1
+            total_turns += result["turns"]
+            wins[result["winner"]] += 1
+            reasons[result["reason"]] += 1
+            if result["winner"] == result["first_player"]:
+                first_player_wins += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"Played {args.games} games in {elapsed:.1f} s with {args.processes} processes")
+    print(f"  {args.games / elapsed:.1f} games/s, {total_actions / elapsed:.0f} actions/s, {total_game_ms / args.games:.1f} ms per game")
+    if finished:
+        print(f"Finished {finished} games, {total_turns / finished:.1f} turns average")
+        for player_index, deck_name in enumerate(deck_names):
+            player_wins = wins[f"player{player_index + 1}"]
+            print(f"  {deck_name} won {player_wins} ({percent(player_wins, finished)})")
+        print(f"  Going first won {first_player_wins} ({percent(first_player_wins, finished)})")
+        for reason, count in reasons.most_common():
+            print(f"  {reason}: {count}")
+    crashed = sum(len(crash_seeds) for crash_seeds in crashes.values())
+    print(f"Crashed {crashed} games ({percent(crashed, args.games)}) with {len(crashes)} signatures")
+    for signature, crash_seeds in sorted(crashes.items(), key=lambda item: -len(item[1])):
+        crash_seeds.sort()
+        shown_seeds = ", ".join(str(seed) for seed in crash_seeds[:10])
+        more = f" and {len(crash_seeds) - 10} more" if len(crash_seeds) > 10 else ""
+        print(f"  {len(crash_seeds)}x {signature}\n    seeds {shown_seeds}{more}")
+    if crashes:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
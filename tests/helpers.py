@@ -1,9 +1,12 @@
 import unittest
 import os, json
+import asyncio
 from pathlib import Path
 from app.card_database import CardDatabase
-from app.gameengine import GameEngine, UNKNOWN_CARD_ID, GameAction, ids_from_cards, GamePhase, EventType, PlayerState
+from app.gameengine import GameEngine, UNKNOWN_CARD_ID, GameAction, ids_from_cards, GamePhase, EventType, PlayerState, GameCard
+from app.aiplayer import AIPlayer, play_ai_actions
 from copy import deepcopy
+import random
 
 card_db = CardDatabase()
 
@@ -398,4 +401,79 @@ def change_oshi(self: unittest.TestCase, player: PlayerState, oshi_id: str) -> l
     player.oshi_card = oshi_card
     player.oshi_card["game_card_id"] = player.player_id + "_oshi"
 
-    return reset_mainstep(self)
\ No newline at end of file
+    return reset_mainstep(self)
+
+def start_ai_game(seed, game_card_db = card_db):
+    # An AI vs AI game with the starter decks before it begins, the same every time for a seed.
+    random.seed(seed)
+    players = [
+        {
+            "player_id": "player1",
+            "username": "Test Player 1",
+            "oshi_id": azki_starter["oshi_id"],
+            "deck": azki_starter["deck"],
+            "cheer_deck": azki_starter["cheer_deck"]
+        },
+        {
+            "player_id": "player2",
+            "username": "Test Player 2",
+            "oshi_id": sora_starter["oshi_id"],
+            "deck": sora_starter["deck"],
+            "cheer_deck": sora_starter["cheer_deck"]
+        }
+    ]
+    engine = GameEngine(game_card_db, "versus", players)
+    engine.seed = seed
+    return engine, [AIPlayer("player1"), AIPlayer("player2")]
+
+def play_ai_game(seed, game_card_db = card_db, setup = None, on_action = None):
+    # Plays the start_ai_game game to the end.
+    # setup(engine) runs before the game begins, on_action(engine, handled) after every action.
+    engine, ais = start_ai_game(seed, game_card_db)
+    if setup:
+        setup(engine)
+    engine.begin_game()
+    for actions in play_ai_actions(engine, ais):
+        if on_action:
+            for _, _, handled in actions:
+                on_action(engine, handled)
+    return engine
+
+def card_state(card):
+    # Cheer cards have no game state.
+    if not isinstance(card, GameCard):
+        return card["game_card_id"]
+    return (card["game_card_id"], card.as_dict())
+
+def game_state(engine : GameEngine):
+    # Everything the rules decide, leaving out events and clocks.
+    state = {
+        "phase": engine.phase,
+        "turn_number": engine.turn_number,
+        "active_player_id": engine.active_player_id,
+        "random": engine.random_gen.getstate(),
+        "game_over": {key: engine.game_over_event.get(key) for key in ["winner_id", "loser_id", "reason_id"]},
+        "decision": engine.current_decision and engine.current_decision["decision_type"],
+    }
+    for player in engine.player_states:
+        zones = {}
+        for zone_name in ["hand", "archive", "backstage", "center", "collab", "deck", "cheer_deck", "holopower", "life"]:
+            zones[zone_name] = [card_state(card) for card in getattr(player, zone_name)]
+        state[player.player_id] = zones
+    return state
+
+class FakeWebSocket:
+    # Keeps what a Player sent, decoded, in place of a client connection.
+    def __init__(self):
+        self.received = []
+        self.message_ready = asyncio.Event()
+        self.closed = False
+
+    async def send_text(self, message):
+        self.received.append(json.loads(message))
+        self.message_ready.set()
+        # Let other tasks run between sends, like a real connection would.
+        await asyncio.sleep(0)
+
+    async def close(self):
+        self.closed = True
@@ -0,0 +1,146 @@
+import unittest
+from app.gameengine import GameEngine, PlayerState, BroadcastEvent, EventType, UNKNOWN_CARD_ID
+from helpers import initialize_game_to_third_turn
+
+
+class TestBroadcastEvents(unittest.TestCase):
+
+    engine : GameEngine
+    player1 : str
+    player2 : str
+
+    def setUp(self):
+        initialize_game_to_third_turn(self)
+        self.engine.grab_events()
+        self.engine.grab_observer_events()
+
+    def broadcast_hidden_event(self):
+        self.engine.broadcast_event({
+            "event_type": "test_event",
+            "card_id": "player1_5",
+            "card_ids": ["player1_6", "player1_7"],
+            "options": ["player1_8"],
+            "hidden_info_player": self.player1,
+            "hidden_info_fields": ["card_id", "card_ids", "options"],
+            "hidden_info_erase": ["options"],
+        })
+
+    def test_views_built_when_grabbed(self):
+        self.broadcast_hidden_event()
+        self.assertEqual(len(self.engine.latest_events), 1)
+        self.assertIsInstance(self.engine.latest_events[0], BroadcastEvent)
+
+        p1_event, p2_event = self.engine.grab_events()
+        self.assertEqual(p1_event["event_player_id"], self.player1)
+        self.assertEqual(p1_event["card_id"], "player1_5")
+        self.assertEqual(p1_event["card_ids"], ["player1_6", "player1_7"])
+        self.assertEqual(p1_event["options"], ["player1_8"])
+
+        self.assertEqual(p2_event["event_player_id"], self.player2)
+        self.assertEqual(p2_event["card_id"], UNKNOWN_CARD_ID)
+        self.assertEqual(p2_event["card_ids"], [UNKNOWN_CARD_ID, UNKNOWN_CARD_ID])
+        self.assertIsNone(p2_event["options"])
+
+        observer_event, = self.engine.grab_observer_events()
+        self.assertEqual(observer_event["event_player_id"], "observer")
+        self.assertEqual(observer_event["card_id"], UNKNOWN_CARD_ID)
+        self.assertIsNone(observer_event["options"])
+
+        # The hidden fields were sanitized once for both.
+        self.assertIs(observer_event["card_ids"], p2_event["card_ids"])
+
+    def test_clocks_from_broadcast_time(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+        player2 : PlayerState = self.engine.get_player(self.player2)
+        player1.clock_time_used = 10
+        player2.clock_time_used = 20
+        self.engine.broadcast_event({ "event_type": "test_event" })
+        player1.clock_time_used = 30
+
+        p1_event, p2_event = self.engine.grab_events()
+        self.assertEqual(p1_event["your_clock_used"], 10)
+        self.assertEqual(p1_event["opponent_clock_used"], 20)
+        self.assertEqual(p2_event["your_clock_used"], 20)
+        self.assertEqual(p2_event["opponent_clock_used"], 10)
+        observer_event, = self.engine.grab_observer_events()
+        self.assertEqual(observer_event["your_clock_used"], 10)
+        self.assertEqual(observer_event["opponent_clock_used"], 20)
+
+    def test_skip_observer_events(self):
+        self.broadcast_hidden_event()
+        self.engine.skip_observer_events()
+        self.assertEqual(self.engine.grab_observer_events(), [])
+        self.assertEqual(len(self.engine.grab_events()), 2)
+
+    def test_events_sent_to_one_player(self):
+        self.engine.handle_game_message(self.player2, "not_an_action", {})
+        self.broadcast_hidden_event()
+        events = self.engine.grab_events()
+        self.assertEqual(len(events), 3)
+        self.assertEqual(events[0]["event_player_id"], self.player2)
+        self.assertEqual(events[0]["event_type"], "game_error")
+        self.assertEqual(len(self.engine.grab_observer_events()), 1)
+
+    def test_grab_player_events(self):
+        self.engine.handle_game_message(self.player2, "not_an_action", {})
+        self.engine.handle_game_message(self.player1, "not_an_action", {})
+        self.broadcast_hidden_event()
+
+        events_by_player = self.engine.grab_player_events([self.player2])
+        self.assertEqual(list(events_by_player), [self.player2])
+        error_event, p2_event = events_by_player[self.player2]
+        self.assertEqual(error_event["event_type"], "game_error")
+        self.assertEqual(error_event["event_player_id"], self.player2)
+        self.assertEqual(p2_event["event_player_id"], self.player2)
+        self.assertEqual(p2_event["card_id"], UNKNOWN_CARD_ID)
+        # Player 1's events were dropped.
+        self.assertEqual(self.engine.grab_events(), [])
+
+    def test_grab_player_events_builds_asked_views_only(self):
+        self.broadcast_hidden_event()
+        built = []
+        player_view = BroadcastEvent.player_view
+        def recording_player_view(broadcast, player_index, player_id):
+            built.append(player_id)
+            return player_view(broadcast, player_index, player_id)
+        BroadcastEvent.player_view = recording_player_view
+        try:
+            self.engine.grab_player_events([self.player1])
+        finally:
+            BroadcastEvent.player_view = player_view
+        self.assertEqual(built, [self.player1])
+
+    def test_observer_catchup_pages(self):
+        engine = self.engine
+        event_count = engine.get_observer_catchup_event_count()
+        self.assertEqual(event_count, len(engine.all_events) + 1)
+
+        all_events = engine.get_observer_catchup_events()
+        self.assertEqual(len(all_events), event_count)
+        self.assertEqual(all_events[0]["event_type"], EventType.EventType_GameStartInfo)
+        self.assertEqual(all_events[0]["starting_player"], engine.starting_player_id)
+        for index, event in enumerate(all_events[1:]):
+            self.assertEqual(event["event_number"], index)
+            self.assertEqual(event["event_player_id"], "observer")
+
+        pages = []
+        for starting_index in range(0, event_count, 7):
+            pages += engine.get_observer_catchup_events(starting_index, 7)
+        self.assertEqual(pages, all_events)
+        self.assertEqual(engine.get_observer_catchup_events(event_count, 7), [])
+
+        # Pages are built once and shared by everyone watching.
+        for page_event, event in zip(pages, all_events):
+            self.assertIs(page_event, event)
+
+    def test_observer_catchup_shares_live_events(self):
+        self.broadcast_hidden_event()
+        live_event, = self.engine.grab_observer_events()
+        event_count = self.engine.get_observer_catchup_event_count()
+        catchup_event, = self.engine.get_observer_catchup_events(event_count - 1, 50)
+        self.assertIs(catchup_event, live_event)
+        self.assertEqual(catchup_event["card_id"], UNKNOWN_CARD_ID)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,8 @@
 from unittest import TestCase, mock
+import os
+import json
+import tempfile
+from app.gameengine import replace_field_in_conditions
 import logging
 logger = logging.getLogger('app.card_database')
 
@@ -129,4 +133,84 @@ class Test_CardDatabase(TestCase):
       "hBP01-051": 4,     # 1st buzz Iroha Alt
     }, { "hY01-001": 10, "hY02-001": 10 })
     self.assertTrue(result)
-    mock_logger.assert_not_called()
\ No newline at end of file
+    mock_logger.assert_not_called()
+
+  def test_card_instances_share_card_text(self):
+    template = card_db.get_card_template("hSD01-006")
+    card1 = card_db.get_card_by_id("hSD01-006")
+    card2 = card_db.get_card_by_id("hSD01-006")
+
+    # Instances are separate but share the nested card text with the template.
+    self.assertIsNot(card1, card2)
+    self.assertIs(card1["arts"][0], template["arts"][0])
+    self.assertIs(card2["arts"][0], template["arts"][0])
+
+    # Modifying an instance doesn't touch the template.
+    card1["game_card_id"] = "test_1"
+    card1["colors"].append("blue")
+    self.assertNotIn("game_card_id", template)
+    self.assertNotIn("blue", template["colors"])
+    self.assertNotIn("blue", card2["colors"])
+
+    self.assertIsNone(card_db.get_card_by_id("INVALID"))
+
+
+  def test_effects_by_timing(self):
+    # hBP01-027 has a gift that triggers when taking damage.
+    self.assertTrue(card_db.has_effects_at_timing("hBP01-027", "on_take_damage"))
+    self.assertTrue(card_db.has_effects_at_timing("hBP01-027_UR", "on_take_damage"))
+    gift_effects = card_db.get_effects_at_timing("hBP01-027", "gift_effects", "on_take_damage")
+    self.assertGreater(len(gift_effects), 0)
+    template = card_db.get_card_template("hBP01-027")
+    for effect in gift_effects:
+      self.assertEqual(effect["timing"], "on_take_damage")
+      self.assertTrue(any(effect is gift for gift in template["gift_effects"]))
+
+    # Nothing for cards or timings without effects.
+    self.assertFalse(card_db.has_effects_at_timing("hSD01-003", "on_take_damage"))
+    self.assertEqual(len(card_db.get_effects_at_timing("hSD01-003", "gift_effects", "on_take_damage")), 0)
+    self.assertEqual(len(card_db.get_effects_at_timing("hBP01-027", "attached_effects", "on_take_damage")), 0)
+    self.assertEqual(len(card_db.get_effects_at_timing("hBP01-027", "gift_effects", "not_a_timing")), 0)
+
+  def test_conditions_compiled_at_load(self):
+    # Every condition in the card definitions has a predicate, found by the dict itself.
+    template = card_db.get_card_template("hBP02-040")
+    for effect in template["gift_effects"]:
+      for condition in effect["conditions"]:
+        self.assertIn(id(condition), card_db.compiled_conditions)
+
+    card = card_db.get_card_by_id("hBP02-040")
+    self.assertIs(card["gift_effects"][0]["conditions"][0], template["gift_effects"][0]["conditions"][0])
+
+  def test_unknown_condition_rejected_at_load(self):
+    bad_card = {
+      "card_id": "TEST-001",
+      "card_type": "support",
+      "effects": [{
+        "timing": "on_play",
+        "effect_type": "draw",
+        "amount": 1,
+        "conditions": [{ "condition": "not_a_real_condition" }],
+      }],
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+      path = os.path.join(temp_dir, "card_definitions.json")
+      with open(path, "w") as f:
+        json.dump([bad_card], f)
+
+      with self.assertRaises(NotImplementedError) as context:
+        CardDatabase().load_cards(path)
+    self.assertIn("TEST-001", str(context.exception))
+    self.assertIn("not_a_real_condition", str(context.exception))
+
+  def test_copied_effects_share_conditions(self):
+    template = card_db.get_card_template("hBP02-040")
+    effects = card_db.copy_effects(template["gift_effects"])
+    self.assertIsNot(effects[0], template["gift_effects"][0])
+    self.assertIsNot(effects[0]["and"][0], template["gift_effects"][0]["and"][0])
+    self.assertIs(effects[0]["conditions"][0], template["gift_effects"][0]["conditions"][0])
+
+    # Replacing a condition field leaves the shared condition alone.
+    replace_field_in_conditions(effects[0], "amount_min", 1)
+    self.assertEqual(effects[0]["conditions"][2]["amount_min"], 1)
+    self.assertEqual(template["gift_effects"][0]["conditions"][2]["amount_min"], 3)
@@ -0,0 +1,139 @@
+import unittest
+from app.gameengine import GameEngine, PlayerState, ids_from_cards
+from app.gameengine import GamePhase
+from helpers import initialize_game_to_third_turn, add_card_to_hand, end_turn, spawn_cheer_on_card, put_card_in_play, play_ai_game
+
+class TestCardIndex(unittest.TestCase):
+
+    engine : GameEngine
+    player1 : str
+    player2 : str
+
+    def setUp(self):
+        initialize_game_to_third_turn(self)
+        self.engine.debug_card_index = True
+
+    def test_find_card_after_moves(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        card = add_card_to_hand(self, player1, "hSD01-005")
+        found, zone, zone_name = player1.find_card(card["game_card_id"])
+        self.assertIs(found, card)
+        self.assertIs(zone, player1.hand)
+        self.assertEqual(zone_name, "hand")
+
+        player1.move_card(card["game_card_id"], "archive")
+        found, zone, zone_name = player1.find_card(card["game_card_id"])
+        self.assertIs(found, card)
+        self.assertIs(zone, player1.archive)
+        self.assertEqual(zone_name, "archive")
+
+        player1.generate_holopower(2)
+        for holopower_card in player1.holopower:
+            _, _, zone_name = player1.find_card(holopower_card["game_card_id"])
+            self.assertEqual(zone_name, "holopower")
+        player1.verify_card_index()
+
+    def test_zone_reassignment_reindexes(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        center_card = player1.center[0]
+        back_card = player1.backstage[0]
+        player1.center = [back_card]
+        player1.backstage = player1.backstage[1:]
+        found, zone, zone_name = player1.find_card(back_card["game_card_id"])
+        self.assertIs(found, back_card)
+        self.assertEqual(zone_name, "center")
+        found, _, _ = player1.find_card(center_card["game_card_id"])
+        self.assertIsNone(found)
+        player1.verify_card_index()
+
+    def test_find_and_remove_card(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        card_id = player1.backstage[0]["game_card_id"]
+        card, zone, zone_name = player1.find_and_remove_card(card_id)
+        self.assertEqual(zone_name, "backstage")
+        self.assertNotIn(card_id, ids_from_cards(player1.backstage))
+        found, _, _ = player1.find_card(card_id)
+        self.assertIsNone(found)
+        player1.verify_card_index()
+
+    def test_floating_and_oshi_cards(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        card = add_card_to_hand(self, player1, "hSD01-005")
+        player1.hand.remove(card)
+        self.engine.floating_cards.append(card)
+        _, zone, zone_name = player1.find_card(card["game_card_id"])
+        self.assertIs(zone, self.engine.floating_cards)
+        self.assertEqual(zone_name, "floating")
+
+        oshi, zone, zone_name = player1.find_card(player1.oshi_card["game_card_id"])
+        self.assertIs(oshi, player1.oshi_card)
+        self.assertIsNone(zone)
+        self.assertEqual(zone_name, "oshi")
+
+    def test_attachment_lookups(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        center = player1.center[0]
+        back = player1.backstage[0]
+        cheer = spawn_cheer_on_card(self, player1, center["game_card_id"], "white", "cheer1")
+        support = put_card_in_play(self, player1, "hSD01-016", back["attached_support"])
+
+        self.assertIs(self.engine.find_card(cheer["game_card_id"]), cheer)
+        self.assertIs(self.engine.find_card(support["game_card_id"]), support)
+        self.assertIs(player1.find_attachment(support["game_card_id"]), support)
+        self.assertIsNone(player1.find_attachment(cheer["game_card_id"]))
+        self.assertEqual(player1.get_holomems_with_attachment(cheer["game_card_id"]), [center])
+        self.assertEqual(player1.get_holomems_with_attachment(support["game_card_id"]), [back])
+
+        player1.move_cheer_between_holomems({cheer["game_card_id"]: back["game_card_id"]})
+        self.assertEqual(player1.get_holomems_with_attachment(cheer["game_card_id"]), [back])
+        self.assertNotIn(cheer, center["attached_cheer"])
+
+        player1.archive_attached_cards([support["game_card_id"]])
+        self.assertEqual(player1.get_holomems_with_attachment(support["game_card_id"]), [])
+        self.assertIs(player1.archive[0], support)
+
+        player1.move_card(back["game_card_id"], "hand")
+        self.assertEqual(player1.get_holomems_with_attachment(cheer["game_card_id"]), [])
+
+    def test_attachments_follow_bloom(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        center = player1.center[0]
+        cheer = spawn_cheer_on_card(self, player1, center["game_card_id"], "white", "cheer1")
+        bloom_card = add_card_to_hand(self, player1, "hSD01-006")
+        player1.bloom(bloom_card["game_card_id"], center["game_card_id"], lambda : None)
+
+        self.assertEqual(player1.get_holomems_with_attachment(cheer["game_card_id"]), [bloom_card])
+        self.assertIs(self.engine.find_card(center["game_card_id"]), center)
+        removed_card, previous_holder_id = player1.find_and_remove_attached(center["game_card_id"])
+        self.assertIs(removed_card, center)
+        self.assertEqual(previous_holder_id, bloom_card["game_card_id"])
+
+    def test_index_stays_in_sync_over_turns(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+        player2 : PlayerState = self.engine.get_player(self.player2)
+
+        end_turn(self)
+        player1.verify_card_index()
+        player2.verify_card_index()
+
+    def test_index_stays_in_sync_in_ai_game(self):
+        def enable_debug(engine : GameEngine):
+            engine.debug_card_index = True
+
+        def verify_card_index(engine : GameEngine, handled):
+            self.assertTrue(handled)
+            for player_state in engine.player_states:
+                player_state.verify_card_index()
+
+        engine = play_ai_game(0, setup=enable_debug, on_action=verify_card_index)
+        self.assertEqual(engine.phase, GamePhase.GameOver)
+
+
+if __name__ == '__main__':
+    unittest.main()
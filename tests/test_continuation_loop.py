@@ -0,0 +1,78 @@
+import sys
+import unittest
+from app.gameengine import GameEngine, PlayerState, EventType
+from helpers import initialize_game_to_third_turn
+
+
+class TestContinuationLoop(unittest.TestCase):
+
+    engine : GameEngine
+    player1 : str
+    player2 : str
+
+    def setUp(self):
+        initialize_game_to_third_turn(self)
+
+    def test_long_effect_chain(self):
+        engine = self.engine
+        player1 : PlayerState = engine.get_player(self.player1)
+        player2 : PlayerState = engine.get_player(self.player2)
+        target_card = player2.center[0]
+        # Each effect goes through the whole deal damage continuation chain,
+        # which used to add stack frames until the chain was done.
+        effect_count = sys.getrecursionlimit()
+        chain = [{
+            "player_id": self.player1,
+            "effect_type": "deal_damage",
+            "target": "center",
+            "opponent": True,
+            "amount": 0,
+            "source_card_id": player1.center[0]["game_card_id"],
+        } for _ in range(effect_count)]
+        engine.grab_events()
+        resolved = []
+        engine.clear_decision()
+        engine.begin_resolving_effects(chain, lambda: resolved.append(True))
+
+        self.assertEqual(resolved, [True])
+        self.assertIsNone(engine.effect_resolution_state)
+        self.assertEqual(target_card.damage, 0)
+        damage_events = [event for event in engine.grab_events()[::2] if event["event_type"] == EventType.EventType_DamageDealt]
+        self.assertEqual(len(damage_events), effect_count)
+
+    def test_queued_steps_run_in_call_order(self):
+        engine = self.engine
+        steps = []
+        def first():
+            steps.append("first")
+            engine.run_continuation(lambda: steps.append("first child"))
+            engine.run_continuation(lambda: steps.append("second child"))
+        def second():
+            steps.append("second")
+
+        def outer():
+            engine.run_continuation(first)
+            engine.run_continuation(second)
+            # Nothing queued runs until this step returns.
+            steps.append("outer")
+        engine.run_continuation(outer)
+        self.assertEqual(steps, ["outer", "first", "first child", "second child", "second"])
+        self.assertFalse(engine.running_continuations)
+
+    def test_failed_step_clears_queue(self):
+        engine = self.engine
+        steps = []
+        def failing():
+            engine.run_continuation(lambda: steps.append("queued"))
+            raise Exception("Step failed")
+        with self.assertRaises(Exception):
+            engine.run_continuation(failing)
+        self.assertFalse(engine.running_continuations)
+        self.assertEqual(engine.queued_continuations, [])
+
+        engine.run_continuation(lambda: steps.append("next"))
+        self.assertEqual(steps, ["next"])
+
+
+if __name__ == '__main__':
+    unittest.main()
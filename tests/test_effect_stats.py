@@ -0,0 +1,51 @@
+import unittest
+from app.gameengine import GameEngine, PlayerState, EffectType, EFFECT_HANDLERS, effect_stats
+from helpers import initialize_game_to_third_turn
+
+
+class TestEffectStats(unittest.TestCase):
+
+    engine : GameEngine
+    player1 : str
+    player2 : str
+
+    def setUp(self):
+        initialize_game_to_third_turn(self)
+        effect_stats.reset()
+
+    def tearDown(self):
+        effect_stats.disable()
+        effect_stats.reset()
+
+    def test_effect_handlers(self):
+        for handler in EFFECT_HANDLERS.values():
+            self.assertTrue(callable(handler))
+        self.assertIs(EFFECT_HANDLERS[EffectType.EffectType_SwitchCenterWithBack], GameEngine.effect_switch_center_with_back)
+
+        player1 : PlayerState = self.engine.get_player(self.player1)
+        with self.assertRaises(NotImplementedError):
+            self.engine.do_effect(player1, { "effect_type": "not_an_effect", "player_id": self.player1 })
+
+    def test_stats_only_recorded_when_enabled(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+        draw_effect = { "effect_type": EffectType.EffectType_Draw, "amount": 1, "player_id": self.player1 }
+
+        self.engine.do_effect(player1, draw_effect)
+        self.assertEqual(effect_stats.get_report(), [])
+
+        effect_stats.enable()
+        hand_size = len(player1.hand)
+        self.engine.do_effect(player1, draw_effect)
+        self.engine.do_effect(player1, draw_effect)
+        self.engine.do_effect(player1, { "effect_type": EffectType.EffectType_Pass, "player_id": self.player1 })
+        self.assertEqual(len(player1.hand), hand_size + 2)
+
+        report = { entry["effect_type"]: entry for entry in effect_stats.get_report() }
+        self.assertEqual(report[EffectType.EffectType_Draw]["count"], 2)
+        self.assertEqual(report[EffectType.EffectType_Pass]["count"], 1)
+        self.assertGreater(report[EffectType.EffectType_Draw]["total_ms"], 0)
+        self.assertGreaterEqual(report[EffectType.EffectType_Draw]["max_us"], report[EffectType.EffectType_Draw]["average_us"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import unittest
+from copy import deepcopy
+from app.gameengine import GameCard, PlayerState, CARD_STATE_FIELDS
+from app.card_database import CardDatabase
+from helpers import initialize_game_to_third_turn
+
+card_db = CardDatabase()
+
+class TestGameCard(unittest.TestCase):
+
+    def test_state_fields_by_key_and_attribute(self):
+        card = GameCard(card_db.get_card_template("hSD01-003"), "player1", "player1_1")
+        self.assertEqual(card["game_card_id"], "player1_1")
+        self.assertEqual(card["owner_id"], "player1")
+        self.assertEqual(card["card_type"], "holomem_debut")
+
+        card["damage"] = 20
+        self.assertEqual(card.damage, 20)
+        card.resting = True
+        self.assertTrue(card["resting"])
+        self.assertTrue(card.get("resting"))
+        self.assertIn("damage", card)
+        self.assertIn("hp", card)
+        self.assertNotIn("bloom_level", card)
+        self.assertEqual(card.get("bloom_level", 0), 0)
+        with self.assertRaises(KeyError):
+            card["bloom_level"]
+
+    def test_as_dict(self):
+        card = GameCard(card_db.get_card_template("hSD01-003"), "player1", "player1_1")
+        cheer = card_db.get_card_by_id("hY01-001")
+        cheer["game_card_id"] = "player1_1001"
+        card.attached_cheer.append(cheer)
+        card.damage = 10
+
+        card_dict = card.as_dict()
+        self.assertIs(type(card_dict), dict)
+        self.assertEqual(card_dict["damage"], 10)
+        self.assertEqual(card_dict["card_id"], "hSD01-003")
+        self.assertEqual(card_dict["attached_cheer"], [cheer])
+
+    def test_state_in_mapping(self):
+        card = GameCard(card_db.get_card_template("hSD01-003"), "player1", "player1_1")
+        card.damage = 10
+        card.resting = True
+
+        # Every way of reading the card as a plain mapping carries the state.
+        for card_dict in [dict(card), {**card}, dict(card.items()), json.loads(json.dumps(card))]:
+            for field in CARD_STATE_FIELDS:
+                self.assertIn(field, card_dict)
+            self.assertEqual(card_dict["damage"], 10)
+            self.assertTrue(card_dict["resting"])
+            self.assertEqual(card_dict["game_card_id"], "player1_1")
+        self.assertEqual(set(card.keys()), set(card.as_dict()))
+        self.assertEqual(len(card), len(card.as_dict()))
+        self.assertEqual(json.loads(json.dumps(card)), json.loads(json.dumps(card.as_dict())))
+
+    def test_deepcopy(self):
+        card = GameCard(card_db.get_card_template("hSD01-003"), "player1", "player1_1")
+        card.damage = 30
+        card_copy = deepcopy(card)
+        self.assertIsInstance(card_copy, GameCard)
+        self.assertEqual(card_copy.damage, 30)
+        self.assertEqual(card_copy["game_card_id"], "player1_1")
+
+    def test_deck_cards_are_game_cards(self):
+        initialize_game_to_third_turn(self)
+        player1 : PlayerState = self.engine.get_player(self.player1)
+        for card in player1.deck + player1.hand + player1.center + player1.backstage:
+            self.assertIsInstance(card, GameCard)
+        for card in player1.cheer_deck:
+            self.assertNotIsInstance(card, GameCard)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import asyncio
+import random
+import unittest
+from unittest.mock import patch
+from app.gameroom import GameRoom
+from app.playermanager import Player
+from app.aiplayer import AIPlayer
+from app.gameengine import EventType
+from app.message_types import FEATURE_GAME_EVENTS
+from helpers import card_db, azki_starter, sora_starter, FakeWebSocket
+
+CLIENT_TIMEOUT = 60
+
+def received_events(messages):
+    events = []
+    for message in messages:
+        if message["message_type"] == "game_events":
+            events += message["events"]
+        elif message["message_type"] == "game_event":
+            events.append(message["event_data"])
+    return events
+
+def new_player(player_id, deck, features):
+    player = Player(player_id, FakeWebSocket())
+    player.save_deck_info(deck["oshi_id"], deck["deck"], deck["cheer_deck"])
+    player.set_features(features)
+    return player
+
+async def play_client(room : GameRoom, player : Player):
+    # Plays the player's side from what their connection received, as a client would,
+    # until the game over event arrives.
+    ai = AIPlayer(player.player_id)
+    websocket = player.websocket
+    seen = 0
+    while True:
+        while seen == len(websocket.received):
+            websocket.message_ready.clear()
+            await websocket.message_ready.wait()
+        events = received_events(websocket.received[seen:])
+        seen = len(websocket.received)
+        if any(event["event_type"] == EventType.EventType_GameOver for event in events):
+            return
+        ai_performing_action, action_info = ai.ai_process_events(events)
+        if ai_performing_action:
+            await room.handle_game_message(player.player_id, action_info["action_type"], action_info["action_data"])
+
+
+class TestGameRoom(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+        patcher = patch.dict(os.environ, {"DONT_UPLOAD_MATCHES": "true"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_events_in_order(self, room : GameRoom, player : Player):
+        events = received_events(player.websocket.received)
+        self.assertEqual(events[0]["event_type"], EventType.EventType_GameStartInfo)
+        # Every numbered event of the game reached the player, once and in order.
+        # The start info and errors are only sent to one player, they aren't numbered.
+        event_numbers = [event["event_number"] for event in events if event["event_number"] >= 0]
+        self.assertEqual(event_numbers, list(range(len(room.engine.all_events))))
+        self.assertTrue(all(event["event_player_id"] == player.player_id for event in events))
+
+    def test_concurrent_versus_rooms(self):
+        # Four rooms played at once by AI clients, half of them taking batched events.
+        async def play_rooms():
+            rooms = []
+            for room_index in range(4):
+                players = [
+                    new_player(f"room{room_index}_player1", azki_starter, [FEATURE_GAME_EVENTS]),
+                    new_player(f"room{room_index}_player2", sora_starter, []),
+                ]
+                rooms.append(GameRoom(f"room{room_index}", f"Room {room_index}", players, "versus", "queue"))
+            for room in rooms:
+                room.start(card_db)
+            clients = [play_client(room, player) for room in rooms for player in room.players]
+            await asyncio.wait_for(asyncio.gather(*clients), CLIENT_TIMEOUT)
+            return rooms
+
+        rooms = asyncio.run(play_rooms())
+        for room in rooms:
+            self.assertTrue(room.engine.is_game_over())
+            self.assertTrue(room.is_ready_for_cleanup())
+            batched_player, single_player = room.players
+            self.assertTrue(all(message["message_type"] == "game_events" for message in batched_player.websocket.received))
+            self.assertTrue(all(message["message_type"] == "game_event" for message in single_player.websocket.received))
+            for player in room.players:
+                self.assert_events_in_order(room, player)
+
+    def test_ai_room(self):
+        async def play_room():
+            player = new_player("player1", azki_starter, [])
+            room = GameRoom("room", "Room", [player], "ai", "queue")
+            room.start(card_db)
+            await asyncio.wait_for(play_client(room, player), CLIENT_TIMEOUT)
+            return room
+
+        room = asyncio.run(play_room())
+        self.assertTrue(room.engine.is_game_over())
+        self.assert_events_in_order(room, room.players[0])
+
+    def test_room_survives_errors(self):
+        async def run():
+            room = GameRoom("room", "Room", [], "versus", "queue")
+            processed = []
+            def on_processed(room):
+                processed.append(room)
+                raise Exception("on_processed failed")
+            room.on_processed = on_processed
+
+            async def handler(value):
+                if value is None:
+                    raise Exception("handler failed")
+                return value
+
+            with self.assertLogs("app.gameroom", level="ERROR"):
+                failed = await asyncio.wait_for(room.post(handler, None), CLIENT_TIMEOUT)
+                room_task = room.room_task
+                result = await asyncio.wait_for(room.post(handler, 2), CLIENT_TIMEOUT)
+            # The same task is still running the room.
+            self.assertIs(room.room_task, room_task)
+            self.assertFalse(room_task.done())
+            room.close()
+            closed_result = await room.post(handler, 3)
+            await room_task
+            return failed, result, closed_result, processed
+
+        failed, result, closed_result, processed = asyncio.run(run())
+        self.assertIsNone(failed)
+        self.assertEqual(result, 2)
+        self.assertIsNone(closed_result)
+        self.assertEqual(len(processed), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import random
+from copy import deepcopy
+from itertools import islice
+import unittest
+from app.gameengine import GameEngine, PlayerState, GameAction, Continuation
+from app.gamesnapshot import SnapshotError, SNAPSHOT_VERSION
+from app.card_database import CardDatabase
+from app.aiplayer import play_ai_actions
+from helpers import card_db, initialize_game_to_third_turn, add_card_to_hand, start_ai_game
+
+def play_ai_rounds(engine, ais, round_count):
+    # Returns every event broadcast while the AIs play.
+    event_count = len(engine.all_events)
+    for _ in islice(play_ai_actions(engine, ais), round_count):
+        pass
+    return engine.all_events[event_count:]
+
+def without_clocks(events):
+    return [{key: value for key, value in event.items() if not key.endswith("_clock_used")} for event in events]
+
+class TestGameSnapshot(unittest.TestCase):
+
+    engine : GameEngine
+    player1 : str
+    player2 : str
+
+    def setUp(self):
+        initialize_game_to_third_turn(self)
+
+    def test_restore(self):
+        engine = self.engine
+        player1 : PlayerState = engine.get_player(self.player1)
+        card = add_card_to_hand(self, player1, "hSD01-006")
+
+        restored = GameEngine.restore(engine.card_db, engine.snapshot())
+        restored_player1 : PlayerState = restored.get_player(self.player1)
+        self.assertIs(restored.card_db, engine.card_db)
+        self.assertIs(restored_player1.engine, restored)
+        self.assertEqual(restored.all_events, engine.all_events)
+        self.assertEqual(restored.current_decision["decision_type"], engine.current_decision["decision_type"])
+        self.assertEqual(restored.seed, engine.seed)
+
+        restored_card = restored_player1.hand[-1]
+        self.assertIsNot(restored_card, card)
+        self.assertEqual(restored_card.as_dict(), card.as_dict())
+        self.assertIs(restored_player1.find_card(card["game_card_id"])[0], restored_card)
+        restored_player1.verify_card_index()
+
+        # The card text is still shared with the card definitions.
+        template = engine.card_db.get_card_template("hSD01-006")
+        self.assertIs(restored_card["arts"][0], template["arts"][0])
+
+    def test_fork_is_independent(self):
+        engine = self.engine
+        player1 : PlayerState = engine.get_player(self.player1)
+        hand_ids = [card["game_card_id"] for card in player1.hand]
+        forked = engine.fork()
+
+        forked.handle_game_message(self.player1, GameAction.MainStepEndTurn, {})
+        self.assertNotEqual(forked.active_player_id, engine.active_player_id)
+        self.assertEqual([card["game_card_id"] for card in player1.hand], hand_ids)
+
+        # The original still plays on.
+        engine.grab_events()
+        engine.handle_game_message(self.player1, GameAction.MainStepEndTurn, {})
+        self.assertEqual(engine.active_player_id, forked.active_player_id)
+        self.assertEqual(without_clocks(engine.all_events), without_clocks(forked.all_events))
+
+    def test_nested_resolution_continuation(self):
+        engine = self.engine
+        choice_effect = {
+            "player_id": self.player1,
+            "effect_type": "choice",
+            "choice": [{ "effect_type": "pass" }, { "effect_type": "pass" }],
+        }
+        engine.clear_decision()
+        engine.begin_resolving_effects([choice_effect], engine.blank_continuation)
+        outer_state = engine.effect_resolution_state
+        engine.begin_resolving_effects([choice_effect], engine.continue_resolving_effects)
+
+        # Going back to the outer resolution is a record, not a closure.
+        continuation = engine.effect_resolution_state.effect_resolution_continuation
+        self.assertIsInstance(continuation, Continuation)
+        self.assertEqual(continuation.step, "resume_effect_resolution")
+        self.assertEqual(continuation.args, (outer_state, engine.continue_resolving_effects))
+
+        resumed_states = []
+        Continuation(engine, "resume_effect_resolution", outer_state, lambda: resumed_states.append(engine.effect_resolution_state))()
+        self.assertEqual(resumed_states, [outer_state])
+
+    def test_rejects_other_versions(self):
+        engine = self.engine
+        snapshot = engine.snapshot()
+        restored = GameEngine.restore(engine.card_db, snapshot)
+        self.assertEqual(restored.seed, engine.seed)
+
+        other_db = CardDatabase()
+        other_db.definitions_hash = "different"
+        with self.assertRaises(SnapshotError):
+            GameEngine.restore(other_db, snapshot)
+
+        import app.gamesnapshot as gamesnapshot
+        gamesnapshot.SNAPSHOT_VERSION = SNAPSHOT_VERSION + 1
+        try:
+            with self.assertRaises(SnapshotError):
+                GameEngine.restore(engine.card_db, snapshot)
+        finally:
+            gamesnapshot.SNAPSHOT_VERSION = SNAPSHOT_VERSION
+
+    def test_forks_play_out_the_same_in_ai_game(self):
+        engine, ais = start_ai_game(0)
+        engine.begin_game()
+
+        # Snapshots are taken in the middle of decisions and effects, so
+        # this covers restoring pending continuations.
+        while not engine.is_game_over():
+            forked = engine.fork()
+            forked_ais = deepcopy(ais)
+            ai_random_state = random.getstate()
+            message_count = len(engine.all_game_messages)
+            events = play_ai_rounds(engine, ais, 5)
+            random.setstate(ai_random_state)
+            forked_events = play_ai_rounds(forked, forked_ais, 5)
+            self.assertGreater(len(engine.all_game_messages), message_count)
+            self.assertEqual(without_clocks(forked_events), without_clocks(events))
+            self.assertEqual(forked.all_game_messages, engine.all_game_messages)
+
+            # Once restored, saving again gives the same bytes.
+            snapshot = GameEngine.restore(card_db, forked.snapshot()).snapshot()
+            self.assertEqual(GameEngine.restore(card_db, snapshot).snapshot(), snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
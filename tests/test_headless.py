@@ -0,0 +1,39 @@
+import unittest
+from app.gameengine import GameEngine, GamePhase
+from helpers import card_db, play_ai_game, game_state
+
+
+class TestHeadless(unittest.TestCase):
+
+    def test_same_game_as_normal_engine(self):
+        for seed in range(5):
+            engine = play_ai_game(seed)
+            self.assertEqual(engine.phase, GamePhase.GameOver)
+
+            headless_engine = GameEngine(card_db, "versus", engine.match_player_info, headless=True)
+            headless_engine.seed = seed
+            headless_engine.begin_game()
+            for message in engine.all_game_messages:
+                self.assertTrue(headless_engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"]))
+            self.assertEqual(game_state(headless_engine), game_state(engine))
+            for headless_message, message in zip(headless_engine.all_game_messages, engine.all_game_messages):
+                self.assertEqual(headless_message["last_event_number"], -1)
+                self.assertEqual(headless_message["action_data"], message["action_data"])
+
+            # Nothing was kept for anyone to see and the clocks never ran.
+            self.assertEqual(headless_engine.all_events, [])
+            self.assertEqual(headless_engine.grab_events(), [])
+            self.assertEqual(headless_engine.grab_observer_events(), [])
+            for player in headless_engine.player_states:
+                self.assertEqual(player.clock_time_used, 0)
+
+    def test_invalid_action_reported(self):
+        players = play_ai_game(0).match_player_info
+        engine = GameEngine(card_db, "versus", players, headless=True)
+        engine.begin_game()
+        self.assertFalse(engine.handle_game_message("player1", "not_an_action", {}))
+        self.assertEqual(engine.grab_events(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
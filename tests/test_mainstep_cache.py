@@ -0,0 +1,90 @@
+import unittest
+from app.gameengine import GameEngine, PlayerState, GameAction
+from app.gameengine import GamePhase
+from helpers import initialize_game_to_third_turn, add_card_to_hand, play_ai_game
+
+def action_types(actions):
+    return [action["action_type"] for action in actions]
+
+class TestMainStepCache(unittest.TestCase):
+
+    engine : GameEngine
+    player1 : str
+    player2 : str
+
+    def setUp(self):
+        initialize_game_to_third_turn(self)
+        self.engine.debug_mainstep_cache = True
+
+    def test_unchanged_sections_reused(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        actions = self.engine.get_available_mainstep_actions()
+        cache = self.engine.mainstep_action_cache[self.player1]
+        section_actions = {section: cached[2] for section, cached in cache.items()}
+
+        self.assertEqual(self.engine.get_available_mainstep_actions(), actions)
+        for section, cached in cache.items():
+            self.assertIs(cached[2], section_actions[section])
+        self.assertEqual(actions, self.engine.build_mainstep_actions(player1))
+
+    def test_hand_change_rebuilds(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        self.engine.get_available_mainstep_actions()
+        bloom_actions = self.engine.mainstep_action_cache[self.player1]["bloom"][2]
+        oshi_actions = self.engine.mainstep_action_cache[self.player1]["oshi_skill"][2]
+
+        card = add_card_to_hand(self, player1, "hSD01-006", reset_main=False)
+        actions = self.engine.get_available_mainstep_actions()
+        cache = self.engine.mainstep_action_cache[self.player1]
+        self.assertIsNot(cache["bloom"][2], bloom_actions)
+        self.assertIs(cache["oshi_skill"][2], oshi_actions)
+        self.assertIn(card["game_card_id"], [action["card_id"] for action in actions if action["action_type"] == GameAction.MainStepBloom])
+
+    def test_holopower_change_rebuilds(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        self.engine.get_available_mainstep_actions()
+        oshi_actions = self.engine.mainstep_action_cache[self.player1]["oshi_skill"][2]
+
+        player1.generate_holopower(3)
+        self.engine.get_available_mainstep_actions()
+        self.assertIsNot(self.engine.mainstep_action_cache[self.player1]["oshi_skill"][2], oshi_actions)
+
+    def test_turn_flag_change_rebuilds(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+
+        actions = self.engine.get_available_mainstep_actions()
+        self.assertIn(GameAction.MainStepCollab, action_types(actions))
+
+        player1.collabed_this_turn = True
+        actions = self.engine.get_available_mainstep_actions()
+        self.assertNotIn(GameAction.MainStepCollab, action_types(actions))
+
+    def test_turn_list_change_rebuilds(self):
+        player1 : PlayerState = self.engine.get_player(self.player1)
+        skill = [action for action in player1.oshi_card["actions"] if action["limit"] == "once_per_game"][0]
+        player1.generate_holopower(skill["cost"])
+
+        actions = self.engine.get_available_mainstep_actions()
+        self.assertIn(skill["skill_id"], [action["skill_id"] for action in actions if action["action_type"] == GameAction.MainStepOshiSkill])
+
+        # Lists on the player are tracked when modified in place too.
+        player1.effects_used_this_game.append(skill["skill_id"])
+        actions = self.engine.get_available_mainstep_actions()
+        self.assertNotIn(skill["skill_id"], [action["skill_id"] for action in actions if action["action_type"] == GameAction.MainStepOshiSkill])
+
+    def test_cache_matches_rebuild_in_ai_game(self):
+        def enable_debug(engine : GameEngine):
+            engine.debug_mainstep_cache = True
+
+        def check_handled(engine : GameEngine, handled):
+            self.assertTrue(handled)
+
+        engine = play_ai_game(0, setup=enable_debug, on_action=check_handled)
+        self.assertEqual(engine.phase, GamePhase.GameOver)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from app.gameengine import GameEngine, message_latency_stats
+from app.matchreplay import MatchReplay, ReplayError
+from helpers import card_db, play_ai_game, game_state
+
+
+def without_clocks(events):
+    return [{key: value for key, value in event.items() if not key.endswith("_clock_used")} for event in events]
+
+
+class TestMatchReplay(unittest.TestCase):
+
+    def setUp(self):
+        # The game is played again alongside the replay to compare with.
+        self.match_data = play_ai_game(1).get_match_log()
+        self.replay = MatchReplay(card_db, self.match_data, checkpoint_interval=10)
+
+    def play_until(self, stop):
+        engine = GameEngine(card_db, self.match_data["game_type"], self.match_data["player_info"])
+        engine.seed = self.match_data["seed"]
+        engine.begin_game()
+        for message in self.match_data["all_game_messages"]:
+            if stop(engine):
+                break
+            engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"])
+        return engine
+
+    def test_seek_turn(self):
+        turn_count = self.replay.get_turn_count()
+        self.assertGreater(turn_count, 3)
+        for turn_number in range(1, turn_count + 1):
+            engine = self.replay.seek_turn(turn_number)
+            expected = self.play_until(lambda engine: engine.turn_number == turn_number)
+            self.assertEqual(engine.turn_number, turn_number)
+            self.assertEqual(game_state(engine), game_state(expected))
+
+        with self.assertRaises(ValueError):
+            self.replay.seek_turn(turn_count + 1)
+
+    def test_seek_event(self):
+        all_events = self.match_data["all_events"]
+        for event_number in range(0, len(all_events), 37):
+            engine = self.replay.seek_event(event_number)
+            expected = self.play_until(lambda engine: len(engine.all_events) > event_number)
+            self.assertEqual(game_state(engine), game_state(expected))
+
+        engine = self.replay.seek_event(len(all_events) - 1)
+        self.assertTrue(engine.is_game_over())
+        self.assertEqual(engine.get_player(engine.game_over_event["winner_id"]).username, self.match_data["winner"])
+
+    def test_seeks_are_independent(self):
+        engine = self.replay.seek_message(15)
+        engine.handle_game_message(engine.current_decision["decision_player"], "resign", {})
+        self.assertTrue(engine.is_game_over())
+        self.assertFalse(self.replay.seek_message(15).is_game_over())
+
+    def test_headless_seek(self):
+        engine = self.replay.seek_turn(3)
+        self.assertTrue(engine.headless)
+        self.assertEqual(engine.all_events, [])
+        self.assertEqual(engine.get_observer_catchup_event_count(), 1)
+
+    def test_seek_with_events(self):
+        replay = MatchReplay(card_db, self.match_data, checkpoint_interval=10, headless=False)
+        engine = replay.seek_turn(3)
+        expected = self.play_until(lambda engine: engine.turn_number == 3)
+        self.assertFalse(engine.headless)
+        self.assertEqual(game_state(engine), game_state(expected))
+        self.assertEqual(without_clocks(engine.all_events), without_clocks(expected.all_events))
+
+        # A spectator joining now catches up from the start of the match.
+        catchup_events = engine.get_observer_catchup_events()
+        self.assertEqual(len(catchup_events), len(expected.all_events) + 1)
+        self.assertEqual(without_clocks(catchup_events), without_clocks(expected.get_observer_catchup_events()))
+
+        # And the game goes on sending events numbered after the ones so far.
+        engine.grab_events()
+        engine.grab_observer_events()
+        message = self.match_data["all_game_messages"][replay.turn_starts[3]]
+        self.assertTrue(engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"]))
+        new_events = engine.grab_observer_events()
+        self.assertGreater(len(new_events), 0)
+        self.assertEqual(new_events[0]["event_number"], len(expected.all_events))
+
+    def test_replayed_messages_not_in_latency_stats(self):
+        message_latency_stats.reset()
+        replay = MatchReplay(card_db, self.match_data, checkpoint_interval=10, headless=False)
+        engine = replay.seek_message(25)
+        self.assertEqual(message_latency_stats.get_report(), [])
+
+        # Messages sent to the game after seeking are.
+        engine.handle_game_message(engine.current_decision["decision_player"], "resign", {})
+        self.assertEqual(len(message_latency_stats.get_report()), 1)
+        message_latency_stats.reset()
+
+    def test_mismatched_log(self):
+        self.match_data["winner"] = "Someone Else"
+        with self.assertRaises(ReplayError):
+            MatchReplay(card_db, self.match_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
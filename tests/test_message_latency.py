@@ -0,0 +1,82 @@
+import unittest
+from app.gameengine import GameEngine, GameAction, GamePhase, message_latency_stats, MESSAGE_LATENCY_BUCKETS_MS, INVALID_ACTION_TYPE
+from helpers import card_db, initialize_game_to_third_turn, play_ai_game
+
+
+class TestMessageLatency(unittest.TestCase):
+
+    engine : GameEngine
+    player1 : str
+    player2 : str
+
+    def setUp(self):
+        initialize_game_to_third_turn(self)
+        message_latency_stats.reset()
+        self.slow_message_ms = message_latency_stats.slow_message_ms
+
+    def tearDown(self):
+        message_latency_stats.slow_message_ms = self.slow_message_ms
+        message_latency_stats.reset()
+
+    def test_messages_recorded_by_action_and_phase(self):
+        engine = self.engine
+        engine.handle_game_message(self.player1, GameAction.MainStepEndTurn, {})
+        engine.handle_game_message(self.player1, "not_an_action", {})
+
+        report = { (entry["action_type"], entry["phase"]): entry for entry in message_latency_stats.get_report() }
+        self.assertEqual(set(report), {
+            (GameAction.MainStepEndTurn, GamePhase.PlayerTurn),
+            (INVALID_ACTION_TYPE, GamePhase.PlayerTurn),
+        })
+        end_turn = report[(GameAction.MainStepEndTurn, GamePhase.PlayerTurn)]
+        self.assertEqual(end_turn["count"], 1)
+        self.assertEqual(len(end_turn["buckets"]), len(MESSAGE_LATENCY_BUCKETS_MS) + 1)
+        self.assertIsNone(end_turn["buckets"][-1]["max_ms"])
+        self.assertEqual(sum(bucket["count"] for bucket in end_turn["buckets"]), 1)
+        self.assertGreater(end_turn["total_ms"], 0)
+        self.assertEqual(end_turn["max_ms"], end_turn["average_ms"])
+
+    def test_unknown_action_types_share_an_entry(self):
+        engine = self.engine
+        for action_type in ["not_an_action", "another_one", "x" * 1000, ["a", "list"], None]:
+            engine.handle_game_message(self.player1, action_type, {})
+        report = message_latency_stats.get_report()
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report[0]["action_type"], INVALID_ACTION_TYPE)
+        self.assertEqual(report[0]["count"], 5)
+
+    def test_bucket_bounds(self):
+        message_latency_stats.record(GameAction.Mulligan, "phase", 0.0005)
+        message_latency_stats.record(GameAction.Mulligan, "phase", 0.001)
+        message_latency_stats.record(GameAction.Mulligan, "phase", 0.003)
+        message_latency_stats.record(GameAction.Mulligan, "phase", 5)
+        report = message_latency_stats.get_report()[0]
+        counts = [bucket["count"] for bucket in report["buckets"]]
+        self.assertEqual(counts, [2, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(report["max_ms"], 5000)
+
+    def test_slow_message_logged(self):
+        engine = self.engine
+        engine.room_id = "room1"
+        message_latency_stats.slow_message_ms = 0
+        with self.assertLogs("app.gameengine", level="WARNING") as logs:
+            engine.handle_game_message(self.player1, GameAction.MainStepEndTurn, {})
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("Room room1", logs.output[0])
+        self.assertIn(f"Action {GameAction.MainStepEndTurn}", logs.output[0])
+        self.assertIn(f"Message {len(engine.all_game_messages) - 1}", logs.output[0])
+
+    def test_headless_not_recorded(self):
+        match_data = play_ai_game(0).get_match_log()
+        message_latency_stats.reset()
+        engine = GameEngine(card_db, match_data["game_type"], match_data["player_info"], headless=True)
+        engine.seed = match_data["seed"]
+        engine.begin_game()
+        for message in match_data["all_game_messages"]:
+            engine.handle_game_message(message["player_id"], message["action_type"], message["action_data"])
+        self.assertTrue(engine.is_game_over())
+        self.assertEqual(message_latency_stats.get_report(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,359 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from app.playermanager import Player, PlayerManager, encode_message, send_game_events_to_all
+from app.message_types import FEATURE_GAME_EVENTS, FEATURE_SERVER_INFO_DIFFS, LobbySubscribeMessage
+from helpers import FakeWebSocket
+
+async def drain(player : Player):
+    # Until the player's writer has sent everything queued.
+    while player.connected and (player.outbound or player.lobby_outbound or player.queued_server_info is not None):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+class FailingWebSocket(FakeWebSocket):
+    async def send_text(self, message):
+        raise ConnectionError("connection lost")
+
+    async def close(self):
+        raise ConnectionError("connection lost")
+
+
+class TestPlayerSends(unittest.IsolatedAsyncioTestCase):
+
+    async def test_messages_sent_in_order(self):
+        player = Player("player1", FakeWebSocket())
+        for index in range(5):
+            player.send({"message_type": "test", "index": index})
+        await drain(player)
+        self.assertEqual([message["index"] for message in player.websocket.received], list(range(5)))
+
+    async def test_latest_server_info_sent_first(self):
+        player = Player("player1", FakeWebSocket())
+        player.send({"message_type": "test"})
+        player.send_server_info(encode_message({"message_type": "server_info", "version": 1}))
+        player.send_server_info(encode_message({"message_type": "server_info", "version": 2}))
+        await drain(player)
+        self.assertEqual(player.websocket.received, [
+            {"message_type": "server_info", "version": 2},
+            {"message_type": "test"},
+        ])
+
+    async def test_overflow_disconnects(self):
+        player = Player("player1", FakeWebSocket())
+        with patch("app.playermanager.OUTBOUND_QUEUE_SIZE", 3):
+            for index in range(3):
+                player.send({"message_type": "test", "index": index})
+            self.assertTrue(player.connected)
+            with self.assertLogs("app.playermanager", level="WARNING"):
+                player.send({"message_type": "test", "index": 3})
+        self.assertFalse(player.connected)
+        self.assertEqual(len(player.outbound), 0)
+        await player.close_task
+        self.assertTrue(player.websocket.closed)
+        # Nothing queued was sent, and nothing is sent after.
+        player.send({"message_type": "test"})
+        await drain(player)
+        self.assertEqual(player.websocket.received, [])
+
+    async def test_failed_send_disconnects(self):
+        player = Player("player1", FailingWebSocket())
+        player.send({"message_type": "test"})
+        player.send({"message_type": "test"})
+        await drain(player)
+        self.assertFalse(player.connected)
+        self.assertEqual(len(player.outbound), 0)
+        await player.writer_task
+
+    async def test_failed_close_logged(self):
+        player = Player("player1", FailingWebSocket())
+        with patch("app.playermanager.OUTBOUND_QUEUE_SIZE", 0), self.assertLogs("app.playermanager", level="INFO") as logs:
+            player.send({"message_type": "test"})
+            await player.close_task
+        self.assertFalse(player.connected)
+        self.assertIn("Close failed", logs.output[-1])
+
+
+class TestGameEventFeature(unittest.IsolatedAsyncioTestCase):
+
+    events = [{"event_type": "first"}, {"event_type": "second"}]
+
+    async def test_batched_with_feature(self):
+        player = Player("player1", FakeWebSocket())
+        player.set_features([FEATURE_GAME_EVENTS])
+        player.send_game_events(self.events)
+        await drain(player)
+        self.assertEqual(player.websocket.received, [{"message_type": "game_events", "events": self.events}])
+
+    async def test_one_message_per_event_without_feature(self):
+        player = Player("player1", FakeWebSocket())
+        player.send_game_events(self.events)
+        player.send_game_events([])
+        await drain(player)
+        self.assertEqual(player.websocket.received, [
+            {"message_type": "game_event", "event_data": self.events[0]},
+            {"message_type": "game_event", "event_data": self.events[1]},
+        ])
+
+    async def test_set_features_ignores_invalid(self):
+        player = Player("player1", FakeWebSocket())
+        player.set_features(FEATURE_GAME_EVENTS)
+        self.assertEqual(player.features, set())
+        player.set_features([FEATURE_GAME_EVENTS, 3, None])
+        self.assertEqual(player.features, {FEATURE_GAME_EVENTS})
+
+    async def test_send_to_all_encodes_once(self):
+        batched = [Player(f"batched{index}", FakeWebSocket()) for index in range(2)]
+        single = [Player(f"single{index}", FakeWebSocket()) for index in range(2)]
+        disconnected = Player("disconnected", FakeWebSocket())
+        disconnected.set_features([FEATURE_GAME_EVENTS])
+        disconnected.disconnect()
+        for player in batched:
+            player.set_features([FEATURE_GAME_EVENTS])
+        with patch("app.playermanager.encode_message", wraps=encode_message) as encode:
+            send_game_events_to_all(batched + single + [disconnected], self.events)
+        # The batch and each event once, shared by everyone getting that form.
+        self.assertEqual(encode.call_count, 1 + len(self.events))
+        self.assertIs(batched[0].outbound[0], batched[1].outbound[0])
+        self.assertEqual(list(map(id, single[0].outbound)), list(map(id, single[1].outbound)))
+        for player in batched + single:
+            await drain(player)
+        for player in batched:
+            self.assertEqual(player.websocket.received, [{"message_type": "game_events", "events": self.events}])
+        for player in single:
+            self.assertEqual([message["event_data"] for message in player.websocket.received], self.events)
+        self.assertEqual(disconnected.websocket.received, [])
+
+
+async def take_received(player : Player):
+    await drain(player)
+    received = player.websocket.received
+    player.websocket.received = []
+    return received
+
+
+class TestServerInfo(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.manager = PlayerManager()
+        self.queue_info = {"queue": 0}
+
+    def add_player(self, player_id, features):
+        player = self.manager.add_player(player_id, FakeWebSocket())
+        player.set_features(features)
+        return player
+
+    def broadcast(self, queue_count=None):
+        if queue_count is not None:
+            self.queue_info = {"queue": queue_count}
+        self.manager.broadcast_server_info(self.queue_info, [])
+
+    def assert_full_server_info(self, player, message):
+        self.assertEqual(message["message_type"], "server_info")
+        self.assertEqual(message["version"], self.manager.lobby_version)
+        self.assertEqual(message["players_info"], list(self.manager.lobby_players.values()))
+        self.assertEqual(message["queue_info"], self.queue_info)
+        self.assertEqual(message["your_id"], player.player_id)
+        self.assertEqual(message["your_username"], player.get_username())
+
+    async def test_diffs_after_full_server_info(self):
+        with_diffs = self.add_player("player1", [FEATURE_SERVER_INFO_DIFFS])
+        without_diffs = self.add_player("player2", [])
+        self.broadcast()
+        for player in [with_diffs, without_diffs]:
+            received = await take_received(player)
+            self.assertEqual(len(received), 1)
+            self.assert_full_server_info(player, received[0])
+
+        joined = self.add_player("player3", [FEATURE_SERVER_INFO_DIFFS])
+        self.broadcast(queue_count=1)
+        received = await take_received(with_diffs)
+        self.assertEqual(received, [{
+            "message_type": "server_info_diff",
+            "version": 2,
+            "base_version": 1,
+            "players_added": [joined.get_public_player_info()],
+            "players_changed": [],
+            "players_removed": [],
+            "rooms_added": [],
+            "rooms_changed": [],
+            "rooms_removed": [],
+            "queue_info": {"queue": 1},
+        }])
+        for player in [without_diffs, joined]:
+            received = await take_received(player)
+            self.assertEqual(len(received), 1)
+            self.assert_full_server_info(player, received[0])
+
+        self.manager.remove_player("player3")
+        self.broadcast()
+        received = await take_received(with_diffs)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["base_version"], 2)
+        self.assertEqual(received[0]["players_removed"], ["player3"])
+        self.assertIsNone(received[0]["queue_info"])
+        received = await take_received(without_diffs)
+        self.assertEqual(len(received), 1)
+        self.assert_full_server_info(without_diffs, received[0])
+
+        # Nothing changed, nothing sent.
+        self.broadcast()
+        self.assertEqual(await take_received(with_diffs), [])
+        self.assertEqual(await take_received(without_diffs), [])
+
+    async def test_resync_sends_full_server_info(self):
+        player = self.add_player("player1", [FEATURE_SERVER_INFO_DIFFS])
+        self.broadcast()
+        self.broadcast(queue_count=1)
+        await take_received(player)
+        # As the server does for server_info_resync.
+        player.server_info_version = None
+        self.broadcast()
+        received = await take_received(player)
+        self.assertEqual(len(received), 1)
+        self.assert_full_server_info(player, received[0])
+
+    async def test_lobby_overflow_resyncs_without_disconnecting(self):
+        player = self.add_player("player1", [FEATURE_SERVER_INFO_DIFFS])
+        with patch("app.playermanager.OUTBOUND_QUEUE_SIZE", 3), patch("app.playermanager.LOBBY_QUEUE_SIZE", 2):
+            player.send({"message_type": "test", "index": 0})
+            player.send({"message_type": "test", "index": 1})
+            # Nothing is sent until the writer runs, the player falls behind.
+            # Versions 2 and 3 are queued as diffs, 4 doesn't fit.
+            for queue_count in range(4):
+                self.broadcast(queue_count=queue_count)
+            self.assertTrue(player.connected)
+            self.assertEqual(len(player.lobby_outbound), 0)
+            self.broadcast(queue_count=4)
+            received = await take_received(player)
+        self.assertTrue(player.connected)
+        self.assertFalse(player.websocket.closed)
+        # The whole lobby once in place of the diffs that didn't fit, then the diffs after it.
+        self.assertEqual(received[0]["message_type"], "server_info")
+        self.assertEqual(received[0]["version"], 4)
+        self.assertEqual(received[0]["queue_info"], {"queue": 3})
+        self.assertEqual(received[1]["message_type"], "server_info_diff")
+        self.assertEqual((received[1]["base_version"], received[1]["version"]), (4, 5))
+        self.assertEqual(received[2:], [{"message_type": "test", "index": 0}, {"message_type": "test", "index": 1}])
+
+        self.broadcast(queue_count=10)
+        received = await take_received(player)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["message_type"], "server_info_diff")
+        self.assertEqual(received[0]["base_version"], self.manager.lobby_version - 1)
+
+
+class TestLobbyView(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.manager = PlayerManager()
+        self.queue_info = {"queue": 0}
+        for index in range(5):
+            self.manager.add_player(f"player{index}", FakeWebSocket())
+        self.subscriber = self.manager.add_player("subscriber", FakeWebSocket())
+
+    def subscribe(self, **subscription):
+        self.assertTrue(self.subscriber.set_lobby_subscription(LobbySubscribeMessage(message_type="lobby_subscribe", **subscription)))
+
+    def broadcast(self, queue_count=None):
+        if queue_count is not None:
+            self.queue_info = {"queue": queue_count}
+        self.manager.broadcast_server_info(self.queue_info, [])
+
+    async def take_page(self):
+        received = await take_received(self.subscriber)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["message_type"], "lobby_view")
+        page = received[0]["players_page"]
+        return [player_info["player_id"] for player_info in page["players_info"]], page
+
+    async def test_cursor_stable_when_earlier_player_leaves(self):
+        self.subscribe(players=True, players_page_size=2)
+        self.broadcast()
+        player_ids, page = await self.take_page()
+        self.assertEqual(player_ids, ["player0", "player1"])
+        self.assertEqual(page["players_count"], 6)
+
+        self.subscribe(players=True, players_cursor=page["next_cursor"], players_page_size=2)
+        self.broadcast()
+        player_ids, page = await self.take_page()
+        self.assertEqual(player_ids, ["player2", "player3"])
+
+        # Leaving before the cursor doesn't move the page.
+        self.manager.remove_player("player0")
+        self.manager.remove_player("player1")
+        self.broadcast()
+        player_ids, page = await self.take_page()
+        self.assertEqual(player_ids, ["player2", "player3"])
+        self.assertEqual(page["players_count"], 4)
+
+    async def test_last_page(self):
+        self.subscribe(players=True, players_page_size=4)
+        self.broadcast()
+        _, page = await self.take_page()
+        self.subscribe(players=True, players_cursor=page["next_cursor"], players_page_size=4)
+        self.broadcast()
+        player_ids, page = await self.take_page()
+        self.assertEqual(player_ids, ["player4", "subscriber"])
+        self.assertIsNone(page["next_cursor"])
+
+        # Exactly filling the last page.
+        self.subscribe(players=True, players_page_size=6)
+        self.broadcast()
+        player_ids, page = await self.take_page()
+        self.assertEqual(len(player_ids), 6)
+        self.assertIsNone(page["next_cursor"])
+
+    async def test_unchanged_view_not_resent(self):
+        self.subscribe(queues=True, players=True, players_page_size=2)
+        self.broadcast()
+        received = await take_received(self.subscriber)
+        self.assertEqual(received[0]["queue_info"], {"queue": 0})
+
+        self.broadcast()
+        self.assertEqual(await take_received(self.subscriber), [])
+
+        # A player joining after the page only changes the count.
+        self.manager.add_player("player5", FakeWebSocket())
+        self.broadcast()
+        received = await take_received(self.subscriber)
+        self.assertEqual(len(received), 1)
+        self.assertNotIn("queue_info", received[0])
+        self.assertEqual(received[0]["players_page"]["players_count"], 7)
+
+        # Only the queues changed.
+        self.broadcast(queue_count=1)
+        received = await take_received(self.subscriber)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["queue_info"], {"queue": 1})
+        self.assertNotIn("players_page", received[0])
+
+        # Not subscribed to rooms or queues, nothing to send.
+        self.subscribe(players=True, players_page_size=2)
+        self.broadcast()
+        await take_received(self.subscriber)
+        self.broadcast(queue_count=2)
+        self.assertEqual(await take_received(self.subscriber), [])
+
+    async def test_lobby_overflow_sends_every_view_once(self):
+        self.subscribe(rooms=True, queues=True)
+        with patch("app.playermanager.OUTBOUND_QUEUE_SIZE", 1), patch("app.playermanager.LOBBY_QUEUE_SIZE", 2):
+            self.subscriber.send({"message_type": "test"})
+            for queue_count in range(3):
+                self.broadcast(queue_count=queue_count)
+            received = await take_received(self.subscriber)
+        self.assertTrue(self.subscriber.connected)
+        self.assertEqual(received, [
+            {
+                "message_type": "lobby_view",
+                "your_id": "subscriber",
+                "your_username": self.subscriber.get_username(),
+                "room_info": [],
+                "queue_info": {"queue": 2},
+            },
+            {"message_type": "test"},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()